@@ -37,8 +37,75 @@ class Config:
     DB_USER: str = os.getenv("DB_USER", "postgres")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "")
     
+    # Пул подключений
+    DB_POOL_MIN_SIZE: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    # Сколько секунд ждать свободное подключение
+    DB_ACQUIRE_TIMEOUT: float = float(os.getenv("DB_ACQUIRE_TIMEOUT", "5"))
+    # Сколько задач может одновременно ждать подключение; остальные отклоняются
+    DB_MAX_WAITERS: int = int(os.getenv("DB_MAX_WAITERS", "50"))
+    
+    # Отслеживание утечек подключений: off, basic (место получения) или stack (полный стек)
+    DB_LEAK_TRACKING: str = os.getenv("DB_LEAK_TRACKING", "basic")
+    # Сколько секунд подключение может удерживаться без предупреждения
+    DB_LEAK_THRESHOLD_SECONDS: float = float(os.getenv("DB_LEAK_THRESHOLD_SECONDS", "30"))
+    # Как часто проверять утечки (секунды)
+    DB_LEAK_CHECK_INTERVAL: float = float(os.getenv("DB_LEAK_CHECK_INTERVAL", "15"))
+    
+    # Лимиты времени выполнения запросов (секунды): чтение, запись, обслуживание
+    DB_READ_TIMEOUT: float = float(os.getenv("DB_READ_TIMEOUT", "5"))
+    DB_WRITE_TIMEOUT: float = float(os.getenv("DB_WRITE_TIMEOUT", "10"))
+    DB_MAINTENANCE_TIMEOUT: float = float(os.getenv("DB_MAINTENANCE_TIMEOUT", "600"))
+    # Сколько секунд ждать возврата подключений при закрытии пула
+    DB_CLOSE_TIMEOUT: float = float(os.getenv("DB_CLOSE_TIMEOUT", "5"))
+    
+    # Повтор транзакций при конфликте сериализации, взаимоблокировке или потере подключения
+    DB_TX_MAX_RETRIES: int = int(os.getenv("DB_TX_MAX_RETRIES", "3"))
+    # Задержка перед повтором (секунды): растёт экспоненциально от базовой до максимальной
+    DB_TX_RETRY_BASE_DELAY: float = float(os.getenv("DB_TX_RETRY_BASE_DELAY", "0.05"))
+    DB_TX_RETRY_MAX_DELAY: float = float(os.getenv("DB_TX_RETRY_MAX_DELAY", "1"))
+    # Бюджет повторов: сколько повторов «зарабатывает» одна успешная транзакция и предел запаса
+    DB_TX_RETRY_BUDGET_RATIO: float = float(os.getenv("DB_TX_RETRY_BUDGET_RATIO", "0.1"))
+    DB_TX_RETRY_BUDGET_MAX: float = float(os.getenv("DB_TX_RETRY_BUDGET_MAX", "20"))
+    
+    # Реплики только для чтения: список host[:port] через запятую
+    DB_REPLICA_HOSTS: list = [
+        host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()
+    ]
+    # Сколько секунд после записи чтения пользователя идут на primary (read-your-writes)
+    DB_REPLICA_STICKY_SECONDS: float = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+    
+    # Пакетная загрузка записей по ID: окно сбора (миллисекунды) и максимальный размер пакета
+    DB_BATCH_WINDOW_MS: float = float(os.getenv("DB_BATCH_WINDOW_MS", "2"))
+    DB_BATCH_MAX_SIZE: int = int(os.getenv("DB_BATCH_MAX_SIZE", "100"))
+    
+    # Количество одновременно обрабатываемых updates
+    MAX_CONCURRENT_UPDATES: int = int(os.getenv("MAX_CONCURRENT_UPDATES", "1"))
+    # Сколько секунд может обрабатываться один update; затем обработка отменяется
+    UPDATE_DEADLINE_SECONDS: float = float(os.getenv("UPDATE_DEADLINE_SECONDS", "30"))
+    
     # Application
     INVITE_TOKEN_EXPIRY_DAYS: int = int(os.getenv("INVITE_TOKEN_EXPIRY_DAYS", "7"))
+    # Импорт платежей из выписок: максимальный размер файла (МБ) и число платежей
+    PAYMENT_IMPORT_MAX_FILE_MB: int = int(os.getenv("PAYMENT_IMPORT_MAX_FILE_MB", "20"))
+    PAYMENT_IMPORT_MAX_ROWS: int = int(os.getenv("PAYMENT_IMPORT_MAX_ROWS", "50000"))
+    # Экспорт данных: сколько строк читать из курсора за раз
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "500"))
+    # Сколько секунд дашборд кредитора берётся из кэша (записи этого процесса сбрасывают его сразу)
+    CREDITOR_DASHBOARD_CACHE_SECONDS: float = float(os.getenv("CREDITOR_DASHBOARD_CACHE_SECONDS", "60"))
+    # Валюта, в которую пересчитываются итоги по долгам в разных валютах (курсы из fx_rates)
+    BASE_CURRENCY: str = os.getenv("BASE_CURRENCY", "RUB")
+    # Сколько секунд курс валют берётся из кэша процесса
+    FX_RATES_CACHE_SECONDS: float = float(os.getenv("FX_RATES_CACHE_SECONDS", "3600"))
+    # Партиции audit_log (maintenance.py): на сколько месяцев вперёд создавать,
+    # сколько месяцев хранить (0 — всё) и куда выгружать отключённые партиции
+    AUDIT_LOG_PARTITIONS_AHEAD: int = int(os.getenv("AUDIT_LOG_PARTITIONS_AHEAD", "3"))
+    AUDIT_LOG_RETENTION_MONTHS: int = int(os.getenv("AUDIT_LOG_RETENTION_MONTHS", "0"))
+    AUDIT_LOG_ARCHIVE_DIR: str = os.getenv("AUDIT_LOG_ARCHIVE_DIR", "")
+    # Формат записей аудита: delta (только изменённые поля и периодические снимки) или full
+    AUDIT_ENCODING: str = os.getenv("AUDIT_ENCODING", "delta")
+    # Полный снимок состояния пишется не реже чем раз в столько событий сущности
+    AUDIT_SNAPSHOT_INTERVAL: int = int(os.getenv("AUDIT_SNAPSHOT_INTERVAL", "20"))
     
     @classmethod
     def validate(cls) -> None:
@@ -1,70 +1,733 @@
 """
 Модуль для подключения к базе данных PostgreSQL.
 """
+import asyncio
+import itertools
+import logging
+import random
+import sys
+import time
+import traceback
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
 import asyncpg
-from typing import Optional
 from config import config
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class PoolOverloadedError(Exception):
+    """Пул подключений перегружен: запрос отклонён без ожидания подключения."""
+
+    def __init__(self, message: str = "Сервис перегружен, попробуйте ещё раз через несколько секунд"):
+        super().__init__(message)
+
+
+class QueryTimeoutError(Exception):
+    """Запрос к базе данных превысил лимит времени выполнения и был отменён."""
+
+    def __init__(self, message: str = "Запрос выполнялся слишком долго, попробуйте ещё раз"):
+        super().__init__(message)
+
+
+class QueryClass:
+    """Классы запросов с разными лимитами времени выполнения."""
+    READ = 'read'
+    WRITE = 'write'
+    MAINTENANCE = 'maintenance'
+
+
+def get_timeout(query_class: str) -> float:
+    """Возвращает лимит времени (в секундах) для класса запросов."""
+    return {
+        QueryClass.READ: config.DB_READ_TIMEOUT,
+        QueryClass.WRITE: config.DB_WRITE_TIMEOUT,
+        QueryClass.MAINTENANCE: config.DB_MAINTENANCE_TIMEOUT,
+    }[query_class]
+
+
+def _statement_timeout_setting(query_class: str) -> str:
+    """Значение statement_timeout (в миллисекундах) для класса запросов."""
+    return str(int(get_timeout(query_class) * 1000))
+
+
+@contextmanager
+def _translate_timeouts():
+    """Превращает отмену запроса по statement_timeout/command_timeout в QueryTimeoutError."""
+    try:
+        yield
+    except asyncpg.exceptions.QueryCanceledError as e:
+        metrics.inc("db.query_timeouts")
+        raise QueryTimeoutError() from e
+    except asyncio.TimeoutError as e:
+        metrics.inc("db.query_timeouts")
+        raise QueryTimeoutError() from e
+
+
+class TimeoutAwareConnection(asyncpg.Connection):
+    """Подключение, сообщающее о превышении лимита времени как QueryTimeoutError."""
+
+    async def execute(self, *args, **kwargs):
+        with _translate_timeouts():
+            return await super().execute(*args, **kwargs)
+
+    async def executemany(self, *args, **kwargs):
+        with _translate_timeouts():
+            return await super().executemany(*args, **kwargs)
+
+    async def fetch(self, *args, **kwargs):
+        with _translate_timeouts():
+            return await super().fetch(*args, **kwargs)
+
+    async def fetchrow(self, *args, **kwargs):
+        with _translate_timeouts():
+            return await super().fetchrow(*args, **kwargs)
+
+    async def fetchval(self, *args, **kwargs):
+        with _translate_timeouts():
+            return await super().fetchval(*args, **kwargs)
+
+
+# Ошибки, после которых транзакцию можно безопасно выполнить заново целиком:
+# конфликт сериализации, взаимоблокировка и потеря подключения
+RETRYABLE_ERRORS = (
+    asyncpg.exceptions.SerializationError,          # 40001
+    asyncpg.exceptions.DeadlockDetectedError,       # 40P01
+    asyncpg.exceptions.PostgresConnectionError,     # класс 08
+    asyncpg.exceptions.CannotConnectNowError,       # 57P03, например во время переключения
+    asyncpg.exceptions.ConnectionDoesNotExistError,
+    ConnectionError,
+)
+
+
+class RetryBudget:
+    """
+    Бюджет повторов транзакций.
+
+    Каждая успешная транзакция пополняет бюджет на ratio, каждый повтор
+    расходует единицу. При массовых сбоях бюджет быстро заканчивается,
+    и повторы не умножают нагрузку на и так перегруженную БД.
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        """Пополняет бюджет после успешной транзакции."""
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Расходует единицу бюджета на повтор, если она есть."""
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def _retry_delay(attempt: int) -> float:
+    """Задержка перед повтором: экспоненциальный рост со случайным разбросом (full jitter)."""
+    ceiling = min(config.DB_TX_RETRY_MAX_DELAY, config.DB_TX_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+def _parse_host(value: str) -> Tuple[str, int]:
+    """Разбирает строку вида host[:port] в пару (host, port)."""
+    if ':' in value:
+        host, port = value.rsplit(':', 1)
+        return host, int(port)
+    return value, config.DB_PORT
+
+
+def _describe_call_site(mode: str) -> str:
+    """
+    Описывает место, откуда запрошено подключение (первый кадр вне database.py).
+
+    В режиме 'stack' возвращает сокращённый стек вызовов (дороже, для отладки),
+    в остальных режимах — только файл, строку и функцию.
+    """
+    if mode == 'stack':
+        frames = [
+            line for line in traceback.format_stack(limit=16)
+            if __file__ not in line
+        ]
+        return ''.join(frames).rstrip()
+
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return '<unknown>'
+    return f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+@dataclass
+class _Lease:
+    """Выданное подключение: когда, откуда и какой задаче."""
+    conn: asyncpg.Connection
+    acquired_at: float
+    call_site: str
+    task: Optional[asyncio.Task]
+    reported: bool = False
+
+
+class _GuardedAcquireContext:
+    """Результат GuardedPool.acquire(): поддерживает и await, и async with."""
+
+    __slots__ = ('_pool', '_timeout', '_call_site', '_conn')
+
+    def __init__(self, pool: "GuardedPool", timeout: Optional[float], call_site: Optional[str]):
+        self._pool = pool
+        self._timeout = timeout
+        self._call_site = call_site
+        self._conn = None
+
+    def __await__(self):
+        return self._pool._acquire(self._timeout, self._call_site).__await__()
+
+    async def __aenter__(self) -> asyncpg.Connection:
+        self._conn = await self._pool._acquire(self._timeout, self._call_site)
+        return self._conn
+
+    async def __aexit__(self, *exc) -> None:
+        conn, self._conn = self._conn, None
+        await self._pool.release(conn)
+
+
+def _is_detached_or_closed(conn: asyncpg.Connection) -> bool:
+    """
+    Проверяет, закрыто ли выданное пулом подключение.
+
+    При close() asyncpg отсоединяет прокси пула от подключения, после чего
+    любой вызов на прокси (в том числе is_closed()) бросает InterfaceError.
+    """
+    if getattr(conn, '_con', False) is None:
+        return True
+    try:
+        return conn.is_closed()
+    except asyncpg.InterfaceError:
+        return True
+
+
+class GuardedPool:
+    """
+    Обёртка над asyncpg.Pool с защитой от насыщения.
+
+    - ожидание подключения ограничено по времени (DB_ACQUIRE_TIMEOUT);
+    - очередь ожидающих ограничена (DB_MAX_WAITERS): лишние запросы сразу
+      получают PoolOverloadedError вместо бесконечного ожидания;
+    - публикует метрики: число ожидающих, занятых подключений и время получения;
+    - отслеживает выданные подключения (DB_LEAK_TRACKING): место получения,
+      время удержания и подключения, закрытые без возврата в пул.
+
+    Остальные атрибуты (close, get_size, copy_* и т.п.) проксируются в asyncpg.Pool.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        name: str,
+        acquire_timeout: float,
+        max_waiters: int,
+        leak_tracking: str = 'basic'
+    ):
+        self._pool = pool
+        self.name = name
+        self._acquire_timeout = acquire_timeout
+        self._max_waiters = max_waiters
+        self._leak_tracking = leak_tracking
+        self._waiters = 0
+        self._in_use = 0
+        self._leases: Dict[int, _Lease] = {}
+
+    def __getattr__(self, item):
+        return getattr(self._pool, item)
+
+    @property
+    def waiters(self) -> int:
+        """Количество задач, ожидающих подключение."""
+        return self._waiters
+
+    @property
+    def in_use(self) -> int:
+        """Количество выданных подключений."""
+        return self._in_use
+
+    def is_saturated(self) -> bool:
+        """Проверяет, заполнена ли очередь ожидания."""
+        return self._waiters >= self._max_waiters
+
+    def acquire(self, *, timeout: Optional[float] = None) -> _GuardedAcquireContext:
+        """Получает подключение из пула (await или async with)."""
+        call_site = None
+        if self._leak_tracking != 'off':
+            call_site = _describe_call_site(self._leak_tracking)
+        return _GuardedAcquireContext(self, timeout, call_site)
+
+    async def _acquire(self, timeout: Optional[float], call_site: Optional[str] = None) -> asyncpg.Connection:
+        """Получает подключение с учётом лимитов очереди и таймаута."""
+        prefix = f"db.pool.{self.name}"
+        if self.is_saturated():
+            metrics.inc(f"{prefix}.shed")
+            raise PoolOverloadedError()
+
+        started = time.monotonic()
+        self._waiters += 1
+        metrics.set_gauge(f"{prefix}.waiters", self._waiters)
+        try:
+            conn = await self._pool.acquire(
+                timeout=timeout if timeout is not None else self._acquire_timeout
+            )
+        except asyncio.TimeoutError:
+            metrics.inc(f"{prefix}.acquire_timeouts")
+            raise PoolOverloadedError() from None
+        finally:
+            self._waiters -= 1
+            metrics.set_gauge(f"{prefix}.waiters", self._waiters)
+
+        acquired_at = time.monotonic()
+        self._in_use += 1
+        metrics.set_gauge(f"{prefix}.in_use", self._in_use)
+        metrics.observe(f"{prefix}.acquire_time", acquired_at - started)
+
+        if call_site is not None:
+            self._leases[id(conn)] = _Lease(
+                conn=conn,
+                acquired_at=acquired_at,
+                call_site=call_site,
+                task=asyncio.current_task(),
+            )
+        return conn
+
+    async def release(self, conn: asyncpg.Connection, *, timeout: Optional[float] = None) -> None:
+        """Возвращает подключение в пул."""
+        self._leases.pop(id(conn), None)
+        self._in_use -= 1
+        metrics.set_gauge(f"db.pool.{self.name}.in_use", self._in_use)
+        await self._pool.release(conn, timeout=timeout)
+
+    def holding_tasks(self) -> List[asyncio.Task]:
+        """Возвращает задачи, удерживающие подключения из пула."""
+        return [lease.task for lease in self._leases.values() if lease.task is not None]
+
+    def check_leaks(self, threshold: float) -> int:
+        """
+        Проверяет выданные подключения на утечки.
+
+        - подключения, закрытые без возврата в пул, снимаются с учёта
+          (asyncpg уже вернул слот в пул при закрытии);
+        - о подключениях, удерживаемых дольше threshold секунд, пишется
+          предупреждение (один раз на подключение).
+
+        Returns:
+            Количество подключений, удерживаемых дольше порога
+        """
+        prefix = f"db.pool.{self.name}"
+        now = time.monotonic()
+        long_held = 0
+
+        for key, lease in list(self._leases.items()):
+            held_for = now - lease.acquired_at
+
+            if _is_detached_or_closed(lease.conn):
+                del self._leases[key]
+                self._in_use -= 1
+                metrics.inc(f"{prefix}.leaks.closed_unreleased")
+                logger.error(
+                    f"Connection from pool '{self.name}' was closed without release "
+                    f"after {held_for:.1f}s; acquired at:\n{lease.call_site}"
+                )
+                continue
+
+            if held_for >= threshold:
+                long_held += 1
+                if not lease.reported:
+                    lease.reported = True
+                    metrics.inc(f"{prefix}.leaks.long_held")
+                    logger.warning(
+                        f"Connection from pool '{self.name}' held for {held_for:.1f}s "
+                        f"(threshold {threshold:.0f}s); acquired at:\n{lease.call_site}"
+                    )
+
+        metrics.set_gauge(f"{prefix}.in_use", self._in_use)
+        metrics.set_gauge(f"{prefix}.leaks.held_over_threshold", long_held)
+        return long_held
 
 
 class Database:
-    """Класс для управления подключением к базе данных."""
-    
-    _pool: Optional[asyncpg.Pool] = None
-    
+    """
+    Класс для управления подключением к базе данных.
+
+    Поддерживает основной пул (primary) и пулы реплик только для чтения.
+    Чтения направляются на реплики, кроме случаев, когда текущий пользователь
+    недавно выполнял запись (read-your-writes): тогда чтение идёт на primary,
+    чтобы не увидеть устаревшие данные из-за задержки репликации.
+    """
+
+    _pool: Optional[GuardedPool] = None
+    _replica_pools: List[GuardedPool] = []
+    _replica_cycle = None
+    _leak_monitor: Optional[asyncio.Task] = None
+
+    # Пользователь (Telegram ID), от имени которого обрабатывается текущий update
+    _current_actor: ContextVar[Optional[int]] = ContextVar('db_current_actor', default=None)
+    # Время последней записи по пользователю (time.monotonic())
+    _recent_writes: Dict[int, float] = {}
+    # Счётчик записей в процессе: чтения, начатые до записи, не разделяются с чтениями после неё
+    _write_epoch: int = 0
+    # Общий для процесса бюджет повторов транзакций
+    _retry_budget = RetryBudget(config.DB_TX_RETRY_BUDGET_RATIO, config.DB_TX_RETRY_BUDGET_MAX)
+
     @classmethod
-    async def create_pool(cls) -> asyncpg.Pool:
-        """Создаёт и возвращает пул подключений к базе данных."""
+    async def _connect_pool(cls, name: str, host: str, port: int) -> GuardedPool:
+        """Создаёт пул подключений к указанному серверу."""
+        pool = await asyncpg.create_pool(
+            host=host,
+            port=port,
+            user=config.DB_USER,
+            password=config.DB_PASSWORD,
+            database=config.DB_NAME,
+            min_size=config.DB_POOL_MIN_SIZE,
+            max_size=config.DB_POOL_MAX_SIZE,
+            connection_class=TimeoutAwareConnection,
+            # По умолчанию сессия ограничена лимитом чтения; транзакции записи
+            # поднимают лимит через apply_timeout (SET LOCAL)
+            server_settings={'statement_timeout': _statement_timeout_setting(QueryClass.READ)},
+            # Клиентский лимит — страховка от зависшего соединения
+            command_timeout=max(config.DB_READ_TIMEOUT, config.DB_WRITE_TIMEOUT) + 5,
+        )
+        return GuardedPool(
+            pool,
+            name=name,
+            acquire_timeout=config.DB_ACQUIRE_TIMEOUT,
+            max_waiters=config.DB_MAX_WAITERS,
+            leak_tracking=config.DB_LEAK_TRACKING,
+        )
+
+    @classmethod
+    async def create_pool(cls) -> GuardedPool:
+        """Создаёт и возвращает пул подключений к базе данных (и пулы реплик)."""
         if cls._pool is None:
-            cls._pool = await asyncpg.create_pool(
-                host=config.DB_HOST,
-                port=config.DB_PORT,
-                user=config.DB_USER,
-                password=config.DB_PASSWORD,
-                database=config.DB_NAME,
-                min_size=1,
-                max_size=10,
-            )
+            cls._pool = await cls._connect_pool('primary', config.DB_HOST, config.DB_PORT)
+
+            replica_pools = []
+            for index, replica in enumerate(config.DB_REPLICA_HOSTS, 1):
+                host, port = _parse_host(replica)
+                replica_pools.append(await cls._connect_pool(f'replica{index}', host, port))
+            cls._replica_pools = replica_pools
+            cls._replica_cycle = itertools.cycle(replica_pools) if replica_pools else None
+
+            if config.DB_LEAK_TRACKING != 'off':
+                cls._leak_monitor = asyncio.get_running_loop().create_task(cls._monitor_leaks())
         return cls._pool
-    
+
     @classmethod
-    async def get_pool(cls) -> asyncpg.Pool:
+    def _all_pools(cls) -> List[GuardedPool]:
+        """Возвращает основной пул и пулы реплик."""
+        if cls._pool is None:
+            return []
+        return [cls._pool] + cls._replica_pools
+
+    @classmethod
+    async def _monitor_leaks(cls) -> None:
+        """Периодически проверяет пулы на утечки подключений."""
+        while True:
+            await asyncio.sleep(config.DB_LEAK_CHECK_INTERVAL)
+            try:
+                cls.check_leaks()
+            except Exception as e:
+                logger.error(f"Connection leak check failed: {e}", exc_info=e)
+
+    @classmethod
+    def check_leaks(cls) -> int:
+        """
+        Проверяет все пулы на утечки подключений.
+
+        Returns:
+            Количество подключений, удерживаемых дольше DB_LEAK_THRESHOLD_SECONDS
+        """
+        return sum(
+            pool.check_leaks(config.DB_LEAK_THRESHOLD_SECONDS)
+            for pool in cls._all_pools()
+        )
+
+    @classmethod
+    async def get_pool(cls) -> GuardedPool:
         """Возвращает пул подключений, создавая его при необходимости."""
         if cls._pool is None:
             return await cls.create_pool()
         return cls._pool
-    
+
+    @classmethod
+    async def get_read_pool(cls) -> GuardedPool:
+        """
+        Возвращает пул для запросов только на чтение.
+
+        Если реплики не настроены или текущий пользователь недавно выполнял
+        запись, возвращается основной пул.
+        """
+        pool = await cls.get_pool()
+        if cls._replica_cycle is None or cls._has_recent_write(cls._current_actor.get()):
+            return pool
+        return next(cls._replica_cycle)
+
+    @classmethod
+    async def apply_timeout(cls, conn: asyncpg.Connection, query_class: str) -> None:
+        """
+        Устанавливает statement_timeout для текущей транзакции.
+
+        Должен вызываться внутри conn.transaction(): значение действует до её конца.
+        """
+        await conn.execute(
+            f"SET LOCAL statement_timeout = {_statement_timeout_setting(query_class)}"
+        )
+
+    @classmethod
+    async def run_transaction(
+        cls,
+        body: Callable[[asyncpg.Connection], Awaitable[T]],
+        *,
+        name: str = 'transaction',
+        isolation: Optional[str] = None,
+        query_class: str = QueryClass.WRITE,
+    ) -> T:
+        """
+        Выполняет body(conn) в транзакции на primary с повтором при временных ошибках.
+
+        При конфликте сериализации, взаимоблокировке или потере подключения
+        транзакция откатывается и body выполняется заново на новом подключении
+        (не более DB_TX_MAX_RETRIES раз, с задержкой и в пределах бюджета повторов).
+        Поэтому body должен заново читать всё, от чего зависит запись, и не иметь
+        побочных эффектов вне транзакции. Остальные ошибки пробрасываются сразу.
+
+        Args:
+            body: Корутина, выполняющая запросы на переданном подключении
+            name: Имя транзакции для логов и метрик
+            isolation: Уровень изоляции ('read_committed', 'repeatable_read', 'serializable')
+            query_class: Класс запросов для statement_timeout
+
+        Returns:
+            Результат body
+        """
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                pool = await cls.get_pool()
+                conn = await pool.acquire()
+                try:
+                    async with conn.transaction(isolation=isolation):
+                        await cls.apply_timeout(conn, query_class)
+                        result = await body(conn)
+                    break
+                except RETRYABLE_ERRORS as e:
+                    metrics.inc(f"db.tx.errors.{type(e).__name__}")
+                    if attempt > config.DB_TX_MAX_RETRIES:
+                        metrics.inc("db.tx.retries_exhausted")
+                        raise
+                    if not cls._retry_budget.try_spend():
+                        metrics.inc("db.tx.retry_budget_exhausted")
+                        raise
+                    delay = _retry_delay(attempt)
+                    metrics.inc("db.tx.retries")
+                    logger.warning(
+                        f"Transaction '{name}' failed with {type(e).__name__}, "
+                        f"retrying in {delay:.3f}s (attempt {attempt})"
+                    )
+                finally:
+                    await pool.release(conn)
+
+                await asyncio.sleep(delay)
+        finally:
+            # Дальнейшие чтения этого пользователя идут на primary (read-your-writes)
+            cls.mark_write()
+
+        cls._retry_budget.deposit()
+        if attempt > 1:
+            metrics.inc("db.tx.recovered")
+        return result
+
+    @classmethod
+    async def connect_maintenance(cls) -> asyncpg.Connection:
+        """
+        Открывает отдельное подключение для обслуживающих задач (миграции, пересчёты).
+
+        Подключение не берётся из пула и ограничено лимитом DB_MAINTENANCE_TIMEOUT.
+        """
+        return await asyncpg.connect(
+            host=config.DB_HOST,
+            port=config.DB_PORT,
+            user=config.DB_USER,
+            password=config.DB_PASSWORD,
+            database=config.DB_NAME,
+            connection_class=TimeoutAwareConnection,
+            server_settings={'statement_timeout': _statement_timeout_setting(QueryClass.MAINTENANCE)},
+            command_timeout=config.DB_MAINTENANCE_TIMEOUT + 5,
+        )
+
+    @classmethod
+    def cancel_inflight(cls) -> int:
+        """
+        Отменяет задачи, удерживающие подключения из пулов.
+
+        При отмене задачи asyncpg отправляет серверу запрос на отмену выполняемого
+        запроса. Учитываются только подключения, отслеживаемые DB_LEAK_TRACKING.
+
+        Returns:
+            Количество отменённых задач
+        """
+        current = asyncio.current_task()
+        cancelled = 0
+        for pool in cls._all_pools():
+            for task in pool.holding_tasks():
+                if task is not current and not task.done():
+                    task.cancel()
+                    cancelled += 1
+        if cancelled:
+            metrics.inc("db.cancelled_on_shutdown", cancelled)
+            logger.info(f"Cancelled {cancelled} in-flight database tasks")
+        return cancelled
+
+    @classmethod
+    def is_overloaded(cls) -> bool:
+        """Проверяет, заполнена ли очередь ожидания основного пула."""
+        return cls._pool is not None and cls._pool.is_saturated()
+
+    @classmethod
+    def get_pool_stats(cls) -> Dict[str, dict]:
+        """Возвращает текущее состояние пулов (ожидающие, занятые, размер)."""
+        pools = cls._all_pools()
+        return {
+            pool.name: {
+                'waiters': pool.waiters,
+                'in_use': pool.in_use,
+                'size': pool.get_size(),
+                'max_size': pool.get_max_size(),
+            }
+            for pool in pools
+        }
+
+    @classmethod
+    def set_actor(cls, actor_id: Optional[int]) -> Token:
+        """
+        Устанавливает пользователя, от имени которого выполняются запросы.
+
+        Returns:
+            Токен для восстановления предыдущего значения через reset_actor
+        """
+        return cls._current_actor.set(actor_id)
+
+    @classmethod
+    def reset_actor(cls, token: Token) -> None:
+        """Восстанавливает предыдущего пользователя."""
+        cls._current_actor.reset(token)
+
+    @classmethod
+    def mark_write(cls, actor_id: Optional[int] = None) -> None:
+        """
+        Отмечает, что пользователь выполнил запись.
+
+        В течение DB_REPLICA_STICKY_SECONDS чтения этого пользователя идут на primary.
+
+        Args:
+            actor_id: Telegram ID пользователя (по умолчанию — текущий пользователь)
+        """
+        cls._write_epoch += 1
+
+        if actor_id is None:
+            actor_id = cls._current_actor.get()
+        if actor_id is None or not cls._replica_pools:
+            return
+
+        now = time.monotonic()
+        cls._recent_writes[actor_id] = now
+
+        # Периодически убираем устаревшие отметки, чтобы словарь не рос бесконечно
+        if len(cls._recent_writes) > 1000:
+            threshold = now - config.DB_REPLICA_STICKY_SECONDS
+            cls._recent_writes = {
+                actor: written_at
+                for actor, written_at in cls._recent_writes.items()
+                if written_at >= threshold
+            }
+
+    @classmethod
+    def read_route(cls) -> Tuple[bool, int]:
+        """
+        Описывает, какие данные увидит чтение текущего пользователя.
+
+        Returns:
+            Пара (читает ли пользователь с primary, номер последней записи в процессе)
+        """
+        on_primary = cls._replica_cycle is None or cls._has_recent_write(cls._current_actor.get())
+        return on_primary, cls._write_epoch
+
+    @classmethod
+    def _has_recent_write(cls, actor_id: Optional[int]) -> bool:
+        """Проверяет, выполнял ли пользователь запись в пределах окна read-your-writes."""
+        if actor_id is None:
+            return False
+        written_at = cls._recent_writes.get(actor_id)
+        if written_at is None:
+            return False
+        return time.monotonic() - written_at < config.DB_REPLICA_STICKY_SECONDS
+
     @classmethod
     async def close_pool(cls) -> None:
-        """Закрывает пул подключений."""
-        if cls._pool is not None:
-            await cls._pool.close()
-            cls._pool = None
-    
+        """
+        Закрывает пул подключений и пулы реплик.
+
+        Выполняющиеся запросы отменяются; если подключения не вернулись в пул
+        за DB_CLOSE_TIMEOUT секунд, пул закрывается принудительно.
+        """
+        if cls._leak_monitor is not None:
+            cls._leak_monitor.cancel()
+            cls._leak_monitor = None
+
+        cls.cancel_inflight()
+
+        for pool in cls._all_pools():
+            try:
+                await asyncio.wait_for(pool.close(), timeout=config.DB_CLOSE_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Pool '{pool.name}' did not close in time, terminating")
+                pool.terminate()
+
+        cls._replica_pools = []
+        cls._replica_cycle = None
+        cls._recent_writes = {}
+        cls._pool = None
+
     @classmethod
     async def execute(cls, query: str, *args) -> str:
         """Выполняет запрос и возвращает результат."""
         pool = await cls.get_pool()
         async with pool.acquire() as connection:
             return await connection.execute(query, *args)
-    
+
     @classmethod
     async def fetch(cls, query: str, *args):
         """Выполняет запрос и возвращает все строки."""
         pool = await cls.get_pool()
         async with pool.acquire() as connection:
             return await connection.fetch(query, *args)
-    
+
     @classmethod
     async def fetchrow(cls, query: str, *args):
         """Выполняет запрос и возвращает одну строку."""
         pool = await cls.get_pool()
         async with pool.acquire() as connection:
             return await connection.fetchrow(query, *args)
-    
+
     @classmethod
     async def fetchval(cls, query: str, *args):
         """Выполняет запрос и возвращает одно значение."""
         pool = await cls.get_pool()
         async with pool.acquire() as connection:
             return await connection.fetchval(query, *args)
-
@@ -0,0 +1,15 @@
+"""
+Календарная арифметика по месяцам, общая для сервисов, обслуживания и миграций.
+"""
+from datetime import date
+
+
+def month_start(day: date) -> date:
+    """Возвращает первое число месяца."""
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    """Возвращает первое число месяца, отстоящего от month на count месяцев."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
@@ -0,0 +1,61 @@
+"""
+Handlers для отчёта о просроченных платежах.
+"""
+from datetime import date
+from typing import List
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from services.arrears_service import ArrearsService, DebtArrears, totals_by_currency
+from repositories.user_repository import UserRepository
+
+# Сколько долгов показывать в каждом разделе отчёта
+MAX_ARREARS_SHOWN = 20
+
+
+def format_arrears_section(title: str, arrears: List[DebtArrears], today: date) -> str:
+    """Форматирует раздел отчёта: долги с просрочкой и итог по валютам."""
+    text = f"<b>{title}</b>\n"
+    
+    for item in arrears[:MAX_ARREARS_SHOWN]:
+        text += (
+            f"• {item.debt_name} — {item.total_missing:,.2f} {item.currency}, "
+            f"платежей: {len(item.installments)}, "
+            f"с {item.oldest_due_date.strftime('%d.%m.%Y')} ({item.days_overdue(today)} дн.)\n"
+        )
+    if len(arrears) > MAX_ARREARS_SHOWN:
+        text += f"... и ещё {len(arrears) - MAX_ARREARS_SHOWN}\n"
+    
+    totals = totals_by_currency(arrears)
+    text += "Итого: " + ", ".join(f"{amount:,.2f} {currency}" for currency, amount in sorted(totals.items())) + "\n"
+    
+    return text
+
+
+async def arrears_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показывает просрочки по долгам, где пользователь кредитор или должник."""
+    query = update.callback_query
+    user = update.effective_user
+    if query is None or user is None:
+        return
+    
+    await query.answer()
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    today = date.today()
+    arrears_service = ArrearsService()
+    as_creditor = await arrears_service.get_arrears(today, creditor_user_id=db_user.id)
+    as_debtor = await arrears_service.get_arrears(today, debtor_user_id=db_user.id)
+    
+    text = "<b>⏰ Просроченные платежи</b>\n\n"
+    if not as_creditor and not as_debtor:
+        text += "Просрочек нет."
+    if as_creditor:
+        text += format_arrears_section("Вам должны:", as_creditor, today) + "\n"
+    if as_debtor:
+        text += format_arrears_section("Вы просрочили:", as_debtor, today)
+    
+    keyboard = [[InlineKeyboardButton("🏠 Главное меню", callback_data="start")]]
+    if query.message:
+        await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
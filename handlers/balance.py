@@ -0,0 +1,128 @@
+"""
+Handlers для просмотра остатка долга на дату.
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from handlers.keyboards import get_cancel_keyboard
+from handlers.utils import parse_date
+from services.balance_service import BalanceService, DebtAsOf
+from services.debt_service import DebtService
+from repositories.user_repository import UserRepository
+
+# Константы состояний для ConversationHandler
+BALANCE_AS_OF_DATE = 0
+
+
+async def balance_as_of_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Запрашивает дату для расчёта остатка (формат: debt:balance:<debt_id>)."""
+    query = update.callback_query
+    user = update.effective_user
+    if query is None or user is None:
+        return -1
+    
+    try:
+        debt_id = int(query.data.split(':')[2])
+    except (IndexError, ValueError):
+        await query.answer("Ошибка: неверный ID долга", show_alert=True)
+        return -1
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    debt_service = DebtService()
+    if not await debt_service.check_access(debt_id, db_user.id):
+        await query.answer("Нет доступа к этому долгу", show_alert=True)
+        return -1
+    
+    await query.answer()
+    context.user_data['balance_debt_id'] = debt_id
+    
+    if query.message:
+        await query.message.edit_text(
+            "📅 Введите дату, на которую показать остаток (ДД.ММ.ГГГГ):",
+            reply_markup=get_cancel_keyboard()
+        )
+    
+    return BALANCE_AS_OF_DATE
+
+
+async def balance_as_of_date(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Показывает остаток и условия долга на введённую дату."""
+    user = update.effective_user
+    if user is None or update.message is None:
+        return -1
+    
+    debt_id = context.user_data.get('balance_debt_id')
+    if not debt_id:
+        await update.message.reply_text("❌ Ошибка: не найден ID долга.")
+        return -1
+    
+    day = parse_date(update.message.text.strip())
+    if day is None:
+        await update.message.reply_text(
+            "❌ Неверный формат даты. Используйте ДД.ММ.ГГГГ:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return BALANCE_AS_OF_DATE
+    if day > date.today():
+        await update.message.reply_text(
+            "❌ Дата не может быть в будущем. Введите другую дату:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return BALANCE_AS_OF_DATE
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    debt_service = DebtService()
+    debt = await debt_service.get_debt_by_id(debt_id)
+    
+    balance_service = BalanceService()
+    
+    try:
+        state = await balance_service.get_debt_as_of(debt_id, db_user.id, day)
+    except PermissionError:
+        await update.message.reply_text("❌ Нет доступа к этому долгу.")
+        return -1
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {str(e)}", reply_markup=get_cancel_keyboard())
+        return BALANCE_AS_OF_DATE
+    
+    context.user_data.pop('balance_debt_id', None)
+    
+    keyboard = InlineKeyboardMarkup([
+        [InlineKeyboardButton("📅 Другая дата", callback_data=f"debt:balance:{debt_id}")],
+        [InlineKeyboardButton("◀️ К долгу", callback_data=f"debt:{debt_id}")]
+    ])
+    await update.message.reply_text(
+        format_debt_as_of(state, debt.currency if debt else ""),
+        reply_markup=keyboard,
+        parse_mode='HTML'
+    )
+    return -1
+
+
+def format_debt_as_of(state: DebtAsOf, currency: str) -> str:
+    """Форматирует остаток и условия долга на дату."""
+    text = f"<b>📅 На {state.as_of.strftime('%d.%m.%Y')}</b>\n\n"
+    
+    if state.balance < 0:
+        text += f"Переплата: {abs(state.balance):,.2f} {currency}\n"
+    else:
+        text += f"Остаток: {state.balance:,.2f} {currency}\n"
+    text += f"Выплачено: {state.paid:,.2f} {currency}\n"
+    
+    terms = state.terms
+    if terms.get('monthly_payment'):
+        try:
+            text += f"Ежемесячный платёж: {Decimal(terms['monthly_payment']):,.2f} {currency}\n"
+        except InvalidOperation:
+            pass
+    if terms.get('due_day'):
+        text += f"День платежа: {terms['due_day']}\n"
+    if terms.get('status') == 'closed':
+        text += "Статус: 🔒 Закрыт\n"
+    
+    return text
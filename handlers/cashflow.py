@@ -0,0 +1,89 @@
+"""
+Handlers для календаря платежей по всем долгам.
+"""
+from datetime import date
+from typing import List
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from services.cashflow_service import CashflowService, CashflowMonth, calendar_cache_key
+from services.portfolio_service import PortfolioService
+from repositories.user_repository import UserRepository
+
+# Сколько месяцев на одной странице календаря
+MONTHS_PER_PAGE = 12
+
+
+def format_cashflow_page(months: List[CashflowMonth], page: int, pages: int) -> str:
+    """Форматирует страницу календаря: по строке на месяц."""
+    text = "<b>📆 Платежи по месяцам</b>"
+    if pages > 1:
+        text += f" ({page + 1}/{pages})"
+    text += "\n\n"
+    
+    for month in months:
+        amounts = " + ".join(f"{amount:,.2f} {currency}" for currency, amount in sorted(month.totals.items()))
+        text += f"{month.month.strftime('%m.%Y')}: {amounts} ({month.payments})\n"
+    
+    return text
+
+
+def get_cashflow_keyboard(page: int, pages: int) -> InlineKeyboardMarkup:
+    """Возвращает клавиатуру листания календаря."""
+    row = []
+    if page > 0:
+        row.append(InlineKeyboardButton("◀️", callback_data=f"cashflow:{page - 1}"))
+    if page < pages - 1:
+        row.append(InlineKeyboardButton("▶️", callback_data=f"cashflow:{page + 1}"))
+    
+    keyboard = [row] if row else []
+    keyboard.append([InlineKeyboardButton("🏠 Главное меню", callback_data="start")])
+    return InlineKeyboardMarkup(keyboard)
+
+
+async def cashflow_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показывает календарь платежей (формат: cashflow[:<страница>])."""
+    query = update.callback_query
+    user = update.effective_user
+    if query is None or user is None:
+        return
+    
+    parts = query.data.split(':')
+    try:
+        page = int(parts[1]) if len(parts) > 1 else None
+    except ValueError:
+        page = None
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    today = date.today()
+    debts = await PortfolioService().get_active_debts(db_user.id)
+    
+    # Листание показывает уже сформированные страницы, пока не изменились
+    # условия (версии) и остатки долгов
+    cache_key = calendar_cache_key(debts, today)
+    cached = context.user_data.get('cashflow')
+    if cached is None or cached['key'] != cache_key:
+        months = CashflowService().build(debts, today)
+        if not months:
+            await query.answer("Нет плановых платежей: задайте ежемесячный платёж и день платежа", show_alert=True)
+            return
+        
+        chunks = [months[i:i + MONTHS_PER_PAGE] for i in range(0, len(months), MONTHS_PER_PAGE)]
+        cached = {
+            'key': cache_key,
+            'pages': [format_cashflow_page(chunk, i, len(chunks)) for i, chunk in enumerate(chunks)],
+        }
+        context.user_data['cashflow'] = cached
+    
+    pages = cached['pages']
+    if page is None or not 0 <= page < len(pages):
+        page = 0
+    
+    await query.answer()
+    if query.message:
+        await query.message.edit_text(
+            pages[page],
+            reply_markup=get_cashflow_keyboard(page, len(pages)),
+            parse_mode='HTML'
+        )
@@ -0,0 +1,66 @@
+"""
+Handlers для дашборда кредитора.
+"""
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from services.dashboard_service import DashboardService, CreditorDashboard
+from services.fx_service import ConvertedTotal
+from repositories.user_repository import UserRepository
+
+
+def format_converted_total(label: str, total: ConvertedTotal) -> str:
+    """Форматирует итог в одной валюте; валюты без курса перечисляются отдельно."""
+    text = f"{label}: ≈ {total.amount:,.2f} {total.currency}"
+    if total.missing:
+        text += f" (без {', '.join(total.missing)}: нет курса)"
+    return text + "\n"
+
+
+def format_creditor_dashboard(dashboard: CreditorDashboard) -> str:
+    """Форматирует сводку кредитора: итоги по валютам и число просроченных долгов."""
+    text = "<b>📊 Мне должны</b>\n\n"
+    
+    if not dashboard.totals:
+        return text + "У вас нет активных долгов, где вы кредитор."
+    
+    text += f"Активных долгов: {dashboard.debts}\n"
+    text += f"С просрочкой: {dashboard.late_debts}\n"
+    if dashboard.outstanding_total is not None:
+        text += format_converted_total("Всего остаток", dashboard.outstanding_total)
+    
+    for item in dashboard.totals:
+        text += (
+            f"\n<b>{item.currency}</b> ({item.debts})\n"
+            f"Остаток: {item.outstanding:,.2f}\n"
+            f"Ожидается в этом месяце: {item.expected_this_month:,.2f}\n"
+            f"Получено в этом месяце: {item.paid_this_month:,.2f}\n"
+        )
+    
+    return text
+
+
+async def creditor_dashboard_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показывает сводку по долгам, где пользователь кредитор."""
+    query = update.callback_query
+    user = update.effective_user
+    if query is None or user is None:
+        return
+    
+    await query.answer()
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    dashboard = await DashboardService().get_creditor_dashboard(db_user.id)
+    
+    keyboard = []
+    if dashboard.late_debts:
+        keyboard.append([InlineKeyboardButton("⏰ Просрочки", callback_data="arrears")])
+    keyboard.append([InlineKeyboardButton("🏠 Главное меню", callback_data="start")])
+    
+    if query.message:
+        await query.message.edit_text(
+            format_creditor_dashboard(dashboard),
+            reply_markup=InlineKeyboardMarkup(keyboard),
+            parse_mode='HTML'
+        )
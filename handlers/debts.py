@@ -15,7 +15,7 @@ from handlers.keyboards import (
 from handlers.utils import format_debt_info, format_payment_plan, format_debt_list_item
 from services.debt_service import DebtService
 from services.payment_service import PaymentService
-from services.planner_service import PlannerService
+from services.plan_service import PaymentPlanService
 from repositories.user_repository import UserRepository
 from database import Database
 
@@ -107,8 +107,8 @@ async def debt_detail_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     # Получаем реальные платежи для отметки выполненных
     actual_payments = await payment_service.get_payments_by_debt(debt_id, include_deleted=False)
     
-    planner_service = PlannerService()
-    plan_items = await planner_service.calculate_payment_plan(debt, balance)
+    # План читается из payment_plans и пересчитывается, только если устарел
+    plan_items = await PaymentPlanService().get_plan(debt_id)
     
     # Форматируем информацию о долге
     debt_info = await format_debt_info(debt, balance)
@@ -7,13 +7,18 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from handlers.keyboards import get_cancel_keyboard
 from handlers.utils import parse_decimal
+from handlers.whatif import format_payment_preview
+from services.amortization import SCHEDULE_ANNUITY, SCHEDULE_DIFFERENTIATED
 from services.debt_service import DebtService
+from services.payment_service import PaymentService
+from services.whatif_service import WhatIfService, Scenario
 from repositories.user_repository import UserRepository
 
 # Константы состояний для редактирования долга
 # Эти константы должны совпадать с теми, что используются в main.py
 EDIT_MONTHLY_PAYMENT = 3
 EDIT_DUE_DAY = 4
+EDIT_INTEREST_RATE = 5
 
 
 async def debt_edit_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -118,7 +123,21 @@ async def debt_edit_monthly_payment(update: Update, context: ContextTypes.DEFAUL
     
     current_due_day = str(debt.due_day) if debt.due_day else "не задан"
     
+    # Показываем, как новый платёж изменит план, до сохранения
+    preview = ""
+    new_monthly = context.user_data['debt_edit'].get('monthly_payment')
+    if new_monthly is not None and debt.monthly_payment is not None and debt.due_day is not None:
+        balance = await PaymentService().calculate_balance(debt_id)
+        if balance > 0:
+            scenario = Scenario('edit', "Новый платёж", monthly_payment=Decimal(str(new_monthly)))
+            try:
+                result = WhatIfService().evaluate(debt, balance, [scenario])['edit']
+                preview = format_payment_preview(debt, result) + "\n\n"
+            except ValueError as e:
+                preview = f"⚠️ {str(e)}\n\n"
+    
     await update.message.reply_text(
+        f"{preview}"
         f"Текущий день платежа: {current_due_day}\n\n"
         "Введите новый день платежа (1-31)\n"
         "или отправьте \"-\" чтобы оставить без изменений:",
@@ -129,7 +148,7 @@ async def debt_edit_monthly_payment(update: Update, context: ContextTypes.DEFAUL
 
 
 async def debt_edit_due_day(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """Обрабатывает ввод нового дня платежа и сохраняет изменения."""
+    """Обрабатывает ввод нового дня платежа и запрашивает процентную ставку."""
     text = update.message.text if update.message else ""
     
     if text.strip() == '-':
@@ -150,6 +169,58 @@ async def debt_edit_due_day(update: Update, context: ContextTypes.DEFAULT_TYPE)
             )
             return EDIT_DUE_DAY
     
+    context.user_data['debt_edit']['due_day'] = due_day
+    
+    debt_id = context.user_data.get('debt_edit_debt_id')
+    if not debt_id:
+        await update.message.reply_text("❌ Ошибка: потерян ID долга. Начните заново.")
+        return -1
+    
+    debt_service = DebtService()
+    debt = await debt_service.get_debt_by_id(debt_id)
+    if debt is None:
+        await update.message.reply_text("❌ Долг не найден.")
+        return -1
+    
+    if debt.interest_rate:
+        schedule = "дифференцированный" if debt.amortization == SCHEDULE_DIFFERENTIATED else "аннуитетный"
+        current_rate = f"{debt.interest_rate.normalize():f}% годовых, {schedule} график"
+    else:
+        current_rate = "без процентов"
+    
+    await update.message.reply_text(
+        f"Текущая ставка: {current_rate}\n\n"
+        "Введите годовую ставку в процентах (например: 12.5), \"0\" — без процентов.\n"
+        "Для дифференцированного графика (платёж — доля основного долга, проценты сверху) "
+        "добавьте \"д\": 12.5 д\n"
+        "Отправьте \"-\" чтобы оставить без изменений:",
+        reply_markup=get_cancel_keyboard()
+    )
+    
+    return EDIT_INTEREST_RATE
+
+
+async def debt_edit_interest_rate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Обрабатывает ввод процентной ставки и сохраняет изменения."""
+    text = update.message.text.strip() if update.message else ""
+    
+    interest_rate = None
+    amortization = None
+    if text != '-':
+        parts = text.split()
+        interest_rate = parse_decimal(parts[0].rstrip('%')) if parts else None
+        if len(parts) > 2 or (len(parts) == 2 and parts[1].lower() != 'д'):
+            interest_rate = None
+        if interest_rate is None or interest_rate < 0 or interest_rate >= 1000:
+            await update.message.reply_text(
+                "❌ Неверный формат ставки. Введите число от 0 до 999 (например: 12.5 или 12.5 д) "
+                "или \"-\" для пропуска:",
+                reply_markup=get_cancel_keyboard()
+            )
+            return EDIT_INTEREST_RATE
+        if interest_rate > 0:
+            amortization = SCHEDULE_DIFFERENTIATED if len(parts) == 2 else SCHEDULE_ANNUITY
+    
     debt_id = context.user_data.get('debt_edit_debt_id')
     if not debt_id:
         await update.message.reply_text("❌ Ошибка: потерян ID долга. Начните заново.")
@@ -176,7 +247,9 @@ async def debt_edit_due_day(update: Update, context: ContextTypes.DEFAULT_TYPE)
             debt_id=debt_id,
             user_id=db_user.id,
             monthly_payment=monthly_payment,
-            due_day=due_day
+            due_day=edit_data.get('due_day'),
+            interest_rate=interest_rate,
+            amortization=amortization
         )
         
         # Очищаем данные
@@ -186,11 +259,13 @@ async def debt_edit_due_day(update: Update, context: ContextTypes.DEFAULT_TYPE)
         # Форматируем сообщение об успехе
         monthly_payment_text = f"{updated_debt.monthly_payment:,.2f}" if updated_debt.monthly_payment else "не задан"
         due_day_text = str(updated_debt.due_day) if updated_debt.due_day else "не задан"
+        rate_text = f"{updated_debt.interest_rate.normalize():f}%" if updated_debt.interest_rate else "без процентов"
         
         text = (
             f"✅ Долг #{debt_id} успешно обновлён!\n\n"
             f"Ежемесячный платёж: {monthly_payment_text}\n"
-            f"День платежа: {due_day_text}"
+            f"День платежа: {due_day_text}\n"
+            f"Ставка: {rate_text}"
         )
         
         # Кнопка для возврата к деталям долга
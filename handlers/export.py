@@ -0,0 +1,94 @@
+"""
+Handlers для экспорта данных пользователя.
+"""
+import logging
+from datetime import date
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from handlers.keyboards import get_main_menu_keyboard
+from services.export_service import ExportService, EXPORT_FORMATS, FORMAT_CSV
+from repositories.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+# Ограничение Telegram Bot API на размер отправляемого файла
+TELEGRAM_UPLOAD_LIMIT_BYTES = 50 * 1024 * 1024
+
+
+def get_export_keyboard() -> InlineKeyboardMarkup:
+    """Возвращает клавиатуру выбора формата экспорта."""
+    keyboard = [
+        [InlineKeyboardButton("📊 CSV (Excel)", callback_data="export:csv")],
+        [InlineKeyboardButton("🧾 JSONL", callback_data="export:jsonl")],
+        [InlineKeyboardButton("◀️ Назад", callback_data="start")]
+    ]
+    return InlineKeyboardMarkup(keyboard)
+
+
+async def export_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показывает выбор формата экспорта."""
+    query = update.callback_query
+    if query:
+        await query.answer()
+    
+    text = (
+        "<b>📤 Экспорт данных</b>\n\n"
+        "Выгружу ваши долги, платежи и историю изменений в zip-архив.\n"
+        "Выберите формат:"
+    )
+    
+    if query and query.message:
+        await query.message.edit_text(text, reply_markup=get_export_keyboard(), parse_mode='HTML')
+
+
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обрабатывает команду /export [csv|jsonl]."""
+    args = context.args
+    fmt = args[0].lower() if args else FORMAT_CSV
+    if fmt not in EXPORT_FORMATS:
+        await update.message.reply_text("Использование: /export [csv|jsonl]")
+        return
+    await send_export(update, fmt)
+
+
+async def export_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обрабатывает выбор формата экспорта."""
+    query = update.callback_query
+    if query:
+        await query.answer("⏳ Готовлю выгрузку...")
+    
+    fmt = query.data.split(':')[1] if query else FORMAT_CSV
+    if fmt not in EXPORT_FORMATS:
+        return
+    await send_export(update, fmt)
+
+
+async def send_export(update: Update, fmt: str) -> None:
+    """Собирает архив с данными пользователя и отправляет его документом."""
+    user = update.effective_user
+    message = update.effective_message
+    if user is None or message is None:
+        return
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    export_service = ExportService()
+    
+    with await export_service.export(db_user.id, fmt) as archive:
+        size = archive.seek(0, 2)
+        archive.seek(0)
+        if size > TELEGRAM_UPLOAD_LIMIT_BYTES:
+            await message.reply_text(
+                "❌ Выгрузка слишком большая для отправки через Telegram (больше 50 МБ).",
+                reply_markup=get_main_menu_keyboard()
+            )
+            return
+        
+        await message.reply_document(
+            document=archive,
+            filename=f"debt_tracker_{date.today().isoformat()}_{fmt}.zip",
+            caption="📤 Ваши долги, платежи и история изменений"
+        )
+    
+    logger.info(f"Data exported: user_id={db_user.id}, format={fmt}, size={size}")
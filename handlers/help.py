@@ -19,13 +19,18 @@ async def help_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         "• Создание и управление долгами\n"
         "• Учёт платежей\n"
         "• План погашения\n"
+        "• Стратегия погашения всех долгов из общего бюджета\n"
+        "• Календарь: сколько платить в каждом месяце по всем долгам\n"
+        "• Сводка по долгам перед вами: остаток, ожидаемые и полученные платежи\n"
+        "• Просроченные платежи по вашим долгам и долгам перед вами\n"
         "• Приглашение кредиторов\n\n"
         "<b>Права доступа:</b>\n"
         "• Должник может изменять долг и добавлять платежи\n"
         "• Кредитор имеет доступ только на чтение\n\n"
         "<b>Команды:</b>\n"
         "/start — главное меню\n"
-        "/help — эта справка\n\n"
+        "/help — эта справка\n"
+        "/export — выгрузка данных (CSV или JSONL)\n\n"
         "Все действия выполняются через кнопки меню."
     )
     
@@ -0,0 +1,176 @@
+"""
+Handlers для просмотра истории изменений долга.
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from models.audit_log import AuditLog
+from models.debt import Debt
+from services.audit_service import AuditService, AuditPage
+from services.debt_service import DebtService
+from repositories.user_repository import UserRepository
+
+
+def get_history_keyboard(debt_id: int, page: AuditPage, is_first_page: bool) -> InlineKeyboardMarkup:
+    """
+    Возвращает клавиатуру истории долга.
+    
+    Args:
+        debt_id: ID долга
+        page: Текущая страница истории
+        is_first_page: True, если показаны самые новые события
+    """
+    keyboard = []
+    
+    if page.next_cursor:
+        keyboard.append([InlineKeyboardButton(
+            "⏪ Раньше", callback_data=f"debt:history:{debt_id}:{page.next_cursor}"
+        )])
+    if not is_first_page:
+        keyboard.append([InlineKeyboardButton("⏫ К последним", callback_data=f"debt:history:{debt_id}")])
+    
+    keyboard.append([InlineKeyboardButton("◀️ К долгу", callback_data=f"debt:{debt_id}")])
+    
+    return InlineKeyboardMarkup(keyboard)
+
+
+def _format_amount(value: Optional[str], currency: str) -> str:
+    """Форматирует сумму из записи аудита (хранится строкой)."""
+    try:
+        return f"{Decimal(value):,.2f} {currency}"
+    except (TypeError, InvalidOperation):
+        return "—"
+
+
+def _format_date(value: Optional[str]) -> str:
+    """Форматирует дату из записи аудита (хранится строкой ISO)."""
+    try:
+        return date.fromisoformat(value[:10]).strftime('%d.%m.%Y')
+    except (TypeError, ValueError):
+        return "—"
+
+
+def describe_audit_entry(entry: AuditLog, debt: Debt) -> str:
+    """
+    Описывает событие аудита по-человечески.
+    
+    Args:
+        entry: Запись аудита
+        debt: Долг, к истории которого относится запись
+    
+    Returns:
+        Описание события
+    """
+    before = entry.before or {}
+    after = entry.after or {}
+    
+    if entry.entity_type == 'payment':
+        if entry.action == 'create':
+            return (
+                f"💰 Платёж {_format_amount(after.get('amount'), debt.currency)} "
+                f"от {_format_date(after.get('payment_date'))}"
+            )
+        if entry.action == 'delete':
+            return (
+                f"🗑️ Удалён платёж {_format_amount(before.get('amount'), debt.currency)} "
+                f"от {_format_date(before.get('payment_date'))}"
+            )
+    
+    if entry.entity_type == 'invite':
+        if entry.action == 'create':
+            return "👥 Создано приглашение для кредитора"
+        return "👥 Приглашение использовано"
+    
+    if entry.action == 'create':
+        return "🆕 Долг создан"
+    if entry.action == 'close':
+        note = after.get('close_note')
+        return "🔒 Долг закрыт" + (f": {note}" if note else "")
+    
+    # before/after — полные состояния, поэтому смотрим только на изменившиеся поля
+    changed = {key for key in set(before) | set(after) if before.get(key) != after.get(key)}
+    
+    if 'imported_payments' in changed or 'imported_total' in changed:
+        return (
+            f"📥 Импорт из выписки: {after.get('imported_payments')} платежей на "
+            f"{_format_amount(after.get('imported_total'), debt.currency)}"
+        )
+    if 'creditor_user_id' in changed and not changed & {'monthly_payment', 'due_day'}:
+        return "🤝 Кредитор принял приглашение"
+    
+    changes = []
+    if 'monthly_payment' in changed:
+        changes.append(f"платёж {_format_amount(after.get('monthly_payment'), debt.currency)}")
+    if 'due_day' in changed:
+        changes.append(f"день платежа {after.get('due_day') or '—'}")
+    if changes:
+        return "✏️ Изменены условия: " + ", ".join(changes)
+    return "✏️ Долг изменён"
+
+
+def format_history(debt: Debt, page: AuditPage, viewer_user_id: int) -> str:
+    """Форматирует страницу истории долга."""
+    text = f"<b>📜 История: {debt.name}</b>\n\n"
+    
+    if not page.entries:
+        return text + "Событий пока нет."
+    
+    for entry in page.entries:
+        if entry.actor_user_id == viewer_user_id:
+            actor = "вы"
+        elif entry.actor_user_id == debt.debtor_user_id:
+            actor = "должник"
+        else:
+            actor = "кредитор"
+        text += f"<i>{entry.occurred_at.strftime('%d.%m.%Y %H:%M')}</i> ({actor})\n"
+        text += f"{describe_audit_entry(entry, debt)}\n\n"
+    
+    return text
+
+
+async def debt_history_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показывает историю долга (формат: debt:history:<debt_id>[:<cursor>])."""
+    query = update.callback_query
+    if query:
+        await query.answer()
+    
+    user = update.effective_user
+    if user is None or query is None:
+        return
+    
+    parts = query.data.split(':')
+    try:
+        debt_id = int(parts[2])
+    except (IndexError, ValueError):
+        await query.answer("Ошибка: неверный ID долга", show_alert=True)
+        return
+    cursor = parts[3] if len(parts) > 3 else None
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    debt_service = DebtService()
+    audit_service = AuditService()
+    
+    try:
+        page = await audit_service.get_debt_history(debt_id, db_user.id, cursor=cursor)
+    except PermissionError:
+        await query.answer("Нет доступа к этому долгу", show_alert=True)
+        return
+    except ValueError as e:
+        await query.answer(str(e), show_alert=True)
+        return
+    
+    debt = await debt_service.get_debt_by_id(debt_id)
+    if debt is None:
+        await query.answer("Долг не найден", show_alert=True)
+        return
+    
+    if query.message:
+        await query.message.edit_text(
+            format_history(debt, page, db_user.id),
+            reply_markup=get_history_keyboard(debt_id, page, is_first_page=cursor is None),
+            parse_mode='HTML'
+        )
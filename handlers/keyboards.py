@@ -9,6 +9,11 @@ def get_main_menu_keyboard() -> InlineKeyboardMarkup:
     keyboard = [
         [InlineKeyboardButton("📋 Мои долги", callback_data="debts:list")],
         [InlineKeyboardButton("➕ Создать долг", callback_data="debt:create")],
+        [InlineKeyboardButton("🧮 Стратегия погашения", callback_data="portfolio")],
+        [InlineKeyboardButton("📆 Платежи по месяцам", callback_data="cashflow")],
+        [InlineKeyboardButton("📊 Мне должны", callback_data="dashboard")],
+        [InlineKeyboardButton("⏰ Просрочки", callback_data="arrears")],
+        [InlineKeyboardButton("📤 Экспорт данных", callback_data="export")],
         [InlineKeyboardButton("ℹ️ Помощь", callback_data="help")]
     ]
     return InlineKeyboardMarkup(keyboard)
@@ -61,10 +66,13 @@ def get_debt_detail_keyboard(debt_id: int, is_debtor: bool, is_closed: bool) ->
         # Только должник может редактировать активные долги
         keyboard.append([InlineKeyboardButton("✏️ Редактировать", callback_data=f"debt:edit:{debt_id}")])
         keyboard.append([InlineKeyboardButton("💰 Добавить платёж", callback_data=f"payment:add:{debt_id}")])
+        keyboard.append([InlineKeyboardButton("🔮 Что если...", callback_data=f"debt:whatif:{debt_id}")])
         keyboard.append([InlineKeyboardButton("👥 Пригласить кредитора", callback_data=f"invite:create:{debt_id}")])
         keyboard.append([InlineKeyboardButton("🔒 Закрыть долг", callback_data=f"debt:close:{debt_id}")])
     
     keyboard.append([InlineKeyboardButton("📄 Платежи", callback_data=f"payments:list:{debt_id}")])
+    keyboard.append([InlineKeyboardButton("📜 История", callback_data=f"debt:history:{debt_id}")])
+    keyboard.append([InlineKeyboardButton("📅 Остаток на дату", callback_data=f"debt:balance:{debt_id}")])
     keyboard.append([InlineKeyboardButton("◀️ Назад к списку", callback_data="debts:list")])
     
     return InlineKeyboardMarkup(keyboard)
@@ -84,6 +92,7 @@ def get_payments_list_keyboard(debt_id: int, payment_ids: list[int], is_debtor:
     
     if is_debtor and not is_closed:
         keyboard.append([InlineKeyboardButton("➕ Добавить платёж", callback_data=f"payment:add:{debt_id}")])
+        keyboard.append([InlineKeyboardButton("📥 Импорт из выписки", callback_data=f"payment:import:{debt_id}")])
     
     keyboard.append([InlineKeyboardButton("◀️ К долгу", callback_data=f"debt:{debt_id}")])
     
@@ -2,6 +2,7 @@
 Handlers для работы с платежами.
 """
 import logging
+import tempfile
 from datetime import date
 from decimal import Decimal
 from telegram import Update
@@ -10,13 +11,20 @@ from telegram.ext import ContextTypes
 logger = logging.getLogger(__name__)
 from handlers.keyboards import get_payments_list_keyboard, get_payment_delete_keyboard, get_cancel_keyboard
 from handlers.utils import parse_decimal, parse_date
+from config import config
 from services.payment_service import PaymentService
+from services.payment_import_service import PaymentImportService, ImportSummary
+from services.statement_parser import FORMAT_1C, FORMAT_OFX
 from services.debt_service import DebtService
 from repositories.user_repository import UserRepository
 
 # Константы состояний для ConversationHandler
 PAYMENT_AMOUNT = 0
 PAYMENT_DATE = 1
+PAYMENT_IMPORT_FILE = 2
+
+# Выписка больше этого размера при скачивании сохраняется во временный файл, а не в память
+IMPORT_SPOOL_MAX_BYTES = 1024 * 1024
 
 
 async def payments_list_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -138,6 +146,8 @@ async def payment_add_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Сохраняем debt_id в контексте
     context.user_data['payment_add_debt_id'] = debt_id
     context.user_data['payment_add_step'] = 'amount'
+    # Ключ идемпотентности: повторная доставка того же диалога не создаст второй платёж
+    context.user_data['payment_add_idempotency_key'] = f"tg:{user.id}:{query.id}"
     
     text = (
         "💰 <b>Добавление платежа</b>\n\n"
@@ -214,13 +224,15 @@ async def payment_add_date(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             debt_id=debt_id,
             amount=amount,
             payment_date=payment_date,
-            user_id=db_user.id
+            user_id=db_user.id,
+            idempotency_key=context.user_data.get('payment_add_idempotency_key')
         )
         
         # Очищаем данные
         context.user_data.pop('payment_add_debt_id', None)
         context.user_data.pop('payment_add_amount', None)
         context.user_data.pop('payment_add_step', None)
+        context.user_data.pop('payment_add_idempotency_key', None)
         
         # Показываем сообщение об успехе с кнопкой возврата к долгу
         from telegram import InlineKeyboardButton, InlineKeyboardMarkup
@@ -354,3 +366,141 @@ async def payment_delete_callback(update: Update, context: ContextTypes.DEFAULT_
     except Exception as e:
         await query.answer(f"Ошибка: {str(e)}", show_alert=True)
 
+
+async def payment_import_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Начинает импорт платежей из банковской выписки."""
+    query = update.callback_query
+    user = update.effective_user
+    if query is None or user is None:
+        return -1
+    
+    try:
+        debt_id = int(query.data.split(':')[2])
+    except (IndexError, ValueError):
+        await query.answer("Ошибка: неверный ID долга", show_alert=True)
+        return -1
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    debt_service = DebtService()
+    debt = await debt_service.get_debt_by_id(debt_id)
+    if debt is None or debt.debtor_user_id != db_user.id:
+        await query.answer("Только должник может добавлять платежи", show_alert=True)
+        return -1
+    if debt.status == 'closed':
+        await query.answer("Нельзя добавлять платежи к закрытому долгу", show_alert=True)
+        return -1
+    
+    await query.answer()
+    context.user_data['payment_import_debt_id'] = debt_id
+    
+    text = (
+        "📥 <b>Импорт платежей из выписки</b>\n\n"
+        "Отправьте файл выписки одним документом:\n"
+        "• CSV с колонками «Дата» и «Сумма» (разделитель «;» или «,»); "
+        "платежи — со знаком минус, как списания в выписке банка\n"
+        "• OFX из интернет-банка\n"
+        "• выгрузку 1C «Клиент-банк» (1CClientBankExchange)\n\n"
+        "Выгрузите только платежи по этому долгу. "
+        "Платежи, которые уже внесены (та же дата и сумма), будут пропущены."
+    )
+    if query.message:
+        await query.message.edit_text(text, reply_markup=get_cancel_keyboard(), parse_mode='HTML')
+    
+    return PAYMENT_IMPORT_FILE
+
+
+async def payment_import_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Принимает файл выписки и импортирует платежи."""
+    document = update.message.document if update.message else None
+    user = update.effective_user
+    if document is None or user is None:
+        return PAYMENT_IMPORT_FILE
+    
+    debt_id = context.user_data.get('payment_import_debt_id')
+    if not debt_id:
+        await update.message.reply_text("❌ Ошибка: не найден ID долга.")
+        return -1
+    
+    max_bytes = config.PAYMENT_IMPORT_MAX_FILE_MB * 1024 * 1024
+    if document.file_size and document.file_size > max_bytes:
+        await update.message.reply_text(
+            f"❌ Файл слишком большой (максимум {config.PAYMENT_IMPORT_MAX_FILE_MB} МБ). "
+            "Разделите выписку на части.",
+            reply_markup=get_cancel_keyboard()
+        )
+        return PAYMENT_IMPORT_FILE
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    await update.message.reply_text("⏳ Импортирую платежи...")
+    
+    import_service = PaymentImportService()
+    
+    try:
+        # Небольшие выписки остаются в памяти, большие уходят во временный файл
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_BYTES) as raw:
+            telegram_file = await document.get_file()
+            await telegram_file.download_to_memory(out=raw)
+            
+            summary = await import_service.import_statement(
+                debt_id=debt_id,
+                user_id=db_user.id,
+                raw=raw,
+                filename=document.file_name
+            )
+        
+        context.user_data.pop('payment_import_debt_id', None)
+        
+        from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+        keyboard = InlineKeyboardMarkup([
+            [InlineKeyboardButton("📄 Платежи", callback_data=f"payments:list:{debt_id}")],
+            [InlineKeyboardButton("◀️ К долгу", callback_data=f"debt:{debt_id}")]
+        ])
+        await update.message.reply_text(format_import_summary(summary), reply_markup=keyboard)
+        logger.info(
+            f"Payments imported: debt_id={debt_id}, imported={summary.imported}, "
+            f"duplicates={summary.duplicates}, errors={summary.error_count}"
+        )
+        return -1
+    
+    except PermissionError:
+        await update.message.reply_text("❌ Только должник может добавлять платежи.")
+        return -1
+    except ValueError as e:
+        await update.message.reply_text(f"❌ Ошибка: {str(e)}", reply_markup=get_cancel_keyboard())
+        return PAYMENT_IMPORT_FILE
+
+
+async def payment_import_expect_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Отвечает на сообщение без файла во время импорта выписки."""
+    if update.message:
+        await update.message.reply_text(
+            "📎 Ожидается файл выписки (CSV, OFX или 1C), отправленный документом.",
+            reply_markup=get_cancel_keyboard()
+        )
+    return PAYMENT_IMPORT_FILE
+
+
+def format_import_summary(summary: ImportSummary) -> str:
+    """Форматирует итог импорта выписки."""
+    source = {FORMAT_OFX: "OFX", FORMAT_1C: "1C"}.get(summary.format, "CSV")
+    
+    text = f"✅ Импорт выписки ({source}) завершён\n\n"
+    text += f"Добавлено платежей: {summary.imported}\n"
+    if summary.imported:
+        text += f"На сумму: {summary.total_amount:,.2f}\n"
+        text += (
+            f"Период: {summary.first_date.strftime('%d.%m.%Y')} — "
+            f"{summary.last_date.strftime('%d.%m.%Y')}\n"
+        )
+    if summary.duplicates:
+        text += f"Пропущено (уже внесены): {summary.duplicates}\n"
+    if summary.error_count:
+        text += f"\n⚠️ Не удалось разобрать строк: {summary.error_count}\n"
+        for line_no, message in summary.errors:
+            text += f"  строка {line_no}: {message}\n"
+    
+    return text
@@ -0,0 +1,222 @@
+"""
+Handlers для совместного плана погашения всех долгов.
+"""
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from handlers.keyboards import get_cancel_keyboard, get_main_menu_keyboard
+from handlers.utils import parse_decimal
+from models.debt import Debt
+from services.portfolio_service import (
+    PortfolioService,
+    PortfolioPlan,
+    STRATEGY_AVALANCHE,
+    STRATEGY_SNOWBALL,
+    STRATEGY_CUSTOM,
+)
+from repositories.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+# Константы состояний для ConversationHandler
+PORTFOLIO_BUDGET = 0
+
+STRATEGY_TITLES = {
+    STRATEGY_AVALANCHE: "🏔 Лавина",
+    STRATEGY_SNOWBALL: "⛄️ Снежный ком",
+    STRATEGY_CUSTOM: "🎯 Свой порядок",
+}
+
+# Сколько месяцев плана показывать в сообщении
+SCHEDULE_PREVIEW_MONTHS = 12
+
+
+def get_portfolio_keyboard(strategies: List[str], current: str) -> InlineKeyboardMarkup:
+    """
+    Возвращает клавиатуру переключения стратегий.
+    
+    Args:
+        strategies: Рассчитанные стратегии
+        current: Показанная стратегия
+    """
+    row = [
+        InlineKeyboardButton(
+            f"• {STRATEGY_TITLES[strategy]}" if strategy == current else STRATEGY_TITLES[strategy],
+            callback_data=f"portfolio:show:{strategy}"
+        )
+        for strategy in strategies
+    ]
+    keyboard = [row, [InlineKeyboardButton("🏠 Главное меню", callback_data="start")]]
+    return InlineKeyboardMarkup(keyboard)
+
+
+def format_portfolio_plan(plan: PortfolioPlan, debts: List[Tuple[Debt, Decimal]]) -> str:
+    """Форматирует совместный план погашения."""
+    currency = debts[0][0].currency
+    
+    text = f"<b>{STRATEGY_TITLES[plan.strategy]}</b> — {plan.budget:,.2f} {currency} в месяц\n\n"
+    
+    if plan.is_complete and plan.months:
+        last = plan.months[-1].month
+        text += f"Все долги погашены: {last.strftime('%m.%Y')} ({len(plan.months)} мес.)\n"
+    else:
+        text += f"⚠️ За {len(plan.months)} мес. погасить все долги не удаётся\n"
+    text += f"Всего выплат: {plan.total_paid:,.2f} {currency}\n\n"
+    
+    text += "<b>Погашение долгов:</b>\n"
+    # Сначала погашаемые раньше, непогашенные в конце
+    payoffs = sorted(plan.payoff_dates.items(), key=lambda item: (item[1] is None, item[1] or date.max))
+    names = {debt.id: debt.name for debt, _ in debts}
+    for debt_id, payoff in payoffs:
+        text += f"• {names[debt_id]} — {payoff.strftime('%d.%m.%Y') if payoff else 'не погашен'}\n"
+    
+    text += "\n<b>По месяцам:</b>\n"
+    preview = plan.months[:SCHEDULE_PREVIEW_MONTHS]
+    for month in preview:
+        text += f"{month.month.strftime('%m.%Y')}: {month.total:,.2f} (остаток {month.remaining:,.2f})\n"
+    if len(plan.months) > len(preview):
+        last = plan.months[-1]
+        text += f"...\n{last.month.strftime('%m.%Y')}: {last.total:,.2f} (остаток {last.remaining:,.2f})\n"
+    
+    return text
+
+
+def parse_portfolio_input(text: str, debts: List[Tuple[Debt, Decimal]]) -> Tuple[Optional[Decimal], Optional[List[int]]]:
+    """
+    Разбирает ввод «бюджет [номера долгов в порядке погашения]».
+    
+    Returns:
+        (бюджет, ID долгов в порядке пользователя или None); бюджет None при ошибке
+    """
+    parts = text.split()
+    if not parts:
+        return None, None
+    
+    budget = parse_decimal(parts[0])
+    if budget is None or budget <= 0:
+        return None, None
+    
+    if len(parts) == 1:
+        return budget, None
+    
+    try:
+        positions = [int(part) for part in parts[1:]]
+    except ValueError:
+        return None, None
+    if sorted(positions) != list(range(1, len(debts) + 1)):
+        return None, None
+    
+    return budget, [debts[position - 1][0].id for position in positions]
+
+
+async def portfolio_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Показывает активные долги и запрашивает ежемесячный бюджет."""
+    query = update.callback_query
+    user = update.effective_user
+    if query is None or user is None:
+        return -1
+    
+    await query.answer()
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    portfolio_service = PortfolioService()
+    debts = await portfolio_service.get_active_debts(db_user.id)
+    
+    if not debts:
+        await query.message.edit_text(
+            "У вас нет активных долгов с остатком.",
+            reply_markup=get_main_menu_keyboard()
+        )
+        return -1
+    
+    context.user_data['portfolio_debt_ids'] = [debt.id for debt, _ in debts]
+    
+    text = "<b>🧮 Стратегия погашения</b>\n\n"
+    for i, (debt, balance) in enumerate(debts, 1):
+        text += f"{i}. {debt.name} — остаток {balance:,.2f} {debt.currency}"
+        if debt.monthly_payment:
+            text += f", платёж {debt.monthly_payment:,.2f}"
+        text += "\n"
+    text += (
+        "\nВведите, сколько в месяц вы готовы направлять на все долги.\n"
+        "Чтобы задать свой порядок погашения, добавьте номера долгов через пробел, "
+        "например: <code>30000 2 1 3</code>"
+    )
+    
+    await query.message.edit_text(text, reply_markup=get_cancel_keyboard(), parse_mode='HTML')
+    return PORTFOLIO_BUDGET
+
+
+async def portfolio_budget(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Рассчитывает планы по всем стратегиям и показывает первый."""
+    user = update.effective_user
+    if user is None or update.message is None:
+        return -1
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    portfolio_service = PortfolioService()
+    debts = await portfolio_service.get_active_debts(db_user.id)
+    
+    # Список мог измениться, пока пользователь вводил бюджет: номера были бы другими
+    if [debt.id for debt, _ in debts] != context.user_data.get('portfolio_debt_ids'):
+        await update.message.reply_text(
+            "❌ Список долгов изменился. Начните заново.",
+            reply_markup=get_main_menu_keyboard()
+        )
+        return -1
+    
+    budget, priority = parse_portfolio_input(update.message.text.strip(), debts)
+    if budget is None:
+        await update.message.reply_text(
+            "❌ Введите положительную сумму и, по желанию, номера всех долгов по одному разу:",
+            reply_markup=get_cancel_keyboard()
+        )
+        return PORTFOLIO_BUDGET
+    
+    try:
+        plans = portfolio_service.compare(debts, budget, priority=priority)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {str(e)}", reply_markup=get_cancel_keyboard())
+        return PORTFOLIO_BUDGET
+    
+    # Переключение стратегий показывает уже готовый текст, без пересчёта
+    views: Dict[str, str] = {strategy: format_portfolio_plan(plan, debts) for strategy, plan in plans.items()}
+    context.user_data['portfolio_views'] = views
+    context.user_data.pop('portfolio_debt_ids', None)
+    
+    current = STRATEGY_CUSTOM if priority else STRATEGY_AVALANCHE
+    await update.message.reply_text(
+        views[current],
+        reply_markup=get_portfolio_keyboard(list(views), current),
+        parse_mode='HTML'
+    )
+    
+    logger.info(f"Portfolio planned: user_id={db_user.id}, debts={len(debts)}, strategies={list(views)}")
+    return -1
+
+
+async def portfolio_show_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Переключает показанную стратегию (формат: portfolio:show:<strategy>)."""
+    query = update.callback_query
+    if query is None:
+        return
+    
+    strategy = query.data.split(':')[2]
+    views = context.user_data.get('portfolio_views') or {}
+    if strategy not in views:
+        await query.answer("Расчёт устарел, постройте план заново", show_alert=True)
+        return
+    
+    await query.answer()
+    await query.message.edit_text(
+        views[strategy],
+        reply_markup=get_portfolio_keyboard(list(views), strategy),
+        parse_mode='HTML'
+    )
@@ -1,10 +1,50 @@
 """
 Handler для команды /start.
 """
+from datetime import date
+from typing import Optional
 from telegram import Update
 from telegram.ext import ContextTypes
+from handlers.dashboard import format_converted_total
 from handlers.keyboards import get_main_menu_keyboard
+from models.user_summary import UserSummary
 from repositories.user_repository import UserRepository
+from services.fx_service import ConvertedTotal, FxService
+from services.summary_service import UserSummaryService
+
+
+def _format_amounts(amounts) -> str:
+    """Суммы по валютам через запятую."""
+    return ", ".join(f"{amount:,.2f} {currency}" for currency, amount in sorted(amounts.items()))
+
+
+def format_user_summary(
+    summary: UserSummary,
+    debtor_total: Optional[ConvertedTotal] = None,
+    creditor_total: Optional[ConvertedTotal] = None,
+    today: Optional[date] = None
+) -> str:
+    """
+    Форматирует сводку пользователя для главного меню (с итогами в одной валюте, если они есть).
+    
+    Сводка пересчитывается при изменениях и ночном обслуживании планов, поэтому
+    ближайший платёж в ней может уже пройти: такая дата не показывается.
+    """
+    today = today or date.today()
+    text = ""
+    if summary.debtor_active:
+        text += f"💸 Вы должны ({summary.debtor_active}): {_format_amounts(summary.debtor_outstanding)}\n"
+        if debtor_total is not None:
+            text += format_converted_total("Всего", debtor_total)
+        if summary.debtor_next_due and summary.debtor_next_due >= today:
+            text += f"Ближайший платёж: {summary.debtor_next_due.strftime('%d.%m.%Y')}\n"
+    if summary.creditor_active:
+        text += f"💰 Вам должны ({summary.creditor_active}): {_format_amounts(summary.creditor_outstanding)}\n"
+        if creditor_total is not None:
+            text += format_converted_total("Всего", creditor_total)
+        if summary.creditor_next_due and summary.creditor_next_due >= today:
+            text += f"Ближайшее поступление: {summary.creditor_next_due.strftime('%d.%m.%Y')}\n"
+    return text
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -29,9 +69,24 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     text = (
         "👋 Добро пожаловать в <b>Debt Tracker</b>!\n\n"
         "Я помогу вам вести учёт задолженностей.\n\n"
-        "Выберите действие:"
     )
     
+    # Сводка хранится готовой: одно чтение по первичному ключу
+    summary = await UserSummaryService().get_summary(db_user.id)
+    if summary is not None:
+        # Остатки в разных валютах сводятся в одну; курсы берутся из кэша FxService
+        fx_service = FxService()
+        debtor_total = creditor_total = None
+        if len(summary.debtor_outstanding) > 1:
+            debtor_total = await fx_service.convert_totals(summary.debtor_outstanding)
+        if len(summary.creditor_outstanding) > 1:
+            creditor_total = await fx_service.convert_totals(summary.creditor_outstanding)
+        summary_text = format_user_summary(summary, debtor_total, creditor_total)
+        if summary_text:
+            text += summary_text + "\n"
+    
+    text += "Выберите действие:"
+    
     if update.message:
         await update.message.reply_text(
             text,
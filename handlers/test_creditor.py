@@ -4,14 +4,19 @@ Handler for test command /test_creditor.
 Allows quickly assigning yourself as creditor for testing purposes.
 """
 import logging
+import asyncpg
 from telegram import Update
 from telegram.ext import ContextTypes
+from metrics import metrics
+from models.debt import Debt
 from repositories.user_repository import UserRepository
-from repositories.debt_repository import DebtRepository
+from repositories.debt_repository import DebtRepository, DebtVersionConflictError, VERSION_CONFLICT_RETRIES
 from services.debt_service import DebtService
 from services.payment_service import PaymentService
-from services.planner_service import PlannerService
+from services.plan_service import PaymentPlanService
 from services.audit_service import AuditService
+from services.dashboard_service import invalidate_creditor_dashboard
+from services.summary_service import UserSummaryService
 from handlers.utils import format_debt_info, format_payment_plan
 from handlers.keyboards import get_debt_detail_keyboard
 from database import Database
@@ -66,8 +71,6 @@ async def test_creditor_command(update: Update, context: ContextTypes.DEFAULT_TY
     db_user = await user_repo.create_or_get_by_tg_id(user.id)
     
     debt_service = DebtService()
-    debt_repo = DebtRepository()
-    audit_service = AuditService()
     
     # Check if debt exists
     debt = await debt_service.get_debt_by_id(debt_id)
@@ -81,47 +84,12 @@ async def test_creditor_command(update: Update, context: ContextTypes.DEFAULT_TY
         await show_debt_as_creditor(update, debt_id, debt)
         return
     
-    # Save state before change for audit
-    debt_before = {
-        'debt_id': debt.id,
-        'creditor_user_id': debt.creditor_user_id,
-    }
-    
-    # Update debt, assigning user as creditor
-    pool = await Database.get_pool()
-    conn = await pool.acquire()
-    
     try:
-        async with conn.transaction():
-            # Update debt
-            updated_debt = await debt_repo.update(
-                debt_id=debt_id,
-                creditor_user_id=db_user.id,
-                conn=conn
-            )
-            
-            if updated_debt is None:
-                raise ValueError("Не удалось обновить долг")
-            
-            # Log change in audit
-            debt_after = {
-                'debt_id': updated_debt.id,
-                'creditor_user_id': updated_debt.creditor_user_id,
-            }
-            await audit_service.log_update(
-                entity_type='debt',
-                entity_id=debt_id,
-                actor_user_id=db_user.id,
-                before=debt_before,
-                after=debt_after,
-                conn=conn
-            )
-            
-            logger.info(
-                f"Test creditor assigned: user_id={db_user.id}, username={user.username}, "
-                f"debt_id={debt_id}"
-            )
-    
+        await assign_test_creditor(debt, db_user.id)
+        logger.info(
+            f"Test creditor assigned: user_id={db_user.id}, username={user.username}, "
+            f"debt_id={debt_id}"
+        )
     except Exception as e:
         logger.error(f"Error assigning test creditor: {e}", exc_info=True)
         await update.message.reply_text(
@@ -129,9 +97,6 @@ async def test_creditor_command(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return
     
-    finally:
-        await pool.release(conn)
-    
     # Get updated debt info (now user is creditor)
     updated_debt = await debt_service.get_debt_by_id(debt_id)
     if updated_debt is None:
@@ -152,6 +117,75 @@ async def test_creditor_command(update: Update, context: ContextTypes.DEFAULT_TY
     await show_debt_as_creditor(update, debt_id, updated_debt)
 
 
+async def assign_test_creditor(debt: Debt, creditor_user_id: int) -> Debt:
+    """
+    Assigns creditor the same way as InviteService._accept, without an invite.
+    
+    Runs in Database.run_transaction with optimistic version check (retried on
+    conflict), writes audit, refreshes user summaries and drops cached creditor
+    dashboards of both the previous and the new creditor.
+    
+    Args:
+        debt: Debt as read before the change
+        creditor_user_id: ID of the new creditor
+    
+    Returns:
+        Updated debt
+    
+    Raises:
+        ValueError: If debt disappeared
+        DebtVersionConflictError: If debt keeps changing concurrently
+    """
+    debt_repo = DebtRepository()
+    audit_service = AuditService()
+    summary_service = UserSummaryService()
+    
+    attempt = 0
+    while True:
+        current = debt
+        
+        async def body(conn: asyncpg.Connection) -> Debt:
+            updated_debt = await debt_repo.update(
+                debt_id=current.id,
+                creditor_user_id=creditor_user_id,
+                expected_version=current.version,
+                conn=conn
+            )
+            if updated_debt is None:
+                raise ValueError("Не удалось обновить долг")
+            
+            await audit_service.log_update(
+                entity_type='debt',
+                entity_id=current.id,
+                actor_user_id=creditor_user_id,
+                before={'debt_id': current.id, 'creditor_user_id': current.creditor_user_id},
+                after={'debt_id': updated_debt.id, 'creditor_user_id': updated_debt.creditor_user_id},
+                conn=conn
+            )
+            
+            await summary_service.refresh(
+                [current.debtor_user_id, current.creditor_user_id, creditor_user_id], conn
+            )
+            return updated_debt
+        
+        try:
+            updated = await Database.run_transaction(body, name='debt.test_creditor')
+            break
+        except DebtVersionConflictError:
+            attempt += 1
+            metrics.inc("debts.version_conflicts")
+            if attempt > VERSION_CONFLICT_RETRIES:
+                raise
+        
+        debt = await debt_repo.get_fresh(debt.id)
+        if debt is None:
+            raise ValueError("Долг не найден")
+    
+    invalidate_creditor_dashboard(current.creditor_user_id)
+    invalidate_creditor_dashboard(creditor_user_id)
+    return updated
+
+
 async def show_debt_as_creditor(update: Update, debt_id: int, debt) -> None:
     """
     Shows debt details from creditor perspective.
@@ -168,8 +202,7 @@ async def show_debt_as_creditor(update: Update, debt_id: int, debt) -> None:
     # Get actual payments for marking completed ones
     actual_payments = await payment_service.get_payments_by_debt(debt_id, include_deleted=False)
     
-    planner_service = PlannerService()
-    plan_items = await planner_service.calculate_payment_plan(debt, balance)
+    plan_items = await PaymentPlanService().get_plan(debt_id)
     
     # Format debt information
     debt_info = await format_debt_info(debt, balance)
@@ -0,0 +1,97 @@
+"""
+Обработчик входящих updates с привязкой контекста БД.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from config import config
+from database import Database
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Ответ на нажатие кнопки, когда запрос отклонён из-за перегрузки
+OVERLOADED_ANSWER = "⏳ Сервис перегружен, попробуйте ещё раз через несколько секунд"
+# Ответ, когда запрос к БД или обработка update заняли слишком много времени
+TIMEOUT_ANSWER = "⏳ Запрос выполнялся слишком долго, попробуйте ещё раз"
+# Ответ, когда транзакция не удалась из-за временной ошибки БД даже после повторов
+TRANSIENT_ERROR_ANSWER = "⏳ Временная ошибка базы данных, попробуйте ещё раз"
+
+
+class DatabaseContextUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обрабатывает updates, устанавливая текущего пользователя для слоя БД.
+
+    Database использует текущего пользователя для маршрутизации чтений:
+    после записи чтения того же пользователя идут на primary.
+
+    Если очередь ожидания пула подключений заполнена, нажатия кнопок сразу
+    получают ответ «попробуйте ещё раз» и не обрабатываются (load shedding).
+
+    Обработка update ограничена UPDATE_DEADLINE_SECONDS: по истечении срока
+    задача отменяется, а вместе с ней и выполняющиеся запросы к БД.
+    """
+
+    async def initialize(self) -> None:
+        """Инициализация не требуется."""
+
+    async def shutdown(self) -> None:
+        """Освобождение ресурсов не требуется."""
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Обрабатывает update в контексте его пользователя."""
+        if Database.is_overloaded() and isinstance(update, Update) and update.callback_query:
+            await self._shed(update, coroutine)
+            return
+
+        actor_id = None
+        if isinstance(update, Update) and update.effective_user:
+            actor_id = update.effective_user.id
+
+        token = Database.set_actor(actor_id)
+        try:
+            await asyncio.wait_for(coroutine, timeout=config.UPDATE_DEADLINE_SECONDS)
+        except asyncio.TimeoutError:
+            metrics.inc("updates.abandoned")
+            logger.warning(
+                f"Update processing exceeded {config.UPDATE_DEADLINE_SECONDS}s and was cancelled"
+            )
+            await reply_retry_later(update, TIMEOUT_ANSWER)
+        finally:
+            Database.reset_actor(token)
+
+    async def _shed(self, update: Update, coroutine: Awaitable[Any]) -> None:
+        """Отклоняет нажатие кнопки с просьбой повторить позже."""
+        metrics.inc("updates.shed")
+        # Корутина обработки не будет выполнена — закрываем её без предупреждений
+        close = getattr(coroutine, 'close', None)
+        if close is not None:
+            close()
+        await reply_retry_later(update, OVERLOADED_ANSWER)
+
+
+async def reply_retry_later(update: object, text: str) -> None:
+    """
+    Быстро сообщает пользователю, что запрос нужно повторить.
+
+    Для нажатия кнопки отвечает на callback, чтобы кнопка не «зависла»;
+    если callback уже отвечен, отправляет сообщение.
+    """
+    if not isinstance(update, Update):
+        return
+    try:
+        if update.callback_query:
+            await update.callback_query.answer(text)
+        elif update.effective_message:
+            await update.effective_message.reply_text(text)
+        return
+    except Exception as e:
+        logger.debug(f"Failed to answer update directly: {e}")
+
+    if update.callback_query and update.effective_message:
+        try:
+            await update.effective_message.reply_text(text)
+        except Exception as e:
+            logger.warning(f"Failed to send retry-later reply: {e}")
@@ -6,6 +6,7 @@ from datetime import date
 from typing import Optional, List
 from models.debt import Debt
 from models.payment import Payment
+from services.amortization import SCHEDULE_DIFFERENTIATED
 from services.payment_service import PaymentService
 from services.planner_service import PaymentPlanItem
 
@@ -40,6 +41,10 @@ async def format_debt_info(debt: Debt, balance: Optional[Decimal] = None) -> str
     if debt.due_day:
         text += f"День платежа: {debt.due_day}\n"
     
+    if debt.interest_rate:
+        schedule = "дифференцированный" if debt.amortization == SCHEDULE_DIFFERENTIATED else "аннуитетный"
+        text += f"Ставка: {debt.interest_rate.normalize():f}% годовых ({schedule} график, {debt.day_count})\n"
+    
     if debt.close_note:
         text += f"\nПримечание: {debt.close_note}\n"
     
@@ -104,7 +109,8 @@ async def format_payment_plan(
         """Форматирует один элемент плана."""
         paid_mark = " ✅" if is_paid else ""
         final_mark = " (финальный)" if item.is_final else ""
-        return f"{index}. {item.payment_date.strftime('%d.%m.%Y')} — {item.amount:,.2f}{paid_mark}{final_mark}\n"
+        interest_mark = f" (проценты {item.interest:,.2f})" if item.interest else ""
+        return f"{index}. {item.payment_date.strftime('%d.%m.%Y')} — {item.amount:,.2f}{interest_mark}{paid_mark}{final_mark}\n"
     
     # Форматируем все платежи с проверкой выполненных
     all_lines = []
@@ -0,0 +1,148 @@
+"""
+Handlers для сценариев «что если» по плану погашения.
+"""
+from typing import Dict, List
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from models.debt import Debt
+from services.debt_service import DebtService
+from services.payment_service import PaymentService
+from services.whatif_service import WhatIfService, ScenarioResult, SCENARIO_CURRENT
+from repositories.user_repository import UserRepository
+
+
+def get_whatif_keyboard(debt_id: int, keys: List[str], titles: Dict[str, str], current: str) -> InlineKeyboardMarkup:
+    """
+    Возвращает клавиатуру переключения сценариев.
+    
+    Args:
+        debt_id: ID долга
+        keys: Ключи сценариев
+        titles: Ключ -> название сценария
+        current: Показанный сценарий
+    """
+    keyboard = []
+    row = []
+    for key in keys:
+        title = f"• {titles[key]}" if key == current else titles[key]
+        row.append(InlineKeyboardButton(title, callback_data=f"debt:whatif:{debt_id}:{key}"))
+        if len(row) == 2:
+            keyboard.append(row)
+            row = []
+    if row:
+        keyboard.append(row)
+    
+    keyboard.append([InlineKeyboardButton("✏️ Изменить платёж", callback_data=f"debt:edit:{debt_id}")])
+    keyboard.append([InlineKeyboardButton("◀️ К долгу", callback_data=f"debt:{debt_id}")])
+    return InlineKeyboardMarkup(keyboard)
+
+
+def _format_delta_months(months: int) -> str:
+    """Описывает сдвиг даты погашения."""
+    if months < 0:
+        return f"на {-months} мес. раньше"
+    if months > 0:
+        return f"на {months} мес. позже"
+    return "в тот же месяц"
+
+
+def format_scenario(result: ScenarioResult, currency: str) -> str:
+    """Форматирует итог сценария и его отличие от текущего плана."""
+    text = f"<b>🔮 {result.scenario.title}</b>\n\n"
+    
+    text += f"Погашение: {result.payoff_date.strftime('%d.%m.%Y')}"
+    if result.scenario.key != SCENARIO_CURRENT:
+        text += f" ({_format_delta_months(result.months_delta)})"
+    text += "\n"
+    
+    text += f"Платежей: {result.installments}"
+    if result.installments_delta:
+        text += f" ({result.installments_delta:+d})"
+    text += "\n"
+    
+    text += f"Последний платёж: {result.final_payment:,.2f} {currency}"
+    if result.final_payment_delta:
+        text += f" ({result.final_payment_delta:+,.2f})"
+    text += "\n"
+    
+    if result.total_interest:
+        text += f"Проценты за весь срок: {result.total_interest:,.2f} {currency}"
+        if result.interest_delta:
+            text += f" ({result.interest_delta:+,.2f})"
+        text += "\n"
+    
+    if result.scenario.extra_payment:
+        text += f"\nРазовый платёж {result.scenario.extra_payment:,.2f} {currency} вносится вместе с ближайшим платежом.\n"
+    
+    return text
+
+
+def format_payment_preview(debt: Debt, result: ScenarioResult) -> str:
+    """Кратко описывает, как изменится план при новом ежемесячном платеже."""
+    return (
+        f"📈 С платежом {result.scenario.monthly_payment:,.2f} {debt.currency} долг будет погашен "
+        f"{result.payoff_date.strftime('%d.%m.%Y')} ({_format_delta_months(result.months_delta)}, "
+        f"платежей: {result.installments})"
+    )
+
+
+async def debt_whatif_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Показывает сценарий «что если» (формат: debt:whatif:<debt_id>[:<сценарий>])."""
+    query = update.callback_query
+    user = update.effective_user
+    if query is None or user is None:
+        return
+    
+    parts = query.data.split(':')
+    try:
+        debt_id = int(parts[2])
+    except (IndexError, ValueError):
+        await query.answer("Ошибка: неверный ID долга", show_alert=True)
+        return
+    key = parts[3] if len(parts) > 3 else None
+    
+    user_repo = UserRepository()
+    db_user = await user_repo.create_or_get_by_tg_id(user.id)
+    
+    debt_service = DebtService()
+    if not await debt_service.check_access(debt_id, db_user.id):
+        await query.answer("Нет доступа к этому долгу", show_alert=True)
+        return
+    
+    debt = await debt_service.get_debt_by_id(debt_id)
+    if debt is None:
+        await query.answer("Долг не найден", show_alert=True)
+        return
+    
+    payment_service = PaymentService()
+    balance = await payment_service.calculate_balance(debt_id)
+    
+    # Переключение сценариев показывает уже рассчитанные результаты, пока не
+    # изменились условия долга (версия) и остаток
+    cache_key = (debt.cache_key, balance)
+    cached = context.user_data.get('whatif')
+    if cached is None or cached['key'] != cache_key:
+        whatif_service = WhatIfService()
+        try:
+            results = whatif_service.evaluate(debt, balance, whatif_service.default_scenarios(debt))
+        except ValueError as e:
+            await query.answer(str(e), show_alert=True)
+            return
+        
+        cached = {
+            'key': cache_key,
+            'views': {k: format_scenario(result, debt.currency) for k, result in results.items()},
+            'titles': {k: result.scenario.title for k, result in results.items()},
+        }
+        context.user_data['whatif'] = cached
+    
+    if key not in cached['views']:
+        key = SCENARIO_CURRENT
+    
+    await query.answer()
+    if query.message:
+        await query.message.edit_text(
+            cached['views'][key],
+            reply_markup=get_whatif_keyboard(debt_id, list(cached['views']), cached['titles'], key),
+            parse_mode='HTML'
+        )
@@ -19,7 +19,8 @@ from telegram.ext import (
 )
 
 from config import config
-from database import Database
+from database import Database, PoolOverloadedError, QueryTimeoutError, RETRYABLE_ERRORS
+from metrics import metrics
 from handlers.start import start_command
 from handlers.help import help_callback
 from handlers.debts import (
@@ -33,7 +34,11 @@ from handlers.payments import (
     payment_add_start,
     payment_add_amount,
     payment_add_date,
-    payment_delete_callback
+    payment_delete_callback,
+    payment_import_start,
+    payment_import_file,
+    payment_import_expect_file,
+    PAYMENT_IMPORT_FILE
 )
 from handlers.create_debt import (
     debt_create_start,
@@ -50,20 +55,37 @@ from handlers.edit_debt import (
     debt_edit_start,
     debt_edit_monthly_payment,
     debt_edit_due_day,
+    debt_edit_interest_rate,
     EDIT_MONTHLY_PAYMENT,
-    EDIT_DUE_DAY
+    EDIT_DUE_DAY,
+    EDIT_INTEREST_RATE
 )
 from handlers.invites import (
     invite_create_callback,
     invite_accept_command
 )
 from handlers.test_creditor import test_creditor_command
+from handlers.export import export_command, export_menu_callback, export_callback
+from handlers.history import debt_history_callback
+from handlers.whatif import debt_whatif_callback
+from handlers.balance import balance_as_of_start, balance_as_of_date, BALANCE_AS_OF_DATE
+from handlers.portfolio import portfolio_start, portfolio_budget, portfolio_show_callback, PORTFOLIO_BUDGET
+from handlers.arrears import arrears_callback
+from handlers.dashboard import creditor_dashboard_callback
+from handlers.cashflow import cashflow_callback
+from handlers.update_processor import (
+    DatabaseContextUpdateProcessor,
+    reply_retry_later,
+    OVERLOADED_ANSWER,
+    TIMEOUT_ANSWER,
+    TRANSIENT_ERROR_ANSWER
+)
 
 
 # Состояния для ConversationHandler
 PAYMENT_AMOUNT, PAYMENT_DATE = range(2)
 # DEBT_NAME, DEBT_AMOUNT, DEBT_MONTHLY_PAYMENT, DEBT_DUE_DAY импортируются из handlers.create_debt
-# EDIT_MONTHLY_PAYMENT, EDIT_DUE_DAY импортируются из handlers.edit_debt
+# EDIT_MONTHLY_PAYMENT, EDIT_DUE_DAY, EDIT_INTEREST_RATE импортируются из handlers.edit_debt
 
 
 # Настройка логирования
@@ -86,6 +108,25 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
     Логирует ошибку с полной информацией и отправляет пользователю понятное сообщение.
     """
     error = context.error
+    
+    # Перегрузка пула: быстрый ответ «попробуйте ещё раз» вместо общей ошибки
+    if isinstance(error, PoolOverloadedError):
+        logger.warning(f"Update shed due to database pool saturation: {error}")
+        await reply_retry_later(update, OVERLOADED_ANSWER)
+        return
+    
+    # Запрос превысил лимит времени и был отменён сервером
+    if isinstance(error, QueryTimeoutError):
+        logger.warning(f"Database query timed out: {error}")
+        await reply_retry_later(update, TIMEOUT_ANSWER)
+        return
+    
+    # Временная ошибка БД, не устранённая повторами транзакции
+    if isinstance(error, RETRYABLE_ERRORS):
+        logger.warning(f"Transient database error after retries: {type(error).__name__}: {error}")
+        await reply_retry_later(update, TRANSIENT_ERROR_ANSWER)
+        return
+    
     logger.error(
         f"Error handling update: {type(error).__name__}: {error}",
         exc_info=error,
@@ -120,6 +161,7 @@ async def post_shutdown(application: Application) -> None:
     Закрывает пул подключений к БД и другие ресурсы.
     """
     logger.info("Shutting down application...")
+    metrics.log_snapshot()
     try:
         await Database.close_pool()
         logger.info("Database pool closed successfully")
@@ -136,7 +178,14 @@ def main() -> None:
     Поддерживает graceful shutdown при получении сигналов SIGINT/SIGTERM.
     """
     # Создаём приложение
-    application = Application.builder().token(config.BOT_TOKEN).post_init(post_init).post_shutdown(post_shutdown).build()
+    application = (
+        Application.builder()
+        .token(config.BOT_TOKEN)
+        .concurrent_updates(DatabaseContextUpdateProcessor(config.MAX_CONCURRENT_UPDATES))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Настройка graceful shutdown для обработки сигналов
     def signal_handler(signum, frame):
@@ -164,6 +213,9 @@ def main() -> None:
     # Обработчик команды /help
     application.add_handler(CommandHandler("help", help_callback))
     
+    # Обработчик команды /export
+    application.add_handler(CommandHandler("export", export_command))
+    
     # Handler for test command /test_creditor (testing only)
     application.add_handler(CommandHandler("test_creditor", test_creditor_command))
     
@@ -193,12 +245,49 @@ def main() -> None:
     )
     application.add_handler(payment_add_conv)
     
+    # ConversationHandler для импорта платежей из выписки
+    payment_import_conv = ConversationHandler(
+        entry_points=[CallbackQueryHandler(payment_import_start, pattern="^payment:import:")],
+        states={
+            PAYMENT_IMPORT_FILE: [
+                MessageHandler(filters.Document.ALL, payment_import_file),
+                MessageHandler(filters.ALL & ~filters.COMMAND, payment_import_expect_file),
+            ],
+        },
+        fallbacks=[CallbackQueryHandler(cancel_callback, pattern="^cancel$"), CommandHandler("start", start_handler), CommandHandler("help", help_callback)],
+        name="payment_import",
+    )
+    application.add_handler(payment_import_conv)
+    
+    # ConversationHandler для остатка на дату
+    balance_as_of_conv = ConversationHandler(
+        entry_points=[CallbackQueryHandler(balance_as_of_start, pattern="^debt:balance:")],
+        states={
+            BALANCE_AS_OF_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, balance_as_of_date)],
+        },
+        fallbacks=[CallbackQueryHandler(cancel_callback, pattern="^cancel$")],
+        name="balance_as_of",
+    )
+    application.add_handler(balance_as_of_conv)
+    
+    # ConversationHandler для совместного плана погашения
+    portfolio_conv = ConversationHandler(
+        entry_points=[CallbackQueryHandler(portfolio_start, pattern="^portfolio$")],
+        states={
+            PORTFOLIO_BUDGET: [MessageHandler(filters.TEXT & ~filters.COMMAND, portfolio_budget)],
+        },
+        fallbacks=[CallbackQueryHandler(cancel_callback, pattern="^cancel$")],
+        name="portfolio",
+    )
+    application.add_handler(portfolio_conv)
+    
     # ConversationHandler для редактирования долга
     debt_edit_conv = ConversationHandler(
         entry_points=[CallbackQueryHandler(debt_edit_start, pattern="^debt:edit:")],
         states={
             EDIT_MONTHLY_PAYMENT: [MessageHandler(filters.TEXT & ~filters.COMMAND, debt_edit_monthly_payment)],
             EDIT_DUE_DAY: [MessageHandler(filters.TEXT & ~filters.COMMAND, debt_edit_due_day)],
+            EDIT_INTEREST_RATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, debt_edit_interest_rate)],
         },
         fallbacks=[CallbackQueryHandler(cancel_callback, pattern="^cancel$"), CommandHandler("start", start_handler), CommandHandler("help", help_callback)],
         name="debt_edit",
@@ -209,9 +298,17 @@ def main() -> None:
     application.add_handler(CallbackQueryHandler(debts_list_callback, pattern="^debts:list$"))
     application.add_handler(CallbackQueryHandler(debt_detail_callback, pattern="^debt:[0-9]+$"))
     application.add_handler(CallbackQueryHandler(debt_close_callback, pattern="^debt:close"))
+    application.add_handler(CallbackQueryHandler(debt_history_callback, pattern="^debt:history:"))
+    application.add_handler(CallbackQueryHandler(debt_whatif_callback, pattern="^debt:whatif:"))
     application.add_handler(CallbackQueryHandler(payments_list_callback, pattern="^payments:list:"))
     application.add_handler(CallbackQueryHandler(payment_delete_callback, pattern="^payment:delete"))
     application.add_handler(CallbackQueryHandler(invite_create_callback, pattern="^invite:create:"))
+    application.add_handler(CallbackQueryHandler(export_menu_callback, pattern="^export$"))
+    application.add_handler(CallbackQueryHandler(portfolio_show_callback, pattern="^portfolio:show:"))
+    application.add_handler(CallbackQueryHandler(arrears_callback, pattern="^arrears$"))
+    application.add_handler(CallbackQueryHandler(creditor_dashboard_callback, pattern="^dashboard$"))
+    application.add_handler(CallbackQueryHandler(cashflow_callback, pattern="^cashflow(:[0-9]+)?$"))
+    application.add_handler(CallbackQueryHandler(export_callback, pattern="^export:"))
     application.add_handler(CallbackQueryHandler(help_callback, pattern="^help$"))
     application.add_handler(CallbackQueryHandler(start_command, pattern="^start$"))
     application.add_handler(CallbackQueryHandler(cancel_callback, pattern="^cancel$"))
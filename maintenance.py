@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Обслуживающие задачи базы данных (запускаются по расписанию, например из cron).
+
+Использование:
+    python maintenance.py partitions    # партиции audit_log: создать будущие, отключить старые
+    python maintenance.py plans         # пересчитать устаревшие планы погашения
+    python maintenance.py arrears       # отчёт о просроченных платежах
+    python maintenance.py summaries     # пересчитать сводки пользователей
+    python maintenance.py statistics    # ночная статистика по должникам
+    python maintenance.py fx-rates FILE # загрузить курсы валют из CSV
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Optional
+import asyncpg
+from config import config
+from database import Database
+from dates import add_months, month_start
+from repositories.arrears_repository import ArrearsRepository
+from repositories.audit_partition_repository import AuditPartitionRepository, partition_name
+from services.arrears_service import group_by_debt, totals_by_currency
+from services.fx_service import FxService
+from services.plan_service import PaymentPlanService
+from services.statistics_service import StatisticsService
+from services.summary_service import UserSummaryService
+
+logger = logging.getLogger(__name__)
+
+
+async def maintain_audit_partitions(
+    conn: asyncpg.Connection,
+    months_ahead: int,
+    retention_months: int,
+    archive_dir: Optional[Path],
+    today: Optional[date] = None
+) -> None:
+    """
+    Создаёт партиции audit_log на months_ahead месяцев вперёд и отключает
+    партиции старше retention_months месяцев.
+    
+    Отключённые партиции выгружаются в archive_dir (CSV.gz) и удаляются;
+    если каталог не задан, остаются в БД отдельными таблицами.
+    
+    Args:
+        conn: Обслуживающее подключение к БД
+        months_ahead: На сколько месяцев вперёд должны существовать партиции
+        retention_months: Сколько месяцев хранить в audit_log (0 — хранить всё)
+        archive_dir: Каталог для архивов отключённых партиций
+        today: Текущая дата (для тестов)
+    """
+    repo = AuditPartitionRepository()
+    current = month_start(today or date.today())
+    
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if await repo.create_partition(month, conn):
+            logger.info(f"Created partition {partition_name(month)}")
+    
+    if retention_months <= 0:
+        return
+    
+    oldest_kept = add_months(current, -retention_months)
+    for month in await repo.list_partitions(conn):
+        if month >= oldest_kept:
+            continue
+        name = await repo.detach_partition(month, conn)
+        logger.info(f"Detached partition {name}")
+        if archive_dir is not None:
+            path = await repo.archive_table(name, archive_dir, conn)
+            logger.info(f"Archived partition {name} to {path}")
+
+
+async def report_arrears(conn: asyncpg.Connection, today: Optional[date] = None) -> None:
+    """
+    Пишет в лог просрочки по всем активным долгам и итоги по валютам.
+    
+    Args:
+        conn: Обслуживающее подключение к БД
+        today: Текущая дата (для тестов)
+    """
+    today = today or date.today()
+    installments = await ArrearsRepository().get_overdue(today, conn=conn)
+    arrears = group_by_debt(installments)
+    
+    for item in arrears:
+        logger.info(
+            f"Debt {item.debt_id}: {item.total_missing} {item.currency} overdue "
+            f"in {len(item.installments)} installments since {item.oldest_due_date}"
+        )
+    for currency, amount in sorted(totals_by_currency(arrears).items()):
+        logger.info(f"Total overdue {currency}: {amount}")
+    logger.info(f"Debts with arrears: {len(arrears)}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Выполняет выбранную задачу на обслуживающем подключении."""
+    conn = await Database.connect_maintenance()
+    try:
+        if args.command == 'partitions':
+            await maintain_audit_partitions(
+                conn,
+                months_ahead=args.ahead,
+                retention_months=args.retention_months,
+                archive_dir=Path(args.archive_dir) if args.archive_dir else None,
+            )
+        elif args.command == 'plans':
+            refreshed = await PaymentPlanService().refresh_stale(conn)
+            logger.info(f"Refreshed {refreshed} payment plans")
+        elif args.command == 'arrears':
+            await report_arrears(conn)
+        elif args.command == 'summaries':
+            rebuilt = await UserSummaryService().rebuild_all(conn)
+            logger.info(f"Rebuilt {rebuilt} user summaries")
+        elif args.command == 'statistics':
+            totals = await StatisticsService().run(conn, prefetch=config.EXPORT_CHUNK_SIZE)
+            logger.info(
+                f"Statistics: {totals.users} debtors, {totals.debts} active debts, "
+                f"progress {totals.payoff_progress}, average delay {totals.avg_delay_days} days"
+            )
+        elif args.command == 'fx-rates':
+            with open(args.file, encoding='utf-8', newline='') as lines:
+                loaded = await FxService().load_file(lines, conn)
+            logger.info(f"Loaded {loaded} FX rates from {args.file}")
+    finally:
+        await conn.close()
+
+
+def main() -> None:
+    """Разбирает аргументы командной строки и запускает задачу."""
+    logging.basicConfig(
+        format='%(asctime)s - [%(levelname)s] - %(name)s - %(message)s',
+        level=logging.INFO,
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    
+    parser = argparse.ArgumentParser(description="Обслуживание базы данных Debt Tracker")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    partitions = commands.add_parser('partitions', help="Партиции audit_log")
+    partitions.add_argument(
+        '--ahead', type=int, default=config.AUDIT_LOG_PARTITIONS_AHEAD,
+        help="На сколько месяцев вперёд создать партиции"
+    )
+    partitions.add_argument(
+        '--retention-months', type=int, default=config.AUDIT_LOG_RETENTION_MONTHS,
+        help="Сколько месяцев истории хранить в audit_log (0 — всё)"
+    )
+    partitions.add_argument(
+        '--archive-dir', default=config.AUDIT_LOG_ARCHIVE_DIR,
+        help="Каталог для архивов отключённых партиций"
+    )
+    
+    commands.add_parser('plans', help="Пересчёт устаревших планов погашения")
+    commands.add_parser('arrears', help="Отчёт о просроченных платежах")
+    commands.add_parser('summaries', help="Пересчёт сводок пользователей")
+    commands.add_parser('statistics', help="Ночная статистика по должникам")
+    fx_rates = commands.add_parser('fx-rates', help="Загрузка курсов валют из CSV")
+    fx_rates.add_argument('file', help="CSV: дата, базовая валюта, валюта котировки, курс")
+    
+    args = parser.parse_args()
+    
+    try:
+        config.validate()
+    except ValueError as e:
+        print(f"Ошибка конфигурации: {e}")
+        sys.exit(1)
+    
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Простые внутрипроцессные метрики (счётчики, gauge-значения и тайминги).
+"""
+import logging
+from dataclasses import dataclass
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Timing:
+    """Агрегированная статистика по длительностям (в секундах)."""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Добавляет наблюдение."""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def avg(self) -> float:
+        """Средняя длительность."""
+        return self.total / self.count if self.count else 0.0
+
+
+class Metrics:
+    """Реестр метрик приложения."""
+
+    def __init__(self):
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Timing] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        """Увеличивает счётчик."""
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Устанавливает текущее значение gauge."""
+        self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Добавляет наблюдение длительности."""
+        timing = self._timings.get(name)
+        if timing is None:
+            timing = self._timings[name] = Timing()
+        timing.observe(seconds)
+
+    def snapshot(self) -> dict:
+        """Возвращает текущие значения всех метрик."""
+        return {
+            'counters': dict(self._counters),
+            'gauges': dict(self._gauges),
+            'timings': {
+                name: {'count': t.count, 'avg': t.avg, 'max': t.max}
+                for name, t in self._timings.items()
+            },
+        }
+
+    def log_snapshot(self) -> None:
+        """Пишет текущие значения метрик в лог."""
+        logger.info(f"Metrics: {self.snapshot()}")
+
+    def reset(self) -> None:
+        """Сбрасывает все метрики."""
+        self._counters.clear()
+        self._gauges.clear()
+        self._timings.clear()
+
+
+# Глобальный реестр метрик
+metrics = Metrics()
@@ -3,11 +3,13 @@
 Скрипт для применения миграций базы данных.
 """
 import asyncio
+import importlib.util
 import os
 import sys
 from pathlib import Path
 import asyncpg
 from config import config
+from database import Database
 
 
 async def get_applied_migrations(conn: asyncpg.Connection) -> set[str]:
@@ -30,6 +32,26 @@ async def apply_migration(conn: asyncpg.Connection, version: str, sql: str) -> N
         )
 
 
+async def apply_python_migration(conn: asyncpg.Connection, version: str, path: Path) -> None:
+    """
+    Применяет миграцию на Python.
+    
+    Модуль должен определять async def upgrade(conn). Транзакциями управляет
+    сама миграция: это позволяет переносить большие таблицы порциями,
+    не блокируя их на всё время переноса. Поэтому upgrade должна быть
+    идемпотентной — после сбоя она запускается заново с начала.
+    """
+    spec = importlib.util.spec_from_file_location(f"migrations.m{version}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    
+    await module.upgrade(conn)
+    await conn.execute(
+        "INSERT INTO schema_migrations (version) VALUES ($1)",
+        version
+    )
+
+
 async def run_migrations() -> None:
     """Запускает все неприменённые миграции."""
     # Проверяем конфигурацию
@@ -41,13 +63,7 @@ async def run_migrations() -> None:
     
     # Подключаемся к базе данных
     try:
-        conn = await asyncpg.connect(
-            host=config.DB_HOST,
-            port=config.DB_PORT,
-            user=config.DB_USER,
-            password=config.DB_PASSWORD,
-            database=config.DB_NAME,
-        )
+        conn = await Database.connect_maintenance()
     except Exception as e:
         print(f"Ошибка подключения к базе данных: {e}")
         sys.exit(1)
@@ -59,10 +75,13 @@ async def run_migrations() -> None:
         
         # Находим все файлы миграций
         migrations_dir = Path(__file__).parent / "migrations"
-        migration_files = sorted([
-            f for f in migrations_dir.glob("*.sql")
-            if f.name != "__init__.py"
-        ])
+        migration_files = sorted(
+            [
+                f for f in migrations_dir.glob("*.*")
+                if f.suffix in (".sql", ".py") and f.name != "__init__.py"
+            ],
+            key=lambda f: f.name
+        )
         
         applied_count = 0
         for migration_file in migration_files:
@@ -72,10 +91,13 @@ async def run_migrations() -> None:
                 continue
             
             print(f"Применяю {version}...")
-            sql = migration_file.read_text(encoding='utf-8')
             
             try:
-                await apply_migration(conn, version, sql)
+                if migration_file.suffix == ".py":
+                    await apply_python_migration(conn, version, migration_file)
+                else:
+                    sql = migration_file.read_text(encoding='utf-8')
+                    await apply_migration(conn, version, sql)
                 applied_count += 1
                 print(f"✓ {version} успешно применена")
             except Exception as e:
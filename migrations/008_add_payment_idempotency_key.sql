@@ -0,0 +1,7 @@
+-- Ключ идемпотентности платежа: повторная отправка того же запроса
+-- (повторная доставка update, двойной ввод) не создаёт дубликат
+ALTER TABLE payments ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(128);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_payments_idempotency_key
+    ON payments(idempotency_key)
+    WHERE idempotency_key IS NOT NULL;
@@ -0,0 +1,3 @@
+-- Версия долга для оптимистичной блокировки: каждое UPDATE проверяет
+-- ожидаемую версию и увеличивает её на 1
+ALTER TABLE debts ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,33 @@
+-- Долг, к которому относится запись аудита: история долга включает
+-- события самого долга, его платежей и приглашений
+ALTER TABLE audit_log ADD COLUMN IF NOT EXISTS debt_id INTEGER;
+
+-- Заполняем для существующих записей
+UPDATE audit_log
+SET debt_id = entity_id
+WHERE entity_type = 'debt' AND debt_id IS NULL;
+
+UPDATE audit_log a
+SET debt_id = p.debt_id
+FROM payments p
+WHERE a.entity_type = 'payment' AND a.entity_id = p.id AND a.debt_id IS NULL;
+
+UPDATE audit_log a
+SET debt_id = i.debt_id
+FROM invites i
+WHERE a.entity_type = 'invite' AND a.entity_id = i.id AND a.debt_id IS NULL;
+
+-- Индексы для постраничного чтения по ключу (occurred_at, id)
+CREATE INDEX IF NOT EXISTS idx_audit_log_debt_id_occurred_at_id
+    ON audit_log(debt_id, occurred_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_actor_user_id_occurred_at_id
+    ON audit_log(actor_user_id, occurred_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_audit_log_occurred_at_id
+    ON audit_log(occurred_at DESC, id DESC);
+
+-- id в конце индекса делает порядок однозначным при одинаковом occurred_at
+DROP INDEX IF EXISTS idx_audit_log_entity_type_entity_id_occurred_at;
+CREATE INDEX IF NOT EXISTS idx_audit_log_entity_type_entity_id_occurred_at_id
+    ON audit_log(entity_type, entity_id, occurred_at DESC, id DESC);
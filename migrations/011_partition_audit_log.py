@@ -0,0 +1,148 @@
+"""
+Перевод audit_log на помесячные партиции по occurred_at.
+
+Перенос идёт без долгой блокировки таблицы:
+1. создаётся секционированная таблица audit_log_new с партициями на все месяцы,
+   за которые есть записи, и на несколько месяцев вперёд;
+2. записи копируются порциями по id, каждая порция — отдельная транзакция
+   (запись в audit_log в это время продолжается);
+3. в короткой транзакции таблица блокируется от записи, докопируются записи,
+   появившиеся за время переноса, и таблицы меняются местами.
+
+Старая таблица остаётся под именем audit_log_legacy; её можно удалить
+после проверки: DROP TABLE audit_log_legacy.
+
+Миграция идемпотентна: после сбоя её можно запустить заново, перенос
+продолжится с последней скопированной порции.
+"""
+from datetime import date, datetime, timezone
+import asyncpg
+from dates import add_months
+
+# Сколько записей копировать за одну транзакцию
+BATCH_SIZE = 10000
+
+# На сколько месяцев вперёд создать партиции (дальше их создаёт maintenance.py)
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, entity_type, entity_id, action, actor_user_id, occurred_at, before, after, debt_id"
+SELECT_COLUMNS = (
+    "id, entity_type, entity_id, action, actor_user_id, "
+    "COALESCE(occurred_at, NOW()), before, after, debt_id"
+)
+
+
+async def _is_partitioned(conn: asyncpg.Connection, table: str) -> bool:
+    """Проверяет, является ли таблица секционированной."""
+    return bool(await conn.fetchval(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = $1 AND c.relnamespace = 'public'::regnamespace
+        )
+        """,
+        table
+    ))
+
+
+async def upgrade(conn: asyncpg.Connection) -> None:
+    """Переводит audit_log на помесячные партиции."""
+    if await _is_partitioned(conn, 'audit_log'):
+        return
+    
+    async with conn.transaction():
+        # Первичный ключ секционированной таблицы обязан включать ключ секционирования
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS audit_log_new (
+                id INTEGER NOT NULL DEFAULT nextval('audit_log_id_seq'),
+                entity_type entity_type NOT NULL,
+                entity_id INTEGER NOT NULL,
+                action audit_action NOT NULL,
+                actor_user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                occurred_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+                before JSONB,
+                after JSONB,
+                debt_id INTEGER,
+                PRIMARY KEY (id, occurred_at)
+            ) PARTITION BY RANGE (occurred_at)
+            """
+        )
+        
+        # Страховка: записи за месяц без партиции попадают сюда, а не в ошибку
+        await conn.execute(
+            "CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log_new DEFAULT"
+        )
+        
+        first = await conn.fetchval("SELECT MIN(occurred_at) FROM audit_log")
+        now = datetime.now(timezone.utc).date()
+        month = date((first or now).year, (first or now).month, 1)
+        last = add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+        while month <= last:
+            await conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS audit_log_{month:%Y_%m}
+                PARTITION OF audit_log_new
+                FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')
+                """
+            )
+            month = add_months(month, 1)
+        
+        # Индексы создаются на родительской таблице и наследуются всеми партициями
+        await conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS audit_log_debt_id_occurred_at_id_idx
+                ON audit_log_new(debt_id, occurred_at DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS audit_log_actor_user_id_occurred_at_id_idx
+                ON audit_log_new(actor_user_id, occurred_at DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS audit_log_entity_occurred_at_id_idx
+                ON audit_log_new(entity_type, entity_id, occurred_at DESC, id DESC);
+            -- Общие выборки по времени: BRIN на порядки меньше B-tree и почти
+            -- не замедляет вставку, а записи лежат на диске в порядке occurred_at
+            CREATE INDEX IF NOT EXISTS audit_log_occurred_at_brin_idx
+                ON audit_log_new USING BRIN (occurred_at);
+            """
+        )
+    
+    # Копируем порциями, продолжая с последней перенесённой записи
+    copied_up_to = await conn.fetchval("SELECT COALESCE(MAX(id), 0) FROM audit_log_new")
+    max_id = await conn.fetchval("SELECT COALESCE(MAX(id), 0) FROM audit_log")
+    while copied_up_to < max_id:
+        await conn.execute(
+            f"""
+            INSERT INTO audit_log_new ({COLUMNS})
+            SELECT {SELECT_COLUMNS}
+            FROM audit_log
+            WHERE id > $1 AND id <= $2
+            ON CONFLICT DO NOTHING
+            """,
+            copied_up_to,
+            copied_up_to + BATCH_SIZE
+        )
+        copied_up_to += BATCH_SIZE
+        print(f"  перенесено до id={min(copied_up_to, max_id)} из {max_id}")
+    
+    async with conn.transaction():
+        # Чтение продолжает работать, запись ждёт окончания переключения
+        await conn.execute("LOCK TABLE audit_log IN EXCLUSIVE MODE")
+        
+        # Записи, добавленные во время переноса, в том числе транзакциями,
+        # получившими id раньше, но зафиксированными позже скопированной порции
+        await conn.execute(
+            f"""
+            INSERT INTO audit_log_new ({COLUMNS})
+            SELECT {SELECT_COLUMNS}
+            FROM audit_log a
+            WHERE NOT EXISTS (SELECT 1 FROM audit_log_new n WHERE n.id = a.id)
+            """
+        )
+        
+        await conn.execute(
+            """
+            ALTER TABLE audit_log RENAME TO audit_log_legacy;
+            ALTER TABLE audit_log_legacy ALTER COLUMN id DROP DEFAULT;
+            ALTER TABLE audit_log_new RENAME TO audit_log;
+            ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id;
+            """
+        )
@@ -0,0 +1,8 @@
+-- Формат before/after в записи аудита:
+-- full — оба состояния целиком (прежний формат), snapshot — полное состояние в after,
+-- delta — в after только изменённые ключи
+ALTER TABLE audit_log ADD COLUMN IF NOT EXISTS payload_encoding TEXT NOT NULL DEFAULT 'full';
+
+ALTER TABLE audit_log DROP CONSTRAINT IF EXISTS audit_log_payload_encoding_check;
+ALTER TABLE audit_log ADD CONSTRAINT audit_log_payload_encoding_check
+    CHECK (payload_encoding IN ('full', 'snapshot', 'delta'));
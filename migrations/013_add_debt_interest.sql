@@ -0,0 +1,14 @@
+-- Процентная ставка по долгу. NULL или 0 — беспроцентный долг (прежнее поведение)
+ALTER TABLE debts ADD COLUMN IF NOT EXISTS interest_rate NUMERIC(7, 4)
+    CHECK (interest_rate IS NULL OR (interest_rate >= 0 AND interest_rate < 1000));
+
+-- Как считаются дни для начисления процентов:
+-- '30/360' — каждый месяц 30 дней из 360, 'actual/365' — фактические дни из 365,
+-- 'actual/actual' — фактические дни из фактического числа дней в году
+ALTER TABLE debts ADD COLUMN IF NOT EXISTS day_count TEXT NOT NULL DEFAULT '30/360'
+    CHECK (day_count IN ('30/360', 'actual/365', 'actual/actual'));
+
+-- Тип графика: 'annuity' — равные платежи (monthly_payment включает проценты),
+-- 'differentiated' — равные доли основного долга (monthly_payment) плюс проценты
+ALTER TABLE debts ADD COLUMN IF NOT EXISTS amortization TEXT NOT NULL DEFAULT 'annuity'
+    CHECK (amortization IN ('annuity', 'differentiated'));
@@ -0,0 +1,25 @@
+-- Сохранённый план погашения: пересчитывается при изменении остатка или условий
+-- долга и при наступлении даты первого планового платежа
+CREATE TABLE IF NOT EXISTS payment_plans (
+    debt_id INTEGER NOT NULL REFERENCES debts(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL CHECK (seq >= 1),  -- Номер платежа в плане
+    payment_date DATE NOT NULL,
+    amount NUMERIC(15, 2) NOT NULL CHECK (amount > 0),
+    principal NUMERIC(15, 2),  -- Для долгов с процентами
+    interest NUMERIC(15, 2),
+    is_final BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (debt_id, seq)
+);
+
+-- Напоминания и отчёты выбирают платежи по дате
+CREATE INDEX IF NOT EXISTS payment_plans_payment_date_idx ON payment_plans(payment_date);
+
+-- Актуальность сохранённого плана. Отдельная таблица, а не колонка debts:
+-- пересчёт плана не должен блокировать строку долга
+CREATE TABLE IF NOT EXISTS payment_plan_state (
+    debt_id INTEGER PRIMARY KEY REFERENCES debts(id) ON DELETE CASCADE,
+    valid_until DATE NOT NULL,  -- До какой даты включительно план актуален
+    generated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS payment_plan_state_valid_until_idx ON payment_plan_state(valid_until);
@@ -0,0 +1,15 @@
+-- Сводка пользователя для главного меню: пересчитывается в транзакциях,
+-- меняющих долги и платежи пользователя, и целиком командой
+-- python maintenance.py summaries
+CREATE TABLE IF NOT EXISTS user_summaries (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    -- Долги, где пользователь должник
+    debtor_active INTEGER NOT NULL DEFAULT 0,
+    debtor_outstanding JSONB NOT NULL DEFAULT '{}',  -- Валюта -> остаток (строкой, без потери точности)
+    debtor_next_due DATE,
+    -- Долги, где пользователь кредитор
+    creditor_active INTEGER NOT NULL DEFAULT 0,
+    creditor_outstanding JSONB NOT NULL DEFAULT '{}',
+    creditor_next_due DATE,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,28 @@
+-- Ночная статистика (python maintenance.py statistics): по должникам и по всем
+-- активным долгам. За каждую дату расчёта — отдельный набор строк
+CREATE TABLE IF NOT EXISTS user_statistics (
+    stat_date DATE NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,  -- Должник
+    active_debts INTEGER NOT NULL,
+    payoff_progress NUMERIC(7, 4),  -- Средняя доля выплаченного по долгам, 0..1
+    installments_due INTEGER NOT NULL,  -- Плановые платежи со сроком до даты расчёта
+    installments_on_time INTEGER NOT NULL,
+    avg_delay_days NUMERIC(9, 2),  -- Средняя просрочка платежа в днях (0 — вовремя)
+    projected_completion DATE,  -- Погашение последнего долга по текущему плану
+    PRIMARY KEY (stat_date, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS global_statistics (
+    stat_date DATE PRIMARY KEY,
+    users INTEGER NOT NULL,
+    active_debts INTEGER NOT NULL,
+    payoff_progress NUMERIC(7, 4),
+    installments_due INTEGER NOT NULL,
+    installments_on_time INTEGER NOT NULL,
+    avg_delay_days NUMERIC(9, 2),
+    projected_completion DATE,
+    computed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Потоковое чтение активных долгов по должникам
+CREATE INDEX IF NOT EXISTS idx_debts_active_debtor_user_id_id ON debts(debtor_user_id, id) WHERE status = 'active';
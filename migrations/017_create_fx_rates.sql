@@ -0,0 +1,9 @@
+-- Курсы валют для пересчёта итогов в одну валюту. Загружаются из локального
+-- файла командой python maintenance.py fx-rates <файл>, без обращения к сети.
+CREATE TABLE IF NOT EXISTS fx_rates (
+    base_currency VARCHAR(3) NOT NULL,
+    quote_currency VARCHAR(3) NOT NULL,
+    rate_date DATE NOT NULL,
+    rate NUMERIC(20, 10) NOT NULL CHECK (rate > 0),  -- Сколько quote_currency за 1 base_currency
+    PRIMARY KEY (base_currency, quote_currency, rate_date)
+);
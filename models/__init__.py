@@ -6,6 +6,9 @@ from .debt import Debt
 from .payment import Payment
 from .invite import Invite
 from .audit_log import AuditLog
+from .payment_plan import PlannedPayment
+from .arrears import OverdueInstallment
+from .user_summary import UserSummary
 
-__all__ = ['User', 'Debt', 'Payment', 'Invite', 'AuditLog']
+__all__ = ['User', 'Debt', 'Payment', 'Invite', 'AuditLog', 'PlannedPayment', 'OverdueInstallment', 'UserSummary']
 
@@ -0,0 +1,36 @@
+"""
+Модель просроченного платежа.
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+
+@dataclass
+class OverdueInstallment:
+    """Плановый платёж, срок которого прошёл, а оплачен он не полностью."""
+    debt_id: int
+    debtor_user_id: int
+    creditor_user_id: Optional[int]
+    debt_name: str
+    currency: str
+    seq: int  # Номер платежа с начала долга, с 1
+    due_date: date
+    amount: Decimal  # Сумма планового платежа
+    missing: Decimal  # Неоплаченная часть платежа
+    
+    @classmethod
+    def from_row(cls, row) -> "OverdueInstallment":
+        """Создаёт экземпляр OverdueInstallment из строки БД."""
+        return cls(
+            debt_id=row['debt_id'],
+            debtor_user_id=row['debtor_user_id'],
+            creditor_user_id=row['creditor_user_id'],
+            debt_name=row['debt_name'],
+            currency=row['currency'],
+            seq=row['seq'],
+            due_date=row['due_date'],
+            amount=row['amount'],
+            missing=row['missing']
+        )
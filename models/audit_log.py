@@ -18,6 +18,8 @@ class AuditLog:
     occurred_at: datetime
     before: Optional[dict]
     after: Optional[dict]
+    debt_id: Optional[int] = None  # Долг, к истории которого относится запись
+    payload_encoding: str = 'full'  # 'full', 'snapshot' или 'delta' (см. services.audit_encoding)
     
     @classmethod
     def from_row(cls, row) -> "AuditLog":
@@ -39,6 +41,8 @@ class AuditLog:
             actor_user_id=row['actor_user_id'],
             occurred_at=row['occurred_at'],
             before=before,
-            after=after
+            after=after,
+            debt_id=row.get('debt_id'),
+            payload_encoding=row.get('payload_encoding') or 'full'
         )
 
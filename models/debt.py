@@ -3,7 +3,7 @@
 """
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 from decimal import Decimal
 
 
@@ -23,6 +23,10 @@ class Debt:
     close_note: Optional[str]
     created_at: datetime
     updated_at: datetime
+    version: int = 1  # Увеличивается при каждом изменении долга
+    interest_rate: Optional[Decimal] = None  # Годовая ставка в процентах; None или 0 — без процентов
+    day_count: str = '30/360'  # '30/360', 'actual/365' или 'actual/actual'
+    amortization: str = 'annuity'  # 'annuity' или 'differentiated'
     
     @classmethod
     def from_row(cls, row) -> "Debt":
@@ -40,6 +44,15 @@ class Debt:
             closed_at=row['closed_at'],
             close_note=row['close_note'],
             created_at=row['created_at'],
-            updated_at=row['updated_at']
+            updated_at=row['updated_at'],
+            version=row.get('version', 1),
+            interest_rate=row.get('interest_rate'),
+            day_count=row.get('day_count', '30/360'),
+            amortization=row.get('amortization', 'annuity')
         )
+    
+    @property
+    def cache_key(self) -> Tuple[int, int]:
+        """Ключ для кэшей, производных от долга: меняется при каждом изменении условий (платежи в него не входят)."""
+        return (self.id, self.version)
 
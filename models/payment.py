@@ -17,6 +17,7 @@ class Payment:
     deleted_at: Optional[datetime]
     created_at: datetime
     updated_at: datetime
+    idempotency_key: Optional[str] = None
     
     @classmethod
     def from_row(cls, row) -> "Payment":
@@ -28,7 +29,8 @@ class Payment:
             payment_date=row['payment_date'],
             deleted_at=row['deleted_at'],
             created_at=row['created_at'],
-            updated_at=row['updated_at']
+            updated_at=row['updated_at'],
+            idempotency_key=row.get('idempotency_key')
         )
     
     def is_deleted(self) -> bool:
@@ -0,0 +1,32 @@
+"""
+Модель сохранённого платежа плана погашения.
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+
+@dataclass
+class PlannedPayment:
+    """Плановый платёж из таблицы payment_plans."""
+    debt_id: int
+    seq: int  # Номер платежа в плане, с 1
+    payment_date: date
+    amount: Decimal
+    principal: Optional[Decimal]
+    interest: Optional[Decimal]
+    is_final: bool
+    
+    @classmethod
+    def from_row(cls, row) -> "PlannedPayment":
+        """Создаёт экземпляр PlannedPayment из строки БД."""
+        return cls(
+            debt_id=row['debt_id'],
+            seq=row['seq'],
+            payment_date=row['payment_date'],
+            amount=row['amount'],
+            principal=row['principal'],
+            interest=row['interest'],
+            is_final=row['is_final']
+        )
@@ -0,0 +1,44 @@
+"""
+Модель сводки пользователя.
+"""
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Optional
+
+
+def _parse_amounts(value) -> Dict[str, Decimal]:
+    """Разбирает JSONB «валюта -> сумма строкой»."""
+    if not value:
+        return {}
+    if isinstance(value, str):
+        value = json.loads(value)
+    return {currency: Decimal(amount) for currency, amount in value.items()}
+
+
+@dataclass
+class UserSummary:
+    """Сводка по активным долгам пользователя как должника и как кредитора."""
+    user_id: int
+    debtor_active: int = 0
+    debtor_outstanding: Dict[str, Decimal] = field(default_factory=dict)  # Валюта -> остаток
+    debtor_next_due: Optional[date] = None
+    creditor_active: int = 0
+    creditor_outstanding: Dict[str, Decimal] = field(default_factory=dict)
+    creditor_next_due: Optional[date] = None
+    updated_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_row(cls, row) -> "UserSummary":
+        """Создаёт экземпляр UserSummary из строки БД."""
+        return cls(
+            user_id=row['user_id'],
+            debtor_active=row['debtor_active'],
+            debtor_outstanding=_parse_amounts(row['debtor_outstanding']),
+            debtor_next_due=row['debtor_next_due'],
+            creditor_active=row['creditor_active'],
+            creditor_outstanding=_parse_amounts(row['creditor_outstanding']),
+            creditor_next_due=row['creditor_next_due'],
+            updated_at=row['updated_at']
+        )
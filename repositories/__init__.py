@@ -7,6 +7,12 @@ from .debt_repository import DebtRepository
 from .payment_repository import PaymentRepository
 from .invite_repository import InviteRepository
 from .audit_log_repository import AuditLogRepository
+from .payment_plan_repository import PaymentPlanRepository
+from .arrears_repository import ArrearsRepository
+from .dashboard_repository import DashboardRepository
+from .user_summary_repository import UserSummaryRepository
+from .statistics_repository import StatisticsRepository
+from .fx_rate_repository import FxRateRepository
 
 __all__ = [
     'BaseRepository',
@@ -15,5 +21,11 @@ __all__ = [
     'PaymentRepository',
     'InviteRepository',
     'AuditLogRepository',
+    'PaymentPlanRepository',
+    'ArrearsRepository',
+    'DashboardRepository',
+    'UserSummaryRepository',
+    'StatisticsRepository',
+    'FxRateRepository',
 ]
 
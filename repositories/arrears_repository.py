@@ -0,0 +1,111 @@
+"""
+Репозиторий для поиска просроченных платежей.
+"""
+from datetime import date
+from typing import List, Optional
+import asyncpg
+from database import Database
+from models.arrears import OverdueInstallment
+from repositories.base import BaseRepository
+
+
+class ArrearsRepository(BaseRepository):
+    """Поиск просрочек по всем активным долгам одним запросом."""
+    
+    async def get_overdue(
+        self,
+        today: date,
+        creditor_user_id: Optional[int] = None,
+        debtor_user_id: Optional[int] = None,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[OverdueInstallment]:
+        """
+        Получает просроченные платежи активных долгов.
+        
+        Сроки платежей строятся generate_series по месяцам от создания долга
+        до today; день платежа за концом месяца сдвигается на последний день,
+        как в PlannerService._get_due_date_in_month. Плановые платежи гасятся
+        фактическими по порядку: платёж просрочен на разницу между суммой
+        плановых платежей по нему включительно и суммой всех платежей до
+        today, но не больше самого платежа. План считается по текущим
+        условиям долга; для долгов с процентами — только по основному долгу.
+        
+        Args:
+            today: Дата, на которую ищутся просрочки (срок платежа раньше неё)
+            creditor_user_id: Только долги этого кредитора (опционально)
+            debtor_user_id: Только долги этого должника (опционально)
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Просроченные платежи по долгам и возрастанию сроков
+        """
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                """
+                WITH scheduled AS (
+                    SELECT id, debtor_user_id, creditor_user_id, name, currency,
+                           principal_amount, monthly_payment, due_day, created_at::date AS created_on
+                    FROM debts
+                    WHERE status = 'active'
+                      AND monthly_payment > 0
+                      AND due_day IS NOT NULL
+                      AND ($2::int IS NULL OR creditor_user_id = $2)
+                      AND ($3::int IS NULL OR debtor_user_id = $3)
+                ),
+                due AS (
+                    SELECT s.id AS debt_id,
+                           ROW_NUMBER() OVER (PARTITION BY s.id ORDER BY m.due_date) AS seq,
+                           m.due_date
+                    FROM scheduled s
+                    CROSS JOIN LATERAL (
+                        SELECT month::date + LEAST(
+                                   s.due_day,
+                                   EXTRACT(DAY FROM month + INTERVAL '1 month' - INTERVAL '1 day')::int
+                               ) - 1 AS due_date
+                        FROM generate_series(
+                            date_trunc('month', s.created_on),
+                            date_trunc('month', $1::date),
+                            INTERVAL '1 month'
+                        ) AS month
+                    ) m
+                    WHERE m.due_date >= s.created_on AND m.due_date < $1
+                ),
+                paid AS (
+                    SELECT p.debt_id, SUM(p.amount) AS paid
+                    FROM payments p
+                    JOIN scheduled s ON s.id = p.debt_id
+                    WHERE p.deleted_at IS NULL AND p.payment_date <= $1
+                    GROUP BY p.debt_id
+                ),
+                expected AS (
+                    SELECT d.debt_id, d.seq, d.due_date,
+                           LEAST(s.monthly_payment, s.principal_amount - (d.seq - 1) * s.monthly_payment) AS amount,
+                           LEAST(d.seq * s.monthly_payment, s.principal_amount) - COALESCE(p.paid, 0) AS unpaid
+                    FROM due d
+                    JOIN scheduled s ON s.id = d.debt_id
+                    LEFT JOIN paid p ON p.debt_id = d.debt_id
+                    WHERE (d.seq - 1) * s.monthly_payment < s.principal_amount
+                )
+                SELECT e.debt_id, s.debtor_user_id, s.creditor_user_id, s.name AS debt_name, s.currency,
+                       e.seq, e.due_date, e.amount, LEAST(e.amount, e.unpaid) AS missing
+                FROM expected e
+                JOIN scheduled s ON s.id = e.debt_id
+                WHERE e.unpaid > 0
+                ORDER BY e.debt_id, e.seq
+                """,
+                today,
+                creditor_user_id,
+                debtor_user_id
+            )
+            
+            return [OverdueInstallment.from_row(row) for row in rows]
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
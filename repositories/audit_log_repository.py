@@ -1,7 +1,7 @@
 """
 Репозиторий для работы с записями аудита.
 """
-from typing import Optional
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from datetime import datetime
 from datetime import timezone
 import json
@@ -22,6 +22,8 @@ class AuditLogRepository(BaseRepository):
         actor_user_id: int,
         before: Optional[dict] = None,
         after: Optional[dict] = None,
+        debt_id: Optional[int] = None,
+        payload_encoding: str = 'full',
         conn: Optional[asyncpg.Connection] = None
     ) -> AuditLog:
         """
@@ -34,6 +36,9 @@ class AuditLogRepository(BaseRepository):
             actor_user_id: ID пользователя, выполнившего действие
             before: Состояние до изменения (опционально)
             after: Состояние после изменения (опционально)
+            debt_id: ID долга, к истории которого относится запись
+                (для записей о долге по умолчанию равен entity_id)
+            payload_encoding: Формат before/after ('full', 'snapshot' или 'delta')
             conn: Подключение к БД (опционально, для транзакций)
         
         Returns:
@@ -48,16 +53,18 @@ class AuditLogRepository(BaseRepository):
             # Преобразуем dict в JSON для JSONB
             before_json = json.dumps(before) if before else None
             after_json = json.dumps(after) if after else None
+            if debt_id is None and entity_type == 'debt':
+                debt_id = entity_id
             
             row = await conn.fetchrow(
                 """
                 INSERT INTO audit_log (
                     entity_type, entity_id, action, actor_user_id,
-                    occurred_at, before, after
+                    occurred_at, before, after, debt_id, payload_encoding
                 )
-                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
                 RETURNING id, entity_type, entity_id, action, actor_user_id,
-                          occurred_at, before, after
+                          occurred_at, before, after, debt_id, payload_encoding
                 """,
                 entity_type,
                 entity_id,
@@ -65,7 +72,9 @@ class AuditLogRepository(BaseRepository):
                 actor_user_id,
                 datetime.now(timezone.utc),
                 before_json,
-                after_json
+                after_json,
+                debt_id,
+                payload_encoding
             )
             
             return AuditLog.from_row(row)
@@ -74,4 +83,244 @@ class AuditLogRepository(BaseRepository):
             if own_connection:
                 pool = await Database.get_pool()
                 await pool.release(conn)
-
+    
+    async def iter_by_user(
+        self,
+        user_id: int,
+        conn: asyncpg.Connection,
+        prefetch: int = 500
+    ) -> AsyncIterator[AuditLog]:
+        """
+        Потоково читает историю изменений долгов пользователя и их платежей и приглашений.
+        
+        Использует серверный курсор, поэтому должен вызываться внутри conn.transaction().
+        Доступны записи по долгам, где пользователь должник или кредитор.
+        
+        Args:
+            user_id: ID пользователя
+            conn: Подключение к БД с открытой транзакцией
+            prefetch: Сколько строк забирать с сервера за раз
+        
+        Yields:
+            AuditLog: Записи аудита в хронологическом порядке
+        """
+        cursor = conn.cursor(
+            """
+            SELECT id, entity_type, entity_id, action, actor_user_id,
+                   occurred_at, before, after, debt_id, payload_encoding
+            FROM audit_log
+            WHERE debt_id IN (
+                SELECT id FROM debts
+                WHERE debtor_user_id = $1 OR creditor_user_id = $1
+            )
+            ORDER BY occurred_at, id
+            """,
+            user_id,
+            prefetch=prefetch
+        )
+        async for row in cursor:
+            yield AuditLog.from_row(row)
+    
+    async def get_debt_history(
+        self,
+        debt_id: int,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 20,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[AuditLog]:
+        """
+        Получает страницу истории долга: события долга, его платежей и приглашений.
+        
+        Args:
+            debt_id: ID долга
+            before: Ключ (occurred_at, id) последней записи предыдущей страницы
+            limit: Размер страницы
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Записи от новых к старым
+        """
+        return await self._fetch_page("debt_id = $1", [debt_id], before, limit, conn)
+    
+    async def get_entity_history(
+        self,
+        entity_type: str,
+        entity_id: int,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 20,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[AuditLog]:
+        """
+        Получает страницу истории одной сущности.
+        
+        Args:
+            entity_type: Тип сущности ('debt', 'payment', 'invite')
+            entity_id: ID сущности
+            before: Ключ (occurred_at, id) последней записи предыдущей страницы
+            limit: Размер страницы
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Записи от новых к старым
+        """
+        return await self._fetch_page(
+            "entity_type = $1 AND entity_id = $2", [entity_type, entity_id], before, limit, conn
+        )
+    
+    async def get_actor_history(
+        self,
+        actor_user_id: int,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 20,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[AuditLog]:
+        """
+        Получает страницу действий пользователя.
+        
+        Args:
+            actor_user_id: ID пользователя
+            before: Ключ (occurred_at, id) последней записи предыдущей страницы
+            limit: Размер страницы
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Записи от новых к старым
+        """
+        return await self._fetch_page("actor_user_id = $1", [actor_user_id], before, limit, conn)
+    
+    async def get_feed(
+        self,
+        before: Optional[Tuple[datetime, int]] = None,
+        limit: int = 20,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[AuditLog]:
+        """
+        Получает страницу общей ленты аудита.
+        
+        Args:
+            before: Ключ (occurred_at, id) последней записи предыдущей страницы
+            limit: Размер страницы
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Записи от новых к старым
+        """
+        return await self._fetch_page(None, [], before, limit, conn)
+    
+    async def get_chain(
+        self,
+        entity_type: str,
+        entity_id: int,
+        anchor: Optional[Tuple[datetime, int]] = None,
+        until: Optional[Tuple[datetime, int]] = None,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[AuditLog]:
+        """
+        Получает записи сущности, необходимые для восстановления её состояния.
+        
+        Цепочка начинается с последнего снимка (snapshot или create) не позже anchor
+        и продолжается до until включительно. Если снимка нет, возвращаются
+        все записи сущности до until.
+        
+        Args:
+            entity_type: Тип сущности ('debt', 'payment', 'invite')
+            entity_id: ID сущности
+            anchor: Ключ (occurred_at, id), не позже которого искать снимок (None — последний)
+            until: Ключ последней нужной записи (None — до конца)
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Записи в хронологическом порядке
+        """
+        params: List[Any] = [entity_type, entity_id]
+        anchor_condition = ""
+        if anchor is not None:
+            params.extend(anchor)
+            anchor_condition = f"AND (occurred_at, id) <= (${len(params) - 1}, ${len(params)})"
+        until_condition = ""
+        if until is not None:
+            params.extend(until)
+            until_condition = f"AND (a.occurred_at, a.id) <= (${len(params) - 1}, ${len(params)})"
+        
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                f"""
+                WITH base AS (
+                    SELECT occurred_at, id
+                    FROM audit_log
+                    WHERE entity_type = $1 AND entity_id = $2
+                      AND (payload_encoding = 'snapshot' OR action = 'create')
+                      {anchor_condition}
+                    ORDER BY occurred_at DESC, id DESC
+                    LIMIT 1
+                )
+                SELECT a.id, a.entity_type, a.entity_id, a.action, a.actor_user_id,
+                       a.occurred_at, a.before, a.after, a.debt_id, a.payload_encoding
+                FROM audit_log a
+                WHERE a.entity_type = $1 AND a.entity_id = $2
+                  AND (NOT EXISTS (SELECT 1 FROM base)
+                       OR (a.occurred_at, a.id) >= ((SELECT occurred_at FROM base), (SELECT id FROM base)))
+                  {until_condition}
+                ORDER BY a.occurred_at, a.id
+                """,
+                *params
+            )
+            
+            return [AuditLog.from_row(row) for row in rows]
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
+    
+    async def _fetch_page(
+        self,
+        condition: Optional[str],
+        args: List[Any],
+        before: Optional[Tuple[datetime, int]],
+        limit: int,
+        conn: Optional[asyncpg.Connection]
+    ) -> List[AuditLog]:
+        """
+        Читает страницу записей по ключу (occurred_at, id), а не через OFFSET.
+        
+        Каждая страница — один проход по индексу от ключа предыдущей,
+        поэтому время не зависит от того, насколько глубоко листает пользователь.
+        """
+        params = list(args)
+        conditions = [condition] if condition else []
+        if before is not None:
+            params.extend(before)
+            conditions.append(f"(occurred_at, id) < (${len(params) - 1}, ${len(params)})")
+        params.append(limit)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                f"""
+                SELECT id, entity_type, entity_id, action, actor_user_id,
+                       occurred_at, before, after, debt_id, payload_encoding
+                FROM audit_log
+                {where}
+                ORDER BY occurred_at DESC, id DESC
+                LIMIT ${len(params)}
+                """,
+                *params
+            )
+            
+            return [AuditLog.from_row(row) for row in rows]
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
@@ -0,0 +1,166 @@
+"""
+Репозиторий для управления помесячными партициями audit_log.
+"""
+import gzip
+import re
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+import asyncpg
+from dates import add_months
+from repositories.base import BaseRepository
+
+
+PARENT_TABLE = 'audit_log'
+DEFAULT_PARTITION = 'audit_log_default'
+
+_PARTITION_NAME = re.compile(r'^audit_log_(\d{4})_(\d{2})$')
+
+
+def partition_name(month: date) -> str:
+    """Имя партиции за месяц: audit_log_YYYY_MM."""
+    return f"{PARENT_TABLE}_{month:%Y_%m}"
+
+
+def parse_partition_name(name: str) -> Optional[date]:
+    """Возвращает месяц партиции по её имени или None для чужих таблиц."""
+    match = _PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+class AuditPartitionRepository(BaseRepository):
+    """
+    Управление партициями audit_log: создание, отключение и архивирование.
+    
+    DDL выполняется на отдельном обслуживающем подключении
+    (Database.connect_maintenance), поэтому conn обязателен.
+    """
+    
+    async def list_partitions(self, conn: asyncpg.Connection) -> List[date]:
+        """
+        Возвращает месяцы подключённых помесячных партиций (без партиции по умолчанию).
+        
+        Returns:
+            Отсортированный список первых чисел месяцев
+        """
+        rows = await conn.fetch(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = $1::regclass
+            """,
+            PARENT_TABLE
+        )
+        months = [parse_partition_name(row['relname']) for row in rows]
+        return sorted(month for month in months if month is not None)
+    
+    async def create_partition(self, month: date, conn: asyncpg.Connection) -> bool:
+        """
+        Создаёт партицию за месяц, если её ещё нет.
+        
+        Если за этот месяц уже есть записи в партиции по умолчанию, они
+        переносятся в новую партицию в той же транзакции.
+        
+        Args:
+            month: Первое число месяца
+            conn: Обслуживающее подключение к БД
+        
+        Returns:
+            True, если партиция создана
+        """
+        name = partition_name(month)
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+        
+        async with conn.transaction():
+            exists = await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name)
+            if exists:
+                return False
+            
+            stray = await conn.fetchval(
+                f"""
+                SELECT EXISTS (
+                    SELECT 1 FROM {DEFAULT_PARTITION}
+                    WHERE occurred_at >= $1::date AND occurred_at < $2::date
+                )
+                """,
+                month,
+                add_months(month, 1)
+            )
+            
+            if not stray:
+                await conn.execute(
+                    f"""
+                    CREATE TABLE {name} PARTITION OF {PARENT_TABLE}
+                    FOR VALUES FROM ('{start}') TO ('{end}')
+                    """
+                )
+                return True
+            
+            # Новая партиция не может пересекаться с записями в партиции по умолчанию:
+            # отключаем её, создаём партицию, переносим записи и подключаем обратно
+            await conn.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+            await conn.execute(
+                f"""
+                CREATE TABLE {name} PARTITION OF {PARENT_TABLE}
+                FOR VALUES FROM ('{start}') TO ('{end}')
+                """
+            )
+            await conn.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE occurred_at >= $1::date AND occurred_at < $2::date
+                    RETURNING *
+                )
+                INSERT INTO {name} SELECT * FROM moved
+                """,
+                month,
+                add_months(month, 1)
+            )
+            await conn.execute(
+                f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"
+            )
+            return True
+    
+    async def detach_partition(self, month: date, conn: asyncpg.Connection) -> str:
+        """
+        Отключает партицию от audit_log; её данные остаются в отдельной таблице.
+        
+        Args:
+            month: Первое число месяца
+            conn: Обслуживающее подключение к БД
+        
+        Returns:
+            Имя отключённой таблицы
+        """
+        name = partition_name(month)
+        await conn.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+        return name
+    
+    async def archive_table(self, name: str, archive_dir: Path, conn: asyncpg.Connection) -> Path:
+        """
+        Выгружает отключённую партицию в сжатый CSV и удаляет таблицу.
+        
+        Args:
+            name: Имя отключённой таблицы
+            archive_dir: Каталог архива
+            conn: Обслуживающее подключение к БД
+        
+        Returns:
+            Путь к файлу архива
+        """
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        path = archive_dir / f"{name}.csv.gz"
+        
+        with gzip.open(path, 'wb') as archive:
+            async def write(chunk: bytes) -> None:
+                archive.write(chunk)
+            
+            await conn.copy_from_table(name, output=write, format='csv', header=True)
+        
+        # Таблица удаляется только после того, как архив полностью записан
+        await conn.execute(f"DROP TABLE {name}")
+        return path
@@ -1,9 +1,73 @@
 """
 Базовый класс для репозиториев.
 """
-from typing import Optional
+import asyncio
+import functools
+import inspect
+import logging
+from typing import Dict, Optional, Tuple
 import asyncpg
 from database import Database
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Выполняющиеся чтения: ключ (метод, аргументы, маршрут чтения) -> задача
+_inflight: Dict[Tuple, asyncio.Task] = {}
+
+
+def singleflight(method):
+    """
+    Объединяет одновременные одинаковые чтения в один запрос к БД.
+    
+    Пока выполняется чтение с теми же аргументами, повторные вызовы не идут
+    в БД, а ждут его результат. Применяется только к методам чтения и
+    отключается, если передано подключение conn (вызов внутри транзакции).
+    
+    Чтения не объединяются, если они видят разные данные: после записи
+    пользователь читает с primary, а запись в процессе начинает новую «эпоху»,
+    так что чтение не получит результат запроса, начатого до неё.
+    
+    Результат общий для всех ожидающих — его нельзя изменять.
+    """
+    signature = inspect.signature(method)
+    name = method.__qualname__
+    
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        arguments.pop('self', None)
+        if arguments.pop('conn', None) is not None:
+            return await method(self, *args, **kwargs)
+        
+        key = (name, tuple(sorted(arguments.items())), Database.read_route())
+        try:
+            task = _inflight.get(key)
+        except TypeError:
+            # Нехешируемые аргументы: выполняем без объединения
+            return await method(self, *args, **kwargs)
+        
+        if task is None:
+            task = asyncio.ensure_future(method(self, *args, **kwargs))
+            _inflight[key] = task
+            task.add_done_callback(functools.partial(_forget_flight, key))
+        else:
+            metrics.inc("db.singleflight.shared")
+        
+        # Отмена одного ожидающего не отменяет запрос для остальных
+        return await asyncio.shield(task)
+    
+    return wrapper
+
+
+def _forget_flight(key: Tuple, task: asyncio.Task) -> None:
+    """Убирает завершённое чтение из списка выполняющихся."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug(f"Coalesced read {key[0]} failed: {task.exception()}")
 
 
 class BaseRepository:
@@ -41,15 +105,16 @@ class BaseRepository:
     
     @staticmethod
     async def _commit(conn: asyncpg.Connection, own_connection: bool = True) -> None:
-        """Завершает транзакцию с коммитом."""
+        """Завершает транзакцию с коммитом и возвращает подключение в пул."""
         if own_connection:
-            await conn.close()
+            # Подключение из пула нельзя закрывать: его нужно вернуть
+            await BaseRepository._release_connection(conn)
         # Если транзакция была передана извне, коммит делается там
     
     @staticmethod
     async def _rollback(conn: asyncpg.Connection, own_connection: bool = True) -> None:
-        """Откатывает транзакцию."""
+        """Откатывает транзакцию и возвращает подключение в пул."""
         if own_connection:
-            await conn.close()
+            await BaseRepository._release_connection(conn)
         # Если транзакция была передана извне, rollback делается там
 
@@ -0,0 +1,87 @@
+"""
+Репозиторий для агрегатов дашборда кредитора.
+"""
+from datetime import date
+from typing import List, Optional
+import asyncpg
+from database import Database
+from repositories.base import BaseRepository
+
+
+class DashboardRepository(BaseRepository):
+    """Агрегаты по долгам кредитора, считаются в БД одним запросом."""
+    
+    async def get_creditor_totals(
+        self,
+        creditor_user_id: int,
+        today: date,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[asyncpg.Record]:
+        """
+        Получает итоги по активным долгам кредитора в разрезе валют.
+        
+        Ожидаемое поступление месяца — ежемесячный платёж каждого долга,
+        срок которого приходится на этот месяц, но не больше остатка на
+        начало месяца. Запрос выполняется на primary: результат кэшируется,
+        и отставание реплики попало бы в кэш.
+        
+        Args:
+            creditor_user_id: ID кредитора
+            today: Текущая дата (определяет месяц)
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Строки (currency, debts, outstanding, expected_this_month, paid_this_month)
+            по возрастанию валюты
+        """
+        own_connection = conn is None
+        if own_connection:
+            pool = await Database.get_pool()
+            conn = await pool.acquire()
+        
+        try:
+            return await conn.fetch(
+                """
+                WITH owned AS (
+                    SELECT id, currency, principal_amount, monthly_payment, due_day, created_at::date AS created_on,
+                           date_trunc('month', $2::date)::date + LEAST(
+                               due_day,
+                               EXTRACT(DAY FROM date_trunc('month', $2::date) + INTERVAL '1 month' - INTERVAL '1 day')::int
+                           ) - 1 AS due_date
+                    FROM debts
+                    WHERE creditor_user_id = $1 AND status = 'active'
+                ),
+                paid AS (
+                    SELECT p.debt_id,
+                           SUM(p.amount) AS paid_total,
+                           SUM(p.amount) FILTER (WHERE p.payment_date < date_trunc('month', $2::date)) AS paid_before_month,
+                           SUM(p.amount) FILTER (
+                               WHERE p.payment_date >= date_trunc('month', $2::date) AND p.payment_date <= $2
+                           ) AS paid_this_month
+                    FROM payments p
+                    JOIN owned o ON o.id = p.debt_id
+                    WHERE p.deleted_at IS NULL
+                    GROUP BY p.debt_id
+                )
+                SELECT o.currency,
+                       COUNT(*) AS debts,
+                       SUM(GREATEST(o.principal_amount - COALESCE(p.paid_total, 0), 0)) AS outstanding,
+                       SUM(
+                           CASE WHEN o.monthly_payment > 0 AND o.due_day IS NOT NULL AND o.due_date >= o.created_on
+                                THEN LEAST(o.monthly_payment, GREATEST(o.principal_amount - COALESCE(p.paid_before_month, 0), 0))
+                                ELSE 0
+                           END
+                       ) AS expected_this_month,
+                       COALESCE(SUM(p.paid_this_month), 0) AS paid_this_month
+                FROM owned o
+                LEFT JOIN paid p ON p.debt_id = o.id
+                GROUP BY o.currency
+                ORDER BY o.currency
+                """,
+                creditor_user_id,
+                today
+            )
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
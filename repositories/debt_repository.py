@@ -1,16 +1,28 @@
 """
 Репозиторий для работы с долгами.
 """
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Optional, List
 from datetime import datetime
 from datetime import timezone
 from decimal import Decimal
 import asyncpg
 from models.debt import Debt
-from repositories.base import BaseRepository
+from repositories.base import BaseRepository, singleflight
+from repositories.loader import BatchLoader
 from database import Database
 
 
+# Сколько раз сервисы повторяют изменение после конфликта версий
+VERSION_CONFLICT_RETRIES = 3
+
+
+class DebtVersionConflictError(ValueError):
+    """Долг был изменён другим действием после того, как его прочитали."""
+    
+    def __init__(self, message: str = "Долг был изменён одновременно с вами, попробуйте ещё раз"):
+        super().__init__(message)
+
+
 class DebtRepository(BaseRepository):
     """Репозиторий для работы с долгами."""
     
@@ -56,7 +68,8 @@ class DebtRepository(BaseRepository):
                 VALUES ($1, $2, $3, $4, $5, $6, $7, 'active', $8, $8)
                 RETURNING id, debtor_user_id, creditor_user_id, name, principal_amount,
                           currency, monthly_payment, due_day, status, closed_at,
-                          close_note, created_at, updated_at
+                          close_note, created_at, updated_at, version,
+                          interest_rate, day_count, amortization
                 """,
                 debtor_user_id,
                 creditor_user_id,
@@ -75,6 +88,7 @@ class DebtRepository(BaseRepository):
                 pool = await Database.get_pool()
                 await pool.release(conn)
     
+    @singleflight
     async def get_by_id(
         self,
         debt_id: int,
@@ -83,6 +97,8 @@ class DebtRepository(BaseRepository):
         """
         Получает долг по ID.
         
+        Без conn запрос объединяется с одновременными запросами в один get_by_ids.
+        
         Args:
             debt_id: ID долга
             conn: Подключение к БД (опционально, для транзакций)
@@ -90,32 +106,119 @@ class DebtRepository(BaseRepository):
         Returns:
             Debt или None, если долг не найден
         """
+        if conn is None:
+            return await _debt_loader.load(debt_id)
+        
+        row = await conn.fetchrow(
+            """
+            SELECT id, debtor_user_id, creditor_user_id, name, principal_amount,
+                   currency, monthly_payment, due_day, status, closed_at,
+                   close_note, created_at, updated_at, version,
+                   interest_rate, day_count, amortization
+            FROM debts
+            WHERE id = $1
+            """,
+            debt_id
+        )
+        
+        if row:
+            return Debt.from_row(row)
+        return None
+    
+    async def lock(self, debt_id: int, conn: asyncpg.Connection) -> Optional[Debt]:
+        """
+        Блокирует строку долга до конца транзакции (SELECT ... FOR UPDATE).
+        
+        Используется для операций, которые нельзя выполнять над долгом параллельно
+        (например, импорт платежей с дедупликацией).
+        
+        Args:
+            debt_id: ID долга
+            conn: Подключение к БД с открытой транзакцией
+        
+        Returns:
+            Debt или None, если долг не найден
+        """
+        row = await conn.fetchrow(
+            """
+            SELECT id, debtor_user_id, creditor_user_id, name, principal_amount,
+                   currency, monthly_payment, due_day, status, closed_at,
+                   close_note, created_at, updated_at, version,
+                   interest_rate, day_count, amortization
+            FROM debts
+            WHERE id = $1
+            FOR UPDATE
+            """,
+            debt_id
+        )
+        
+        if row:
+            return Debt.from_row(row)
+        return None
+    
+    async def get_by_ids(
+        self,
+        ids: List[int],
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Dict[int, Debt]:
+        """
+        Получает долги по списку ID одним запросом.
+        
+        Args:
+            ids: Список ID
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Словарь ID -> Debt; ненайденные ID в него не попадают
+        """
+        if not ids:
+            return {}
+        
         own_connection = conn is None
         if own_connection:
-            pool = await Database.get_pool()
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
             conn = await pool.acquire()
         
         try:
-            row = await conn.fetchrow(
+            rows = await conn.fetch(
                 """
                 SELECT id, debtor_user_id, creditor_user_id, name, principal_amount,
                        currency, monthly_payment, due_day, status, closed_at,
-                       close_note, created_at, updated_at
+                       close_note, created_at, updated_at, version,
+                       interest_rate, day_count, amortization
                 FROM debts
-                WHERE id = $1
+                WHERE id = ANY($1::INTEGER[])
                 """,
-                debt_id
+                list(ids)
             )
             
-            if row:
-                return Debt.from_row(row)
-            return None
+            return {row['id']: Debt.from_row(row) for row in rows}
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
                 await pool.release(conn)
     
+    async def get_fresh(self, debt_id: int) -> Optional[Debt]:
+        """
+        Получает актуальную версию долга с primary.
+        
+        Используется после конфликта версий: реплика может отставать.
+        
+        Args:
+            debt_id: ID долга
+        
+        Returns:
+            Debt или None, если долг не найден
+        """
+        pool = await Database.get_pool()
+        conn = await pool.acquire()
+        try:
+            return await self.get_by_id(debt_id, conn)
+        finally:
+            await pool.release(conn)
+    
+    @singleflight
     async def get_by_debtor(
         self,
         debtor_user_id: int,
@@ -133,7 +236,8 @@ class DebtRepository(BaseRepository):
         """
         own_connection = conn is None
         if own_connection:
-            pool = await Database.get_pool()
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
             conn = await pool.acquire()
         
         try:
@@ -141,7 +245,8 @@ class DebtRepository(BaseRepository):
                 """
                 SELECT id, debtor_user_id, creditor_user_id, name, principal_amount,
                        currency, monthly_payment, due_day, status, closed_at,
-                       close_note, created_at, updated_at
+                       close_note, created_at, updated_at, version,
+                       interest_rate, day_count, amortization
                 FROM debts
                 WHERE debtor_user_id = $1
                 ORDER BY created_at DESC
@@ -153,9 +258,9 @@ class DebtRepository(BaseRepository):
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
                 await pool.release(conn)
     
+    @singleflight
     async def get_by_creditor(
         self,
         creditor_user_id: int,
@@ -173,7 +278,8 @@ class DebtRepository(BaseRepository):
         """
         own_connection = conn is None
         if own_connection:
-            pool = await Database.get_pool()
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
             conn = await pool.acquire()
         
         try:
@@ -181,7 +287,8 @@ class DebtRepository(BaseRepository):
                 """
                 SELECT id, debtor_user_id, creditor_user_id, name, principal_amount,
                        currency, monthly_payment, due_day, status, closed_at,
-                       close_note, created_at, updated_at
+                       close_note, created_at, updated_at, version,
+                       interest_rate, day_count, amortization
                 FROM debts
                 WHERE creditor_user_id = $1
                 ORDER BY created_at DESC
@@ -193,29 +300,73 @@ class DebtRepository(BaseRepository):
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
                 await pool.release(conn)
     
+    async def iter_by_user(
+        self,
+        user_id: int,
+        conn: asyncpg.Connection,
+        prefetch: int = 500
+    ) -> AsyncIterator[Debt]:
+        """
+        Потоково читает все долги пользователя (как должника и как кредитора).
+        
+        Использует серверный курсор, поэтому должен вызываться внутри conn.transaction().
+        Условие доступа совпадает с check_access.
+        
+        Args:
+            user_id: ID пользователя
+            conn: Подключение к БД с открытой транзакцией
+            prefetch: Сколько строк забирать с сервера за раз
+        
+        Yields:
+            Debt: Долги в порядке создания
+        """
+        cursor = conn.cursor(
+            """
+            SELECT id, debtor_user_id, creditor_user_id, name, principal_amount,
+                   currency, monthly_payment, due_day, status, closed_at,
+                   close_note, created_at, updated_at, version,
+                   interest_rate, day_count, amortization
+            FROM debts
+            WHERE debtor_user_id = $1 OR creditor_user_id = $1
+            ORDER BY id
+            """,
+            user_id,
+            prefetch=prefetch
+        )
+        async for row in cursor:
+            yield Debt.from_row(row)
+    
     async def update(
         self,
         debt_id: int,
         creditor_user_id: Optional[int] = None,
         monthly_payment: Optional[Decimal] = None,
         due_day: Optional[int] = None,
+        interest_rate: Optional[Decimal] = None,
+        amortization: Optional[str] = None,
+        expected_version: Optional[int] = None,
         conn: Optional[asyncpg.Connection] = None
     ) -> Optional[Debt]:
         """
-        Обновляет долг.
+        Обновляет долг и увеличивает его версию.
         
         Args:
             debt_id: ID долга
             creditor_user_id: ID кредитора (опционально)
             monthly_payment: Ежемесячный платёж (опционально)
             due_day: День месяца для платежа (опционально)
+            interest_rate: Годовая ставка в процентах, 0 — без процентов (опционально)
+            amortization: Тип графика 'annuity' или 'differentiated' (опционально)
+            expected_version: Версия, на основе которой сделано изменение (опционально)
             conn: Подключение к БД (опционально, для транзакций)
         
         Returns:
             Обновлённый Debt или None, если долг не найден
+        
+        Raises:
+            DebtVersionConflictError: Если версия долга не совпадает с expected_version
         """
         own_connection = conn is None
         if own_connection:
@@ -243,25 +394,44 @@ class DebtRepository(BaseRepository):
                 values.append(due_day)
                 param_num += 1
             
+            if interest_rate is not None:
+                updates.append(f"interest_rate = ${param_num}")
+                values.append(interest_rate)
+                param_num += 1
+            
+            if amortization is not None:
+                updates.append(f"amortization = ${param_num}")
+                values.append(amortization)
+                param_num += 1
+            
             if not updates:
                 # Нет изменений
                 return await self.get_by_id(debt_id, conn)
             
             values.append(debt_id)
+            where = f"id = ${param_num}"
+            param_num += 1
+            
+            if expected_version is not None:
+                values.append(expected_version)
+                where += f" AND version = ${param_num}"
             
             query = f"""
                 UPDATE debts
-                SET {', '.join(updates)}, updated_at = NOW()
-                WHERE id = ${param_num}
+                SET {', '.join(updates)}, updated_at = NOW(), version = version + 1
+                WHERE {where}
                 RETURNING id, debtor_user_id, creditor_user_id, name, principal_amount,
                           currency, monthly_payment, due_day, status, closed_at,
-                          close_note, created_at, updated_at
+                          close_note, created_at, updated_at, version,
+                          interest_rate, day_count, amortization
             """
             
             row = await conn.fetchrow(query, *values)
             
             if row:
                 return Debt.from_row(row)
+            if expected_version is not None and await self._exists(debt_id, conn):
+                raise DebtVersionConflictError()
             return None
         
         finally:
@@ -269,6 +439,7 @@ class DebtRepository(BaseRepository):
                 pool = await Database.get_pool()
                 await pool.release(conn)
     
+    @singleflight
     async def check_access(
         self,
         debt_id: int,
@@ -288,7 +459,8 @@ class DebtRepository(BaseRepository):
         """
         own_connection = conn is None
         if own_connection:
-            pool = await Database.get_pool()
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
             conn = await pool.acquire()
         
         try:
@@ -307,25 +479,29 @@ class DebtRepository(BaseRepository):
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
                 await pool.release(conn)
     
     async def close_debt(
         self,
         debt_id: int,
         close_note: Optional[str] = None,
+        expected_version: Optional[int] = None,
         conn: Optional[asyncpg.Connection] = None
     ) -> Optional[Debt]:
         """
-        Закрывает долг (устанавливает status='closed' и closed_at).
+        Закрывает долг (устанавливает status='closed' и closed_at) и увеличивает его версию.
         
         Args:
             debt_id: ID долга
             close_note: Примечание при закрытии (опционально)
+            expected_version: Версия, на основе которой принято решение о закрытии (опционально)
             conn: Подключение к БД (опционально, для транзакций)
         
         Returns:
-            Обновлённый Debt или None, если долг не найден
+            Обновлённый Debt или None, если активный долг не найден
+        
+        Raises:
+            DebtVersionConflictError: Если версия долга не совпадает с expected_version
         """
         own_connection = conn is None
         if own_connection:
@@ -336,23 +512,40 @@ class DebtRepository(BaseRepository):
             row = await conn.fetchrow(
                 """
                 UPDATE debts
-                SET status = 'closed', closed_at = $1, close_note = $2, updated_at = $1
+                SET status = 'closed', closed_at = $1, close_note = $2, updated_at = $1,
+                    version = version + 1
                 WHERE id = $3 AND status = 'active'
+                  AND ($4::INTEGER IS NULL OR version = $4)
                 RETURNING id, debtor_user_id, creditor_user_id, name, principal_amount,
                           currency, monthly_payment, due_day, status, closed_at,
-                          close_note, created_at, updated_at
+                          close_note, created_at, updated_at, version,
+                          interest_rate, day_count, amortization
                 """,
                 datetime.now(timezone.utc),
                 close_note,
-                debt_id
+                debt_id,
+                expected_version
             )
             
             if row:
                 return Debt.from_row(row)
+            if expected_version is not None and await self._exists(debt_id, conn):
+                raise DebtVersionConflictError()
             return None
         
         finally:
             if own_connection:
                 pool = await Database.get_pool()
                 await pool.release(conn)
+    
+    async def _exists(self, debt_id: int, conn: asyncpg.Connection) -> bool:
+        """Проверяет, что долг существует (на том же подключении)."""
+        row = await conn.fetchrow("SELECT 1 FROM debts WHERE id = $1", debt_id)
+        return row is not None
+
 
+# Общий загрузчик: одиночные get_by_id без транзакции собираются в пакеты
+_debt_loader = BatchLoader(
+    lambda ids: DebtRepository().get_by_ids(ids),
+    name='debts'
+)
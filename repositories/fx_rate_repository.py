@@ -0,0 +1,118 @@
+"""
+Репозиторий курсов валют.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncpg
+from database import Database
+from repositories.base import BaseRepository
+
+# Валютная пара: (base_currency, quote_currency)
+CurrencyPair = Tuple[str, str]
+
+
+class FxRateRepository(BaseRepository):
+    """Репозиторий для работы с таблицей fx_rates."""
+    
+    async def get_latest(
+        self,
+        pairs: List[CurrencyPair],
+        on_date: date,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Dict[CurrencyPair, Decimal]:
+        """
+        Получает последние курсы на дату для нескольких пар одним запросом.
+        
+        Args:
+            pairs: Валютные пары
+            on_date: Дата, на которую нужен курс (берётся последний курс не позже неё)
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Пара -> курс; пары без курса в результат не входят
+        """
+        if not pairs:
+            return {}
+        
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                """
+                SELECT p.base_currency, p.quote_currency, r.rate
+                FROM unnest($1::varchar[], $2::varchar[]) AS p(base_currency, quote_currency)
+                CROSS JOIN LATERAL (
+                    SELECT rate
+                    FROM fx_rates
+                    WHERE base_currency = p.base_currency
+                      AND quote_currency = p.quote_currency
+                      AND rate_date <= $3
+                    ORDER BY rate_date DESC
+                    LIMIT 1
+                ) r
+                """,
+                [base for base, _ in pairs],
+                [quote for _, quote in pairs],
+                on_date
+            )
+            
+            return {(row['base_currency'], row['quote_currency']): row['rate'] for row in rows}
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
+    
+    async def load(
+        self,
+        records: Iterable[Tuple[str, str, date, Decimal]],
+        conn: asyncpg.Connection
+    ) -> int:
+        """
+        Загружает курсы, заменяя уже сохранённые на те же даты.
+        
+        Записи загружаются через COPY во временную таблицу и переносятся в
+        fx_rates одним INSERT ... ON CONFLICT. Должен вызываться внутри
+        транзакции: временная таблица удаляется при её завершении.
+        
+        Args:
+            records: Записи (base_currency, quote_currency, rate_date, rate); читаются потоково
+            conn: Подключение к БД с открытой транзакцией
+        
+        Returns:
+            Количество загруженных курсов
+        """
+        await conn.execute(
+            """
+            CREATE TEMP TABLE fx_rates_import (
+                base_currency VARCHAR(3) NOT NULL,
+                quote_currency VARCHAR(3) NOT NULL,
+                rate_date DATE NOT NULL,
+                rate NUMERIC(20, 10) NOT NULL
+            ) ON COMMIT DROP
+            """
+        )
+        
+        await conn.copy_records_to_table(
+            'fx_rates_import',
+            records=records,
+            columns=['base_currency', 'quote_currency', 'rate_date', 'rate']
+        )
+        
+        # При повторе пары и даты в файле действует последняя строка
+        status = await conn.execute(
+            """
+            INSERT INTO fx_rates (base_currency, quote_currency, rate_date, rate)
+            SELECT DISTINCT ON (base_currency, quote_currency, rate_date)
+                   base_currency, quote_currency, rate_date, rate
+            FROM fx_rates_import
+            ORDER BY base_currency, quote_currency, rate_date, ctid DESC
+            ON CONFLICT (base_currency, quote_currency, rate_date)
+            DO UPDATE SET rate = EXCLUDED.rate
+            """
+        )
+        return int(status.split()[-1])
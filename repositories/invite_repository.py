@@ -75,6 +75,8 @@ class InviteRepository(BaseRepository):
         """
         own_connection = conn is None
         if own_connection:
+            # Всегда primary: ссылку открывает другой пользователь через секунды
+            # после создания, и чтение своих записей его не направит на primary
             pool = await Database.get_pool()
             conn = await pool.acquire()
         
@@ -94,7 +96,6 @@ class InviteRepository(BaseRepository):
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
                 await pool.release(conn)
     
     async def mark_as_used(
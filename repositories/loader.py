@@ -0,0 +1,132 @@
+"""
+Пакетная загрузка записей по ID (в стиле DataLoader).
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+from config import config
+from database import Database
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class _Batch:
+    """Ключи, собранные за одно окно, и ожидающие их результата."""
+
+    __slots__ = ('futures', 'dispatched')
+
+    def __init__(self):
+        self.futures: Dict = {}
+        self.dispatched = False
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Собирает одиночные загрузки по ключу в пакетные запросы.
+
+    Вызовы load(), сделанные в течение DB_BATCH_WINDOW_MS, объединяются в один
+    вызов batch_fn со списком ключей (например, WHERE id = ANY($1)), после чего
+    каждый вызывающий получает свою запись. Одинаковые ключи в пакете
+    запрашиваются один раз.
+
+    Как и singleflight, пакеты разделяются по маршруту чтения: пользователь,
+    недавно выполнивший запись, не попадёт в пакет, читающий с реплики, а
+    загрузка после записи не попадёт в пакет, собранный до неё.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]],
+        name: str,
+        window: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+    ):
+        """
+        Args:
+            batch_fn: Загружает записи по списку ключей и возвращает словарь ключ -> запись
+            name: Имя загрузчика для метрик
+            window: Окно сбора ключей в секундах (по умолчанию DB_BATCH_WINDOW_MS)
+            max_batch_size: Максимальный размер пакета (по умолчанию DB_BATCH_MAX_SIZE)
+        """
+        self._batch_fn = batch_fn
+        self.name = name
+        self._window = window
+        self._max_batch_size = max_batch_size
+        self._pending: Dict[Tuple, _Batch] = {}
+
+    @property
+    def window(self) -> float:
+        """Окно сбора ключей в секундах."""
+        if self._window is not None:
+            return self._window
+        return config.DB_BATCH_WINDOW_MS / 1000
+
+    @property
+    def max_batch_size(self) -> int:
+        """Максимальное количество ключей в одном запросе."""
+        if self._max_batch_size is not None:
+            return self._max_batch_size
+        return config.DB_BATCH_MAX_SIZE
+
+    async def load(self, key: K) -> Optional[V]:
+        """
+        Загружает запись по ключу в составе ближайшего пакета.
+
+        Returns:
+            Запись или None, если она не найдена
+        """
+        loop = asyncio.get_running_loop()
+        route = Database.read_route()
+
+        batch = self._pending.get(route)
+        if batch is None:
+            batch = self._pending[route] = _Batch()
+            if self.window > 0:
+                loop.call_later(self.window, self._dispatch, route, batch)
+            else:
+                loop.call_soon(self._dispatch, route, batch)
+
+        future = batch.futures.get(key)
+        if future is None:
+            future = batch.futures[key] = loop.create_future()
+            if len(batch.futures) >= self.max_batch_size:
+                self._dispatch(route, batch)
+
+        # Отмена одного вызывающего не отменяет загрузку для остальных
+        return await asyncio.shield(future)
+
+    def _dispatch(self, route: Tuple, batch: _Batch) -> None:
+        """Отправляет собранный пакет (один раз)."""
+        if self._pending.get(route) is batch:
+            del self._pending[route]
+        if batch.dispatched:
+            return
+        batch.dispatched = True
+        asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: _Batch) -> None:
+        """Выполняет пакетный запрос и раздаёт результаты."""
+        keys = list(batch.futures)
+        metrics.inc(f"db.loader.{self.name}.batches")
+        metrics.inc(f"db.loader.{self.name}.keys", len(keys))
+
+        try:
+            values = await self._batch_fn(keys)
+        except asyncio.CancelledError:
+            for future in batch.futures.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.debug(f"Batch load '{self.name}' of {len(keys)} keys failed: {e}")
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in batch.futures.items():
+            if not future.done():
+                future.set_result(values.get(key))
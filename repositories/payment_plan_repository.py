@@ -0,0 +1,200 @@
+"""
+Репозиторий для работы с сохранёнными планами погашения.
+"""
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+from decimal import Decimal
+import asyncpg
+from database import Database
+from models.payment_plan import PlannedPayment
+from repositories.base import BaseRepository
+
+# Первый ключ рекомендательной блокировки пересчёта плана (второй — ID долга)
+PLAN_LOCK_NAMESPACE = 4401
+
+
+class PaymentPlanRepository(BaseRepository):
+    """Репозиторий для работы с таблицей payment_plans."""
+    
+    async def lock(self, debt_id: int, conn: asyncpg.Connection) -> None:
+        """
+        Блокирует пересчёт плана долга до конца транзакции.
+        
+        Используется рекомендательная блокировка, а не строка debts: транзакции
+        платежей и изменения условий уже держат блокировки на долге, и ожидание
+        строки долга при пересчёте плана приводило бы к взаимоблокировкам.
+        
+        Args:
+            debt_id: ID долга
+            conn: Подключение к БД с открытой транзакцией
+        """
+        await conn.execute("SELECT pg_advisory_xact_lock($1, $2)", PLAN_LOCK_NAMESPACE, debt_id)
+    
+    async def replace(
+        self,
+        debt_id: int,
+        items: Iterable[Tuple[date, Decimal, Optional[Decimal], Optional[Decimal], bool]],
+        valid_until: date,
+        conn: asyncpg.Connection
+    ) -> None:
+        """
+        Заменяет план долга.
+        
+        Вызывается в транзакции после lock(), иначе параллельные пересчёты
+        одного плана конфликтуют.
+        
+        Args:
+            debt_id: ID долга
+            items: Платежи (дата, сумма, основной долг, проценты, финальный) по порядку
+            valid_until: До какой даты включительно план актуален
+            conn: Подключение к БД с открытой транзакцией
+        """
+        await conn.execute("DELETE FROM payment_plans WHERE debt_id = $1", debt_id)
+        
+        records = [
+            (debt_id, seq, payment_date, amount, principal, interest, is_final)
+            for seq, (payment_date, amount, principal, interest, is_final) in enumerate(items, 1)
+        ]
+        if records:
+            await conn.copy_records_to_table(
+                'payment_plans',
+                records=records,
+                columns=['debt_id', 'seq', 'payment_date', 'amount', 'principal', 'interest', 'is_final']
+            )
+        
+        await conn.execute(
+            """
+            INSERT INTO payment_plan_state (debt_id, valid_until, generated_at)
+            VALUES ($1, $2, NOW())
+            ON CONFLICT (debt_id) DO UPDATE
+            SET valid_until = EXCLUDED.valid_until, generated_at = EXCLUDED.generated_at
+            """,
+            debt_id,
+            valid_until
+        )
+    
+    async def get_by_debt(
+        self,
+        debt_id: int,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Tuple[Optional[date], List[PlannedPayment]]:
+        """
+        Получает сохранённый план долга.
+        
+        Args:
+            debt_id: ID долга
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            (до какой даты план актуален или None, если план не построен; платежи по порядку)
+        """
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            valid_until = await conn.fetchval(
+                "SELECT valid_until FROM payment_plan_state WHERE debt_id = $1",
+                debt_id
+            )
+            rows = await conn.fetch(
+                """
+                SELECT debt_id, seq, payment_date, amount, principal, interest, is_final
+                FROM payment_plans
+                WHERE debt_id = $1
+                ORDER BY seq
+                """,
+                debt_id
+            )
+            
+            return valid_until, [PlannedPayment.from_row(row) for row in rows]
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
+    
+    async def get_due_between(
+        self,
+        start: date,
+        end: date,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[PlannedPayment]:
+        """
+        Получает плановые платежи активных долгов с датой в [start, end].
+        
+        Args:
+            start: Начальная дата
+            end: Конечная дата
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Платежи по возрастанию даты
+        """
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                """
+                SELECT p.debt_id, p.seq, p.payment_date, p.amount, p.principal, p.interest, p.is_final
+                FROM payment_plans p
+                JOIN debts d ON d.id = p.debt_id
+                WHERE p.payment_date BETWEEN $1 AND $2 AND d.status = 'active'
+                ORDER BY p.payment_date, p.debt_id
+                """,
+                start,
+                end
+            )
+            
+            return [PlannedPayment.from_row(row) for row in rows]
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
+    
+    async def get_stale_debt_ids(
+        self,
+        today: date,
+        limit: int,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[int]:
+        """
+        Получает активные долги, план которых не построен или устарел.
+        
+        Args:
+            today: Текущая дата
+            limit: Максимальное количество
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Список ID долгов
+        """
+        own_connection = conn is None
+        if own_connection:
+            pool = await Database.get_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                """
+                SELECT d.id
+                FROM debts d
+                LEFT JOIN payment_plan_state s ON s.debt_id = d.id
+                WHERE d.status = 'active' AND (s.debt_id IS NULL OR s.valid_until < $1)
+                ORDER BY d.id
+                LIMIT $2
+                """,
+                today,
+                limit
+            )
+            
+            return [row['id'] for row in rows]
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
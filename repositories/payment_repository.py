@@ -1,13 +1,14 @@
 """
 Репозиторий для работы с платежами.
 """
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Iterable, Optional, List, Tuple
 from datetime import datetime, date
 from datetime import timezone
 from decimal import Decimal
 import asyncpg
 from models.payment import Payment
-from repositories.base import BaseRepository
+from repositories.base import BaseRepository, singleflight
+from repositories.loader import BatchLoader
 from database import Database
 
 
@@ -19,8 +20,9 @@ class PaymentRepository(BaseRepository):
         debt_id: int,
         amount: Decimal,
         payment_date: date,
+        idempotency_key: Optional[str] = None,
         conn: Optional[asyncpg.Connection] = None
-    ) -> Payment:
+    ) -> Optional[Payment]:
         """
         Создаёт новый платёж.
         
@@ -28,10 +30,12 @@ class PaymentRepository(BaseRepository):
             debt_id: ID долга
             amount: Сумма платежа
             payment_date: Дата платежа
+            idempotency_key: Ключ идемпотентности (опционально)
             conn: Подключение к БД (опционально, для транзакций)
         
         Returns:
-            Payment: Созданный платёж
+            Payment: Созданный платёж или None, если платёж с таким
+            ключом идемпотентности уже существует
         """
         own_connection = conn is None
         if own_connection:
@@ -41,33 +45,43 @@ class PaymentRepository(BaseRepository):
         try:
             row = await conn.fetchrow(
                 """
-                INSERT INTO payments (debt_id, amount, payment_date, created_at, updated_at)
-                VALUES ($1, $2, $3, $4, $4)
-                RETURNING id, debt_id, amount, payment_date, deleted_at, created_at, updated_at
+                INSERT INTO payments (
+                    debt_id, amount, payment_date, idempotency_key, created_at, updated_at
+                )
+                VALUES ($1, $2, $3, $4, $5, $5)
+                ON CONFLICT (idempotency_key) WHERE idempotency_key IS NOT NULL DO NOTHING
+                RETURNING id, debt_id, amount, payment_date, deleted_at, created_at, updated_at,
+                          idempotency_key
                 """,
                 debt_id,
                 amount,
                 payment_date,
+                idempotency_key,
                 datetime.now(timezone.utc)
             )
             
-            return Payment.from_row(row)
+            if row:
+                return Payment.from_row(row)
+            return None
         
         finally:
             if own_connection:
                 pool = await Database.get_pool()
                 await pool.release(conn)
     
-    async def get_by_id(
+    async def get_by_idempotency_key(
         self,
-        payment_id: int,
+        idempotency_key: str,
         conn: Optional[asyncpg.Connection] = None
     ) -> Optional[Payment]:
         """
-        Получает платёж по ID.
+        Получает платёж по ключу идемпотентности.
+        
+        Запрос всегда выполняется на primary: реплика может ещё не содержать
+        только что созданный платёж.
         
         Args:
-            payment_id: ID платежа
+            idempotency_key: Ключ идемпотентности
             conn: Подключение к БД (опционально, для транзакций)
         
         Returns:
@@ -81,11 +95,12 @@ class PaymentRepository(BaseRepository):
         try:
             row = await conn.fetchrow(
                 """
-                SELECT id, debt_id, amount, payment_date, deleted_at, created_at, updated_at
+                SELECT id, debt_id, amount, payment_date, deleted_at, created_at, updated_at,
+                       idempotency_key
                 FROM payments
-                WHERE id = $1
+                WHERE idempotency_key = $1
                 """,
-                payment_id
+                idempotency_key
             )
             
             if row:
@@ -94,9 +109,165 @@ class PaymentRepository(BaseRepository):
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
                 await pool.release(conn)
     
+    async def bulk_import(
+        self,
+        debt_id: int,
+        records: Iterable[Tuple[int, date, Decimal]],
+        conn: asyncpg.Connection
+    ) -> dict:
+        """
+        Массово добавляет платежи по долгу, пропуская уже существующие.
+        
+        Записи загружаются через COPY во временную таблицу и переносятся в
+        payments одним INSERT ... SELECT. Дубликатом считается платёж с той же
+        датой и суммой: если такой платёж уже есть N раз, первые N совпадающих
+        записей импорта пропускаются (повторный импорт той же выписки ничего не добавит).
+        
+        Должен вызываться внутри транзакции: временная таблица удаляется при её завершении.
+        
+        Args:
+            debt_id: ID долга
+            records: Записи (номер строки, дата платежа, сумма); читаются потоково
+            conn: Подключение к БД с открытой транзакцией
+        
+        Returns:
+            Словарь: staged (записей в выписке), inserted (добавлено),
+            total (сумма добавленных), first_date и last_date (период добавленных)
+        """
+        await conn.execute(
+            """
+            CREATE TEMP TABLE payment_import (
+                line_no INTEGER NOT NULL,
+                payment_date DATE NOT NULL,
+                amount NUMERIC(15, 2) NOT NULL
+            ) ON COMMIT DROP
+            """
+        )
+        
+        status = await conn.copy_records_to_table(
+            'payment_import',
+            records=records,
+            columns=['line_no', 'payment_date', 'amount']
+        )
+        staged = int(status.split()[-1]) if status else 0
+        
+        row = await conn.fetchrow(
+            """
+            WITH incoming AS (
+                SELECT payment_date, amount,
+                       ROW_NUMBER() OVER (PARTITION BY payment_date, amount ORDER BY line_no) AS n
+                FROM payment_import
+            ),
+            existing AS (
+                SELECT payment_date, amount, COUNT(*) AS c
+                FROM payments
+                WHERE debt_id = $1 AND deleted_at IS NULL
+                GROUP BY payment_date, amount
+            ),
+            inserted AS (
+                INSERT INTO payments (debt_id, amount, payment_date, created_at, updated_at)
+                SELECT $1, i.amount, i.payment_date, $2, $2
+                FROM incoming i
+                LEFT JOIN existing e USING (payment_date, amount)
+                WHERE i.n > COALESCE(e.c, 0)
+                ORDER BY i.payment_date
+                RETURNING amount, payment_date
+            )
+            SELECT COUNT(*) AS inserted,
+                   COALESCE(SUM(amount), 0) AS total,
+                   MIN(payment_date) AS first_date,
+                   MAX(payment_date) AS last_date
+            FROM inserted
+            """,
+            debt_id,
+            datetime.now(timezone.utc)
+        )
+        
+        return {
+            'staged': staged,
+            'inserted': row['inserted'],
+            'total': Decimal(str(row['total'])),
+            'first_date': row['first_date'],
+            'last_date': row['last_date'],
+        }
+    
+    @singleflight
+    async def get_by_id(
+        self,
+        payment_id: int,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Optional[Payment]:
+        """
+        Получает платёж по ID.
+        
+        Без conn запрос объединяется с одновременными запросами в один get_by_ids.
+        
+        Args:
+            payment_id: ID платежа
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Payment или None, если платёж не найден
+        """
+        if conn is None:
+            return await _payment_loader.load(payment_id)
+        
+        row = await conn.fetchrow(
+            """
+            SELECT id, debt_id, amount, payment_date, deleted_at, created_at, updated_at
+            FROM payments
+            WHERE id = $1
+            """,
+            payment_id
+        )
+        
+        if row:
+            return Payment.from_row(row)
+        return None
+    
+    async def get_by_ids(
+        self,
+        ids: List[int],
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Dict[int, Payment]:
+        """
+        Получает платежи по списку ID одним запросом.
+        
+        Args:
+            ids: Список ID
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Словарь ID -> Payment; ненайденные ID в него не попадают
+        """
+        if not ids:
+            return {}
+        
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                """
+                SELECT id, debt_id, amount, payment_date, deleted_at, created_at, updated_at
+                FROM payments
+                WHERE id = ANY($1::INTEGER[])
+                """,
+                list(ids)
+            )
+            
+            return {row['id']: Payment.from_row(row) for row in rows}
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
+    
+    @singleflight
     async def get_by_debt_id(
         self,
         debt_id: int,
@@ -116,7 +287,8 @@ class PaymentRepository(BaseRepository):
         """
         own_connection = conn is None
         if own_connection:
-            pool = await Database.get_pool()
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
             conn = await pool.acquire()
         
         try:
@@ -141,7 +313,140 @@ class PaymentRepository(BaseRepository):
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
+                await pool.release(conn)
+    
+    async def iter_by_user(
+        self,
+        user_id: int,
+        conn: asyncpg.Connection,
+        prefetch: int = 500
+    ) -> AsyncIterator[Payment]:
+        """
+        Потоково читает платежи (включая удалённые) по всем долгам пользователя.
+        
+        Использует серверный курсор, поэтому должен вызываться внутри conn.transaction().
+        Доступны платежи по долгам, где пользователь должник или кредитор.
+        
+        Args:
+            user_id: ID пользователя
+            conn: Подключение к БД с открытой транзакцией
+            prefetch: Сколько строк забирать с сервера за раз
+        
+        Yields:
+            Payment: Платежи, сгруппированные по долгу и отсортированные по дате
+        """
+        cursor = conn.cursor(
+            """
+            SELECT p.id, p.debt_id, p.amount, p.payment_date, p.deleted_at,
+                   p.created_at, p.updated_at, p.idempotency_key
+            FROM payments p
+            JOIN debts d ON d.id = p.debt_id
+            WHERE d.debtor_user_id = $1 OR d.creditor_user_id = $1
+            ORDER BY p.debt_id, p.payment_date, p.id
+            """,
+            user_id,
+            prefetch=prefetch
+        )
+        async for row in cursor:
+            yield Payment.from_row(row)
+    
+    async def get_paid_history(
+        self,
+        debt_ids: List[int],
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Dict[int, List[Tuple[date, Decimal]]]:
+        """
+        Получает накопленную сумму платежей по дням для нескольких долгов.
+        
+        Платёж учитывается с даты платежа и до даты удаления: удаление — это
+        отрицательное событие в день deleted_at. Суммы накапливаются оконной
+        функцией, поэтому один запрос отвечает на «сколько было выплачено на
+        любую дату» для всех долгов сразу.
+        
+        Args:
+            debt_ids: ID долгов
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            debt_id -> [(день, выплачено к концу дня)] по возрастанию дней
+        """
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                """
+                WITH events AS (
+                    SELECT debt_id, payment_date AS day, amount AS delta
+                    FROM payments
+                    WHERE debt_id = ANY($1::INTEGER[])
+                      AND (deleted_at IS NULL OR deleted_at::date > payment_date)
+                    UNION ALL
+                    SELECT debt_id, deleted_at::date, -amount
+                    FROM payments
+                    WHERE debt_id = ANY($1::INTEGER[])
+                      AND deleted_at IS NOT NULL AND deleted_at::date > payment_date
+                )
+                SELECT debt_id, day,
+                       SUM(SUM(delta)) OVER (PARTITION BY debt_id ORDER BY day) AS paid
+                FROM events
+                GROUP BY debt_id, day
+                ORDER BY debt_id, day
+                """,
+                list(debt_ids)
+            )
+            
+            history: Dict[int, List[Tuple[date, Decimal]]] = {}
+            for row in rows:
+                history.setdefault(row['debt_id'], []).append((row['day'], Decimal(str(row['paid']))))
+            return history
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
+    
+    async def get_paid_totals(
+        self,
+        debt_ids: List[int],
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Dict[int, Decimal]:
+        """
+        Получает суммы активных платежей для нескольких долгов одним запросом.
+        
+        Args:
+            debt_ids: ID долгов
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            debt_id -> сумма платежей; долгов без платежей в словаре нет
+        """
+        if not debt_ids:
+            return {}
+        
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                """
+                SELECT debt_id, SUM(amount) AS paid
+                FROM payments
+                WHERE debt_id = ANY($1::INTEGER[]) AND deleted_at IS NULL
+                GROUP BY debt_id
+                """,
+                list(debt_ids)
+            )
+            
+            return {row['debt_id']: Decimal(str(row['paid'])) for row in rows}
+        
+        finally:
+            if own_connection:
                 await pool.release(conn)
     
     async def soft_delete(
@@ -185,6 +490,7 @@ class PaymentRepository(BaseRepository):
                 pool = await Database.get_pool()
                 await pool.release(conn)
     
+    @singleflight
     async def calculate_balance(
         self,
         debt_id: int,
@@ -204,7 +510,8 @@ class PaymentRepository(BaseRepository):
         """
         own_connection = conn is None
         if own_connection:
-            pool = await Database.get_pool()
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
             conn = await pool.acquire()
         
         try:
@@ -227,6 +534,11 @@ class PaymentRepository(BaseRepository):
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
                 await pool.release(conn)
 
+
+# Общий загрузчик: одиночные get_by_id без транзакции собираются в пакеты
+_payment_loader = BatchLoader(
+    lambda ids: PaymentRepository().get_by_ids(ids),
+    name='payments'
+)
@@ -0,0 +1,95 @@
+"""
+Репозиторий ночной статистики.
+"""
+from datetime import date
+from typing import AsyncIterator, Iterable, Tuple
+import asyncpg
+from repositories.base import BaseRepository
+
+USER_STATISTICS_COLUMNS = [
+    'stat_date', 'user_id', 'active_debts', 'payoff_progress', 'installments_due',
+    'installments_on_time', 'avg_delay_days', 'projected_completion',
+]
+
+
+class StatisticsRepository(BaseRepository):
+    """Чтение исходных данных и запись результатов ночной статистики."""
+    
+    async def stream_active_debt_payments(
+        self,
+        conn: asyncpg.Connection,
+        prefetch: int = 500
+    ) -> AsyncIterator[asyncpg.Record]:
+        """
+        Потоково читает активные долги с их платежами.
+        
+        Использует серверный курсор, поэтому должен вызываться внутри conn.transaction().
+        Долг без платежей даёт одну строку с payment_date и payment_amount = NULL.
+        
+        Args:
+            conn: Подключение к БД с открытой транзакцией
+            prefetch: Сколько строк забирать с сервера за раз
+        
+        Yields:
+            Строки долга (колонки debts) и платежа (payment_date, payment_amount),
+            сгруппированные по должнику и долгу, платежи — по возрастанию даты
+        """
+        cursor = conn.cursor(
+            """
+            SELECT d.id, d.debtor_user_id, d.creditor_user_id, d.name, d.principal_amount,
+                   d.currency, d.monthly_payment, d.due_day, d.status, d.closed_at,
+                   d.close_note, d.created_at, d.updated_at, d.version,
+                   d.interest_rate, d.day_count, d.amortization,
+                   p.payment_date, p.amount AS payment_amount
+            FROM debts d
+            LEFT JOIN payments p ON p.debt_id = d.id AND p.deleted_at IS NULL
+            WHERE d.status = 'active'
+            ORDER BY d.debtor_user_id, d.id, p.payment_date, p.id
+            """,
+            prefetch=prefetch
+        )
+        async for row in cursor:
+            yield row
+    
+    async def delete_for_date(self, stat_date: date, conn: asyncpg.Connection) -> None:
+        """
+        Удаляет статистику за дату перед повторным расчётом.
+        
+        Args:
+            stat_date: Дата расчёта
+            conn: Подключение к БД с открытой транзакцией
+        """
+        await conn.execute("DELETE FROM user_statistics WHERE stat_date = $1", stat_date)
+        await conn.execute("DELETE FROM global_statistics WHERE stat_date = $1", stat_date)
+    
+    async def copy_user_statistics(self, records: Iterable[Tuple], conn: asyncpg.Connection) -> None:
+        """
+        Записывает статистику должников через COPY.
+        
+        Args:
+            records: Кортежи в порядке USER_STATISTICS_COLUMNS
+            conn: Подключение к БД с открытой транзакцией
+        """
+        await conn.copy_records_to_table(
+            'user_statistics',
+            records=records,
+            columns=USER_STATISTICS_COLUMNS
+        )
+    
+    async def save_global_statistics(self, record: Tuple, conn: asyncpg.Connection) -> None:
+        """
+        Сохраняет общую статистику.
+        
+        Args:
+            record: Кортеж (stat_date, users, active_debts, payoff_progress, installments_due,
+                installments_on_time, avg_delay_days, projected_completion)
+            conn: Подключение к БД с открытой транзакцией
+        """
+        await conn.copy_records_to_table(
+            'global_statistics',
+            records=[record],
+            columns=[
+                'stat_date', 'users', 'active_debts', 'payoff_progress', 'installments_due',
+                'installments_on_time', 'avg_delay_days', 'projected_completion',
+            ]
+        )
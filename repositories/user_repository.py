@@ -1,12 +1,13 @@
 """
 Репозиторий для работы с пользователями.
 """
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from datetime import timezone
 import asyncpg
 from models.user import User
-from repositories.base import BaseRepository
+from repositories.base import BaseRepository, singleflight
+from repositories.loader import BatchLoader
 from database import Database
 
 
@@ -30,37 +31,57 @@ class UserRepository(BaseRepository):
         """
         own_connection = conn is None
         if own_connection:
-            pool = await Database.get_pool()
-            conn = await pool.acquire()
-        
-        try:
-            # Пытаемся найти существующего пользователя
+            # Пользователь почти всегда уже существует: ищем его на реплике,
+            # и только при отсутствии идём на primary для вставки
+            read_pool = await Database.get_read_pool()
+            read_conn = await read_pool.acquire()
+            try:
+                row = await read_conn.fetchrow(
+                    "SELECT id, tg_user_id, created_at FROM users WHERE tg_user_id = $1",
+                    tg_user_id
+                )
+            finally:
+                await read_pool.release(read_conn)
+        else:
             row = await conn.fetchrow(
                 "SELECT id, tg_user_id, created_at FROM users WHERE tg_user_id = $1",
                 tg_user_id
             )
-            
-            if row:
-                return User.from_row(row)
-            
-            # Создаём нового пользователя
+        
+        if row:
+            return User.from_row(row)
+        
+        if own_connection:
+            pool = await Database.get_pool()
+            conn = await pool.acquire()
+        
+        try:
+            # Создаём пользователя; при гонке (или отставании реплики) берём существующего
             row = await conn.fetchrow(
                 """
                 INSERT INTO users (tg_user_id, created_at)
                 VALUES ($1, $2)
+                ON CONFLICT (tg_user_id) DO NOTHING
                 RETURNING id, tg_user_id, created_at
                 """,
                 tg_user_id,
                 datetime.now(timezone.utc)
             )
+            Database.mark_write()
+            
+            if row is None:
+                row = await conn.fetchrow(
+                    "SELECT id, tg_user_id, created_at FROM users WHERE tg_user_id = $1",
+                    tg_user_id
+                )
             
             return User.from_row(row)
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
                 await pool.release(conn)
     
+    @singleflight
     async def get_by_id(
         self,
         user_id: int,
@@ -69,6 +90,8 @@ class UserRepository(BaseRepository):
         """
         Получает пользователя по ID.
         
+        Без conn запрос объединяется с одновременными запросами в один get_by_ids.
+        
         Args:
             user_id: ID пользователя
             conn: Подключение к БД (опционально, для транзакций)
@@ -76,23 +99,61 @@ class UserRepository(BaseRepository):
         Returns:
             User или None, если пользователь не найден
         """
+        if conn is None:
+            return await _user_loader.load(user_id)
+        
+        row = await conn.fetchrow(
+            "SELECT id, tg_user_id, created_at FROM users WHERE id = $1",
+            user_id
+        )
+        
+        if row:
+            return User.from_row(row)
+        return None
+    
+    async def get_by_ids(
+        self,
+        ids: List[int],
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Dict[int, User]:
+        """
+        Получает пользователей по списку ID одним запросом.
+        
+        Args:
+            ids: Список ID
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Словарь ID -> User; ненайденные ID в него не попадают
+        """
+        if not ids:
+            return {}
+        
         own_connection = conn is None
         if own_connection:
-            pool = await Database.get_pool()
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
             conn = await pool.acquire()
         
         try:
-            row = await conn.fetchrow(
-                "SELECT id, tg_user_id, created_at FROM users WHERE id = $1",
-                user_id
+            rows = await conn.fetch(
+                """
+                SELECT id, tg_user_id, created_at
+                FROM users
+                WHERE id = ANY($1::INTEGER[])
+                """,
+                list(ids)
             )
             
-            if row:
-                return User.from_row(row)
-            return None
+            return {row['id']: User.from_row(row) for row in rows}
         
         finally:
             if own_connection:
-                pool = await Database.get_pool()
                 await pool.release(conn)
 
+
+# Общий загрузчик: одиночные get_by_id без транзакции собираются в пакеты
+_user_loader = BatchLoader(
+    lambda ids: UserRepository().get_by_ids(ids),
+    name='users'
+)
@@ -0,0 +1,189 @@
+"""
+Репозиторий для работы со сводками пользователей.
+"""
+from datetime import date
+from typing import List, Optional
+import asyncpg
+from database import Database
+from models.user_summary import UserSummary
+from repositories.base import BaseRepository
+
+# Первый ключ рекомендательной блокировки пересчёта сводки (второй — ID пользователя)
+SUMMARY_LOCK_NAMESPACE = 4801
+
+
+class UserSummaryRepository(BaseRepository):
+    """Репозиторий для работы с таблицей user_summaries."""
+    
+    async def get(
+        self,
+        user_id: int,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Optional[UserSummary]:
+        """
+        Получает сводку пользователя по первичному ключу.
+        
+        Args:
+            user_id: ID пользователя
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            UserSummary или None, если сводка ещё не построена
+        """
+        own_connection = conn is None
+        if own_connection:
+            # Только чтение: запрос может выполняться на реплике
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+        
+        try:
+            row = await conn.fetchrow(
+                """
+                SELECT user_id, debtor_active, debtor_outstanding, debtor_next_due,
+                       creditor_active, creditor_outstanding, creditor_next_due, updated_at
+                FROM user_summaries
+                WHERE user_id = $1
+                """,
+                user_id
+            )
+            
+            return UserSummary.from_row(row) if row else None
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
+    
+    async def refresh(
+        self,
+        user_ids: List[int],
+        today: date,
+        conn: asyncpg.Connection
+    ) -> None:
+        """
+        Пересчитывает сводки пользователей по их активным долгам.
+        
+        Сначала берутся блокировки сводок в порядке ID, затем сводки
+        считаются отдельным запросом: он видит все изменения транзакций,
+        которые пересчитывали эти же сводки раньше. Ближайший платёж берётся
+        из payment_plans, поэтому планы изменённых долгов пересчитываются до
+        вызова.
+        
+        Args:
+            user_ids: ID пользователей
+            today: Текущая дата (платежи раньше неё не считаются ближайшими)
+            conn: Подключение к БД с открытой транзакцией
+        """
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        
+        await conn.execute(
+            """
+            SELECT pg_advisory_xact_lock($1, user_id)
+            FROM (SELECT unnest($2::int[]) AS user_id ORDER BY 1) ids
+            """,
+            SUMMARY_LOCK_NAMESPACE,
+            user_ids
+        )
+        
+        await conn.execute(
+            """
+            WITH balances AS (
+                SELECT d.debtor_user_id, d.creditor_user_id, d.currency,
+                       GREATEST(d.principal_amount - COALESCE(p.paid, 0), 0) AS balance,
+                       n.next_due
+                FROM debts d
+                LEFT JOIN LATERAL (
+                    SELECT SUM(amount) AS paid
+                    FROM payments
+                    WHERE debt_id = d.id AND deleted_at IS NULL
+                ) p ON TRUE
+                LEFT JOIN LATERAL (
+                    SELECT MIN(payment_date) AS next_due
+                    FROM payment_plans
+                    WHERE debt_id = d.id AND payment_date >= $2
+                ) n ON TRUE
+                WHERE d.status = 'active'
+                  AND (d.debtor_user_id = ANY($1::int[]) OR d.creditor_user_id = ANY($1::int[]))
+            ),
+            sides AS (
+                SELECT debtor_user_id AS user_id, 'debtor' AS side, currency, balance, next_due
+                FROM balances
+                UNION ALL
+                SELECT creditor_user_id, 'creditor', currency, balance, next_due
+                FROM balances
+                WHERE creditor_user_id IS NOT NULL
+            ),
+            per_currency AS (
+                SELECT user_id, side, currency, COUNT(*) AS debts, SUM(balance) AS outstanding,
+                       MIN(next_due) AS next_due
+                FROM sides
+                WHERE user_id = ANY($1::int[])
+                GROUP BY user_id, side, currency
+            ),
+            per_side AS (
+                SELECT user_id, side, SUM(debts)::int AS debts,
+                       jsonb_object_agg(currency, outstanding::text) AS outstanding,
+                       MIN(next_due) AS next_due
+                FROM per_currency
+                GROUP BY user_id, side
+            )
+            INSERT INTO user_summaries (
+                user_id, debtor_active, debtor_outstanding, debtor_next_due,
+                creditor_active, creditor_outstanding, creditor_next_due, updated_at
+            )
+            SELECT u.id,
+                   COALESCE(d.debts, 0), COALESCE(d.outstanding, '{}'::jsonb), d.next_due,
+                   COALESCE(c.debts, 0), COALESCE(c.outstanding, '{}'::jsonb), c.next_due,
+                   NOW()
+            FROM users u
+            LEFT JOIN per_side d ON d.user_id = u.id AND d.side = 'debtor'
+            LEFT JOIN per_side c ON c.user_id = u.id AND c.side = 'creditor'
+            WHERE u.id = ANY($1::int[])
+            ON CONFLICT (user_id) DO UPDATE
+            SET debtor_active = EXCLUDED.debtor_active,
+                debtor_outstanding = EXCLUDED.debtor_outstanding,
+                debtor_next_due = EXCLUDED.debtor_next_due,
+                creditor_active = EXCLUDED.creditor_active,
+                creditor_outstanding = EXCLUDED.creditor_outstanding,
+                creditor_next_due = EXCLUDED.creditor_next_due,
+                updated_at = EXCLUDED.updated_at
+            """,
+            user_ids,
+            today
+        )
+    
+    async def get_user_ids_after(
+        self,
+        after_id: int,
+        limit: int,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> List[int]:
+        """
+        Получает ID пользователей по возрастанию, начиная после after_id.
+        
+        Args:
+            after_id: Последний обработанный ID (0 — с начала)
+            limit: Максимальное количество
+            conn: Подключение к БД (опционально, для транзакций)
+        
+        Returns:
+            Список ID пользователей
+        """
+        own_connection = conn is None
+        if own_connection:
+            pool = await Database.get_pool()
+            conn = await pool.acquire()
+        
+        try:
+            rows = await conn.fetch(
+                "SELECT id FROM users WHERE id > $1 ORDER BY id LIMIT $2",
+                after_id,
+                limit
+            )
+            
+            return [row['id'] for row in rows]
+        
+        finally:
+            if own_connection:
+                await pool.release(conn)
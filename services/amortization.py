@@ -0,0 +1,235 @@
+"""
+График погашения долга с процентами.
+
+Все вычисления ведутся в целых числах: суммы — в копейках (центах), годовая
+ставка — доля, умноженная на RATE_SCALE. Проценты за период округляются до
+копейки (половина — вверх) ровно один раз, поэтому результат не зависит от
+накопления ошибок и совпадает при любом числе долгов в пакете.
+"""
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterator, List, Optional, Tuple
+from models.debt import Debt
+
+
+# Масштаб ставки: 12.5% годовых = 0.125 * RATE_SCALE
+RATE_SCALE = 10 ** 12
+
+DAY_COUNT_30_360 = '30/360'
+DAY_COUNT_ACTUAL_365 = 'actual/365'
+DAY_COUNT_ACTUAL_ACTUAL = 'actual/actual'
+DAY_COUNTS = (DAY_COUNT_30_360, DAY_COUNT_ACTUAL_365, DAY_COUNT_ACTUAL_ACTUAL)
+
+SCHEDULE_ANNUITY = 'annuity'  # Равные платежи: сначала проценты, остальное — основной долг
+SCHEDULE_DIFFERENTIATED = 'differentiated'  # Равные доли основного долга плюс проценты
+SCHEDULES = (SCHEDULE_ANNUITY, SCHEDULE_DIFFERENTIATED)
+
+
+@dataclass(frozen=True)
+class InterestTerms:
+    """Условия начисления процентов."""
+    rate: int  # Годовая ставка, доля * RATE_SCALE
+    day_count: str = DAY_COUNT_30_360
+    schedule: str = SCHEDULE_ANNUITY
+    
+    @classmethod
+    def from_debt(cls, debt: Debt) -> Optional["InterestTerms"]:
+        """Возвращает условия долга или None для беспроцентного долга."""
+        if not debt.interest_rate:
+            return None
+        return cls(rate=rate_units(debt.interest_rate), day_count=debt.day_count, schedule=debt.amortization)
+
+
+@dataclass
+class Installment:
+    """Платёж графика; суммы в копейках."""
+    payment_date: date
+    payment: int
+    principal: int
+    interest: int
+    balance: int  # Остаток основного долга после платежа
+
+
+def rate_units(percent: Decimal) -> int:
+    """Переводит годовую ставку в процентах в целое число долей RATE_SCALE."""
+    return int((percent * RATE_SCALE / 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_minor(amount: Decimal) -> int:
+    """Переводит сумму в копейки (центы)."""
+    return int((amount * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_minor(amount: int) -> Decimal:
+    """Переводит копейки (центы) в сумму с двумя знаками."""
+    return Decimal(amount).scaleb(-2)
+
+
+def due_date_in_month(month: date, due_day: Optional[int]) -> date:
+    """Дата платежа в месяце; день платежа за концом месяца сдвигается на последний день."""
+    if not due_day:
+        return month.replace(day=1)
+    return month.replace(day=min(due_day, monthrange(month.year, month.month)[1]))
+
+
+def iter_due_dates(first: date, due_day: int) -> Iterator[date]:
+    """Даты платежей начиная с first, по одной в месяц."""
+    index = first.year * 12 + first.month - 1
+    yield first
+    while True:
+        index += 1
+        yield due_date_in_month(date(index // 12, index % 12 + 1, 1), due_day)
+
+
+def _round_div(numerator: int, denominator: int) -> int:
+    """Целочисленное деление с округлением половины вверх (для неотрицательных чисел)."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def _days_360(start: date, end: date) -> int:
+    """Число дней между датами по правилу 30E/360."""
+    return (
+        360 * (end.year - start.year)
+        + 30 * (end.month - start.month)
+        + min(end.day, 30) - min(start.day, 30)
+    )
+
+
+def accrue(balance: int, rate: int, day_count: str, start: date, end: date) -> int:
+    """
+    Начисляет проценты на остаток за период [start, end).
+    
+    Args:
+        balance: Остаток в копейках
+        rate: Годовая ставка, доля * RATE_SCALE
+        day_count: Правило подсчёта дней (DAY_COUNT_*)
+        start: Начало периода
+        end: Конец периода
+    
+    Returns:
+        Проценты в копейках
+    """
+    if balance <= 0 or rate <= 0 or end <= start:
+        return 0
+    
+    if day_count == DAY_COUNT_30_360:
+        return _round_div(balance * rate * _days_360(start, end), 360 * RATE_SCALE)
+    
+    if day_count == DAY_COUNT_ACTUAL_365:
+        return _round_div(balance * rate * (end - start).days, 365 * RATE_SCALE)
+    
+    if day_count == DAY_COUNT_ACTUAL_ACTUAL:
+        # Дни каждого календарного года делятся на длину этого года; общий
+        # знаменатель 365 * 366 сохраняет точность без дробей
+        weighted = 0
+        cursor = start
+        while cursor < end:
+            year_end = min(date(cursor.year + 1, 1, 1), end)
+            year_length = 366 if monthrange(cursor.year, 2)[1] == 29 else 365
+            weighted += (year_end - cursor).days * (365 * 366 // year_length)
+            cursor = year_end
+        return _round_div(balance * rate * weighted, 365 * 366 * RATE_SCALE)
+    
+    raise ValueError(f"Неизвестное правило подсчёта дней: {day_count}")
+
+
+def iter_schedule(
+    balance: int,
+    payment: int,
+    terms: InterestTerms,
+    start: date,
+    due_dates: Iterator[date],
+    first_extra: int = 0
+) -> Iterator[Installment]:
+    """
+    Строит график платежей до погашения долга.
+    
+    Для аннуитета payment — полный платёж (проценты + основной долг), для
+    дифференцированного графика — доля основного долга, проценты добавляются сверху.
+    Последний платёж уменьшается до остатка с процентами.
+    
+    Если аннуитетный платёж не покрывает проценты, остаток растёт и график
+    бесконечен: вызывающий ограничивает число платежей.
+    
+    Args:
+        balance: Остаток основного долга в копейках
+        payment: Ежемесячный платёж в копейках
+        terms: Условия начисления процентов
+        start: Дата, с которой начисляются проценты
+        due_dates: Даты платежей
+        first_extra: Разовый дополнительный платёж вместе с первым платежом
+    
+    Yields:
+        Installment
+    """
+    previous = start
+    extra = first_extra
+    
+    for due in due_dates:
+        if balance <= 0:
+            return
+        
+        interest = accrue(balance, terms.rate, terms.day_count, previous, due)
+        if terms.schedule == SCHEDULE_DIFFERENTIATED:
+            principal = min(payment + extra, balance)
+        else:
+            # Непокрытые платежом проценты увеличивают остаток
+            principal = min(payment + extra - interest, balance)
+        
+        balance -= principal
+        extra = 0
+        previous = due
+        yield Installment(
+            payment_date=due,
+            payment=principal + interest,
+            principal=principal,
+            interest=interest,
+            balance=balance,
+        )
+
+
+def summarize(
+    balance: int,
+    payment: int,
+    terms: InterestTerms,
+    start: date,
+    due_dates: Iterator[date],
+    max_periods: int,
+    first_extra: int = 0
+) -> Optional[Tuple[date, int, int, int]]:
+    """
+    Рассчитывает итог графика, не сохраняя платежи.
+    
+    Returns:
+        (дата последнего платежа, число платежей, последний платёж, сумма процентов)
+        в копейках или None, если долг не гасится за max_periods платежей
+    """
+    count = 0
+    total_interest = 0
+    for installment in iter_schedule(balance, payment, terms, start, due_dates, first_extra):
+        count += 1
+        total_interest += installment.interest
+        if installment.balance == 0:
+            return installment.payment_date, count, installment.payment, total_interest
+        if count >= max_periods:
+            return None
+    return None
+
+
+def build_schedule(
+    balance: int,
+    payment: int,
+    terms: InterestTerms,
+    start: date,
+    due_dates: Iterator[date],
+    max_periods: int
+) -> List[Installment]:
+    """Строит график, ограниченный max_periods платежами."""
+    schedule = []
+    for installment in iter_schedule(balance, payment, terms, start, due_dates):
+        schedule.append(installment)
+        if len(schedule) >= max_periods:
+            break
+    return schedule
@@ -0,0 +1,102 @@
+"""
+Сервис просрочек по плановым платежам.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+from models.arrears import OverdueInstallment
+from repositories.arrears_repository import ArrearsRepository
+
+
+@dataclass
+class DebtArrears:
+    """Просроченные платежи одного долга."""
+    debt_id: int
+    debt_name: str
+    currency: str
+    debtor_user_id: int
+    creditor_user_id: Optional[int]
+    installments: List[OverdueInstallment] = field(default_factory=list)  # По возрастанию сроков
+    
+    @property
+    def total_missing(self) -> Decimal:
+        """Сумма просрочки."""
+        return sum((item.missing for item in self.installments), Decimal('0'))
+    
+    @property
+    def oldest_due_date(self) -> date:
+        """Срок самого раннего неоплаченного платежа."""
+        return self.installments[0].due_date
+    
+    def days_overdue(self, today: date) -> int:
+        """Сколько дней просрочен самый ранний неоплаченный платёж."""
+        return (today - self.oldest_due_date).days
+
+
+def group_by_debt(installments: List[OverdueInstallment]) -> List[DebtArrears]:
+    """
+    Группирует просроченные платежи по долгам.
+    
+    Args:
+        installments: Платежи по долгам и возрастанию сроков
+    
+    Returns:
+        Список DebtArrears, сначала самые давние просрочки
+    """
+    grouped: Dict[int, DebtArrears] = {}
+    for item in installments:
+        arrears = grouped.get(item.debt_id)
+        if arrears is None:
+            arrears = grouped[item.debt_id] = DebtArrears(
+                debt_id=item.debt_id,
+                debt_name=item.debt_name,
+                currency=item.currency,
+                debtor_user_id=item.debtor_user_id,
+                creditor_user_id=item.creditor_user_id,
+            )
+        arrears.installments.append(item)
+    
+    return sorted(grouped.values(), key=lambda arrears: (arrears.oldest_due_date, arrears.debt_id))
+
+
+def totals_by_currency(arrears: List[DebtArrears]) -> Dict[str, Decimal]:
+    """Сумма просрочек по валютам."""
+    totals: Dict[str, Decimal] = {}
+    for item in arrears:
+        totals[item.currency] = totals.get(item.currency, Decimal('0')) + item.total_missing
+    return totals
+
+
+class ArrearsService:
+    """Сервис поиска просроченных платежей."""
+    
+    def __init__(self):
+        self.arrears_repo = ArrearsRepository()
+    
+    async def get_arrears(
+        self,
+        today: Optional[date] = None,
+        creditor_user_id: Optional[int] = None,
+        debtor_user_id: Optional[int] = None
+    ) -> List[DebtArrears]:
+        """
+        Получает просрочки по активным долгам.
+        
+        Все долги проверяются одним запросом в БД, без построения плана
+        каждого долга.
+        
+        Args:
+            today: Текущая дата (по умолчанию — сегодня)
+            creditor_user_id: Только долги этого кредитора (опционально)
+            debtor_user_id: Только долги этого должника (опционально)
+        
+        Returns:
+            Список DebtArrears, сначала самые давние просрочки
+        """
+        installments = await self.arrears_repo.get_overdue(
+            today or date.today(),
+            creditor_user_id=creditor_user_id,
+            debtor_user_id=debtor_user_id
+        )
+        return group_by_debt(installments)
@@ -0,0 +1,105 @@
+"""
+Компактное (дельта) кодирование состояний в журнале аудита.
+
+Запись аудита хранит одно из:
+- 'full'     — прежний формат: before и after целиком, как их передал сервис;
+- 'snapshot' — полное состояние сущности после события в after (before пустой);
+- 'delta'    — в after только изменённые ключи (JSON Merge Patch, RFC 7396:
+               null означает, что ключ удалён), before пустой.
+
+Состояние на момент любой записи восстанавливается проигрыванием записей
+от ближайшего предшествующего снимка (snapshot или create). В состояние долга
+попадают только его поля (DEBT_STATE_FIELDS): остальные ключи описывают само
+событие (например, итоги импорта выписки) и остаются только в его записи.
+"""
+from typing import Iterable, Iterator, Optional, Tuple
+from models.audit_log import AuditLog
+
+
+ENCODING_FULL = 'full'
+ENCODING_SNAPSHOT = 'snapshot'
+ENCODING_DELTA = 'delta'
+
+# Поля долга, из которых складывается его состояние в журнале
+DEBT_STATE_FIELDS = frozenset({
+    'id', 'name', 'debtor_user_id', 'creditor_user_id', 'principal_amount', 'currency',
+    'monthly_payment', 'due_day', 'status', 'interest_rate', 'amortization',
+    'closed_at', 'close_note',
+})
+
+
+def state_fields(entity_type: str, payload: Optional[dict]) -> dict:
+    """Оставляет в записи только поля состояния сущности."""
+    if entity_type != 'debt':
+        return dict(payload or {})
+    return {key: value for key, value in (payload or {}).items() if key in DEBT_STATE_FIELDS}
+
+
+def has_event_fields(entity_type: str, payload: Optional[dict]) -> bool:
+    """Проверяет, есть ли в записи ключи, не относящиеся к состоянию сущности."""
+    return len(state_fields(entity_type, payload)) != len(payload or {})
+
+
+def compact(state: Optional[dict]) -> dict:
+    """Убирает ключи со значением None: отсутствующий ключ и есть None."""
+    return {key: value for key, value in (state or {}).items() if value is not None}
+
+
+def make_patch(before: Optional[dict], after: Optional[dict]) -> dict:
+    """
+    Возвращает ключи after, значения которых отличаются от before.
+    
+    Ключ, ставший None, попадает в патч со значением None. Ключи, которых нет
+    в after, считаются неизменными: сервисы передают только затронутые поля.
+    """
+    before = before or {}
+    return {key: value for key, value in (after or {}).items() if before.get(key) != value}
+
+
+def apply_patch(state: Optional[dict], patch: Optional[dict]) -> dict:
+    """Применяет патч к состоянию и возвращает новое состояние."""
+    result = dict(state or {})
+    for key, value in (patch or {}).items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = value
+    return result
+
+
+def is_base(entry: AuditLog) -> bool:
+    """Проверяет, начинается ли с записи восстановление состояния."""
+    return entry.payload_encoding == ENCODING_SNAPSHOT or entry.action == 'create'
+
+
+def replay(
+    entries: Iterable[AuditLog],
+    state: Optional[dict] = None
+) -> Iterator[Tuple[AuditLog, dict, dict]]:
+    """
+    Проигрывает записи одной сущности в хронологическом порядке.
+    
+    Args:
+        entries: Записи аудита, начиная со снимка или создания
+        state: Состояние перед первой записью (если цепочка начинается не со снимка)
+    
+    Yields:
+        (запись, состояние до, состояние после)
+    """
+    state = compact(state)
+    for entry in entries:
+        before = state
+        if is_base(entry):
+            state = compact(state_fields(entry.entity_type, entry.after))
+        else:
+            # В прежнем формате after тоже содержит только новые значения изменённых полей
+            state = apply_patch(state, state_fields(entry.entity_type, entry.after))
+        yield entry, before, state
+
+
+def final_state(entries: Iterable[AuditLog], state: Optional[dict] = None) -> Optional[dict]:
+    """Возвращает состояние после последней записи или None, если записей нет."""
+    result = None
+    for _, _, result in replay(entries, state):
+        pass
+    return result
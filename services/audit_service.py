@@ -1,9 +1,68 @@
 """
 Сервис для аудита операций.
 """
-from typing import Optional
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 import asyncpg
+from config import config
+from models.audit_log import AuditLog
 from repositories.audit_log_repository import AuditLogRepository
+from repositories.debt_repository import DebtRepository
+from services.audit_encoding import (
+    ENCODING_DELTA,
+    ENCODING_FULL,
+    ENCODING_SNAPSHOT,
+    apply_patch,
+    compact,
+    final_state,
+    has_event_fields,
+    is_base,
+    make_patch,
+    replay,
+    state_fields,
+)
+
+
+# Размер страницы истории по умолчанию и максимальный
+HISTORY_PAGE_SIZE = 10
+MAX_HISTORY_PAGE_SIZE = 100
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Больше любого id: ключ (at, _MAX_ID) включает все записи в момент at
+_MAX_ID = 2 ** 31 - 1
+
+
+@dataclass
+class AuditPage:
+    """Страница истории изменений."""
+    entries: List[AuditLog]
+    next_cursor: Optional[str]  # None, если это последняя страница
+
+
+def encode_cursor(entry: AuditLog) -> str:
+    """
+    Кодирует ключ (occurred_at, id) записи в короткую строку для callback_data.
+    
+    Время хранится в целых микросекундах, чтобы ключ восстанавливался без потерь.
+    """
+    micros = (entry.occurred_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}.{entry.id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Восстанавливает ключ (occurred_at, id) из строки курсора.
+    
+    Raises:
+        ValueError: Если курсор повреждён
+    """
+    try:
+        micros, entry_id = cursor.split('.')
+        return _EPOCH + timedelta(microseconds=int(micros)), int(entry_id)
+    except (ValueError, OverflowError):
+        raise ValueError("Неверный курсор истории")
 
 
 class AuditService:
@@ -11,6 +70,7 @@ class AuditService:
     
     def __init__(self):
         self.audit_repo = AuditLogRepository()
+        self.debt_repo = DebtRepository()
     
     async def log_create(
         self,
@@ -18,6 +78,7 @@ class AuditService:
         entity_id: int,
         actor_user_id: int,
         after: dict,
+        debt_id: Optional[int] = None,
         conn: Optional[asyncpg.Connection] = None
     ) -> None:
         """
@@ -28,15 +89,18 @@ class AuditService:
             entity_id: ID сущности
             actor_user_id: ID пользователя, выполнившего действие
             after: Состояние после создания
+            debt_id: ID долга, к истории которого относится запись
+                (для платежей и приглашений)
             conn: Подключение к БД (для транзакции)
         """
-        await self.audit_repo.create(
+        await self._record(
             entity_type=entity_type,
             entity_id=entity_id,
             action='create',
             actor_user_id=actor_user_id,
             before=None,
             after=after,
+            debt_id=debt_id,
             conn=conn
         )
     
@@ -47,6 +111,7 @@ class AuditService:
         actor_user_id: int,
         before: dict,
         after: dict,
+        debt_id: Optional[int] = None,
         conn: Optional[asyncpg.Connection] = None
     ) -> None:
         """
@@ -58,15 +123,18 @@ class AuditService:
             actor_user_id: ID пользователя, выполнившего действие
             before: Состояние до изменения
             after: Состояние после изменения
+            debt_id: ID долга, к истории которого относится запись
+                (для платежей и приглашений)
             conn: Подключение к БД (для транзакции)
         """
-        await self.audit_repo.create(
+        await self._record(
             entity_type=entity_type,
             entity_id=entity_id,
             action='update',
             actor_user_id=actor_user_id,
             before=before,
             after=after,
+            debt_id=debt_id,
             conn=conn
         )
     
@@ -76,6 +144,7 @@ class AuditService:
         entity_id: int,
         actor_user_id: int,
         before: dict,
+        debt_id: Optional[int] = None,
         conn: Optional[asyncpg.Connection] = None
     ) -> None:
         """
@@ -86,15 +155,18 @@ class AuditService:
             entity_id: ID сущности
             actor_user_id: ID пользователя, выполнившего действие
             before: Состояние до удаления
+            debt_id: ID долга, к истории которого относится запись
+                (для платежей и приглашений)
             conn: Подключение к БД (для транзакции)
         """
-        await self.audit_repo.create(
+        await self._record(
             entity_type=entity_type,
             entity_id=entity_id,
             action='delete',
             actor_user_id=actor_user_id,
             before=before,
             after=None,
+            debt_id=debt_id,
             conn=conn
         )
     
@@ -105,6 +177,7 @@ class AuditService:
         actor_user_id: int,
         before: dict,
         after: dict,
+        debt_id: Optional[int] = None,
         conn: Optional[asyncpg.Connection] = None
     ) -> None:
         """
@@ -116,15 +189,258 @@ class AuditService:
             actor_user_id: ID пользователя, выполнившего действие
             before: Состояние до закрытия
             after: Состояние после закрытия
+            debt_id: ID долга, к истории которого относится запись
+                (для платежей и приглашений)
             conn: Подключение к БД (для транзакции)
         """
-        await self.audit_repo.create(
+        await self._record(
             entity_type=entity_type,
             entity_id=entity_id,
             action='close',
             actor_user_id=actor_user_id,
             before=before,
             after=after,
+            debt_id=debt_id,
             conn=conn
         )
-
+    
+    async def _record(
+        self,
+        entity_type: str,
+        entity_id: int,
+        action: str,
+        actor_user_id: int,
+        before: Optional[dict],
+        after: Optional[dict],
+        debt_id: Optional[int],
+        conn: Optional[asyncpg.Connection]
+    ) -> None:
+        """
+        Записывает событие в формате, выбранном AUDIT_ENCODING.
+        
+        В режиме 'delta' создание пишется полным снимком, а изменения — только
+        изменёнными ключами. Полный снимок пишется также каждые
+        AUDIT_SNAPSHOT_INTERVAL событий сущности и при первом событии в новом
+        месяце: партиции audit_log помесячные, и архивирование старого месяца
+        не должно отрезать дельты от их снимка.
+        """
+        # Записи с полями события (итоги импорта и т. п.) хранятся целиком, чтобы
+        # история их показывала; в цепочку состояния входят только поля сущности
+        if config.AUDIT_ENCODING != ENCODING_DELTA or has_event_fields(entity_type, after):
+            await self.audit_repo.create(
+                entity_type=entity_type,
+                entity_id=entity_id,
+                action=action,
+                actor_user_id=actor_user_id,
+                before=before,
+                after=after,
+                debt_id=debt_id,
+                payload_encoding=ENCODING_FULL,
+                conn=conn
+            )
+            return
+        
+        before = state_fields(entity_type, before)
+        
+        if action == 'create':
+            encoding, payload = ENCODING_SNAPSHOT, compact(after)
+        else:
+            # Удаление ничего не меняет в полях: сам факт есть в action
+            patch = make_patch(before, after) if after is not None else {}
+            chain = await self.audit_repo.get_chain(entity_type, entity_id, conn=conn)
+            
+            if chain and is_base(chain[0]) and not self._snapshot_due(chain):
+                encoding, payload = ENCODING_DELTA, patch
+            else:
+                # Без снимка в цепочке восстанавливаем, что известно, и начинаем новую
+                state = final_state(chain) or {}
+                state = apply_patch({**state, **compact(before)}, patch)
+                encoding, payload = ENCODING_SNAPSHOT, state
+        
+        await self.audit_repo.create(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            action=action,
+            actor_user_id=actor_user_id,
+            before=None,
+            after=payload,
+            debt_id=debt_id,
+            payload_encoding=encoding,
+            conn=conn
+        )
+    
+    @staticmethod
+    def _snapshot_due(chain: List[AuditLog]) -> bool:
+        """Проверяет, пора ли записать полный снимок вместо дельты."""
+        if len(chain) >= config.AUDIT_SNAPSHOT_INTERVAL:
+            return True
+        base_time = chain[0].occurred_at
+        now = datetime.now(timezone.utc)
+        return (base_time.year, base_time.month) != (now.year, now.month)
+    
+    async def expand(self, entries: List[AuditLog]) -> List[AuditLog]:
+        """
+        Восстанавливает полные before/after для записей в компактном формате.
+        
+        Для каждой сущности читается одна цепочка от ближайшего снимка до самой
+        новой из её записей, поэтому стоимость не зависит от длины всей истории.
+        
+        Args:
+            entries: Записи аудита (изменяются на месте)
+        
+        Returns:
+            Те же записи
+        """
+        groups: Dict[Tuple[str, int], List[AuditLog]] = {}
+        for entry in entries:
+            if entry.payload_encoding != ENCODING_FULL:
+                groups.setdefault((entry.entity_type, entry.entity_id), []).append(entry)
+        
+        for (entity_type, entity_id), group in groups.items():
+            keys = [(entry.occurred_at, entry.id) for entry in group]
+            chain = await self.audit_repo.get_chain(
+                entity_type, entity_id, anchor=min(keys), until=max(keys)
+            )
+            views = {entry.id: (before, after) for entry, before, after in replay(chain)}
+            for entry in group:
+                if entry.id in views:
+                    entry.before, entry.after = views[entry.id]
+        
+        return entries
+    
+    async def reconstruct(
+        self,
+        entity_type: str,
+        entity_id: int,
+        at: Optional[datetime] = None
+    ) -> Optional[dict]:
+        """
+        Восстанавливает состояние сущности на момент времени по журналу аудита.
+        
+        Args:
+            entity_type: Тип сущности ('debt', 'payment', 'invite')
+            entity_id: ID сущности
+            at: Момент времени (None — текущее состояние)
+        
+        Returns:
+            Состояние (ключи как в записях аудита) или None, если сущности ещё не было
+        """
+        key = (at, _MAX_ID) if at is not None else None
+        chain = await self.audit_repo.get_chain(entity_type, entity_id, anchor=key, until=key)
+        return final_state(chain)
+    
+    async def get_debt_history(
+        self,
+        debt_id: int,
+        user_id: int,
+        cursor: Optional[str] = None,
+        limit: int = HISTORY_PAGE_SIZE
+    ) -> AuditPage:
+        """
+        Возвращает историю долга: платежи, изменения и закрытие по времени.
+        
+        Args:
+            debt_id: ID долга
+            user_id: ID пользователя, запрашивающего историю
+            cursor: Курсор следующей страницы (из AuditPage.next_cursor)
+            limit: Размер страницы
+        
+        Returns:
+            AuditPage: Записи от новых к старым
+        
+        Raises:
+            PermissionError: Если пользователь не является должником или кредитором
+            ValueError: Если курсор повреждён
+        """
+        if not await self.debt_repo.check_access(debt_id, user_id):
+            raise PermissionError("Нет доступа к этому долгу")
+        
+        return await self._page(
+            lambda before, size: self.audit_repo.get_debt_history(debt_id, before, size),
+            cursor,
+            limit
+        )
+    
+    async def get_entity_history(
+        self,
+        entity_type: str,
+        entity_id: int,
+        cursor: Optional[str] = None,
+        limit: int = HISTORY_PAGE_SIZE
+    ) -> AuditPage:
+        """
+        Возвращает историю одной сущности. Права доступа не проверяются.
+        
+        Args:
+            entity_type: Тип сущности ('debt', 'payment', 'invite')
+            entity_id: ID сущности
+            cursor: Курсор следующей страницы
+            limit: Размер страницы
+        
+        Returns:
+            AuditPage: Записи от новых к старым
+        """
+        return await self._page(
+            lambda before, size: self.audit_repo.get_entity_history(entity_type, entity_id, before, size),
+            cursor,
+            limit
+        )
+    
+    async def get_actor_history(
+        self,
+        actor_user_id: int,
+        cursor: Optional[str] = None,
+        limit: int = HISTORY_PAGE_SIZE
+    ) -> AuditPage:
+        """
+        Возвращает действия пользователя.
+        
+        Args:
+            actor_user_id: ID пользователя
+            cursor: Курсор следующей страницы
+            limit: Размер страницы
+        
+        Returns:
+            AuditPage: Записи от новых к старым
+        """
+        return await self._page(
+            lambda before, size: self.audit_repo.get_actor_history(actor_user_id, before, size),
+            cursor,
+            limit
+        )
+    
+    async def get_feed(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = HISTORY_PAGE_SIZE
+    ) -> AuditPage:
+        """
+        Возвращает общую ленту аудита. Права доступа не проверяются.
+        
+        Args:
+            cursor: Курсор следующей страницы
+            limit: Размер страницы
+        
+        Returns:
+            AuditPage: Записи от новых к старым
+        """
+        return await self._page(
+            lambda before, size: self.audit_repo.get_feed(before, size),
+            cursor,
+            limit
+        )
+    
+    async def _page(self, fetch, cursor: Optional[str], limit: int) -> AuditPage:
+        """Читает на одну запись больше страницы, чтобы узнать, есть ли следующая."""
+        limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+        before = decode_cursor(cursor) if cursor else None
+        entries = await fetch(before, limit + 1)
+        
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = encode_cursor(entries[-1])
+        
+        await self.expand(entries)
+        
+        return AuditPage(entries=entries, next_cursor=next_cursor)
@@ -0,0 +1,130 @@
+"""
+Сервис расчёта остатка и условий долга на произвольную дату.
+"""
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from models.debt import Debt
+from repositories.debt_repository import DebtRepository
+from repositories.payment_repository import PaymentRepository
+from services.audit_service import AuditService
+
+
+@dataclass
+class DebtAsOf:
+    """Состояние долга на конец дня."""
+    debt_id: int
+    as_of: date
+    balance: Decimal
+    paid: Decimal
+    terms: Dict  # Условия долга из журнала аудита (monthly_payment, due_day, status, ...)
+
+
+class PaymentHistoryIndex:
+    """
+    Накопленные суммы платежей по дням для нескольких долгов.
+    
+    Строится одним запросом; ответ на «сколько выплачено к дате» — двоичный
+    поиск по дням долга, без повторного чтения платежей.
+    """
+    
+    def __init__(self, history: Dict[int, List[Tuple[date, Decimal]]]):
+        self._days = {debt_id: [day for day, _ in steps] for debt_id, steps in history.items()}
+        self._paid = {debt_id: [paid for _, paid in steps] for debt_id, steps in history.items()}
+    
+    def paid_as_of(self, debt_id: int, day: date) -> Decimal:
+        """Возвращает сумму платежей, учтённых на конец дня."""
+        days = self._days.get(debt_id)
+        if not days:
+            return Decimal('0')
+        index = bisect_right(days, day)
+        return self._paid[debt_id][index - 1] if index else Decimal('0')
+
+
+def end_of_day(day: date) -> datetime:
+    """Последний момент дня в часовом поясе сервера."""
+    return datetime.combine(day + timedelta(days=1), time.min).astimezone() - timedelta(microseconds=1)
+
+
+class BalanceService:
+    """Сервис остатков и условий долга на дату."""
+    
+    def __init__(self):
+        self.debt_repo = DebtRepository()
+        self.payment_repo = PaymentRepository()
+        self.audit_service = AuditService()
+    
+    async def build_index(self, debt_ids: Iterable[int]) -> PaymentHistoryIndex:
+        """Строит индекс накопленных платежей для долгов одним запросом."""
+        return PaymentHistoryIndex(await self.payment_repo.get_paid_history(list(debt_ids)))
+    
+    async def get_balances_as_of(
+        self,
+        debts: List[Debt],
+        days: List[date]
+    ) -> Dict[Tuple[int, date], Optional[Decimal]]:
+        """
+        Рассчитывает остатки сразу для многих долгов и дат.
+        
+        Права доступа не проверяются: долги должен выбрать вызывающий.
+        
+        Args:
+            debts: Долги
+            days: Даты
+        
+        Returns:
+            (debt_id, дата) -> остаток на конец дня или None, если долга ещё не было
+        """
+        index = await self.build_index(debt.id for debt in debts)
+        
+        balances: Dict[Tuple[int, date], Optional[Decimal]] = {}
+        for debt in debts:
+            created = debt.created_at.astimezone().date()
+            for day in days:
+                if day < created:
+                    balances[(debt.id, day)] = None
+                else:
+                    balances[(debt.id, day)] = debt.principal_amount - index.paid_as_of(debt.id, day)
+        return balances
+    
+    async def get_debt_as_of(self, debt_id: int, user_id: int, day: date) -> DebtAsOf:
+        """
+        Возвращает остаток и условия долга на конец указанного дня.
+        
+        Платёж учитывается с даты платежа до дня его удаления. Условия
+        (ежемесячный платёж, день платежа, статус) восстанавливаются по журналу аудита.
+        
+        Args:
+            debt_id: ID долга
+            user_id: ID пользователя (должник или кредитор)
+            day: Дата
+        
+        Returns:
+            DebtAsOf: Состояние долга на конец дня
+        
+        Raises:
+            PermissionError: Если у пользователя нет доступа к долгу
+            ValueError: Если долг не найден или ещё не существовал на эту дату
+        """
+        if not await self.debt_repo.check_access(debt_id, user_id):
+            raise PermissionError("Нет доступа к этому долгу")
+        
+        debt = await self.debt_repo.get_by_id(debt_id)
+        if debt is None:
+            raise ValueError("Долг не найден")
+        
+        balance = (await self.get_balances_as_of([debt], [day]))[(debt_id, day)]
+        if balance is None:
+            raise ValueError("На эту дату долга ещё не было")
+        
+        terms = await self.audit_service.reconstruct('debt', debt_id, at=end_of_day(day)) or {}
+        
+        return DebtAsOf(
+            debt_id=debt_id,
+            as_of=day,
+            balance=balance,
+            paid=debt.principal_amount - balance,
+            terms=terms,
+        )
@@ -0,0 +1,107 @@
+"""
+Сервис календаря платежей по всем долгам должника.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from dates import add_months, month_start
+from models.debt import Debt
+from services.planner_service import PlannerService, PaymentPlanItem
+from services.portfolio_service import PortfolioService
+
+# Горизонт календаря: 10 лет
+MAX_CALENDAR_MONTHS = 120
+
+
+@dataclass
+class CashflowMonth:
+    """Плановые платежи по всем долгам за один месяц."""
+    month: date  # Первое число месяца
+    totals: Dict[str, Decimal] = field(default_factory=dict)  # Валюта -> сумма платежей
+    payments: int = 0  # Количество плановых платежей
+
+
+def build_calendar(
+    payments: Iterable[Tuple[Debt, PaymentPlanItem]],
+    last_month: date
+) -> List[CashflowMonth]:
+    """
+    Сворачивает поток плановых платежей по возрастанию дат в помесячные итоги.
+    
+    Args:
+        payments: (долг, элемент плана) по возрастанию дат, в том числе бесконечный поток
+        last_month: Последний месяц календаря (первое число)
+    
+    Returns:
+        Список CashflowMonth по возрастанию месяцев; месяцы без платежей пропускаются
+    """
+    calendar: List[CashflowMonth] = []
+    for debt, item in payments:
+        month = month_start(item.payment_date)
+        if month > last_month:
+            break
+        if not calendar or calendar[-1].month != month:
+            calendar.append(CashflowMonth(month=month))
+        current = calendar[-1]
+        current.totals[debt.currency] = current.totals.get(debt.currency, Decimal('0')) + item.amount
+        current.payments += 1
+    return calendar
+
+
+def calendar_cache_key(debts: List[Tuple[Debt, Decimal]], today: date) -> Tuple:
+    """Ключ кэша календаря: меняется со сменой дня и при изменении условий или остатка любого долга."""
+    return (today, tuple((debt.cache_key, balance) for debt, balance in debts))
+
+
+class CashflowService:
+    """Сервис помесячного календаря платежей должника."""
+    
+    def __init__(self):
+        self.portfolio_service = PortfolioService()
+        self.planner_service = PlannerService()
+    
+    async def get_calendar(
+        self,
+        user_id: int,
+        today: Optional[date] = None,
+        months: int = MAX_CALENDAR_MONTHS
+    ) -> List[CashflowMonth]:
+        """
+        Рассчитывает, сколько пользователь платит в каждом месяце по всем долгам.
+        
+        Args:
+            user_id: ID должника
+            today: Текущая дата (по умолчанию — сегодня)
+            months: Сколько месяцев показывать, начиная с текущего
+        
+        Returns:
+            Список CashflowMonth по возрастанию месяцев
+        """
+        today = today or date.today()
+        debts = await self.portfolio_service.get_active_debts(user_id)
+        return self.build(debts, today, months)
+    
+    def build(
+        self,
+        debts: List[Tuple[Debt, Decimal]],
+        today: date,
+        months: int = MAX_CALENDAR_MONTHS
+    ) -> List[CashflowMonth]:
+        """
+        Строит календарь по уже прочитанным долгам.
+        
+        Остатки всех долгов читаются заранее одним запросом (PortfolioService),
+        планы строятся лениво и сливаются в один поток по датам, который
+        сворачивается в месяцы за один проход. Суммы в разных валютах не складываются.
+        
+        Args:
+            debts: Список (долг, остаток)
+            today: Текущая дата
+            months: Сколько месяцев показывать, начиная с текущего
+        
+        Returns:
+            Список CashflowMonth по возрастанию месяцев
+        """
+        last_month = add_months(month_start(today), months - 1)
+        return build_calendar(self.planner_service.merge_payment_plans(debts, today), last_month)
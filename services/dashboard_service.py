@@ -0,0 +1,129 @@
+"""
+Сервис дашборда кредитора.
+"""
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from config import config
+from metrics import metrics
+from repositories.arrears_repository import ArrearsRepository
+from repositories.dashboard_repository import DashboardRepository
+from services.fx_service import ConvertedTotal, FxService
+
+# Кэш дашбордов: creditor_user_id -> (время расчёта по time.monotonic(), дашборд)
+_dashboards: Dict[int, Tuple[float, "CreditorDashboard"]] = {}
+# Сколько раз сбрасывался кэш кредитора: расчёт, начатый до записи, не попадает в кэш
+_generations: Dict[int, int] = {}
+
+
+@dataclass
+class CurrencyTotals:
+    """Итоги по долгам кредитора в одной валюте."""
+    currency: str
+    debts: int
+    outstanding: Decimal  # Сумма остатков
+    expected_this_month: Decimal  # Плановые платежи с датой в текущем месяце
+    paid_this_month: Decimal  # Платежи с начала месяца
+
+
+@dataclass
+class CreditorDashboard:
+    """Сводка по всем активным долгам кредитора."""
+    today: date
+    totals: List[CurrencyTotals] = field(default_factory=list)  # По возрастанию валюты
+    late_debts: int = 0  # Долги с просроченными платежами
+    outstanding_total: Optional[ConvertedTotal] = None  # Остатки в BASE_CURRENCY, если валют несколько
+    
+    @property
+    def debts(self) -> int:
+        """Количество активных долгов."""
+        return sum(item.debts for item in self.totals)
+
+
+def invalidate_creditor_dashboard(creditor_user_id: Optional[int]) -> None:
+    """
+    Сбрасывает кэш дашборда кредитора.
+    
+    Вызывается после фиксации транзакции, изменившей платежи или условия
+    долга: чтение, начатое до сброса, результат в кэш не положит.
+    
+    Args:
+        creditor_user_id: ID кредитора (None — у долга нет кредитора, ничего не делается)
+    """
+    if creditor_user_id is None:
+        return
+    _generations[creditor_user_id] = _generations.get(creditor_user_id, 0) + 1
+    _dashboards.pop(creditor_user_id, None)
+
+
+class DashboardService:
+    """Сервис сводки по долгам кредитора."""
+    
+    def __init__(self):
+        self.dashboard_repo = DashboardRepository()
+        self.arrears_repo = ArrearsRepository()
+        self.fx_service = FxService()
+    
+    async def get_creditor_dashboard(
+        self,
+        creditor_user_id: int,
+        today: Optional[date] = None
+    ) -> CreditorDashboard:
+        """
+        Получает сводку по долгам кредитора.
+        
+        Итоги считаются в БД одним агрегирующим запросом по всем долгам,
+        просрочки — одним запросом ArrearsRepository. Остатки в разных валютах
+        дополнительно сводятся в BASE_CURRENCY по курсам FxService. Результат кэшируется
+        на CREDITOR_DASHBOARD_CACHE_SECONDS секунд и в пределах дня.
+        
+        Args:
+            creditor_user_id: ID кредитора
+            today: Текущая дата (по умолчанию — сегодня)
+        
+        Returns:
+            CreditorDashboard
+        """
+        today = today or date.today()
+        
+        cached = _dashboards.get(creditor_user_id)
+        if cached is not None:
+            computed_at, dashboard = cached
+            if dashboard.today == today and time.monotonic() - computed_at < config.CREDITOR_DASHBOARD_CACHE_SECONDS:
+                metrics.inc('dashboard.cache.hit')
+                return dashboard
+        metrics.inc('dashboard.cache.miss')
+        
+        generation = _generations.get(creditor_user_id, 0)
+        computed_at = time.monotonic()
+        
+        rows = await self.dashboard_repo.get_creditor_totals(creditor_user_id, today)
+        overdue = await self.arrears_repo.get_overdue(today, creditor_user_id=creditor_user_id)
+        
+        dashboard = CreditorDashboard(
+            today=today,
+            totals=[
+                CurrencyTotals(
+                    currency=row['currency'],
+                    debts=row['debts'],
+                    outstanding=row['outstanding'],
+                    expected_this_month=row['expected_this_month'],
+                    paid_this_month=row['paid_this_month'],
+                )
+                for row in rows
+            ],
+            late_debts=len({item.debt_id for item in overdue}),
+        )
+        if len(dashboard.totals) > 1:
+            dashboard.outstanding_total = await self.fx_service.convert_totals(
+                {item.currency: item.outstanding for item in dashboard.totals},
+                on_date=today
+            )
+        
+        # Пока шёл расчёт, платёж мог изменить данные: такой результат не кэшируем
+        if _generations.get(creditor_user_id, 0) == generation:
+            _dashboards[creditor_user_id] = (computed_at, dashboard)
+        
+        return dashboard
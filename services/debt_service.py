@@ -6,8 +6,17 @@ from decimal import Decimal
 import asyncpg
 from database import Database
 from models.debt import Debt
-from repositories.debt_repository import DebtRepository
+from metrics import metrics
+from repositories.debt_repository import (
+    DebtRepository,
+    DebtVersionConflictError,
+    VERSION_CONFLICT_RETRIES,
+)
+from services.amortization import SCHEDULES
 from services.audit_service import AuditService
+from services.dashboard_service import invalidate_creditor_dashboard
+from services.plan_service import PaymentPlanService
+from services.summary_service import UserSummaryService
 
 
 class DebtService:
@@ -16,6 +25,8 @@ class DebtService:
     def __init__(self):
         self.debt_repo = DebtRepository()
         self.audit_service = AuditService()
+        self.plan_service = PaymentPlanService()
+        self.summary_service = UserSummaryService()
     
     async def create_debt(
         self,
@@ -67,47 +78,47 @@ class DebtService:
             actor_user_id = debtor_user_id
         
         # Создаём долг в транзакции с аудитом
-        pool = await Database.get_pool()
-        conn = await pool.acquire()
-        
-        try:
-            async with conn.transaction():
-                # Создаём долг
-                debt = await self.debt_repo.create(
-                    debtor_user_id=debtor_user_id,
-                    creditor_user_id=creditor_user_id,
-                    name=name.strip(),
-                    principal_amount=principal_amount,
-                    currency=currency,
-                    monthly_payment=monthly_payment,
-                    due_day=due_day,
-                    conn=conn
-                )
-                
-                # Логируем создание
-                after = {
-                    'id': debt.id,
-                    'name': debt.name,
-                    'debtor_user_id': debt.debtor_user_id,
-                    'creditor_user_id': debt.creditor_user_id,
-                    'principal_amount': str(debt.principal_amount),
-                    'currency': debt.currency,
-                    'monthly_payment': str(debt.monthly_payment) if debt.monthly_payment else None,
-                    'due_day': debt.due_day,
-                    'status': debt.status,
-                }
-                await self.audit_service.log_create(
-                    entity_type='debt',
-                    entity_id=debt.id,
-                    actor_user_id=actor_user_id,
-                    after=after,
-                    conn=conn
-                )
-                
-                return debt
-        
-        finally:
-            await pool.release(conn)
+        async def body(conn: asyncpg.Connection) -> Debt:
+            # Создаём долг
+            debt = await self.debt_repo.create(
+                debtor_user_id=debtor_user_id,
+                creditor_user_id=creditor_user_id,
+                name=name.strip(),
+                principal_amount=principal_amount,
+                currency=currency,
+                monthly_payment=monthly_payment,
+                due_day=due_day,
+                conn=conn
+            )
+            
+            # Логируем создание
+            after = {
+                'id': debt.id,
+                'name': debt.name,
+                'debtor_user_id': debt.debtor_user_id,
+                'creditor_user_id': debt.creditor_user_id,
+                'principal_amount': str(debt.principal_amount),
+                'currency': debt.currency,
+                'monthly_payment': str(debt.monthly_payment) if debt.monthly_payment else None,
+                'due_day': debt.due_day,
+                'status': debt.status,
+            }
+            await self.audit_service.log_create(
+                entity_type='debt',
+                entity_id=debt.id,
+                actor_user_id=actor_user_id,
+                after=after,
+                conn=conn
+            )
+            
+            await self.plan_service.refresh(debt.id, conn)
+            await self.summary_service.refresh([debt.debtor_user_id, debt.creditor_user_id], conn)
+            
+            return debt
+        
+        debt = await Database.run_transaction(body, name='debt.create')
+        invalidate_creditor_dashboard(debt.creditor_user_id)
+        return debt
     
     async def get_user_debts(self, user_id: int) -> List[Debt]:
         """
@@ -167,10 +178,12 @@ class DebtService:
         user_id: int,
         monthly_payment: Optional[Decimal] = None,
         due_day: Optional[int] = None,
-        creditor_user_id: Optional[int] = None
+        creditor_user_id: Optional[int] = None,
+        interest_rate: Optional[Decimal] = None,
+        amortization: Optional[str] = None
     ) -> Debt:
         """
-        Обновляет условия долга (monthly_payment, due_day, creditor_user_id).
+        Обновляет условия долга (monthly_payment, due_day, creditor_user_id, проценты).
         
         Args:
             debt_id: ID долга
@@ -178,12 +191,15 @@ class DebtService:
             monthly_payment: Новый ежемесячный платёж (опционально)
             due_day: Новый день платежа (опционально, 1-31)
             creditor_user_id: ID кредитора (опционально)
+            interest_rate: Годовая ставка в процентах, 0 — без процентов (опционально)
+            amortization: Тип графика 'annuity' или 'differentiated' (опционально)
         
         Returns:
             Обновлённый Debt
         
         Raises:
             ValueError: Если долг закрыт или параметры невалидны
+            DebtVersionConflictError: Если долг постоянно изменяется параллельно
             PermissionError: Если пользователь не имеет прав
         """
         # Проверяем доступ
@@ -210,52 +226,106 @@ class DebtService:
         if monthly_payment is not None and monthly_payment <= 0:
             raise ValueError("Ежемесячный платёж должен быть больше нуля")
         
-        # Обновляем в транзакции с аудитом
-        pool = await Database.get_pool()
-        conn = await pool.acquire()
-        
-        try:
-            async with conn.transaction():
-                # Сохраняем состояние до изменения
-                before = {
-                    'id': debt.id,
-                    'monthly_payment': str(debt.monthly_payment) if debt.monthly_payment else None,
-                    'due_day': debt.due_day,
-                    'creditor_user_id': debt.creditor_user_id,
-                }
-                
-                # Обновляем долг
-                updated_debt = await self.debt_repo.update(
-                    debt_id=debt_id,
-                    creditor_user_id=creditor_user_id,
-                    monthly_payment=monthly_payment,
-                    due_day=due_day,
-                    conn=conn
-                )
-                
-                if updated_debt is None:
-                    raise ValueError("Не удалось обновить долг")
-                
-                # Логируем изменение
-                after = {
-                    'id': updated_debt.id,
-                    'monthly_payment': str(updated_debt.monthly_payment) if updated_debt.monthly_payment else None,
-                    'due_day': updated_debt.due_day,
-                    'creditor_user_id': updated_debt.creditor_user_id,
-                }
-                await self.audit_service.log_update(
-                    entity_type='debt',
-                    entity_id=debt_id,
-                    actor_user_id=user_id,
-                    before=before,
-                    after=after,
-                    conn=conn
+        if interest_rate is not None and (interest_rate < 0 or interest_rate >= 1000):
+            raise ValueError("Ставка должна быть от 0 до 999.9999% годовых")
+        
+        if amortization is not None and amortization not in SCHEDULES:
+            raise ValueError("Тип графика должен быть annuity или differentiated")
+        
+        # Обновляем с повтором при конфликте версий: условия задаются абсолютными
+        # значениями, поэтому их можно применить поверх более новой версии
+        attempt = 0
+        while True:
+            try:
+                return await self._save_conditions(
+                    debt, user_id, monthly_payment, due_day, creditor_user_id,
+                    interest_rate, amortization
                 )
-                
-                return updated_debt
+            except DebtVersionConflictError:
+                attempt += 1
+                metrics.inc("debts.version_conflicts")
+                if attempt > VERSION_CONFLICT_RETRIES:
+                    raise
+            
+            debt = await self.debt_repo.get_fresh(debt_id)
+            if debt is None:
+                raise ValueError("Долг не найден")
+            if debt.status == 'closed':
+                raise ValueError("Нельзя изменять закрытый долг")
+    
+    async def _save_conditions(
+        self,
+        debt: Debt,
+        user_id: int,
+        monthly_payment: Optional[Decimal],
+        due_day: Optional[int],
+        creditor_user_id: Optional[int],
+        interest_rate: Optional[Decimal] = None,
+        amortization: Optional[str] = None
+    ) -> Debt:
+        """
+        Сохраняет условия долга в транзакции с аудитом.
         
-        finally:
-            await pool.release(conn)
+        Raises:
+            DebtVersionConflictError: Если долг изменился после чтения
+        """
+        async def body(conn: asyncpg.Connection) -> Debt:
+            # Сохраняем состояние до изменения
+            before = {
+                'id': debt.id,
+                'monthly_payment': str(debt.monthly_payment) if debt.monthly_payment else None,
+                'due_day': debt.due_day,
+                'creditor_user_id': debt.creditor_user_id,
+                'interest_rate': str(debt.interest_rate) if debt.interest_rate else None,
+                'amortization': debt.amortization,
+            }
+            
+            # Обновляем долг
+            updated_debt = await self.debt_repo.update(
+                debt_id=debt.id,
+                creditor_user_id=creditor_user_id,
+                monthly_payment=monthly_payment,
+                due_day=due_day,
+                interest_rate=interest_rate,
+                amortization=amortization,
+                expected_version=debt.version,
+                conn=conn
+            )
+            
+            if updated_debt is None:
+                raise ValueError("Не удалось обновить долг")
+            
+            # Логируем изменение
+            after = {
+                'id': updated_debt.id,
+                'monthly_payment': str(updated_debt.monthly_payment) if updated_debt.monthly_payment else None,
+                'due_day': updated_debt.due_day,
+                'creditor_user_id': updated_debt.creditor_user_id,
+                'interest_rate': str(updated_debt.interest_rate) if updated_debt.interest_rate else None,
+                'amortization': updated_debt.amortization,
+            }
+            await self.audit_service.log_update(
+                entity_type='debt',
+                entity_id=debt.id,
+                actor_user_id=user_id,
+                before=before,
+                after=after,
+                conn=conn
+            )
+            
+            # Платёж, день или ставка изменились: план пересчитывается в той же транзакции
+            await self.plan_service.refresh(debt.id, conn)
+            await self.summary_service.refresh(
+                [debt.debtor_user_id, debt.creditor_user_id, updated_debt.creditor_user_id], conn
+            )
+            
+            return updated_debt
+        
+        updated_debt = await Database.run_transaction(body, name='debt.update')
+        # Кредитор мог смениться: сводка меняется у обоих
+        invalidate_creditor_dashboard(debt.creditor_user_id)
+        invalidate_creditor_dashboard(updated_debt.creditor_user_id)
+        return updated_debt
     
     async def close_debt(
         self,
@@ -276,6 +346,7 @@ class DebtService:
         
         Raises:
             ValueError: Если долг уже закрыт или не найден
+            DebtVersionConflictError: Если долг постоянно изменяется параллельно
             PermissionError: Если пользователь не имеет прав
         """
         # Проверяем доступ
@@ -295,48 +366,78 @@ class DebtService:
         if debt.debtor_user_id != user_id:
             raise PermissionError("Только должник может закрыть долг")
         
-        # Закрываем в транзакции с аудитом
-        pool = await Database.get_pool()
-        conn = await pool.acquire()
-        
-        try:
-            async with conn.transaction():
-                # Сохраняем состояние до закрытия
-                before = {
-                    'id': debt.id,
-                    'status': debt.status,
-                    'closed_at': str(debt.closed_at) if debt.closed_at else None,
-                    'close_note': debt.close_note,
-                }
-                
-                # Закрываем долг
-                closed_debt = await self.debt_repo.close_debt(
-                    debt_id=debt_id,
-                    close_note=close_note,
-                    conn=conn
-                )
-                
-                if closed_debt is None:
-                    raise ValueError("Не удалось закрыть долг")
-                
-                # Логируем закрытие
-                after = {
-                    'id': closed_debt.id,
-                    'status': closed_debt.status,
-                    'closed_at': str(closed_debt.closed_at) if closed_debt.closed_at else None,
-                    'close_note': closed_debt.close_note,
-                }
-                await self.audit_service.log_close(
-                    entity_type='debt',
-                    entity_id=debt_id,
-                    actor_user_id=user_id,
-                    before=before,
-                    after=after,
-                    conn=conn
-                )
-                
-                return closed_debt
+        # Закрываем с повтором при конфликте версий
+        attempt = 0
+        while True:
+            try:
+                return await self._close(debt, user_id, close_note)
+            except DebtVersionConflictError:
+                attempt += 1
+                metrics.inc("debts.version_conflicts")
+                if attempt > VERSION_CONFLICT_RETRIES:
+                    raise
+            
+            debt = await self.debt_repo.get_fresh(debt_id)
+            if debt is None:
+                raise ValueError("Долг не найден")
+            if debt.status == 'closed':
+                raise ValueError("Долг уже закрыт")
+    
+    async def _close(
+        self,
+        debt: Debt,
+        user_id: int,
+        close_note: Optional[str]
+    ) -> Debt:
+        """
+        Закрывает долг в транзакции с аудитом.
         
-        finally:
-            await pool.release(conn)
+        Raises:
+            DebtVersionConflictError: Если долг изменился после чтения
+        """
+        async def body(conn: asyncpg.Connection) -> Debt:
+            # Сохраняем состояние до закрытия
+            before = {
+                'id': debt.id,
+                'status': debt.status,
+                'closed_at': str(debt.closed_at) if debt.closed_at else None,
+                'close_note': debt.close_note,
+            }
+            
+            # Закрываем долг
+            closed_debt = await self.debt_repo.close_debt(
+                debt_id=debt.id,
+                close_note=close_note,
+                expected_version=debt.version,
+                conn=conn
+            )
+            
+            if closed_debt is None:
+                raise ValueError("Не удалось закрыть долг")
+            
+            # Логируем закрытие
+            after = {
+                'id': closed_debt.id,
+                'status': closed_debt.status,
+                'closed_at': str(closed_debt.closed_at) if closed_debt.closed_at else None,
+                'close_note': closed_debt.close_note,
+            }
+            await self.audit_service.log_close(
+                entity_type='debt',
+                entity_id=debt.id,
+                actor_user_id=user_id,
+                before=before,
+                after=after,
+                conn=conn
+            )
+            
+            # У закрытого долга план пустой
+            await self.plan_service.refresh(debt.id, conn)
+            await self.summary_service.refresh([debt.debtor_user_id, debt.creditor_user_id], conn)
+            
+            return closed_debt
+        
+        closed_debt = await Database.run_transaction(body, name='debt.close')
+        invalidate_creditor_dashboard(closed_debt.creditor_user_id)
+        return closed_debt
 
@@ -0,0 +1,164 @@
+"""
+Сервис экспорта данных пользователя.
+"""
+import csv
+import dataclasses
+import io
+import json
+import tempfile
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, BinaryIO, Dict, List
+from uuid import UUID
+from config import config
+from database import Database, QueryClass
+from metrics import metrics
+from models.audit_log import AuditLog
+from models.debt import Debt
+from models.payment import Payment
+from repositories.audit_log_repository import AuditLogRepository
+from repositories.debt_repository import DebtRepository
+from repositories.payment_repository import PaymentRepository
+
+
+# Форматы экспорта
+FORMAT_CSV = 'csv'
+FORMAT_JSONL = 'jsonl'
+EXPORT_FORMATS = (FORMAT_CSV, FORMAT_JSONL)
+
+# Архив больше этого размера собирается во временном файле, а не в памяти
+EXPORT_SPOOL_MAX_BYTES = 1024 * 1024
+
+
+def export_value(value: Any) -> Any:
+    """Приводит значение поля модели к виду, пригодному для JSON."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def export_record(model) -> Dict[str, Any]:
+    """Преобразует модель (dataclass) в словарь для экспорта."""
+    return {
+        field.name: export_value(getattr(model, field.name))
+        for field in dataclasses.fields(model)
+    }
+
+
+def csv_value(value: Any) -> Any:
+    """Приводит значение для CSV: вложенные словари записываются как JSON."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class ExportService:
+    """Сервис потоковой выгрузки долгов, платежей и истории изменений."""
+    
+    def __init__(self):
+        self.debt_repo = DebtRepository()
+        self.payment_repo = PaymentRepository()
+        self.audit_repo = AuditLogRepository()
+    
+    async def export(self, user_id: int, fmt: str = FORMAT_CSV) -> BinaryIO:
+        """
+        Выгружает данные пользователя в zip-архив.
+        
+        В архиве три файла: debts, payments и audit_log (CSV или JSONL).
+        Данные читаются серверными курсорами порциями по EXPORT_CHUNK_SIZE строк
+        и сразу сжимаются в архив, поэтому память не зависит от объёма истории.
+        Все три выборки выполняются в одной транзакции REPEATABLE READ
+        и видят один и тот же снимок данных.
+        
+        Доступ такой же, как в DebtRepository.check_access: выгружаются долги,
+        где пользователь должник или кредитор, и связанные с ними записи.
+        
+        Args:
+            user_id: ID пользователя
+            fmt: Формат файлов в архиве ('csv' или 'jsonl')
+        
+        Returns:
+            Файл архива, позиция в начале; закрывает вызывающий
+        
+        Raises:
+            ValueError: Если формат не поддерживается
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+        
+        out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+        try:
+            pool = await Database.get_read_pool()
+            conn = await pool.acquire()
+            try:
+                async with conn.transaction(isolation='repeatable_read', readonly=True):
+                    # Выгрузка большой истории — обслуживающий запрос, а не интерактивное чтение
+                    await Database.apply_timeout(conn, QueryClass.MAINTENANCE)
+                    prefetch = config.EXPORT_CHUNK_SIZE
+                    
+                    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                        sections = (
+                            ('debts', Debt, self.debt_repo.iter_by_user(user_id, conn, prefetch)),
+                            ('payments', Payment, self.payment_repo.iter_by_user(user_id, conn, prefetch)),
+                            ('audit_log', AuditLog, self.audit_repo.iter_by_user(user_id, conn, prefetch)),
+                        )
+                        for name, model, records in sections:
+                            with archive.open(f"{name}.{fmt}", 'w') as member:
+                                count = await write_records(member, model, records, fmt)
+                            metrics.inc(f"export.rows.{name}", count)
+            finally:
+                await pool.release(conn)
+        except BaseException:
+            out.close()
+            raise
+        
+        metrics.inc(f"export.{fmt}")
+        out.seek(0)
+        return out
+
+
+async def write_records(
+    member: BinaryIO,
+    model: type,
+    records: AsyncIterator,
+    fmt: str
+) -> int:
+    """
+    Записывает записи в файл архива по одной.
+    
+    Args:
+        member: Файл внутри архива (бинарный поток на запись)
+        model: Класс модели (задаёт колонки CSV)
+        records: Асинхронный итератор моделей
+        fmt: 'csv' или 'jsonl'
+    
+    Returns:
+        Количество записанных строк
+    """
+    # utf-8-sig: Excel правильно открывает CSV с кириллицей только с BOM
+    encoding = 'utf-8-sig' if fmt == FORMAT_CSV else 'utf-8'
+    text = io.TextIOWrapper(member, encoding=encoding, newline='')
+    count = 0
+    try:
+        if fmt == FORMAT_CSV:
+            columns: List[str] = [field.name for field in dataclasses.fields(model)]
+            writer = csv.writer(text)
+            writer.writerow(columns)
+            async for record in records:
+                row = export_record(record)
+                writer.writerow([csv_value(row[column]) for column in columns])
+                count += 1
+        else:
+            async for record in records:
+                text.write(json.dumps(export_record(record), ensure_ascii=False))
+                text.write('\n')
+                count += 1
+    finally:
+        text.flush()
+        text.detach()
+    return count
@@ -0,0 +1,188 @@
+"""
+Сервис пересчёта сумм в одну валюту по курсам из таблицы fx_rates.
+
+Курсы загружаются из локального файла (python maintenance.py fx-rates <файл>)
+и кэшируются в памяти процесса по паре валют и дате. Суммы пересчитываются
+уже сгруппированными по валюте: одно умножение на валюту, а не на каждую сумму.
+"""
+import csv
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+import asyncpg
+from config import config
+from metrics import metrics
+from repositories.fx_rate_repository import CurrencyPair, FxRateRepository
+
+# Кэш курсов: (пара, дата) -> (время чтения по time.monotonic(), курс или None, если курса нет)
+_rates: Dict[Tuple[CurrencyPair, date], Tuple[float, Optional[Decimal]]] = {}
+
+
+@dataclass
+class ConvertedTotal:
+    """Сумма остатков в разных валютах, пересчитанная в одну."""
+    currency: str
+    amount: Decimal
+    missing: List[str] = field(default_factory=list)  # Валюты без курса, в сумму не вошли
+
+
+def clear_fx_cache() -> None:
+    """Сбрасывает кэш курсов (после загрузки новых курсов в этом процессе)."""
+    _rates.clear()
+
+
+def read_fx_rates(lines: TextIO) -> Iterator[Tuple[str, str, date, Decimal]]:
+    """
+    Читает курсы из CSV: дата (ГГГГ-ММ-ДД), базовая валюта, валюта котировки, курс.
+    
+    Строка заголовка (начинается с "date") и строки-комментарии (#) пропускаются.
+    Курс — сколько единиц валюты котировки стоит одна единица базовой валюты.
+    
+    Args:
+        lines: Текстовый поток с CSV
+    
+    Yields:
+        (base_currency, quote_currency, rate_date, rate)
+    
+    Raises:
+        ValueError: Если строка не разбирается; в сообщении указан её номер
+    """
+    for line_no, row in enumerate(csv.reader(lines), start=1):
+        if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+            continue
+        if line_no == 1 and row[0].strip().lower() == 'date':
+            continue
+        if len(row) != 4:
+            raise ValueError(f"Строка {line_no}: ожидается 4 поля (дата, валюта, валюта, курс)")
+        
+        raw_date, base, quote, raw_rate = (value.strip() for value in row)
+        try:
+            rate_date = date.fromisoformat(raw_date)
+            rate = Decimal(raw_rate.replace(',', '.'))
+        except (ValueError, InvalidOperation):
+            raise ValueError(f"Строка {line_no}: неверная дата или курс")
+        
+        base, quote = base.upper(), quote.upper()
+        if len(base) != 3 or len(quote) != 3 or not (base + quote).isalpha() or base == quote:
+            raise ValueError(f"Строка {line_no}: неверная пара валют {base}/{quote}")
+        if not rate.is_finite() or rate <= 0:
+            raise ValueError(f"Строка {line_no}: курс должен быть больше нуля")
+        
+        yield base, quote, rate_date, rate
+
+
+class FxService:
+    """Сервис курсов валют и пересчёта итогов."""
+    
+    def __init__(self):
+        self.fx_repo = FxRateRepository()
+    
+    async def get_rates(
+        self,
+        currencies: Iterable[str],
+        to_currency: str,
+        on_date: Optional[date] = None
+    ) -> Dict[str, Optional[Decimal]]:
+        """
+        Получает курсы нескольких валют к одной.
+        
+        Курсы, которых нет в кэше, читаются одним запросом. Если прямого
+        курса нет, используется обратный (to_currency -> валюта).
+        
+        Args:
+            currencies: Валюты
+            to_currency: Валюта, в которую пересчитываются суммы
+            on_date: Дата курса (по умолчанию — сегодня)
+        
+        Returns:
+            Валюта -> курс (None — курса нет)
+        """
+        on_date = on_date or date.today()
+        now = time.monotonic()
+        rates: Dict[str, Optional[Decimal]] = {}
+        pending: List[str] = []
+        
+        for currency in set(currencies):
+            if currency == to_currency:
+                rates[currency] = Decimal('1')
+                continue
+            cached = _rates.get(((currency, to_currency), on_date))
+            if cached is not None and now - cached[0] < config.FX_RATES_CACHE_SECONDS:
+                rates[currency] = cached[1]
+            else:
+                pending.append(currency)
+        
+        if not pending:
+            metrics.inc('fx.cache.hit')
+            return rates
+        metrics.inc('fx.cache.miss')
+        
+        found = await self.fx_repo.get_latest(
+            [(currency, to_currency) for currency in pending]
+            + [(to_currency, currency) for currency in pending],
+            on_date
+        )
+        for currency in pending:
+            rate = found.get((currency, to_currency))
+            if rate is None and (to_currency, currency) in found:
+                rate = 1 / found[(to_currency, currency)]
+            _rates[((currency, to_currency), on_date)] = (now, rate)
+            rates[currency] = rate
+        
+        return rates
+    
+    async def convert_totals(
+        self,
+        amounts: Dict[str, Decimal],
+        to_currency: Optional[str] = None,
+        on_date: Optional[date] = None
+    ) -> ConvertedTotal:
+        """
+        Пересчитывает суммы по валютам в одну валюту и складывает их.
+        
+        Args:
+            amounts: Валюта -> сумма
+            to_currency: Валюта итога (по умолчанию — BASE_CURRENCY)
+            on_date: Дата курса (по умолчанию — сегодня)
+        
+        Returns:
+            ConvertedTotal; валюты без курса перечислены в missing и в сумму не входят
+        """
+        to_currency = to_currency or config.BASE_CURRENCY
+        rates = await self.get_rates(amounts.keys(), to_currency, on_date)
+        
+        total = Decimal('0')
+        missing: List[str] = []
+        for currency, amount in sorted(amounts.items()):
+            rate = rates.get(currency)
+            if rate is None:
+                missing.append(currency)
+            else:
+                total += amount * rate
+        
+        return ConvertedTotal(
+            currency=to_currency,
+            amount=total.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            missing=missing,
+        )
+    
+    async def load_file(self, lines: TextIO, conn: asyncpg.Connection) -> int:
+        """
+        Загружает курсы из CSV в таблицу fx_rates в одной транзакции.
+        
+        Args:
+            lines: Текстовый поток с CSV (см. read_fx_rates)
+            conn: Обслуживающее подключение к БД
+        
+        Returns:
+            Количество загруженных курсов
+        
+        Raises:
+            ValueError: Если файл содержит неверную строку (ничего не загружается)
+        """
+        async with conn.transaction():
+            loaded = await self.fx_repo.load(read_fx_rates(lines), conn)
+        clear_fx_cache()
+        return loaded
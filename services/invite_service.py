@@ -7,10 +7,18 @@ from datetime import timezone
 from uuid import UUID, uuid4
 import asyncpg
 from database import Database
+from models.debt import Debt
 from models.invite import Invite
-from repositories.debt_repository import DebtRepository
+from metrics import metrics
+from repositories.debt_repository import (
+    DebtRepository,
+    DebtVersionConflictError,
+    VERSION_CONFLICT_RETRIES,
+)
 from repositories.invite_repository import InviteRepository
 from services.audit_service import AuditService
+from services.dashboard_service import invalidate_creditor_dashboard
+from services.summary_service import UserSummaryService
 
 
 class InviteService:
@@ -20,6 +28,7 @@ class InviteService:
         self.invite_repo = InviteRepository()
         self.debt_repo = DebtRepository()
         self.audit_service = AuditService()
+        self.summary_service = UserSummaryService()
     
     async def create_invite(
         self,
@@ -64,38 +73,34 @@ class InviteService:
         expires_at = datetime.now(timezone.utc) + timedelta(days=36500)  # ~100 лет
         
         # Создаём приглашение в транзакции с аудитом
-        pool = await Database.get_pool()
-        conn = await pool.acquire()
-        
-        try:
-            async with conn.transaction():
-                # Создаём приглашение
-                invite = await self.invite_repo.create(
-                    debt_id=debt_id,
-                    token=token,
-                    expires_at=expires_at,
-                    conn=conn
-                )
-                
-                # Логируем создание
-                after = {
-                    'id': invite.id,
-                    'debt_id': invite.debt_id,
-                    'token': str(invite.token),
-                    'expires_at': str(invite.expires_at),
-                }
-                await self.audit_service.log_create(
-                    entity_type='invite',
-                    entity_id=invite.id,
-                    actor_user_id=user_id,
-                    after=after,
-                    conn=conn
-                )
-                
-                return invite
-        
-        finally:
-            await pool.release(conn)
+        async def body(conn: asyncpg.Connection) -> Invite:
+            # Создаём приглашение
+            invite = await self.invite_repo.create(
+                debt_id=debt_id,
+                token=token,
+                expires_at=expires_at,
+                conn=conn
+            )
+            
+            # Логируем создание
+            after = {
+                'id': invite.id,
+                'debt_id': invite.debt_id,
+                'token': str(invite.token),
+                'expires_at': str(invite.expires_at),
+            }
+            await self.audit_service.log_create(
+                entity_type='invite',
+                entity_id=invite.id,
+                actor_user_id=user_id,
+                after=after,
+                debt_id=invite.debt_id,
+                conn=conn
+            )
+            
+            return invite
+        
+        return await Database.run_transaction(body, name='invite.create')
     
     async def accept_invite(
         self,
@@ -135,75 +140,103 @@ class InviteService:
         if debt.creditor_user_id == user_id:
             raise ValueError("Вы уже являетесь кредитором этого долга")
         
-        # Принимаем приглашение в транзакции с аудитом
-        pool = await Database.get_pool()
-        conn = await pool.acquire()
-        
-        try:
-            async with conn.transaction():
-                # Сохраняем состояние долга до изменения
-                debt_before = {
-                    'debt_id': debt.id,
-                    'creditor_user_id': debt.creditor_user_id,
-                }
-                
-                # Сохраняем состояние invite до изменения
-                invite_before = {
-                    'id': invite.id,
-                    'debt_id': invite.debt_id,
-                    'used_at': str(invite.used_at) if invite.used_at else None,
-                }
-                
-                # Обновляем долг (назначаем кредитора)
-                updated_debt = await self.debt_repo.update(
-                    debt_id=debt.id,
-                    creditor_user_id=user_id,
-                    conn=conn
-                )
-                
-                if updated_debt is None:
-                    raise ValueError("Не удалось принять приглашение")
-                
-                # Отмечаем приглашение как использованное
-                updated_invite = await self.invite_repo.mark_as_used(
-                    invite_id=invite.id,
-                    conn=conn
-                )
-                
-                if updated_invite is None:
-                    raise ValueError("Не удалось отметить приглашение как использованное")
-                
-                # Логируем изменение долга
-                debt_after = {
-                    'debt_id': updated_debt.id,
-                    'creditor_user_id': updated_debt.creditor_user_id,
-                }
-                await self.audit_service.log_update(
-                    entity_type='debt',
-                    entity_id=debt.id,
-                    actor_user_id=user_id,
-                    before=debt_before,
-                    after=debt_after,
-                    conn=conn
-                )
-                
-                # Логируем изменение invite (mark as used)
-                invite_after = {
-                    'id': updated_invite.id,
-                    'debt_id': updated_invite.debt_id,
-                    'used_at': str(updated_invite.used_at) if updated_invite.used_at else None,
-                }
-                await self.audit_service.log_update(
-                    entity_type='invite',
-                    entity_id=invite.id,
-                    actor_user_id=user_id,
-                    before=invite_before,
-                    after=invite_after,
-                    conn=conn
-                )
-        
-        finally:
-            await pool.release(conn)
+        # Принимаем с повтором при конфликте версий долга
+        attempt = 0
+        while True:
+            try:
+                await self._accept(invite, debt, user_id)
+                return
+            except DebtVersionConflictError:
+                attempt += 1
+                metrics.inc("debts.version_conflicts")
+                if attempt > VERSION_CONFLICT_RETRIES:
+                    raise
+            
+            debt = await self.debt_repo.get_fresh(invite.debt_id)
+            if debt is None:
+                raise ValueError("Долг не найден")
+            if debt.creditor_user_id == user_id:
+                raise ValueError("Вы уже являетесь кредитором этого долга")
+    
+    async def _accept(self, invite: Invite, debt: Debt, user_id: int) -> None:
+        """
+        Назначает кредитора и отмечает приглашение в транзакции с аудитом.
+        
+        Raises:
+            DebtVersionConflictError: Если долг изменился после чтения
+        """
+        async def body(conn: asyncpg.Connection) -> None:
+            # Сохраняем состояние долга до изменения
+            debt_before = {
+                'debt_id': debt.id,
+                'creditor_user_id': debt.creditor_user_id,
+            }
+            
+            # Сохраняем состояние invite до изменения
+            invite_before = {
+                'id': invite.id,
+                'debt_id': invite.debt_id,
+                'used_at': str(invite.used_at) if invite.used_at else None,
+            }
+            
+            # Обновляем долг (назначаем кредитора)
+            updated_debt = await self.debt_repo.update(
+                debt_id=debt.id,
+                creditor_user_id=user_id,
+                expected_version=debt.version,
+                conn=conn
+            )
+            
+            if updated_debt is None:
+                raise ValueError("Не удалось принять приглашение")
+            
+            # Отмечаем приглашение как использованное
+            updated_invite = await self.invite_repo.mark_as_used(
+                invite_id=invite.id,
+                conn=conn
+            )
+            
+            if updated_invite is None:
+                raise ValueError("Не удалось отметить приглашение как использованное")
+            
+            # Логируем изменение долга
+            debt_after = {
+                'debt_id': updated_debt.id,
+                'creditor_user_id': updated_debt.creditor_user_id,
+            }
+            await self.audit_service.log_update(
+                entity_type='debt',
+                entity_id=debt.id,
+                actor_user_id=user_id,
+                before=debt_before,
+                after=debt_after,
+                conn=conn
+            )
+            
+            # Логируем изменение invite (mark as used)
+            invite_after = {
+                'id': updated_invite.id,
+                'debt_id': updated_invite.debt_id,
+                'used_at': str(updated_invite.used_at) if updated_invite.used_at else None,
+            }
+            await self.audit_service.log_update(
+                entity_type='invite',
+                entity_id=invite.id,
+                actor_user_id=user_id,
+                before=invite_before,
+                after=invite_after,
+                debt_id=invite.debt_id,
+                conn=conn
+            )
+            
+            await self.summary_service.refresh(
+                [debt.debtor_user_id, debt.creditor_user_id, updated_debt.creditor_user_id], conn
+            )
+        
+        await Database.run_transaction(body, name='invite.accept')
+        # Долг переходит к новому кредитору
+        invalidate_creditor_dashboard(debt.creditor_user_id)
+        invalidate_creditor_dashboard(user_id)
     
     async def cleanup_expired_invites(self) -> int:
         """
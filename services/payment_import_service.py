@@ -0,0 +1,147 @@
+"""
+Сервис импорта платежей из банковских выписок.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import BinaryIO, List, Optional, Tuple
+import asyncpg
+from config import config
+from database import Database
+from repositories.debt_repository import DebtRepository
+from repositories.payment_repository import PaymentRepository
+from services.audit_service import AuditService
+from services.dashboard_service import invalidate_creditor_dashboard
+from services.plan_service import PaymentPlanService
+from services.summary_service import UserSummaryService
+from services.statement_parser import StatementParser, open_statement
+
+
+@dataclass
+class ImportSummary:
+    """Итог импорта выписки."""
+    format: str
+    imported: int
+    duplicates: int
+    total_amount: Decimal
+    first_date: Optional[date]
+    last_date: Optional[date]
+    error_count: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+
+class PaymentImportService:
+    """Сервис импорта платежей из файлов CSV, OFX и 1C."""
+    
+    def __init__(self):
+        self.payment_repo = PaymentRepository()
+        self.debt_repo = DebtRepository()
+        self.audit_service = AuditService()
+        self.plan_service = PaymentPlanService()
+        self.summary_service = UserSummaryService()
+    
+    async def import_statement(
+        self,
+        debt_id: int,
+        user_id: int,
+        raw: BinaryIO,
+        filename: Optional[str] = None
+    ) -> ImportSummary:
+        """
+        Импортирует платежи из выписки.
+        
+        Выписка разбирается потоково и загружается через COPY в одной транзакции.
+        Платежи, уже внесённые по долгу (та же дата и сумма), пропускаются.
+        В аудит пишется одна итоговая запись по долгу.
+        
+        Args:
+            debt_id: ID долга
+            user_id: ID пользователя, выполняющего импорт
+            raw: Файл выписки (бинарный поток с поддержкой seek)
+            filename: Имя файла (подсказка для определения формата)
+        
+        Returns:
+            ImportSummary: Итог импорта
+        
+        Raises:
+            ValueError: Если долг не найден, закрыт или в выписке нет платежей
+            PermissionError: Если пользователь не является должником
+        """
+        if not await self.debt_repo.check_access(debt_id, user_id):
+            raise PermissionError("Нет доступа к этому долгу")
+        
+        debt = await self.debt_repo.get_by_id(debt_id)
+        if debt is None:
+            raise ValueError("Долг не найден")
+        
+        if debt.debtor_user_id != user_id:
+            raise PermissionError("Только должник может добавлять платежи")
+        
+        if debt.status == 'closed':
+            raise ValueError("Нельзя добавлять платежи к закрытому долгу")
+        
+        async def body(conn: asyncpg.Connection) -> ImportSummary:
+            # Параллельный импорт по тому же долгу мог бы не увидеть чужие дубликаты
+            locked = await self.debt_repo.lock(debt_id, conn)
+            if locked is None:
+                raise ValueError("Долг не найден")
+            if locked.status == 'closed':
+                raise ValueError("Нельзя добавлять платежи к закрытому долгу")
+            
+            # При повторе транзакции выписка читается заново
+            raw.seek(0)
+            stream = open_statement(raw)
+            try:
+                parser = StatementParser(
+                    stream,
+                    filename=filename,
+                    max_rows=config.PAYMENT_IMPORT_MAX_ROWS
+                )
+                records = (
+                    (payment.line_no, payment.payment_date, payment.amount)
+                    for payment in parser
+                )
+                result = await self.payment_repo.bulk_import(debt_id, records, conn)
+            finally:
+                # Закрывать исходный файл не нужно: он ещё понадобится при повторе
+                stream.detach()
+            
+            if result['staged'] == 0:
+                raise ValueError("В файле не найдено ни одного платежа")
+            
+            summary = ImportSummary(
+                format=parser.format,
+                imported=result['inserted'],
+                duplicates=result['staged'] - result['inserted'],
+                total_amount=result['total'],
+                first_date=result['first_date'],
+                last_date=result['last_date'],
+                error_count=parser.error_count,
+                errors=parser.errors,
+            )
+            
+            if summary.imported:
+                await self.audit_service.log_update(
+                    entity_type='debt',
+                    entity_id=debt_id,
+                    actor_user_id=user_id,
+                    before={'id': debt_id},
+                    after={
+                        'id': debt_id,
+                        'imported_payments': summary.imported,
+                        'imported_total': str(summary.total_amount),
+                        'first_date': str(summary.first_date),
+                        'last_date': str(summary.last_date),
+                        'source': summary.format,
+                        'filename': filename,
+                    },
+                    conn=conn
+                )
+                await self.plan_service.refresh(debt_id, conn)
+                await self.summary_service.refresh([locked.debtor_user_id, locked.creditor_user_id], conn)
+            
+            return summary
+        
+        summary = await Database.run_transaction(body, name='payment.import')
+        invalidate_creditor_dashboard(debt.creditor_user_id)
+        return summary
@@ -11,6 +11,9 @@ from models.payment import Payment
 from repositories.debt_repository import DebtRepository
 from repositories.payment_repository import PaymentRepository
 from services.audit_service import AuditService
+from services.dashboard_service import invalidate_creditor_dashboard
+from services.plan_service import PaymentPlanService
+from services.summary_service import UserSummaryService
 
 
 class PaymentService:
@@ -20,25 +23,32 @@ class PaymentService:
         self.payment_repo = PaymentRepository()
         self.debt_repo = DebtRepository()
         self.audit_service = AuditService()
+        self.plan_service = PaymentPlanService()
+        self.summary_service = UserSummaryService()
     
     async def add_payment(
         self,
         debt_id: int,
         amount: Decimal,
         payment_date: date,
-        user_id: int
+        user_id: int,
+        idempotency_key: Optional[str] = None
     ) -> Payment:
         """
         Добавляет платёж.
         
+        Если передан idempotency_key и платёж с таким ключом уже существует,
+        возвращается исходный платёж без повторной записи (и без записи аудита).
+        
         Args:
             debt_id: ID долга
             amount: Сумма платежа
             payment_date: Дата платежа
             user_id: ID пользователя, добавляющего платёж
+            idempotency_key: Ключ идемпотентности (например, из update/сообщения Telegram)
         
         Returns:
-            Payment: Созданный платёж
+            Payment: Созданный (или ранее созданный с тем же ключом) платёж
         
         Raises:
             ValueError: Если долг закрыт, не найден, или сумма невалидна
@@ -48,6 +58,12 @@ class PaymentService:
         if not await self.debt_repo.check_access(debt_id, user_id):
             raise PermissionError("Нет доступа к этому долгу")
         
+        # Повторная отправка: возвращаем уже созданный платёж
+        if idempotency_key is not None:
+            existing = await self._get_existing_payment(debt_id, idempotency_key)
+            if existing is not None:
+                return existing
+        
         # Получаем долг
         debt = await self.debt_repo.get_by_id(debt_id)
         if debt is None:
@@ -66,38 +82,62 @@ class PaymentService:
             raise ValueError("Сумма платежа должна быть больше нуля")
         
         # Создаём платёж в транзакции с аудитом
-        pool = await Database.get_pool()
-        conn = await pool.acquire()
-        
-        try:
-            async with conn.transaction():
-                # Создаём платёж
-                payment = await self.payment_repo.create(
-                    debt_id=debt_id,
-                    amount=amount,
-                    payment_date=payment_date,
-                    conn=conn
-                )
-                
-                # Логируем создание
-                after = {
-                    'id': payment.id,
-                    'debt_id': payment.debt_id,
-                    'amount': str(payment.amount),
-                    'payment_date': str(payment.payment_date),
-                }
-                await self.audit_service.log_create(
-                    entity_type='payment',
-                    entity_id=payment.id,
-                    actor_user_id=user_id,
-                    after=after,
-                    conn=conn
-                )
-                
-                return payment
-        
-        finally:
-            await pool.release(conn)
+        async def body(conn: asyncpg.Connection) -> Payment:
+            # Создаём платёж
+            payment = await self.payment_repo.create(
+                debt_id=debt_id,
+                amount=amount,
+                payment_date=payment_date,
+                idempotency_key=idempotency_key,
+                conn=conn
+            )
+            
+            if payment is None:
+                # Параллельный запрос с тем же ключом успел создать платёж
+                return await self._get_existing_payment(debt_id, idempotency_key, conn)
+            
+            # Логируем создание
+            after = {
+                'id': payment.id,
+                'debt_id': payment.debt_id,
+                'amount': str(payment.amount),
+                'payment_date': str(payment.payment_date),
+            }
+            await self.audit_service.log_create(
+                entity_type='payment',
+                entity_id=payment.id,
+                actor_user_id=user_id,
+                after=after,
+                debt_id=payment.debt_id,
+                conn=conn
+            )
+            
+            # Остаток изменился: план и сводки пересчитываются в той же транзакции
+            await self.plan_service.refresh(debt_id, conn)
+            await self.summary_service.refresh([debt.debtor_user_id, debt.creditor_user_id], conn)
+            
+            return payment
+        
+        payment = await Database.run_transaction(body, name='payment.add')
+        invalidate_creditor_dashboard(debt.creditor_user_id)
+        return payment
+    
+    async def _get_existing_payment(
+        self,
+        debt_id: int,
+        idempotency_key: str,
+        conn: Optional[asyncpg.Connection] = None
+    ) -> Optional[Payment]:
+        """
+        Получает платёж, ранее созданный с тем же ключом идемпотентности.
+        
+        Raises:
+            ValueError: Если ключ уже использован для платежа по другому долгу
+        """
+        existing = await self.payment_repo.get_by_idempotency_key(idempotency_key, conn=conn)
+        if existing is not None and existing.debt_id != debt_id:
+            raise ValueError("Ключ идемпотентности уже использован для другого долга")
+        return existing
     
     async def delete_payment(
         self,
@@ -143,42 +183,43 @@ class PaymentService:
             raise PermissionError("Только должник может удалять платежи")
         
         # Удаляем в транзакции с аудитом
-        pool = await Database.get_pool()
-        conn = await pool.acquire()
-        
-        try:
-            async with conn.transaction():
-                # Сохраняем состояние до удаления
-                before = {
-                    'id': payment.id,
-                    'debt_id': payment.debt_id,
-                    'amount': str(payment.amount),
-                    'payment_date': str(payment.payment_date),
-                    'deleted_at': str(payment.deleted_at) if payment.deleted_at else None,
-                }
-                
-                # Удаляем платёж
-                deleted_payment = await self.payment_repo.soft_delete(
-                    payment_id=payment_id,
-                    conn=conn
-                )
-                
-                if deleted_payment is None:
-                    raise ValueError("Не удалось удалить платёж")
-                
-                # Логируем удаление
-                await self.audit_service.log_delete(
-                    entity_type='payment',
-                    entity_id=payment_id,
-                    actor_user_id=user_id,
-                    before=before,
-                    conn=conn
-                )
-                
-                return deleted_payment
-        
-        finally:
-            await pool.release(conn)
+        async def body(conn: asyncpg.Connection) -> Payment:
+            # Сохраняем состояние до удаления
+            before = {
+                'id': payment.id,
+                'debt_id': payment.debt_id,
+                'amount': str(payment.amount),
+                'payment_date': str(payment.payment_date),
+                'deleted_at': str(payment.deleted_at) if payment.deleted_at else None,
+            }
+            
+            # Удаляем платёж
+            deleted_payment = await self.payment_repo.soft_delete(
+                payment_id=payment_id,
+                conn=conn
+            )
+            
+            if deleted_payment is None:
+                raise ValueError("Не удалось удалить платёж")
+            
+            # Логируем удаление
+            await self.audit_service.log_delete(
+                entity_type='payment',
+                entity_id=payment_id,
+                actor_user_id=user_id,
+                before=before,
+                debt_id=payment.debt_id,
+                conn=conn
+            )
+            
+            await self.plan_service.refresh(payment.debt_id, conn)
+            await self.summary_service.refresh([debt.debtor_user_id, debt.creditor_user_id], conn)
+            
+            return deleted_payment
+        
+        deleted_payment = await Database.run_transaction(body, name='payment.delete')
+        invalidate_creditor_dashboard(debt.creditor_user_id)
+        return deleted_payment
     
     async def get_payments_by_debt(
         self,
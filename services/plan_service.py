@@ -0,0 +1,152 @@
+"""
+Сервис сохранённых планов погашения.
+
+План строится PlannerService и хранится в таблице payment_plans. Пересчёт
+выполняется в транзакциях, которые меняют остаток или условия долга, а также
+при наступлении даты первого планового платежа; чтение плана — один запрос.
+"""
+from datetime import date
+from typing import Optional
+import asyncpg
+from database import Database
+from metrics import metrics
+from models.payment_plan import PlannedPayment
+from repositories.debt_repository import DebtRepository
+from repositories.payment_plan_repository import PaymentPlanRepository
+from repositories.payment_repository import PaymentRepository
+from services.summary_service import UserSummaryService
+
+# Срок актуальности пустого плана: он меняется только вместе с долгом
+NO_EXPIRY = date.max
+
+# Сколько устаревших планов пересчитывать за одну транзакцию обслуживания
+REFRESH_BATCH_SIZE = 100
+
+
+class PaymentPlanService:
+    """Сервис построения и чтения сохранённых планов погашения."""
+    
+    def __init__(self):
+        self.plan_repo = PaymentPlanRepository()
+        self.debt_repo = DebtRepository()
+        self.payment_repo = PaymentRepository()
+        self.summary_service = UserSummaryService()
+    
+    async def refresh(self, debt_id: int, conn: asyncpg.Connection, today: Optional[date] = None) -> list:
+        """
+        Пересчитывает и сохраняет план долга в транзакции вызывающего.
+        
+        Вызывается после изменения платежей или условий долга в той же
+        транзакции, поэтому план фиксируется вместе с изменением. Долг и
+        остаток читаются после блокировки плана: из параллельных пересчётов
+        последний видит все зафиксированные изменения.
+        
+        Args:
+            debt_id: ID долга
+            conn: Подключение к БД с открытой транзакцией
+            today: Текущая дата (по умолчанию — сегодня)
+        
+        Returns:
+            Список PaymentPlanItem (пустой, если долг не найден, закрыт или погашен)
+        """
+        # PlannerService импортирует PaymentService, который сам пересчитывает планы
+        from services.planner_service import PlannerService
+        
+        await self.plan_repo.lock(debt_id, conn)
+        debt = await self.debt_repo.get_by_id(debt_id, conn=conn)
+        if debt is None:
+            return []
+        
+        balance = await self.payment_repo.calculate_balance(debt.id, debt.principal_amount, conn=conn)
+        items = await PlannerService().calculate_payment_plan(debt, balance, today)
+        
+        await self.plan_repo.replace(
+            debt.id,
+            [
+                (item.payment_date, item.amount, item.principal, item.interest, item.is_final)
+                for item in items
+            ],
+            valid_until=items[0].payment_date if items else NO_EXPIRY,
+            conn=conn
+        )
+        metrics.inc('payment_plan.refreshed')
+        
+        return items
+    
+    async def get_plan(self, debt_id: int, today: Optional[date] = None) -> list:
+        """
+        Получает план долга из таблицы payment_plans.
+        
+        Если план не построен или первый плановый платёж уже прошёл, план
+        пересчитывается в отдельной транзакции.
+        
+        Args:
+            debt_id: ID долга
+            today: Текущая дата (по умолчанию — сегодня)
+        
+        Returns:
+            Список PaymentPlanItem
+        """
+        today = today or date.today()
+        valid_until, planned = await self.plan_repo.get_by_debt(debt_id)
+        
+        if valid_until is not None and valid_until >= today:
+            metrics.inc('payment_plan.hit')
+            return [_to_plan_item(payment) for payment in planned]
+        
+        metrics.inc('payment_plan.stale')
+        
+        async def body(conn: asyncpg.Connection) -> list:
+            return await self.refresh(debt_id, conn, today)
+        
+        return await Database.run_transaction(body, name='plan.refresh')
+    
+    async def refresh_stale(self, conn: asyncpg.Connection, today: Optional[date] = None) -> int:
+        """
+        Пересчитывает устаревшие планы активных долгов пакетами.
+        
+        Каждый пакет — отдельная транзакция, чтобы не держать блокировки
+        планов всех долгов до конца обслуживания. Планы строятся от той же
+        даты today, по которой отбираются устаревшие: иначе план, актуальный
+        на сегодня, но устаревший на today, отбирался бы снова и снова.
+        Сводки должников и кредиторов пересчитываются в той же транзакции:
+        ближайший платёж в них берётся из планов.
+        
+        Args:
+            conn: Обслуживающее подключение к БД
+            today: Текущая дата (по умолчанию — сегодня)
+        
+        Returns:
+            Количество пересчитанных планов
+        """
+        today = today or date.today()
+        refreshed = 0
+        
+        while True:
+            debt_ids = await self.plan_repo.get_stale_debt_ids(today, REFRESH_BATCH_SIZE, conn=conn)
+            if not debt_ids:
+                return refreshed
+            
+            async with conn.transaction():
+                for debt_id in debt_ids:
+                    await self.refresh(debt_id, conn, today)
+                debts = await self.debt_repo.get_by_ids(debt_ids, conn=conn)
+                await self.summary_service.refresh(
+                    [user_id for debt in debts.values() for user_id in (debt.debtor_user_id, debt.creditor_user_id)],
+                    conn,
+                    today
+                )
+            refreshed += len(debt_ids)
+
+
+def _to_plan_item(payment: PlannedPayment):
+    """Преобразует сохранённый платёж в элемент плана."""
+    from services.planner_service import PaymentPlanItem
+    
+    return PaymentPlanItem(
+        payment.payment_date,
+        payment.amount,
+        is_final=payment.is_final,
+        principal=payment.principal,
+        interest=payment.interest,
+    )
@@ -1,21 +1,55 @@
 """
 Сервис для расчёта плана погашения долга.
 """
-from typing import List, Optional
+import heapq
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import date, datetime
 from decimal import Decimal
 from calendar import monthrange
 from models.debt import Debt
+from services.amortization import (
+    InterestTerms,
+    from_minor,
+    iter_due_dates,
+    iter_schedule,
+    summarize,
+    to_minor,
+)
 from services.payment_service import PaymentService
 
+# Сколько платежей просматривать при расчёте итога долга с процентами (30 лет)
+MAX_SUMMARY_PAYMENTS = 360
+# Сколько платежей включать в план погашения долга
+MAX_PLAN_PAYMENTS = 100
+
 
 class PaymentPlanItem:
     """Элемент плана погашения."""
     
-    def __init__(self, payment_date: date, amount: Decimal, is_final: bool = False):
+    def __init__(
+        self,
+        payment_date: date,
+        amount: Decimal,
+        is_final: bool = False,
+        principal: Optional[Decimal] = None,
+        interest: Optional[Decimal] = None
+    ):
         self.payment_date = payment_date
         self.amount = amount
         self.is_final = is_final  # True для "добивающего" платежа
+        self.principal = principal  # Для долгов с процентами: погашение основного долга
+        self.interest = interest  # Для долгов с процентами: проценты в платеже
+
+
+def _tag_plan(
+    index: int,
+    debt: Debt,
+    items: Iterator[PaymentPlanItem]
+) -> Iterator[Tuple[date, int, Debt, PaymentPlanItem]]:
+    """Помечает платежи плана ключом слияния (дата, номер долга)."""
+    for item in items:
+        yield item.payment_date, index, debt, item
 
 
 class PlannerService:
@@ -73,10 +107,154 @@ class PlannerService:
         
         return self._get_due_date_in_month(next_year, next_month, due_day)
     
+    def get_payoff_summary(
+        self,
+        balance: Decimal,
+        monthly_payment: Decimal,
+        due_day: int,
+        extra_payment: Decimal = Decimal('0'),
+        today: Optional[date] = None,
+        terms: Optional[InterestTerms] = None
+    ) -> Tuple[date, int, Decimal, Decimal]:
+        """
+        Рассчитывает итог плана погашения без построения списка платежей.
+        
+        Даёт тот же результат, что и calculate_payment_plan. Без процентов
+        считается за постоянное время: число платежей — деление остатка на
+        ежемесячный платёж с округлением вверх.
+        
+        Args:
+            balance: Остаток долга (больше нуля)
+            monthly_payment: Ежемесячный платёж (больше нуля)
+            due_day: День платежа (1-31)
+            extra_payment: Разовый дополнительный платёж вместе с ближайшим платежом
+            today: Текущая дата (по умолчанию — сегодня)
+            terms: Условия начисления процентов (None — без процентов)
+        
+        Returns:
+            (дата последнего платежа, число платежей, сумма последнего платежа, сумма процентов)
+        
+        Raises:
+            ValueError: Если долг с процентами не гасится за MAX_SUMMARY_PAYMENTS платежей
+        """
+        today = today or date.today()
+        first_date = self._get_next_due_date(today, due_day)
+        
+        if terms is not None:
+            summary = summarize(
+                to_minor(balance),
+                to_minor(monthly_payment),
+                terms,
+                start=today,
+                due_dates=iter_due_dates(first_date, due_day),
+                max_periods=MAX_SUMMARY_PAYMENTS,
+                first_extra=to_minor(extra_payment),
+            )
+            if summary is None:
+                raise ValueError("Платёж не покрывает проценты: долг не будет погашен")
+            final_date, count, final_payment, interest = summary
+            return final_date, count, from_minor(final_payment), from_minor(interest)
+        
+        first_amount = monthly_payment + extra_payment
+        if balance <= first_amount:
+            return first_date, 1, balance, Decimal('0')
+        
+        rest = balance - first_amount
+        more, remainder = divmod(rest, monthly_payment)
+        if remainder:
+            more += 1
+        final_payment = rest - (more - 1) * monthly_payment
+        
+        month_index = first_date.year * 12 + first_date.month - 1 + int(more)
+        final_date = self._get_due_date_in_month(month_index // 12, month_index % 12 + 1, due_day)
+        
+        return final_date, int(more) + 1, final_payment, Decimal('0')
+    
+    def get_payoff_summaries(
+        self,
+        debts: List[Tuple[Debt, Decimal]],
+        today: Optional[date] = None
+    ) -> Dict[int, Optional[Tuple[date, int, Decimal, Decimal]]]:
+        """
+        Рассчитывает итоги планов для многих долгов за один вызов.
+        
+        Args:
+            debts: Список (долг, остаток)
+            today: Текущая дата (по умолчанию — сегодня)
+        
+        Returns:
+            debt_id -> итог, как в get_payoff_summary; None, если плана нет
+            (не заданы условия, долг погашен или не гасится)
+        """
+        today = today or date.today()
+        summaries: Dict[int, Optional[Tuple[date, int, Decimal, Decimal]]] = {}
+        
+        for debt, balance in debts:
+            if debt.monthly_payment is None or debt.due_day is None or balance <= 0 or debt.status == 'closed':
+                summaries[debt.id] = None
+                continue
+            try:
+                summaries[debt.id] = self.get_payoff_summary(
+                    balance, debt.monthly_payment, debt.due_day,
+                    today=today, terms=InterestTerms.from_debt(debt)
+                )
+            except ValueError:
+                summaries[debt.id] = None
+        
+        return summaries
+    
+    def iter_payment_plan(
+        self,
+        debt: Debt,
+        balance: Decimal,
+        today: Optional[date] = None
+    ) -> Iterator[PaymentPlanItem]:
+        """
+        Лениво строит план погашения долга по возрастанию дат.
+        
+        Если аннуитетный платёж не покрывает проценты, план бесконечен:
+        вызывающий ограничивает число платежей.
+        
+        Args:
+            debt: Долг
+            balance: Текущий остаток
+            today: Текущая дата (по умолчанию — сегодня)
+        
+        Yields:
+            PaymentPlanItem
+        """
+        if debt.monthly_payment is None or debt.due_day is None or balance <= 0 or debt.status == 'closed':
+            return
+        
+        today = today or date.today()
+        due_dates = iter_due_dates(self._get_next_due_date(today, debt.due_day), debt.due_day)
+        
+        terms = InterestTerms.from_debt(debt)
+        if terms is not None:
+            for installment in iter_schedule(to_minor(balance), to_minor(debt.monthly_payment), terms, today, due_dates):
+                yield PaymentPlanItem(
+                    installment.payment_date,
+                    from_minor(installment.payment),
+                    is_final=installment.balance == 0,
+                    principal=from_minor(installment.principal),
+                    interest=from_minor(installment.interest),
+                )
+            return
+        
+        remaining_balance = balance
+        for payment_date in due_dates:
+            if remaining_balance <= debt.monthly_payment:
+                # "Добивающий" платёж
+                yield PaymentPlanItem(payment_date, remaining_balance, is_final=True)
+                return
+            yield PaymentPlanItem(payment_date, debt.monthly_payment, is_final=False)
+            remaining_balance -= debt.monthly_payment
+    
     async def calculate_payment_plan(
         self,
         debt: Debt,
-        current_balance: Optional[Decimal] = None
+        current_balance: Optional[Decimal] = None,
+        today: Optional[date] = None
     ) -> List[PaymentPlanItem]:
         """
         Рассчитывает план погашения долга.
@@ -84,9 +262,10 @@ class PlannerService:
         Args:
             debt: Долг
             current_balance: Текущий баланс (опционально, будет рассчитан, если не указан)
+            today: Текущая дата (по умолчанию — сегодня)
         
         Returns:
-            Список элементов плана погашения
+            Список элементов плана погашения (не больше MAX_PLAN_PAYMENTS)
         """
         # Если нет monthly_payment или due_day, план пустой
         if debt.monthly_payment is None or debt.due_day is None:
@@ -96,56 +275,34 @@ class PlannerService:
         if current_balance is None:
             current_balance = await self.payment_service.calculate_balance(debt.id)
         
-        # Если баланс <= 0, план пустой
-        if current_balance <= 0:
-            return []
+        return list(islice(self.iter_payment_plan(debt, current_balance, today), MAX_PLAN_PAYMENTS))
+    
+    def merge_payment_plans(
+        self,
+        debts: List[Tuple[Debt, Decimal]],
+        today: Optional[date] = None
+    ) -> Iterator[Tuple[Debt, PaymentPlanItem]]:
+        """
+        Объединяет планы нескольких долгов в один поток по возрастанию дат.
         
-        # Если долг закрыт, план пустой
-        if debt.status == 'closed':
-            return []
+        Планы строятся лениво и сливаются heapq.merge за один проход:
+        платежи не собираются в списки и не сортируются целиком.
+        При равных датах платежи идут в порядке долгов в debts.
         
-        plan = []
-        today = date.today()
-        current_date = today
-        remaining_balance = current_balance
-        monthly_payment = debt.monthly_payment
-        due_day = debt.due_day
-        max_payments = 100  # Достаточно большой лимит для генерации плана
-        
-        # Генерируем план погашения
-        for _ in range(max_payments):
-            if remaining_balance <= 0:
-                break
-            
-            # Определяем дату платежа
-            if len(plan) == 0:
-                # Первая дата - следующая дата платежа
-                payment_date = self._get_next_due_date(current_date, due_day)
-            else:
-                # Следующие даты - следующий месяц
-                prev_date = plan[-1].payment_date
-                if prev_date.month == 12:
-                    next_year = prev_date.year + 1
-                    next_month = 1
-                else:
-                    next_year = prev_date.year
-                    next_month = prev_date.month + 1
-                
-                payment_date = self._get_due_date_in_month(next_year, next_month, due_day)
-            
-            # Определяем сумму платежа
-            if remaining_balance <= monthly_payment:
-                # "Добивающий" платёж
-                amount = remaining_balance
-                plan.append(PaymentPlanItem(payment_date, amount, is_final=True))
-                break
-            else:
-                amount = monthly_payment
-                plan.append(PaymentPlanItem(payment_date, amount, is_final=False))
-            
-            remaining_balance -= amount
-        
-        return plan
+        Args:
+            debts: Список (долг, остаток)
+            today: Текущая дата (по умолчанию — сегодня)
+        
+        Yields:
+            (долг, элемент плана); поток бесконечен, если какой-то план бесконечен
+        """
+        today = today or date.today()
+        streams = [
+            _tag_plan(index, debt, self.iter_payment_plan(debt, balance, today))
+            for index, (debt, balance) in enumerate(debts)
+        ]
+        for _, _, debt, item in heapq.merge(*streams):
+            yield debt, item
     
     async def get_payment_plan_for_debt(self, debt_id: int) -> List[PaymentPlanItem]:
         """
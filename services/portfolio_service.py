@@ -0,0 +1,296 @@
+"""
+Сервис планирования погашения нескольких долгов из общего бюджета.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+from dates import add_months, month_start
+from models.debt import Debt
+from repositories.debt_repository import DebtRepository
+from repositories.payment_repository import PaymentRepository
+from services.amortization import RATE_SCALE, due_date_in_month, from_minor, rate_units, to_minor
+
+
+STRATEGY_AVALANCHE = 'avalanche'  # Сначала самый дорогой долг
+STRATEGY_SNOWBALL = 'snowball'    # Сначала самый маленький долг
+STRATEGY_CUSTOM = 'custom'        # Порядок задаёт пользователь
+STRATEGIES = (STRATEGY_AVALANCHE, STRATEGY_SNOWBALL, STRATEGY_CUSTOM)
+
+# Горизонт планирования: 30 лет
+MAX_PLAN_MONTHS = 360
+
+
+@dataclass
+class PortfolioMonth:
+    """Платежи по всем долгам за один месяц."""
+    month: date  # Первое число месяца
+    payments: Dict[int, Decimal]  # debt_id -> сумма платежа
+    remaining: Decimal  # Общий остаток после платежей месяца
+    
+    @property
+    def total(self) -> Decimal:
+        """Сумма платежей за месяц."""
+        return sum(self.payments.values(), Decimal('0'))
+
+
+@dataclass
+class PortfolioPlan:
+    """Совместный план погашения долгов по одной стратегии."""
+    strategy: str
+    budget: Decimal
+    months: List[PortfolioMonth] = field(default_factory=list)
+    payoff_dates: Dict[int, Optional[date]] = field(default_factory=dict)  # None — не погашен за горизонт
+    
+    @property
+    def is_complete(self) -> bool:
+        """True, если все долги погашаются в пределах горизонта."""
+        return all(day is not None for day in self.payoff_dates.values())
+    
+    @property
+    def total_paid(self) -> Decimal:
+        """Сумма всех платежей по плану."""
+        return sum((month.total for month in self.months), Decimal('0'))
+
+
+def priority_order(
+    strategy: str,
+    debts: Sequence[Debt],
+    balances: Dict[int, Decimal],
+    priority: Optional[Sequence[int]] = None
+) -> List[int]:
+    """
+    Возвращает ID долгов в порядке, в котором на них направляется свободный остаток бюджета.
+    
+    Args:
+        strategy: Стратегия
+        debts: Долги
+        balances: debt_id -> текущий остаток
+        priority: ID долгов в порядке пользователя (для STRATEGY_CUSTOM)
+    
+    Returns:
+        Список ID долгов
+    
+    Raises:
+        ValueError: Если стратегия неизвестна или порядок пользователя неполный
+    """
+    ids = [debt.id for debt in debts]
+    
+    if strategy == STRATEGY_AVALANCHE:
+        # При равных ставках (в том числе беспроцентных долгах) — сначала больший остаток
+        rates = {debt.id: debt.interest_rate or Decimal('0') for debt in debts}
+        return sorted(ids, key=lambda debt_id: (-rates[debt_id], -balances[debt_id], debt_id))
+    if strategy == STRATEGY_SNOWBALL:
+        return sorted(ids, key=lambda debt_id: (balances[debt_id], debt_id))
+    if strategy == STRATEGY_CUSTOM:
+        if priority is None or sorted(priority) != sorted(ids):
+            raise ValueError("Укажите порядок погашения для каждого долга ровно один раз")
+        return list(priority)
+    
+    raise ValueError(f"Неизвестная стратегия: {strategy}")
+
+
+def simulate(
+    balances: List[int],
+    minimums: List[int],
+    order: List[int],
+    budget: int,
+    rates: Optional[List[int]] = None,
+    max_months: int = MAX_PLAN_MONTHS
+) -> Tuple[List[List[int]], List[int], List[Optional[int]]]:
+    """
+    Помесячно распределяет бюджет между долгами.
+    
+    Каждый месяц на остатки начисляются проценты, затем вносятся обязательные
+    платежи (в пределах бюджета), а остаток бюджета направляется на долги в порядке order. Платёж
+    погашенного долга остаётся в бюджете и переходит на следующие долги (rollover).
+    
+    Все суммы — целые копейки, долги адресуются индексами списков.
+    
+    Args:
+        balances: Остатки долгов
+        minimums: Обязательные ежемесячные платежи
+        order: Индексы долгов в порядке приоритета
+        budget: Ежемесячный бюджет
+        rates: Годовые ставки (доля * RATE_SCALE); проценты начисляются
+            помесячно, 1/12 годовой ставки (None — без процентов)
+        max_months: Горизонт планирования
+    
+    Returns:
+        (платежи по месяцам: months[m][i] — платёж по долгу i в месяце m,
+         общий остаток после каждого месяца,
+         номер месяца погашения каждого долга или None)
+    """
+    remaining = list(balances)
+    active = [i for i in order if remaining[i] > 0]
+    accruing = [i for i in active if rates and rates[i] > 0]
+    payoff: List[Optional[int]] = [None] * len(remaining)
+    months = []
+    totals = []
+    
+    while active and len(months) < max_months:
+        for i in accruing:
+            if remaining[i] > 0:
+                remaining[i] += (2 * remaining[i] * rates[i] + 12 * RATE_SCALE) // (24 * RATE_SCALE)
+        
+        payments = [0] * len(remaining)
+        free = budget
+        
+        for i in active:
+            # Проценты могли поднять остаток выше обязательного платежа: бюджет не превышается
+            pay = min(minimums[i], remaining[i], free)
+            payments[i] = pay
+            remaining[i] -= pay
+            free -= pay
+        
+        for i in active:
+            if free <= 0:
+                break
+            pay = min(free, remaining[i])
+            payments[i] += pay
+            remaining[i] -= pay
+            free -= pay
+        
+        for i in active:
+            if remaining[i] == 0:
+                payoff[i] = len(months)
+        
+        months.append(payments)
+        totals.append(sum(remaining))
+        active = [i for i in active if remaining[i] > 0]
+    
+    return months, totals, payoff
+
+
+class PortfolioService:
+    """Сервис совместного планирования погашения долгов должника."""
+    
+    def __init__(self):
+        self.debt_repo = DebtRepository()
+        self.payment_repo = PaymentRepository()
+    
+    async def get_active_debts(self, user_id: int) -> List[Tuple[Debt, Decimal]]:
+        """
+        Получает активные долги пользователя-должника с положительным остатком.
+        
+        Args:
+            user_id: ID должника
+        
+        Returns:
+            Список (долг, остаток) в порядке создания
+        """
+        debts = [debt for debt in await self.debt_repo.get_by_debtor(user_id) if debt.status == 'active']
+        paid = await self.payment_repo.get_paid_totals([debt.id for debt in debts])
+        
+        result = []
+        for debt in sorted(debts, key=lambda debt: debt.created_at):
+            balance = debt.principal_amount - paid.get(debt.id, Decimal('0'))
+            if balance > 0:
+                result.append((debt, balance))
+        return result
+    
+    def plan(
+        self,
+        debts: List[Tuple[Debt, Decimal]],
+        budget: Decimal,
+        strategy: str,
+        priority: Optional[Sequence[int]] = None,
+        start: Optional[date] = None
+    ) -> PortfolioPlan:
+        """
+        Рассчитывает совместный план погашения по стратегии.
+        
+        Для долгов с процентами проценты начисляются помесячно (1/12 годовой
+        ставки); точный график отдельного долга строит PlannerService.
+        
+        Args:
+            debts: Список (долг, остаток)
+            budget: Ежемесячный бюджет на все долги
+            strategy: Стратегия (STRATEGY_*)
+            priority: ID долгов в порядке пользователя (для STRATEGY_CUSTOM)
+            start: Первый месяц плана (по умолчанию — следующий месяц)
+        
+        Returns:
+            PortfolioPlan
+        
+        Raises:
+            ValueError: Если долги в разных валютах, бюджет меньше обязательных
+                платежей или стратегия задана неверно
+        """
+        currencies = {debt.currency for debt, _ in debts}
+        if len(currencies) > 1:
+            raise ValueError(f"Долги в разных валютах ({', '.join(sorted(currencies))}), общий план не построить")
+        
+        balances = {debt.id: balance for debt, balance in debts}
+        minimums = {
+            debt.id: min(debt.monthly_payment or Decimal('0'), balance)
+            for debt, balance in debts
+        }
+        if budget < sum(minimums.values(), Decimal('0')):
+            raise ValueError(
+                f"Бюджет меньше суммы ежемесячных платежей ({sum(minimums.values(), Decimal('0')):,.2f})"
+            )
+        
+        order = priority_order(strategy, [debt for debt, _ in debts], balances, priority)
+        index = {debt.id: i for i, (debt, _) in enumerate(debts)}
+        
+        schedule, totals, payoff = simulate(
+            balances=[to_minor(balance) for _, balance in debts],
+            minimums=[to_minor(debt.monthly_payment or Decimal('0')) for debt, _ in debts],
+            order=[index[debt_id] for debt_id in order],
+            budget=to_minor(budget),
+            rates=[rate_units(debt.interest_rate or Decimal('0')) for debt, _ in debts],
+        )
+        
+        first_month = start or add_months(month_start(date.today()), 1)
+        plan = PortfolioPlan(strategy=strategy, budget=budget)
+        
+        for offset, payments in enumerate(schedule):
+            paid = {
+                debt.id: from_minor(payments[index[debt.id]])
+                for debt, _ in debts
+                if payments[index[debt.id]]
+            }
+            plan.months.append(PortfolioMonth(
+                month=add_months(first_month, offset),
+                payments=paid,
+                remaining=from_minor(totals[offset]),
+            ))
+        
+        for debt, _ in debts:
+            month_index = payoff[index[debt.id]]
+            plan.payoff_dates[debt.id] = (
+                due_date_in_month(add_months(first_month, month_index), debt.due_day)
+                if month_index is not None else None
+            )
+        
+        return plan
+    
+    def compare(
+        self,
+        debts: List[Tuple[Debt, Decimal]],
+        budget: Decimal,
+        priority: Optional[Sequence[int]] = None
+    ) -> Dict[str, PortfolioPlan]:
+        """
+        Рассчитывает планы погашения по нескольким стратегиям.
+        
+        Args:
+            debts: Список (долг, остаток), см. get_active_debts
+            budget: Ежемесячный бюджет на все долги
+            priority: ID долгов в порядке пользователя; если задан, добавляется STRATEGY_CUSTOM
+        
+        Returns:
+            Стратегия -> PortfolioPlan
+        
+        Raises:
+            ValueError: Если план построить нельзя
+        """
+        strategies = [STRATEGY_AVALANCHE, STRATEGY_SNOWBALL]
+        if priority is not None:
+            strategies.append(STRATEGY_CUSTOM)
+        
+        return {
+            strategy: self.plan(debts, budget, strategy, priority=priority)
+            for strategy in strategies
+        }
@@ -0,0 +1,332 @@
+"""
+Разбор банковских выписок (CSV, OFX, 1C) для импорта платежей.
+
+Импортируются только списания со счёта должника:
+- CSV: суммы со знаком, как в банковских выписках — списание отрицательное,
+  поступление положительное;
+- OFX: отрицательный TRNAMT или TRNTYPE DEBIT;
+- 1C: документы, где счёт плательщика (ПлательщикСчет) — счёт выписки (РасчСчет).
+Поступления на счёт учитываются как ошибочные строки.
+"""
+import csv
+import io
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import BinaryIO, Iterator, List, Optional, TextIO, Tuple
+
+# Форматы выписок
+FORMAT_CSV = 'csv'
+FORMAT_OFX = 'ofx'
+FORMAT_1C = '1c'
+
+# Сколько ошибок по строкам сохранять для показа пользователю
+MAX_ERROR_SAMPLES = 5
+
+# Названия колонок CSV (в нижнем регистре)
+_DATE_COLUMNS = ('дата', 'date')
+_AMOUNT_COLUMNS = ('сумма', 'amount', 'sum')
+
+# Предел NUMERIC(15, 2) в таблице payments
+_MAX_AMOUNT = Decimal('1e13')
+
+_OFX_TAG = re.compile(r'<(/?)(STMTTRN|TRNTYPE|DTPOSTED|TRNAMT)>([^<\r\n]*)', re.IGNORECASE)
+
+# Направление операции в строке выписки
+_SIGNED = 'signed'  # По знаку суммы: отрицательная — списание
+_DEBIT = 'debit'    # Списание, знак суммы не важен
+_CREDIT = 'credit'  # Поступление на счёт
+
+# Строка выписки: (номер строки, дата, сумма, направление)
+_Record = Tuple[int, str, str, str]
+
+
+@dataclass
+class ImportedPayment:
+    """Платёж, прочитанный из выписки."""
+    line_no: int
+    payment_date: date
+    amount: Decimal
+
+
+def open_statement(raw: BinaryIO) -> TextIO:
+    """
+    Открывает выписку как текст, определяя кодировку (UTF-8 или Windows-1251).
+    
+    Выгрузки 1C и многих банков сохраняются в Windows-1251.
+    """
+    head = raw.read(64 * 1024)
+    raw.seek(0)
+    encoding = 'utf-8-sig'
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Обрезанный на границе блока многобайтовый символ — не повод менять кодировку
+        if e.start < len(head) - 3:
+            encoding = 'cp1251'
+    return io.TextIOWrapper(raw, encoding=encoding, errors='replace', newline='')
+
+
+def parse_amount(text: str) -> Optional[Decimal]:
+    """
+    Парсит сумму из выписки: «1 000,50», «-1000.50», «1,000.50».
+    
+    Returns:
+        Сумма со знаком с точностью до копеек или None
+    """
+    text = text.strip().replace('\xa0', '').replace(' ', '').replace("'", '')
+    if not text:
+        return None
+    if ',' in text and '.' in text:
+        # Разделитель дробной части — последний из встретившихся
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    else:
+        text = text.replace(',', '.')
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        return None
+    if not amount.is_finite():
+        return None
+    return amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def parse_statement_date(text: str) -> Optional[date]:
+    """Парсит дату из выписки: DD.MM.YYYY, DD/MM/YYYY, YYYY-MM-DD, YYYYMMDD (OFX)."""
+    text = text.strip()
+    if not text:
+        return None
+    # Время после даты не нужно: «15.01.2024 12:30», «2024-01-15T12:30:00»
+    text = re.split(r'[\sT]', text, maxsplit=1)[0]
+    for fmt in ('%d.%m.%Y', '%d/%m/%Y', '%Y-%m-%d', '%d.%m.%y'):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    # OFX: YYYYMMDD[HHMMSS[.XXX][[TZ]]]
+    if len(text) >= 8 and text[:8].isdigit():
+        try:
+            return datetime.strptime(text[:8], '%Y%m%d').date()
+        except ValueError:
+            return None
+    return None
+
+
+def detect_format(first_line: str, filename: Optional[str] = None) -> str:
+    """Определяет формат выписки по первой строке и имени файла."""
+    line = first_line.strip().lstrip('\ufeff')
+    if line.startswith('1CClientBankExchange'):
+        return FORMAT_1C
+    if 'OFXHEADER' in line.upper() or line.upper().startswith(('<OFX', '<?XML')):
+        return FORMAT_OFX
+    if filename:
+        lower = filename.lower()
+        if lower.endswith(('.ofx', '.qfx')):
+            return FORMAT_OFX
+    return FORMAT_CSV
+
+
+class StatementParser:
+    """
+    Потоково разбирает выписку и выдаёт платежи по одному.
+    
+    Файл читается построчно, поэтому память не зависит от размера выписки.
+    Строки, которые не удалось разобрать, пропускаются и учитываются в errors.
+    
+    Args:
+        stream: Текстовый поток выписки (см. open_statement)
+        filename: Имя файла (подсказка для определения формата)
+        max_rows: Максимальное количество платежей в выписке
+        today: Текущая дата (платежи из будущего отклоняются)
+    """
+    
+    def __init__(
+        self,
+        stream: TextIO,
+        filename: Optional[str] = None,
+        max_rows: Optional[int] = None,
+        today: Optional[date] = None
+    ):
+        self._stream = stream
+        self._filename = filename
+        self._max_rows = max_rows
+        self._today = today or date.today()
+        self.format: Optional[str] = None
+        self.rows = 0
+        self.error_count = 0
+        self.errors: List[Tuple[int, str]] = []
+    
+    def __iter__(self) -> Iterator[ImportedPayment]:
+        first_line = self._stream.readline()
+        while first_line and not first_line.strip():
+            first_line = self._stream.readline()
+        if not first_line:
+            self.format = FORMAT_CSV
+            return
+        
+        self.format = detect_format(first_line, self._filename)
+        if self.format == FORMAT_1C:
+            records = self._parse_1c()
+        elif self.format == FORMAT_OFX:
+            records = self._parse_ofx(first_line)
+        else:
+            records = self._parse_csv(first_line)
+        
+        for line_no, raw_date, raw_amount, direction in records:
+            payment = self._validate(line_no, raw_date, raw_amount, direction)
+            if payment is None:
+                continue
+            self.rows += 1
+            if self._max_rows is not None and self.rows > self._max_rows:
+                raise ValueError(f"В выписке больше {self._max_rows} платежей, разделите её на части")
+            yield payment
+    
+    def _error(self, line_no: int, message: str) -> None:
+        """Учитывает строку, которую не удалось разобрать."""
+        self.error_count += 1
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append((line_no, message))
+    
+    def _validate(
+        self,
+        line_no: int,
+        raw_date: str,
+        raw_amount: str,
+        direction: str
+    ) -> Optional[ImportedPayment]:
+        """Проверяет дату, направление и сумму платежа."""
+        if direction == _CREDIT:
+            self._error(line_no, "поступление на счёт, а не платёж")
+            return None
+        
+        payment_date = parse_statement_date(raw_date)
+        if payment_date is None:
+            self._error(line_no, f"неверная дата «{raw_date.strip()[:20]}»")
+            return None
+        if payment_date > self._today:
+            self._error(line_no, "дата платежа в будущем")
+            return None
+        
+        amount = parse_amount(raw_amount)
+        if amount is None:
+            self._error(line_no, f"неверная сумма «{raw_amount.strip()[:20]}»")
+            return None
+        # Платёж — списание: в выписке со знаком оно отрицательное
+        amount = -amount if direction == _SIGNED else abs(amount)
+        if amount < 0:
+            self._error(line_no, "поступление на счёт, а не платёж")
+            return None
+        if amount == 0:
+            self._error(line_no, "сумма должна быть больше нуля")
+            return None
+        if amount >= _MAX_AMOUNT:
+            self._error(line_no, "слишком большая сумма")
+            return None
+        
+        return ImportedPayment(line_no=line_no, payment_date=payment_date, amount=amount)
+    
+    def _parse_csv(self, first_line: str) -> Iterator[_Record]:
+        """
+        CSV с колонками даты и суммы (разделитель «;», «,» или табуляция).
+        
+        Суммы со знаком, как в банковских выписках: платёж (списание) отрицательный.
+        """
+        delimiter = max((';', '\t', ','), key=first_line.count)
+        header = next(csv.reader([first_line], delimiter=delimiter))
+        names = [name.strip().lstrip('\ufeff').lower() for name in header]
+        
+        date_col = next((i for i, n in enumerate(names) if n.startswith(_DATE_COLUMNS)), None)
+        amount_col = next((i for i, n in enumerate(names) if n.startswith(_AMOUNT_COLUMNS)), None)
+        
+        line_no = 1
+        if date_col is None or amount_col is None:
+            # Без заголовка: первая колонка — дата, вторая — сумма
+            date_col, amount_col = 0, 1
+            if len(header) > 1:
+                yield line_no, header[date_col], header[amount_col], _SIGNED
+            else:
+                self._error(line_no, "ожидаются колонки даты и суммы")
+        
+        for row in csv.reader(self._stream, delimiter=delimiter):
+            line_no += 1
+            if not any(cell.strip() for cell in row):
+                continue
+            if len(row) <= max(date_col, amount_col):
+                self._error(line_no, "недостаточно колонок")
+                continue
+            yield line_no, row[date_col], row[amount_col], _SIGNED
+    
+    def _parse_ofx(self, first_line: str) -> Iterator[_Record]:
+        """OFX (SGML или XML): транзакции STMTTRN с TRNTYPE, DTPOSTED и TRNAMT."""
+        line_no = 0
+        current = None
+        start_line = 0
+        
+        def lines():
+            yield first_line
+            yield from self._stream
+        
+        for line in lines():
+            line_no += 1
+            for closing, tag, value in _OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == 'STMTTRN':
+                    if closing:
+                        if current is not None:
+                            # Знак TRNAMT задаёт направление; DEBIT — списание при любом знаке
+                            trntype = current.get('TRNTYPE', '').strip().upper()
+                            direction = _DEBIT if trntype == 'DEBIT' else _SIGNED
+                            yield start_line, current.get('DTPOSTED', ''), current.get('TRNAMT', ''), direction
+                        current = None
+                    else:
+                        current = {}
+                        start_line = line_no
+                elif current is not None and not closing:
+                    current[tag] = value
+    
+    def _parse_1c(self) -> Iterator[_Record]:
+        """
+        Формат обмена 1C «Клиент-банк»: секции СекцияДокумент ... КонецДокумента.
+        
+        Сумма в 1C без знака, направление определяется по счетам документа:
+        списание — если счёт плательщика есть среди счетов выписки (РасчСчет).
+        """
+        line_no = 1
+        current = None
+        start_line = 0
+        accounts = set()
+        
+        for line in self._stream:
+            line_no += 1
+            line = line.strip()
+            if line.startswith('СекцияДокумент'):
+                current = {}
+                start_line = line_no
+            elif line == 'КонецДокумента':
+                if current is not None:
+                    direction = self._1c_direction(current, accounts)
+                    if direction is None:
+                        self._error(start_line, "счёт выписки не совпадает со счетами документа")
+                    else:
+                        yield start_line, current.get('Дата', ''), current.get('Сумма', ''), direction
+                current = None
+            elif '=' in line:
+                key, value = line.split('=', 1)
+                if current is not None:
+                    current[key.strip()] = value
+                elif key.strip() == 'РасчСчет' and value.strip():
+                    # Заголовок файла и секции СекцияРасчСчет
+                    accounts.add(value.strip())
+    
+    @staticmethod
+    def _1c_direction(document: dict, accounts: set) -> Optional[str]:
+        """Направление документа 1C относительно счетов выписки (None — не определено)."""
+        if document.get('ПлательщикСчет', '').strip() in accounts:
+            return _DEBIT
+        if document.get('ПолучательСчет', '').strip() in accounts:
+            return _CREDIT
+        return None
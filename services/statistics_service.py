@@ -0,0 +1,237 @@
+"""
+Ночная статистика по должникам и по всем активным долгам.
+
+Исходные данные читаются одним потоком через серверный курсор, сгруппированным
+по должнику, поэтому в памяти одновременно находятся только долги и платежи
+одного должника и пакет готовых строк для COPY. Суммы считаются в копейках,
+даты платежей — целыми днями.
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncpg
+from dates import add_months, month_start
+from models.debt import Debt
+from repositories.statistics_repository import StatisticsRepository
+from services.amortization import due_date_in_month, iter_due_dates, to_minor
+from services.planner_service import PlannerService
+
+# Сколько строк статистики должников записывать одним COPY
+COPY_BATCH_SIZE = 1000
+
+# Платежи долга: (дата, сумма в копейках) по возрастанию даты
+DebtPayments = List[Tuple[date, int]]
+
+
+@dataclass
+class StatisticsTotals:
+    """Накопленная статистика по набору долгов."""
+    users: int = 0
+    debts: int = 0
+    progress_sum: Decimal = Decimal('0')  # Сумма долей выплаченного по долгам
+    installments_due: int = 0
+    installments_on_time: int = 0
+    delay_days: int = 0  # Сумма просрочек по всем платежам со сроком
+    projected_completion: Optional[date] = None
+    
+    def add(self, other: "StatisticsTotals") -> None:
+        """Добавляет статистику другого набора долгов."""
+        self.users += other.users
+        self.debts += other.debts
+        self.progress_sum += other.progress_sum
+        self.installments_due += other.installments_due
+        self.installments_on_time += other.installments_on_time
+        self.delay_days += other.delay_days
+        if other.projected_completion is not None:
+            self.projected_completion = max(self.projected_completion or date.min, other.projected_completion)
+    
+    @property
+    def payoff_progress(self) -> Optional[Decimal]:
+        """Средняя доля выплаченного по долгам."""
+        if not self.debts:
+            return None
+        return (self.progress_sum / self.debts).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP)
+    
+    @property
+    def avg_delay_days(self) -> Optional[Decimal]:
+        """Средняя просрочка платежа в днях."""
+        if not self.installments_due:
+            return None
+        return (Decimal(self.delay_days) / self.installments_due).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def first_due_date(created_on: date, due_day: int) -> date:
+    """Первый срок платежа: день платежа в месяце создания или в следующем, как в PlannerService."""
+    due = due_date_in_month(created_on, due_day)
+    if due < created_on:
+        due = due_date_in_month(add_months(month_start(created_on), 1), due_day)
+    return due
+
+
+def installment_timeliness(debt: Debt, payments: DebtPayments, today: date) -> Tuple[int, int, int]:
+    """
+    Сопоставляет плановые платежи со сроком до today с фактическими.
+    
+    Плановые платежи гасятся фактическими по порядку: платёж считается
+    внесённым в день, когда сумма фактических платежей достигла суммы
+    плановых по нему включительно. Неоплаченный платёж просрочен по today.
+    
+    Args:
+        debt: Долг
+        payments: Платежи долга по возрастанию даты (не позже today)
+        today: Дата расчёта
+    
+    Returns:
+        (платежей со сроком, из них вовремя, сумма просрочек в днях)
+    """
+    if not debt.monthly_payment or debt.due_day is None:
+        return 0, 0, 0
+    
+    monthly = to_minor(debt.monthly_payment)
+    principal = to_minor(debt.principal_amount)
+    created_on = debt.created_at.astimezone().date()
+    
+    due_count = on_time = delay_days = 0
+    expected = paid = 0
+    consumed = 0
+    covered_on: Optional[date] = None
+    
+    for due in iter_due_dates(first_due_date(created_on, debt.due_day), debt.due_day):
+        if due >= today or expected >= principal:
+            break
+        expected = min(expected + monthly, principal)
+        while paid < expected and consumed < len(payments):
+            covered_on, amount = payments[consumed]
+            paid += amount
+            consumed += 1
+        
+        due_count += 1
+        if paid >= expected:
+            if covered_on <= due:
+                on_time += 1
+            else:
+                delay_days += (covered_on - due).days
+        else:
+            delay_days += (today - due).days
+    
+    return due_count, on_time, delay_days
+
+
+class StatisticsService:
+    """Расчёт ночной статистики."""
+    
+    def __init__(self):
+        self.statistics_repo = StatisticsRepository()
+        self.planner_service = PlannerService()
+    
+    def user_statistics(self, debts: List[Tuple[Debt, DebtPayments]], today: date) -> StatisticsTotals:
+        """
+        Считает статистику одного должника.
+        
+        Срок погашения всех долгов оценивается пакетным расчётом итогов
+        планов (PlannerService.get_payoff_summaries), без построения планов.
+        
+        Args:
+            debts: Активные долги должника с платежами
+            today: Дата расчёта
+        
+        Returns:
+            StatisticsTotals
+        """
+        totals = StatisticsTotals(users=1, debts=len(debts))
+        balances = []
+        
+        for debt, payments in debts:
+            principal = to_minor(debt.principal_amount)
+            paid = sum(amount for _, amount in payments)
+            if principal > 0:
+                totals.progress_sum += Decimal(min(paid, principal)) / principal
+            balances.append((debt, Decimal(principal - paid).scaleb(-2)))
+            
+            due_count, on_time, delay_days = installment_timeliness(debt, payments, today)
+            totals.installments_due += due_count
+            totals.installments_on_time += on_time
+            totals.delay_days += delay_days
+        
+        payoffs = [
+            summary[0]
+            for summary in self.planner_service.get_payoff_summaries(balances, today).values()
+            if summary is not None
+        ]
+        totals.projected_completion = max(payoffs, default=None)
+        
+        return totals
+    
+    async def _iter_debtors(
+        self,
+        conn: asyncpg.Connection,
+        today: date,
+        prefetch: int
+    ) -> AsyncIterator[Tuple[int, List[Tuple[Debt, DebtPayments]]]]:
+        """Собирает поток строк курсора в долги по должникам."""
+        user_id: Optional[int] = None
+        debts: List[Tuple[Debt, DebtPayments]] = []
+        
+        async for row in self.statistics_repo.stream_active_debt_payments(conn, prefetch=prefetch):
+            if row['debtor_user_id'] != user_id:
+                if debts:
+                    yield user_id, debts
+                user_id, debts = row['debtor_user_id'], []
+            if not debts or debts[-1][0].id != row['id']:
+                debts.append((Debt.from_row(row), []))
+            # Платежи будущими датами в статистику на сегодня не входят
+            if row['payment_date'] is not None and row['payment_date'] <= today:
+                debts[-1][1].append((row['payment_date'], to_minor(row['payment_amount'])))
+        
+        if debts:
+            yield user_id, debts
+    
+    async def run(
+        self,
+        conn: asyncpg.Connection,
+        today: Optional[date] = None,
+        prefetch: int = 500
+    ) -> StatisticsTotals:
+        """
+        Пересчитывает статистику за дату и записывает её через COPY.
+        
+        Выполняется в одной транзакции REPEATABLE READ: данные читаются из
+        одного снимка, а читатели видят либо прежнюю статистику за дату,
+        либо новую целиком.
+        
+        Args:
+            conn: Обслуживающее подключение к БД
+            today: Дата расчёта (по умолчанию — сегодня)
+            prefetch: Сколько строк забирать с сервера за раз
+        
+        Returns:
+            Общая статистика
+        """
+        today = today or date.today()
+        overall = StatisticsTotals()
+        batch = []
+        
+        async with conn.transaction(isolation='repeatable_read'):
+            await self.statistics_repo.delete_for_date(today, conn)
+            
+            async for user_id, debts in self._iter_debtors(conn, today, prefetch):
+                totals = self.user_statistics(debts, today)
+                overall.add(totals)
+                batch.append((
+                    today, user_id, totals.debts, totals.payoff_progress, totals.installments_due,
+                    totals.installments_on_time, totals.avg_delay_days, totals.projected_completion,
+                ))
+                if len(batch) >= COPY_BATCH_SIZE:
+                    await self.statistics_repo.copy_user_statistics(batch, conn)
+                    batch = []
+            
+            if batch:
+                await self.statistics_repo.copy_user_statistics(batch, conn)
+            
+            await self.statistics_repo.save_global_statistics((
+                today, overall.users, overall.debts, overall.payoff_progress, overall.installments_due,
+                overall.installments_on_time, overall.avg_delay_days, overall.projected_completion,
+            ), conn)
+        
+        return overall
@@ -0,0 +1,81 @@
+"""
+Сервис сводок пользователей для главного меню.
+"""
+from datetime import date
+from typing import Iterable, Optional
+import asyncpg
+from models.user_summary import UserSummary
+from repositories.user_summary_repository import UserSummaryRepository
+
+# Сколько сводок пересчитывать за одну транзакцию полного пересчёта
+REBUILD_BATCH_SIZE = 1000
+
+
+class UserSummaryService:
+    """Сервис сводок: пересчёт в транзакциях изменений и чтение по ключу."""
+    
+    def __init__(self):
+        self.summary_repo = UserSummaryRepository()
+    
+    async def refresh(
+        self,
+        user_ids: Iterable[Optional[int]],
+        conn: asyncpg.Connection,
+        today: Optional[date] = None
+    ) -> None:
+        """
+        Пересчитывает сводки пользователей в транзакции вызывающего.
+        
+        Вызывается после изменения долга или платежей (и после пересчёта
+        плана) для должника и кредитора долга.
+        
+        Args:
+            user_ids: ID пользователей; None (долг без кредитора) пропускаются
+            conn: Подключение к БД с открытой транзакцией
+            today: Текущая дата (по умолчанию — сегодня)
+        """
+        await self.summary_repo.refresh(
+            [user_id for user_id in user_ids if user_id is not None],
+            today or date.today(),
+            conn
+        )
+    
+    async def get_summary(self, user_id: int) -> Optional[UserSummary]:
+        """
+        Получает сводку пользователя одним чтением по первичному ключу.
+        
+        Args:
+            user_id: ID пользователя
+        
+        Returns:
+            UserSummary или None, если сводка ещё не построена
+        """
+        return await self.summary_repo.get(user_id)
+    
+    async def rebuild_all(self, conn: asyncpg.Connection, today: Optional[date] = None) -> int:
+        """
+        Пересчитывает сводки всех пользователей пакетами.
+        
+        Каждый пакет — отдельная транзакция, чтобы не держать блокировки
+        сводок всех пользователей до конца пересчёта.
+        
+        Args:
+            conn: Обслуживающее подключение к БД
+            today: Текущая дата (по умолчанию — сегодня)
+        
+        Returns:
+            Количество пересчитанных сводок
+        """
+        today = today or date.today()
+        rebuilt = 0
+        last_id = 0
+        
+        while True:
+            user_ids = await self.summary_repo.get_user_ids_after(last_id, REBUILD_BATCH_SIZE, conn=conn)
+            if not user_ids:
+                return rebuilt
+            
+            async with conn.transaction():
+                await self.summary_repo.refresh(user_ids, today, conn)
+            rebuilt += len(user_ids)
+            last_id = user_ids[-1]
@@ -0,0 +1,135 @@
+"""
+Сервис сценариев «что если» для плана погашения долга.
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional
+from models.debt import Debt
+from services.amortization import InterestTerms
+from services.planner_service import PlannerService
+
+
+SCENARIO_CURRENT = 'current'
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Сценарий изменения платежей."""
+    key: str
+    title: str
+    extra_payment: Decimal = Decimal('0')  # Разовый дополнительный платёж вместе с ближайшим
+    monthly_payment: Optional[Decimal] = None  # Новый ежемесячный платёж (None — текущий)
+
+
+@dataclass
+class ScenarioResult:
+    """Итог плана погашения по сценарию и его отличие от текущего плана."""
+    scenario: Scenario
+    payoff_date: date
+    installments: int
+    final_payment: Decimal
+    months_delta: int  # Отрицательное — погашение раньше
+    installments_delta: int
+    final_payment_delta: Decimal
+    total_interest: Decimal = Decimal('0')  # Проценты за весь срок
+    interest_delta: Decimal = Decimal('0')
+
+
+def _months_between(start: date, end: date) -> int:
+    """Разница между месяцами дат."""
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def _round_amount(amount: Decimal) -> Decimal:
+    """Округляет сумму сценария до целых."""
+    return amount.quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+
+
+class WhatIfService:
+    """Сервис расчёта сценариев погашения поверх PlannerService."""
+    
+    def __init__(self):
+        self.planner_service = PlannerService()
+    
+    def default_scenarios(self, debt: Debt) -> List[Scenario]:
+        """
+        Возвращает типовые сценарии для долга: разовые доплаты и увеличение платежа.
+        
+        Args:
+            debt: Долг с заданным ежемесячным платежом
+        
+        Returns:
+            Список сценариев, первый — текущий план
+        """
+        monthly = debt.monthly_payment
+        return [
+            Scenario(SCENARIO_CURRENT, "Текущий план"),
+            Scenario('extra1', f"+{monthly:,.0f} в этом месяце", extra_payment=monthly),
+            Scenario('extra3', f"+{monthly * 3:,.0f} в этом месяце", extra_payment=monthly * 3),
+            Scenario('raise25', "Платёж +25%", monthly_payment=_round_amount(monthly * Decimal('1.25'))),
+            Scenario('raise50', "Платёж +50%", monthly_payment=_round_amount(monthly * Decimal('1.5'))),
+            Scenario('double', "Платёж ×2", monthly_payment=monthly * 2),
+        ]
+    
+    def evaluate(
+        self,
+        debt: Debt,
+        balance: Decimal,
+        scenarios: List[Scenario],
+        today: Optional[date] = None
+    ) -> Dict[str, ScenarioResult]:
+        """
+        Рассчитывает все сценарии за один вызов.
+        
+        Сценарий без процентов считается за постоянное время, с процентами —
+        проходом по графику в целых числах без сохранения платежей.
+        Отличия считаются от текущего плана долга.
+        
+        Args:
+            debt: Долг
+            balance: Текущий остаток
+            scenarios: Сценарии
+            today: Текущая дата (по умолчанию — сегодня)
+        
+        Returns:
+            Ключ сценария -> ScenarioResult, в порядке scenarios
+        
+        Raises:
+            ValueError: Если у долга нет ежемесячного платежа или дня платежа,
+                долг погашен, платёж в сценарии не больше нуля или не покрывает проценты
+        """
+        if debt.monthly_payment is None or debt.due_day is None:
+            raise ValueError("Для расчёта задайте ежемесячный платёж и день платежа")
+        if balance <= 0:
+            raise ValueError("Долг уже погашен")
+        
+        today = today or date.today()
+        terms = InterestTerms.from_debt(debt)
+        base_date, base_count, base_final, base_interest = self.planner_service.get_payoff_summary(
+            balance, debt.monthly_payment, debt.due_day, today=today, terms=terms
+        )
+        
+        results: Dict[str, ScenarioResult] = {}
+        for scenario in scenarios:
+            monthly = scenario.monthly_payment or debt.monthly_payment
+            if monthly <= 0 or scenario.extra_payment < 0:
+                raise ValueError("Платёж в сценарии должен быть больше нуля")
+            
+            payoff_date, count, final, interest = self.planner_service.get_payoff_summary(
+                balance, monthly, debt.due_day,
+                extra_payment=scenario.extra_payment, today=today, terms=terms
+            )
+            results[scenario.key] = ScenarioResult(
+                scenario=scenario,
+                payoff_date=payoff_date,
+                installments=count,
+                final_payment=final,
+                months_delta=_months_between(base_date, payoff_date),
+                installments_delta=count - base_count,
+                final_payment_delta=final - base_final,
+                total_interest=interest,
+                interest_delta=interest - base_interest,
+            )
+        
+        return results
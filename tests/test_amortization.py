@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the interest-bearing amortization engine.
+"""
+import time
+from decimal import Decimal
+from datetime import date, datetime, timezone
+
+from services.amortization import (
+    DAY_COUNT_30_360,
+    DAY_COUNT_ACTUAL_365,
+    DAY_COUNT_ACTUAL_ACTUAL,
+    SCHEDULE_ANNUITY,
+    SCHEDULE_DIFFERENTIATED,
+    InterestTerms,
+    accrue,
+    build_schedule,
+    iter_due_dates,
+    rate_units,
+    summarize,
+)
+from services.planner_service import PlannerService
+from models.debt import Debt
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+RATE_12 = rate_units(Decimal("12"))
+
+
+def make_debt(debt_id=1, interest_rate=None, amortization=SCHEDULE_ANNUITY):
+    """Build an active debt with a monthly plan."""
+    return Debt(
+        id=debt_id, debtor_user_id=100, creditor_user_id=None, name="Кредит",
+        principal_amount=Decimal("1000.00"), currency="RUB",
+        monthly_payment=Decimal("100.00"), due_day=15, status="active",
+        closed_at=None, close_note=None, created_at=NOW, updated_at=NOW,
+        interest_rate=interest_rate, amortization=amortization,
+    )
+
+
+def test_accrue_day_count_conventions():
+    """Interest depends on the day-count convention and is rounded to a kopeck."""
+    start, end = date(2024, 1, 15), date(2024, 2, 15)
+    
+    assert accrue(10_000_000, RATE_12, DAY_COUNT_30_360, start, end) == 100_000
+    assert accrue(10_000_000, RATE_12, DAY_COUNT_ACTUAL_365, start, end) == 101_918
+    # 17 days of 2023 over 365 plus 14 days of 2024 over 366
+    assert accrue(10_000_000, RATE_12, DAY_COUNT_ACTUAL_ACTUAL, date(2023, 12, 15), date(2024, 1, 15)) == 101_792
+
+
+def test_annuity_schedule_splits_interest_and_principal():
+    """A fixed payment covers interest first; the last payment is reduced."""
+    terms = InterestTerms(rate=RATE_12)
+    schedule = build_schedule(100_000, 10_000, terms, date(2024, 1, 15), iter_due_dates(date(2024, 2, 15), 15), 100)
+    
+    assert (schedule[0].interest, schedule[0].principal, schedule[0].balance) == (1_000, 9_000, 91_000)
+    assert all(item.payment == 10_000 for item in schedule[:-1])
+    assert schedule[-1].balance == 0 and schedule[-1].payment < 10_000
+    assert sum(item.principal for item in schedule) == 100_000
+    assert len(schedule) == 11
+
+
+def test_differentiated_schedule_adds_interest_on_top():
+    """The principal part is fixed and the payment decreases with the balance."""
+    terms = InterestTerms(rate=RATE_12, schedule=SCHEDULE_DIFFERENTIATED)
+    schedule = build_schedule(100_000, 10_000, terms, date(2024, 1, 15), iter_due_dates(date(2024, 2, 15), 15), 100)
+    
+    assert len(schedule) == 10
+    assert [item.payment for item in schedule[:2]] == [11_000, 10_900]
+    assert schedule[-1].payment == 10_100
+
+
+def test_summarize_detects_payment_below_interest():
+    """A payment that never covers interest does not pay the debt off."""
+    terms = InterestTerms(rate=RATE_12)
+    
+    assert summarize(10_000_000, 50_000, terms, date(2024, 1, 15), iter_due_dates(date(2024, 2, 15), 15), 360) is None
+
+
+def test_zero_interest_summary_is_unchanged():
+    """Debts without a rate keep the interest-free closed form."""
+    planner = PlannerService()
+    
+    summary = planner.get_payoff_summaries([(make_debt(), Decimal("1000.00"))], today=date(2024, 1, 10))
+    
+    assert summary[1] == (date(2024, 10, 15), 10, Decimal("100.00"), Decimal("0"))
+
+
+def test_batch_summaries_for_thousands_of_debts():
+    """The batch form covers thousands of interest-bearing debts quickly."""
+    debts = [(make_debt(i, interest_rate=Decimal("19.9")), Decimal("1000.00")) for i in range(1, 2001)]
+    
+    started = time.perf_counter()
+    summaries = PlannerService().get_payoff_summaries(debts, today=date(2024, 1, 10))
+    elapsed = time.perf_counter() - started
+    
+    assert len(summaries) == 2000
+    assert summaries[1][1] == 11 and summaries[1][3] > 0
+    assert elapsed < 2
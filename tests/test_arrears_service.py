@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for ArrearsService.
+"""
+import pytest
+from decimal import Decimal
+from datetime import date
+from unittest.mock import AsyncMock
+
+from models.arrears import OverdueInstallment
+from services.arrears_service import ArrearsService, group_by_debt, totals_by_currency
+
+
+def make_installment(debt_id: int, seq: int, due_date: date, missing: str, currency: str = "RUB") -> OverdueInstallment:
+    """Create overdue installment for testing."""
+    return OverdueInstallment(
+        debt_id=debt_id, debtor_user_id=100, creditor_user_id=200, debt_name=f"Долг {debt_id}",
+        currency=currency, seq=seq, due_date=due_date, amount=Decimal("1000.00"), missing=Decimal(missing),
+    )
+
+
+INSTALLMENTS = [
+    make_installment(1, 3, date(2024, 3, 15), "400.00"),
+    make_installment(1, 4, date(2024, 4, 15), "1000.00"),
+    make_installment(2, 1, date(2024, 2, 29), "1000.00", currency="USD"),
+    make_installment(3, 2, date(2024, 4, 1), "250.00"),
+]
+
+
+def test_group_by_debt_orders_by_oldest_arrears():
+    """Debts are grouped and the longest overdue comes first."""
+    arrears = group_by_debt(INSTALLMENTS)
+    
+    assert [item.debt_id for item in arrears] == [2, 1, 3]
+    assert arrears[1].total_missing == Decimal("1400.00")
+    assert arrears[1].oldest_due_date == date(2024, 3, 15)
+    assert arrears[1].days_overdue(date(2024, 4, 20)) == 36
+
+
+def test_totals_by_currency_keeps_currencies_apart():
+    """Totals never mix currencies."""
+    totals = totals_by_currency(group_by_debt(INSTALLMENTS))
+    
+    assert totals == {"RUB": Decimal("1650.00"), "USD": Decimal("1000.00")}
+
+
+@pytest.mark.asyncio
+async def test_get_arrears_uses_single_query():
+    """All debts of a creditor are checked with one repository call."""
+    service = ArrearsService()
+    service.arrears_repo = AsyncMock()
+    service.arrears_repo.get_overdue.return_value = INSTALLMENTS
+    
+    arrears = await service.get_arrears(date(2024, 4, 20), creditor_user_id=200)
+    
+    service.arrears_repo.get_overdue.assert_called_once_with(
+        date(2024, 4, 20), creditor_user_id=200, debtor_user_id=None
+    )
+    assert len(arrears) == 3
@@ -0,0 +1,30 @@
+"""
+Unit-тесты для AuditLogRepository (без подключения к БД).
+"""
+import re
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from repositories.audit_log_repository import AuditLogRepository
+
+
+@pytest.mark.asyncio
+async def test_create_binds_every_inserted_column():
+    """Тест: число колонок INSERT, плейсхолдеров VALUES и переданных аргументов совпадает."""
+    conn = AsyncMock()
+    conn.fetchrow.return_value = {
+        'id': 1, 'entity_type': 'debt', 'entity_id': 7, 'action': 'update', 'actor_user_id': 100,
+        'occurred_at': datetime.now(timezone.utc), 'before': None, 'after': '{"name": "x"}',
+        'debt_id': 7, 'payload_encoding': 'delta',
+    }
+
+    await AuditLogRepository().create(
+        'debt', 7, 'update', 100, after={'name': 'x'}, payload_encoding='delta', conn=conn
+    )
+
+    query, *args = conn.fetchrow.call_args.args
+    columns = re.search(r'INSERT INTO audit_log \(([^)]*)\)', query).group(1).split(',')
+    placeholders = re.search(r'VALUES \(([^)]*)\)', query).group(1).split(',')
+    assert len(columns) == len(placeholders) == len(args)
+    assert [p.strip() for p in placeholders] == [f'${i}' for i in range(1, len(args) + 1)]
+    assert args[-1] == 'delta'
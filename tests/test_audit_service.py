@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for audit history pagination.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.audit_service import AuditService, decode_cursor, encode_cursor
+from models.audit_log import AuditLog
+
+START = datetime(2024, 1, 15, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def make_entry(entry_id: int) -> AuditLog:
+    """Create audit entry for testing; larger id means newer."""
+    return AuditLog(
+        id=entry_id, entity_type="payment", entity_id=entry_id, action="create",
+        actor_user_id=100, occurred_at=START + timedelta(seconds=entry_id),
+        before=None, after={"amount": "100.00"}, debt_id=1,
+    )
+
+
+@pytest.fixture
+def audit_service():
+    """Create AuditService with mocked repositories."""
+    service = AuditService()
+    service.audit_repo = MagicMock()
+    service.debt_repo = MagicMock()
+    service.debt_repo.check_access = AsyncMock(return_value=True)
+    return service
+
+
+def test_cursor_round_trip():
+    """Test cursor keeps microseconds and id."""
+    entry = make_entry(7)
+    assert decode_cursor(encode_cursor(entry)) == (entry.occurred_at, 7)
+    with pytest.raises(ValueError):
+        decode_cursor("garbage")
+
+
+@pytest.mark.asyncio
+async def test_debt_history_pages(audit_service):
+    """Test page size, next cursor and keyset continuation."""
+    entries = [make_entry(i) for i in range(5, 0, -1)]
+    audit_service.audit_repo.get_debt_history = AsyncMock(return_value=entries[:3])
+
+    page = await audit_service.get_debt_history(1, 100, limit=2)
+
+    assert [e.id for e in page.entries] == [5, 4]
+    assert page.next_cursor == encode_cursor(entries[1])
+    audit_service.audit_repo.get_debt_history.assert_called_with(1, None, 3)
+
+    audit_service.audit_repo.get_debt_history = AsyncMock(return_value=entries[2:])
+    page = await audit_service.get_debt_history(1, 100, cursor=page.next_cursor, limit=3)
+
+    assert [e.id for e in page.entries] == [3, 2, 1]
+    assert page.next_cursor is None
+    audit_service.audit_repo.get_debt_history.assert_called_with(1, (entries[1].occurred_at, 4), 4)
+
+
+@pytest.mark.asyncio
+async def test_debt_history_requires_access(audit_service):
+    """Test history is hidden from users without access to the debt."""
+    audit_service.debt_repo.check_access = AsyncMock(return_value=False)
+    audit_service.audit_repo.get_debt_history = AsyncMock()
+
+    with pytest.raises(PermissionError):
+        await audit_service.get_debt_history(1, 999)
+
+    audit_service.audit_repo.get_debt_history.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_repository_uses_keyset_condition():
+    """Test repository pages by (occurred_at, id) instead of OFFSET."""
+    from repositories.audit_log_repository import AuditLogRepository
+
+    conn = AsyncMock()
+    conn.fetch = AsyncMock(return_value=[])
+    pool = AsyncMock()
+    pool.acquire = AsyncMock(return_value=conn)
+
+    with patch('repositories.audit_log_repository.Database.get_read_pool', AsyncMock(return_value=pool)):
+        await AuditLogRepository().get_debt_history(1, before=(START, 9), limit=11)
+
+    query, *args = conn.fetch.call_args.args
+    assert "(occurred_at, id) < ($2, $3)" in query
+    assert "OFFSET" not in query
+    assert args == [1, START, 9, 11]
+
+
+def make_event(entry_id: int, action: str, encoding: str, after: dict, before: dict = None) -> AuditLog:
+    """Create debt audit event for reconstruction tests."""
+    return AuditLog(
+        id=entry_id, entity_type="debt", entity_id=1, action=action,
+        actor_user_id=100, occurred_at=START + timedelta(seconds=entry_id),
+        before=before, after=after, debt_id=1, payload_encoding=encoding,
+    )
+
+
+def test_patch_and_replay():
+    """Test delta patches rebuild every intermediate state."""
+    from services.audit_encoding import make_patch, replay
+
+    assert make_patch({"a": "1", "b": "2"}, {"a": "1", "b": "3"}) == {"b": "3"}
+    assert make_patch({"a": "1"}, {"a": None}) == {"a": None}
+
+    chain = [
+        make_event(1, "create", "snapshot", {"monthly_payment": "1000", "due_day": 15}),
+        make_event(2, "update", "delta", {"due_day": 20}),
+        make_event(3, "update", "delta", {"monthly_payment": None}),
+    ]
+    views = [(before, after) for _, before, after in replay(chain)]
+
+    assert views[1] == ({"monthly_payment": "1000", "due_day": 15}, {"monthly_payment": "1000", "due_day": 20})
+    assert views[2][1] == {"due_day": 20}
+
+
+@pytest.mark.asyncio
+async def test_update_is_stored_as_delta(audit_service):
+    """Test updates store only changed keys while a snapshot is recent."""
+    now = datetime.now(timezone.utc)
+    base = make_event(1, "create", "snapshot", {"monthly_payment": "1000", "due_day": 15})
+    base.occurred_at = now
+    audit_service.audit_repo.get_chain = AsyncMock(return_value=[base])
+    audit_service.audit_repo.create = AsyncMock()
+
+    with patch('services.audit_service.config.AUDIT_ENCODING', 'delta'):
+        await audit_service.log_update(
+            'debt', 1, 100,
+            before={"monthly_payment": "1000", "due_day": 15},
+            after={"monthly_payment": "1000", "due_day": 20},
+        )
+
+    kwargs = audit_service.audit_repo.create.call_args.kwargs
+    assert kwargs['payload_encoding'] == 'delta'
+    assert kwargs['after'] == {"due_day": 20}
+    assert kwargs['before'] is None
+
+
+@pytest.mark.asyncio
+async def test_snapshot_written_after_interval(audit_service):
+    """Test a full snapshot replaces the delta once the chain is long enough."""
+    now = datetime.now(timezone.utc)
+    chain = [make_event(1, "create", "snapshot", {"monthly_payment": "1000", "due_day": 15})]
+    chain += [make_event(i, "update", "delta", {"due_day": i}) for i in range(2, 5)]
+    for event in chain:
+        event.occurred_at = now
+    audit_service.audit_repo.get_chain = AsyncMock(return_value=chain)
+    audit_service.audit_repo.create = AsyncMock()
+
+    with patch('services.audit_service.config.AUDIT_ENCODING', 'delta'), \
+         patch('services.audit_service.config.AUDIT_SNAPSHOT_INTERVAL', 4):
+        await audit_service.log_update('debt', 1, 100, before={"due_day": 4}, after={"due_day": 5})
+
+    kwargs = audit_service.audit_repo.create.call_args.kwargs
+    assert kwargs['payload_encoding'] == 'snapshot'
+    assert kwargs['after'] == {"monthly_payment": "1000", "due_day": 5}
+
+
+@pytest.mark.asyncio
+async def test_history_page_expands_deltas(audit_service):
+    """Test history pages show full before/after for delta entries."""
+    chain = [
+        make_event(1, "create", "snapshot", {"monthly_payment": "1000", "due_day": 15}),
+        make_event(2, "update", "delta", {"due_day": 20}),
+    ]
+    page_entry = make_event(2, "update", "delta", {"due_day": 20})
+    audit_service.audit_repo.get_debt_history = AsyncMock(return_value=[page_entry])
+    audit_service.audit_repo.get_chain = AsyncMock(return_value=chain)
+
+    page = await audit_service.get_debt_history(1, 100)
+
+    assert page.entries[0].before == {"monthly_payment": "1000", "due_day": 15}
+    assert page.entries[0].after == {"monthly_payment": "1000", "due_day": 20}
+
+
+@pytest.mark.asyncio
+async def test_import_event_stays_out_of_reconstructed_state(audit_service):
+    """Test event-only keys of an import entry are kept in history but not in the debt state."""
+    now = datetime.now(timezone.utc)
+    base = make_event(1, "create", "snapshot", {"id": 1, "monthly_payment": "1000", "due_day": 15})
+    base.occurred_at = now
+    audit_service.audit_repo.get_chain = AsyncMock(return_value=[base])
+    audit_service.audit_repo.create = AsyncMock()
+    imported = {
+        "id": 1, "imported_payments": 3, "imported_total": "3000.00",
+        "source": "ofx", "filename": "statement.ofx",
+    }
+
+    with patch('services.audit_service.config.AUDIT_ENCODING', 'delta'):
+        await audit_service.log_update('debt', 1, 100, before={"id": 1}, after=imported)
+
+    kwargs = audit_service.audit_repo.create.call_args.kwargs
+    assert kwargs['payload_encoding'] == 'full'
+    assert kwargs['after'] == imported
+
+    chain = [
+        base,
+        make_event(2, "update", "full", imported, before={"id": 1}),
+        make_event(3, "update", "delta", {"due_day": 20}),
+    ]
+    audit_service.audit_repo.get_chain = AsyncMock(return_value=chain)
+
+    state = await audit_service.reconstruct('debt', 1)
+
+    assert state == {"id": 1, "monthly_payment": "1000", "due_day": 20}
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for BalanceService.
+"""
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock
+
+from services.balance_service import BalanceService, PaymentHistoryIndex
+from models.debt import Debt
+
+CREATED = datetime(2024, 1, 10, 12, 0, tzinfo=timezone.utc)
+
+DEBT = Debt(
+    id=1, debtor_user_id=100, creditor_user_id=200, name="Кредит",
+    principal_amount=Decimal("10000.00"), currency="RUB",
+    monthly_payment=Decimal("1000.00"), due_day=15, status="active",
+    closed_at=None, close_note=None, created_at=CREATED, updated_at=CREATED,
+)
+
+# 1000 paid on 15.01, 2000 on 15.02, the first payment deleted on 01.03
+HISTORY = {
+    1: [
+        (date(2024, 1, 15), Decimal("1000.00")),
+        (date(2024, 2, 15), Decimal("3000.00")),
+        (date(2024, 3, 1), Decimal("2000.00")),
+    ]
+}
+
+
+@pytest.fixture
+def balance_service():
+    """Create BalanceService with mocked dependencies."""
+    service = BalanceService()
+    service.debt_repo = AsyncMock()
+    service.payment_repo = AsyncMock()
+    service.audit_service = AsyncMock()
+    service.payment_repo.get_paid_history.return_value = HISTORY
+    return service
+
+
+def test_paid_as_of_uses_last_step_on_or_before_day():
+    """Paid amount is the cumulative sum of the latest step not after the day."""
+    index = PaymentHistoryIndex(HISTORY)
+    
+    assert index.paid_as_of(1, date(2024, 1, 14)) == Decimal("0")
+    assert index.paid_as_of(1, date(2024, 1, 15)) == Decimal("1000.00")
+    assert index.paid_as_of(1, date(2024, 2, 20)) == Decimal("3000.00")
+    assert index.paid_as_of(1, date(2024, 3, 1)) == Decimal("2000.00")
+    assert index.paid_as_of(2, date(2024, 3, 1)) == Decimal("0")
+
+
+@pytest.mark.asyncio
+async def test_balances_as_of_none_before_creation(balance_service):
+    """Days before the debt existed have no balance."""
+    days = [date(2024, 1, 1), date(2024, 2, 20)]
+    
+    balances = await balance_service.get_balances_as_of([DEBT], days)
+    
+    assert balances[(1, date(2024, 1, 1))] is None
+    assert balances[(1, date(2024, 2, 20))] == Decimal("7000.00")
+    balance_service.payment_repo.get_paid_history.assert_called_once_with([1])
+
+
+@pytest.mark.asyncio
+async def test_get_debt_as_of_reconstructs_terms(balance_service):
+    """Terms come from the audit log state at the end of the day."""
+    balance_service.debt_repo.check_access.return_value = True
+    balance_service.debt_repo.get_by_id.return_value = DEBT
+    balance_service.audit_service.reconstruct.return_value = {"monthly_payment": "500.00", "due_day": 10}
+    
+    state = await balance_service.get_debt_as_of(1, 100, date(2024, 3, 5))
+    
+    assert state.balance == Decimal("8000.00")
+    assert state.paid == Decimal("2000.00")
+    assert state.terms["due_day"] == 10
+    entity_type, entity_id = balance_service.audit_service.reconstruct.call_args.args
+    assert (entity_type, entity_id) == ("debt", 1)
+
+
+@pytest.mark.asyncio
+async def test_get_debt_as_of_checks_access(balance_service):
+    """Users without access to the debt are rejected."""
+    balance_service.debt_repo.check_access.return_value = False
+    
+    with pytest.raises(PermissionError):
+        await balance_service.get_debt_as_of(1, 300, date(2024, 3, 5))
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the monthly cash-flow calendar.
+"""
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock
+
+from models.debt import Debt
+from services.cashflow_service import CashflowService, build_calendar, calendar_cache_key
+from services.planner_service import PlannerService
+
+CREATED = datetime(2024, 1, 10, 12, 0, tzinfo=timezone.utc)
+TODAY = date(2024, 1, 20)
+
+
+def make_debt(debt_id: int, monthly: str, due_day: int, currency: str = "RUB", **overrides) -> Debt:
+    """Create debt for testing."""
+    data = dict(
+        id=debt_id, debtor_user_id=100, creditor_user_id=200, name=f"Долг {debt_id}",
+        principal_amount=Decimal("100000.00"), currency=currency,
+        monthly_payment=Decimal(monthly), due_day=due_day, status="active",
+        closed_at=None, close_note=None, created_at=CREATED, updated_at=CREATED,
+    )
+    data.update(overrides)
+    return Debt(**data)
+
+
+def test_merge_payment_plans_orders_all_debts_by_date():
+    """Plans of several debts come out as one date-ordered stream."""
+    debts = [
+        (make_debt(1, "1000.00", 25), Decimal("2500.00")),
+        (make_debt(2, "300.00", 5, currency="USD"), Decimal("600.00")),
+    ]
+    
+    merged = list(PlannerService().merge_payment_plans(debts, TODAY))
+    
+    assert [(debt.id, item.payment_date) for debt, item in merged] == [
+        (1, date(2024, 1, 25)),
+        (2, date(2024, 2, 5)),
+        (1, date(2024, 2, 25)),
+        (2, date(2024, 3, 5)),
+        (1, date(2024, 3, 25)),
+    ]
+    assert merged[-1][1].amount == Decimal("500.00")
+
+
+def test_calendar_keeps_currencies_apart_and_respects_horizon():
+    """Monthly totals are per currency and the stream is cut at the horizon."""
+    debts = [
+        (make_debt(1, "1000.00", 25), Decimal("2500.00")),
+        (make_debt(2, "300.00", 5, currency="USD"), Decimal("600.00")),
+        # Payment below the interest: the plan never ends
+        (make_debt(3, "10.00", 1, interest_rate=Decimal("20")), Decimal("100000.00")),
+    ]
+    
+    calendar = build_calendar(PlannerService().merge_payment_plans(debts, TODAY), date(2024, 3, 1))
+    
+    assert [month.month for month in calendar] == [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+    assert calendar[0].totals == {"RUB": Decimal("1000.00")}
+    assert calendar[1].totals == {"RUB": Decimal("1010.00"), "USD": Decimal("300.00")}
+    assert calendar[2].payments == 3
+
+
+@pytest.mark.asyncio
+async def test_get_calendar_reads_balances_once():
+    """All balances come from one portfolio read, not a balance call per debt."""
+    service = CashflowService()
+    service.portfolio_service = AsyncMock()
+    service.portfolio_service.get_active_debts.return_value = [
+        (make_debt(1, "1000.00", 25), Decimal("2500.00")),
+    ]
+    
+    calendar = await service.get_calendar(100, today=TODAY, months=2)
+    
+    service.portfolio_service.get_active_debts.assert_called_once_with(100)
+    assert [month.month for month in calendar] == [date(2024, 1, 1), date(2024, 2, 1)]
+
+
+def test_calendar_cache_key_follows_versions_and_balances():
+    """Cached calendar pages are dropped when terms, balance or the day change."""
+    debts = [(make_debt(1, "1000.00", 25), Decimal("2500.00"))]
+    key = calendar_cache_key(debts, TODAY)
+    
+    assert calendar_cache_key([(make_debt(1, "1000.00", 25), Decimal("2500.00"))], TODAY) == key
+    assert calendar_cache_key([(make_debt(1, "1000.00", 25, version=2), Decimal("2500.00"))], TODAY) != key
+    assert calendar_cache_key([(make_debt(1, "1000.00", 25), Decimal("1500.00"))], TODAY) != key
+    assert calendar_cache_key(debts, date(2024, 1, 21)) != key
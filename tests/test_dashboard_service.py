@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for DashboardService.
+"""
+import pytest
+from decimal import Decimal
+from datetime import date
+from unittest.mock import AsyncMock
+
+from services import dashboard_service
+from services.dashboard_service import DashboardService, invalidate_creditor_dashboard
+
+TODAY = date(2024, 3, 20)
+
+ROWS = [
+    {
+        'currency': 'RUB', 'debts': 2, 'outstanding': Decimal("15000.00"),
+        'expected_this_month': Decimal("3000.00"), 'paid_this_month': Decimal("1000.00"),
+    },
+]
+
+
+@pytest.fixture
+def service():
+    """Create DashboardService with mocked repositories and an empty cache."""
+    dashboard_service._dashboards.clear()
+    dashboard_service._generations.clear()
+    service = DashboardService()
+    service.dashboard_repo = AsyncMock()
+    service.dashboard_repo.get_creditor_totals.return_value = ROWS
+    service.arrears_repo = AsyncMock()
+    service.arrears_repo.get_overdue.return_value = []
+    return service
+
+
+@pytest.mark.asyncio
+async def test_dashboard_is_cached_until_invalidated(service):
+    """Repeated reads hit the cache; a payment write forces a recomputation."""
+    first = await service.get_creditor_dashboard(200, today=TODAY)
+    second = await service.get_creditor_dashboard(200, today=TODAY)
+    
+    assert second is first
+    assert first.totals[0].outstanding == Decimal("15000.00")
+    service.dashboard_repo.get_creditor_totals.assert_called_once()
+    
+    invalidate_creditor_dashboard(200)
+    await service.get_creditor_dashboard(200, today=TODAY)
+    
+    assert service.dashboard_repo.get_creditor_totals.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_dashboard_computed_during_write_is_not_cached(service):
+    """A result that raced with an invalidation is returned but not cached."""
+    async def totals(creditor_user_id, today):
+        invalidate_creditor_dashboard(creditor_user_id)
+        return ROWS
+    
+    service.dashboard_repo.get_creditor_totals.side_effect = totals
+    
+    await service.get_creditor_dashboard(200, today=TODAY)
+    
+    assert 200 not in dashboard_service._dashboards
+
+
+@pytest.mark.asyncio
+async def test_dashboard_not_reused_on_next_day(service):
+    """Month-relative totals are recomputed when the day changes."""
+    await service.get_creditor_dashboard(200, today=TODAY)
+    await service.get_creditor_dashboard(200, today=date(2024, 4, 1))
+    
+    assert service.dashboard_repo.get_creditor_totals.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_dashboard_converts_mixed_currencies(service):
+    """With debts in several currencies the dashboard also carries a total in the base currency."""
+    service.dashboard_repo.get_creditor_totals.return_value = ROWS + [
+        {
+            'currency': 'USD', 'debts': 1, 'outstanding': Decimal("100.00"),
+            'expected_this_month': Decimal("0.00"), 'paid_this_month': Decimal("0.00"),
+        },
+    ]
+    service.fx_service = AsyncMock()
+    
+    dashboard = await service.get_creditor_dashboard(200, today=TODAY)
+    
+    assert dashboard.outstanding_total is service.fx_service.convert_totals.return_value
+    service.fx_service.convert_totals.assert_called_once_with(
+        {'RUB': Decimal("15000.00"), 'USD': Decimal("100.00")}, on_date=TODAY
+    )
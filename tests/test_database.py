@@ -0,0 +1,258 @@
+"""
+Unit-тесты для слоя Database (без подключения к БД).
+"""
+import asyncio
+import itertools
+import asyncpg
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from database import (
+    Database,
+    GuardedPool,
+    PoolOverloadedError,
+    QueryClass,
+    QueryTimeoutError,
+    RetryBudget,
+    _translate_timeouts,
+)
+from metrics import metrics
+
+
+@pytest.fixture
+def pools():
+    """Фикстура: primary и две реплики вместо настоящих пулов."""
+    primary = MagicMock(name='primary')
+    replicas = [MagicMock(name='replica1'), MagicMock(name='replica2')]
+
+    Database._pool = primary
+    Database._replica_pools = replicas
+    Database._replica_cycle = itertools.cycle(replicas)
+    Database._recent_writes = {}
+    yield primary, replicas
+
+    Database._pool = None
+    Database._replica_pools = []
+    Database._replica_cycle = None
+    Database._recent_writes = {}
+
+
+@pytest.mark.asyncio
+async def test_read_pool_without_replicas_is_primary():
+    """Тест: без реплик чтения идут на primary."""
+    primary = MagicMock(name='primary')
+    Database._pool = primary
+    try:
+        assert await Database.get_read_pool() is primary
+    finally:
+        Database._pool = None
+
+
+@pytest.mark.asyncio
+async def test_reads_are_spread_across_replicas(pools):
+    """Тест: чтения распределяются по репликам по кругу."""
+    primary, replicas = pools
+
+    assert await Database.get_read_pool() is replicas[0]
+    assert await Database.get_read_pool() is replicas[1]
+    assert await Database.get_read_pool() is replicas[0]
+    assert await Database.get_pool() is primary
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_for_same_user(pools):
+    """Тест: после записи чтения того же пользователя идут на primary."""
+    primary, replicas = pools
+
+    token = Database.set_actor(42)
+    try:
+        Database.mark_write()
+        assert await Database.get_read_pool() is primary
+    finally:
+        Database.reset_actor(token)
+
+    # Другой пользователь продолжает читать с реплик
+    token = Database.set_actor(7)
+    try:
+        assert await Database.get_read_pool() in replicas
+    finally:
+        Database.reset_actor(token)
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_expires(pools, monkeypatch):
+    """Тест: по истечении окна чтения снова идут на реплики."""
+    primary, replicas = pools
+    monkeypatch.setattr('database.config.DB_REPLICA_STICKY_SECONDS', 0)
+
+    token = Database.set_actor(42)
+    try:
+        Database.mark_write()
+        assert await Database.get_read_pool() in replicas
+    finally:
+        Database.reset_actor(token)
+
+
+@pytest.fixture
+def raw_pool():
+    """Фикстура: asyncpg-пул с подключением-заглушкой."""
+    pool = MagicMock()
+    pool.acquire = AsyncMock(return_value=MagicMock(name='conn'))
+    pool.release = AsyncMock()
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_guarded_pool_tracks_in_use(raw_pool):
+    """Тест: пул учитывает выданные подключения."""
+    pool = GuardedPool(raw_pool, name='test', acquire_timeout=1, max_waiters=10)
+
+    conn = await pool.acquire()
+    assert pool.in_use == 1
+    await pool.release(conn)
+    assert pool.in_use == 0
+
+    async with pool.acquire() as conn:
+        assert pool.in_use == 1
+    assert pool.in_use == 0
+    raw_pool.acquire.assert_called_with(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_guarded_pool_sheds_when_queue_full(raw_pool):
+    """Тест: при заполненной очереди ожидания запрос сразу отклоняется."""
+    pool = GuardedPool(raw_pool, name='test', acquire_timeout=1, max_waiters=0)
+
+    with pytest.raises(PoolOverloadedError):
+        await pool.acquire()
+    raw_pool.acquire.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_guarded_pool_acquire_timeout(raw_pool):
+    """Тест: таймаут ожидания подключения превращается в PoolOverloadedError."""
+    raw_pool.acquire = AsyncMock(side_effect=asyncio.TimeoutError)
+    pool = GuardedPool(raw_pool, name='test', acquire_timeout=0.01, max_waiters=10)
+
+    with pytest.raises(PoolOverloadedError):
+        await pool.acquire()
+    assert pool.waiters == 0
+    assert pool.in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_leak_check_reports_long_held_connection(raw_pool):
+    """Тест: подключение, удерживаемое дольше порога, считается утечкой."""
+    conn = MagicMock(name='conn')
+    conn.is_closed = MagicMock(return_value=False)
+    raw_pool.acquire = AsyncMock(return_value=conn)
+    pool = GuardedPool(raw_pool, name='test', acquire_timeout=1, max_waiters=10)
+
+    await pool.acquire()
+    assert pool.check_leaks(threshold=3600) == 0
+    assert pool.check_leaks(threshold=0) == 1
+
+    await pool.release(conn)
+    assert pool.check_leaks(threshold=0) == 0
+
+
+@pytest.mark.asyncio
+async def test_leak_check_untracks_closed_unreleased_connection(raw_pool):
+    """Тест: закрытое, но не возвращённое подключение снимается с учёта."""
+    raw_conn = MagicMock(spec=asyncpg.connection.Connection)
+    conn = asyncpg.pool.PoolConnectionProxy(MagicMock(name='holder'), raw_conn)
+    raw_pool.acquire = AsyncMock(return_value=conn)
+    pool = GuardedPool(raw_pool, name='test', acquire_timeout=1, max_waiters=10)
+
+    await pool.acquire()
+    assert pool.in_use == 1
+    # Так asyncpg отсоединяет прокси при close() подключения из пула
+    conn._detach()
+    with pytest.raises(asyncpg.InterfaceError):
+        conn.is_closed()
+    pool.check_leaks(threshold=3600)
+    assert pool.in_use == 0
+    assert metrics.snapshot()['counters']['db.pool.test.leaks.closed_unreleased'] >= 1
+
+
+def test_query_cancel_becomes_query_timeout_error():
+    """Тест: отмена запроса по statement_timeout превращается в QueryTimeoutError."""
+    with pytest.raises(QueryTimeoutError):
+        with _translate_timeouts():
+            raise asyncpg.exceptions.QueryCanceledError("canceling statement due to statement timeout")
+
+    with pytest.raises(QueryTimeoutError):
+        with _translate_timeouts():
+            raise asyncio.TimeoutError()
+
+
+@pytest.mark.asyncio
+async def test_apply_timeout_sets_local_statement_timeout(monkeypatch):
+    """Тест: для транзакции записи устанавливается SET LOCAL statement_timeout."""
+    monkeypatch.setattr('database.config.DB_WRITE_TIMEOUT', 2.5)
+    conn = AsyncMock()
+
+    await Database.apply_timeout(conn, QueryClass.WRITE)
+
+    conn.execute.assert_called_once_with("SET LOCAL statement_timeout = 2500")
+
+
+@pytest.fixture
+def tx_pool(monkeypatch):
+    """Фикстура: primary-пул для run_transaction без задержек между повторами."""
+    conn = MagicMock(name='conn')
+    conn.execute = AsyncMock()
+    pool = MagicMock()
+    pool.acquire = AsyncMock(return_value=conn)
+    pool.release = AsyncMock()
+    monkeypatch.setattr(Database, '_pool', pool)
+    monkeypatch.setattr('database.config.DB_TX_RETRY_BASE_DELAY', 0)
+    monkeypatch.setattr(Database, '_retry_budget', RetryBudget(ratio=0.1, max_tokens=10))
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_run_transaction_retries_serialization_failure(tx_pool):
+    """Тест: конфликт сериализации приводит к повтору транзакции на новом подключении."""
+    body = AsyncMock(side_effect=[asyncpg.exceptions.SerializationError("conflict"), 'done'])
+
+    result = await Database.run_transaction(body, isolation='serializable')
+
+    assert result == 'done'
+    assert body.call_count == 2
+    assert tx_pool.acquire.call_count == tx_pool.release.call_count == 2
+    tx_pool.acquire.return_value.transaction.assert_called_with(isolation='serializable')
+
+
+@pytest.mark.asyncio
+async def test_run_transaction_gives_up_after_max_retries(tx_pool, monkeypatch):
+    """Тест: после DB_TX_MAX_RETRIES повторов ошибка пробрасывается."""
+    monkeypatch.setattr('database.config.DB_TX_MAX_RETRIES', 2)
+    body = AsyncMock(side_effect=asyncpg.exceptions.DeadlockDetectedError("deadlock"))
+
+    with pytest.raises(asyncpg.exceptions.DeadlockDetectedError):
+        await Database.run_transaction(body)
+
+    assert body.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_run_transaction_does_not_retry_other_errors(tx_pool):
+    """Тест: прикладные ошибки не повторяются."""
+    body = AsyncMock(side_effect=ValueError("Долг не найден"))
+
+    with pytest.raises(ValueError):
+        await Database.run_transaction(body)
+
+    assert body.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_run_transaction_respects_retry_budget(tx_pool, monkeypatch):
+    """Тест: при исчерпанном бюджете повторов ошибка пробрасывается сразу."""
+    monkeypatch.setattr(Database, '_retry_budget', RetryBudget(ratio=0.1, max_tokens=0))
+    body = AsyncMock(side_effect=asyncpg.exceptions.SerializationError("conflict"))
+
+    with pytest.raises(asyncpg.exceptions.SerializationError):
+        await Database.run_transaction(body)
+
+    assert body.call_count == 1
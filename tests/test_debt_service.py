@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for DebtService.
+"""
+import pytest
+from decimal import Decimal
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.debt_service import DebtService
+from models.debt import Debt
+from repositories.debt_repository import DebtVersionConflictError, VERSION_CONFLICT_RETRIES
+
+
+@pytest.fixture
+def debt_service():
+    """Create DebtService instance."""
+    return DebtService()
+
+
+def make_debt(version: int = 1, **overrides) -> Debt:
+    """Create debt for testing."""
+    fields = dict(
+        id=1,
+        debtor_user_id=100,
+        creditor_user_id=None,
+        name="Test Debt",
+        principal_amount=Decimal("10000.00"),
+        currency="RUB",
+        monthly_payment=Decimal("1000.00"),
+        due_day=15,
+        status="active",
+        closed_at=None,
+        close_note=None,
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+        version=version,
+    )
+    fields.update(overrides)
+    return Debt(**fields)
+
+
+@pytest.fixture
+def mock_pool():
+    """Mock database pool with a transactional connection."""
+    mock_conn = AsyncMock()
+    mock_conn.transaction = MagicMock()
+    pool = AsyncMock()
+    pool.acquire = AsyncMock(return_value=mock_conn)
+    pool.release = AsyncMock()
+    return pool
+
+
+def test_cache_key_changes_with_version():
+    """Test cache key follows the debt version."""
+    assert make_debt(version=1).cache_key != make_debt(version=2).cache_key
+
+
+class TestUpdateDebtConditions:
+    """Tests for optimistic concurrency in update_debt_conditions."""
+
+    @pytest.mark.asyncio
+    async def test_retries_on_version_conflict(self, debt_service, mock_pool):
+        """Test conflicting update is re-applied on top of the fresh version."""
+        updated = make_debt(version=3, due_day=20)
+        debt_service.debt_repo.check_access = AsyncMock(return_value=True)
+        debt_service.debt_repo.get_by_id = AsyncMock(return_value=make_debt(version=1))
+        debt_service.debt_repo.get_fresh = AsyncMock(return_value=make_debt(version=2))
+        debt_service.debt_repo.update = AsyncMock(side_effect=[DebtVersionConflictError(), updated])
+        debt_service.audit_service.log_update = AsyncMock()
+        debt_service.plan_service.refresh = AsyncMock()
+
+        with patch('services.debt_service.Database.get_pool', return_value=mock_pool):
+            result = await debt_service.update_debt_conditions(debt_id=1, user_id=100, due_day=20)
+
+        assert result == updated
+        versions = [c.kwargs['expected_version'] for c in debt_service.debt_repo.update.call_args_list]
+        assert versions == [1, 2]
+        debt_service.audit_service.log_update.assert_called_once()
+        debt_service.plan_service.refresh.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_retries(self, debt_service, mock_pool):
+        """Test persistent conflicts surface as DebtVersionConflictError."""
+        debt_service.debt_repo.check_access = AsyncMock(return_value=True)
+        debt_service.debt_repo.get_by_id = AsyncMock(return_value=make_debt())
+        debt_service.debt_repo.get_fresh = AsyncMock(return_value=make_debt())
+        debt_service.debt_repo.update = AsyncMock(side_effect=DebtVersionConflictError())
+
+        with patch('services.debt_service.Database.get_pool', return_value=mock_pool):
+            with pytest.raises(DebtVersionConflictError):
+                await debt_service.update_debt_conditions(debt_id=1, user_id=100, due_day=20)
+
+        assert debt_service.debt_repo.update.call_count == VERSION_CONFLICT_RETRIES + 1
+
+    @pytest.mark.asyncio
+    async def test_stops_when_debt_closed_concurrently(self, debt_service, mock_pool):
+        """Test conflict caused by closing the debt is not retried."""
+        debt_service.debt_repo.check_access = AsyncMock(return_value=True)
+        debt_service.debt_repo.get_by_id = AsyncMock(return_value=make_debt())
+        debt_service.debt_repo.get_fresh = AsyncMock(return_value=make_debt(version=2, status='closed'))
+        debt_service.debt_repo.update = AsyncMock(side_effect=DebtVersionConflictError())
+
+        with patch('services.debt_service.Database.get_pool', return_value=mock_pool):
+            with pytest.raises(ValueError, match="Нельзя изменять закрытый долг"):
+                await debt_service.update_debt_conditions(debt_id=1, user_id=100, due_day=20)
+
+        assert debt_service.debt_repo.update.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_create_debt_succeeds(debt_service):
+    """Test a debt is created with the plan and summaries refreshed in the same transaction."""
+    created = make_debt()
+    debt_service.debt_repo.create = AsyncMock(return_value=created)
+    debt_service.audit_service.log_create = AsyncMock()
+    debt_service.plan_service.refresh = AsyncMock()
+    debt_service.summary_service.refresh = AsyncMock()
+
+    async def run_transaction(body, name):
+        return await body(AsyncMock())
+
+    with patch('services.debt_service.Database.run_transaction', side_effect=run_transaction):
+        result = await debt_service.create_debt(100, None, "x", Decimal("100"))
+
+    assert result == created
+    debt_service.plan_service.refresh.assert_called_once()
+    debt_service.summary_service.refresh.assert_called_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("changes, message", [
+    ({'interest_rate': Decimal("-1")}, "Ставка"),
+    ({'amortization': 'balloon'}, "Тип графика"),
+])
+async def test_update_conditions_rejects_bad_interest_terms(debt_service, changes, message):
+    """Test negative rates and unknown schedules are rejected before anything is saved."""
+    debt_service.debt_repo.check_access = AsyncMock(return_value=True)
+    debt_service.debt_repo.get_by_id = AsyncMock(return_value=make_debt())
+    debt_service.debt_repo.update = AsyncMock()
+
+    with pytest.raises(ValueError, match=message):
+        await debt_service.update_debt_conditions(debt_id=1, user_id=100, **changes)
+
+    debt_service.debt_repo.update.assert_not_called()
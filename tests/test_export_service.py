@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for ExportService.
+"""
+import csv
+import io
+import json
+import zipfile
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.export_service import ExportService, FORMAT_CSV, FORMAT_JSONL
+from models.audit_log import AuditLog
+from models.debt import Debt
+from models.payment import Payment
+
+NOW = datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc)
+
+DEBT = Debt(
+    id=1, debtor_user_id=100, creditor_user_id=200, name="Кредит",
+    principal_amount=Decimal("10000.00"), currency="RUB",
+    monthly_payment=Decimal("1000.00"), due_day=15, status="active",
+    closed_at=None, close_note=None, created_at=NOW, updated_at=NOW,
+)
+PAYMENT = Payment(
+    id=10, debt_id=1, amount=Decimal("1000.00"), payment_date=date(2024, 1, 15),
+    deleted_at=None, created_at=NOW, updated_at=NOW,
+)
+AUDIT = AuditLog(
+    id=5, entity_type="payment", entity_id=10, action="create",
+    actor_user_id=100, occurred_at=NOW, before=None, after={"amount": "1000.00"},
+)
+
+
+def stream(*items):
+    """Return a repository iter_by_user replacement yielding items."""
+    async def iterate(user_id, conn, prefetch):
+        for item in items:
+            yield item
+    return iterate
+
+
+@pytest.fixture
+def export_service():
+    """Create ExportService with repositories streaming fixed records."""
+    service = ExportService()
+    service.debt_repo = MagicMock(iter_by_user=stream(DEBT))
+    service.payment_repo = MagicMock(iter_by_user=stream(PAYMENT))
+    service.audit_repo = MagicMock(iter_by_user=stream(AUDIT))
+    return service
+
+
+@pytest.fixture
+def mock_pool():
+    """Mock read pool with a transactional connection."""
+    mock_conn = AsyncMock()
+    mock_conn.transaction = MagicMock()
+    pool = AsyncMock()
+    pool.acquire = AsyncMock(return_value=mock_conn)
+    pool.release = AsyncMock()
+    return pool
+
+
+async def run_export(export_service, mock_pool, fmt):
+    """Run export and return the archive contents as {name: text}."""
+    with patch('services.export_service.Database.get_read_pool', AsyncMock(return_value=mock_pool)), \
+         patch('services.export_service.Database.apply_timeout', AsyncMock()):
+        with await export_service.export(100, fmt) as archive:
+            with zipfile.ZipFile(archive) as zf:
+                return {name: zf.read(name).decode('utf-8-sig') for name in zf.namelist()}
+
+
+@pytest.mark.asyncio
+async def test_export_csv(export_service, mock_pool):
+    """Test CSV export writes one file per model with dataclass columns."""
+    files = await run_export(export_service, mock_pool, FORMAT_CSV)
+
+    assert sorted(files) == ['audit_log.csv', 'debts.csv', 'payments.csv']
+    debts = list(csv.DictReader(io.StringIO(files['debts.csv'])))
+    assert debts[0]['name'] == "Кредит"
+    assert debts[0]['principal_amount'] == "10000.00"
+    audit = list(csv.DictReader(io.StringIO(files['audit_log.csv'])))
+    assert json.loads(audit[0]['after']) == {"amount": "1000.00"}
+    mock_pool.release.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_export_jsonl(export_service, mock_pool):
+    """Test JSONL export serializes dates, decimals and nested JSON."""
+    files = await run_export(export_service, mock_pool, FORMAT_JSONL)
+
+    payment = json.loads(files['payments.jsonl'].splitlines()[0])
+    assert payment['payment_date'] == "2024-01-15"
+    assert payment['amount'] == "1000.00"
+    audit = json.loads(files['audit_log.jsonl'].splitlines()[0])
+    assert audit['after'] == {"amount": "1000.00"}
+
+
+@pytest.mark.asyncio
+async def test_export_unknown_format(export_service):
+    """Test unsupported format is rejected."""
+    with pytest.raises(ValueError):
+        await export_service.export(100, 'xml')
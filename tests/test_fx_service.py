@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for FxService and the offline FX rate file reader.
+"""
+import io
+import pytest
+from decimal import Decimal
+from datetime import date
+from unittest.mock import AsyncMock
+
+from services import fx_service
+from services.fx_service import FxService, read_fx_rates
+
+TODAY = date(2024, 3, 20)
+
+
+@pytest.fixture
+def service():
+    """Create FxService with a mocked repository and an empty rate cache."""
+    fx_service.clear_fx_cache()
+    service = FxService()
+    service.fx_repo = AsyncMock()
+    return service
+
+
+def test_read_fx_rates_skips_header_and_comments():
+    """Header and comment lines are ignored; codes are upper-cased and decimal commas accepted."""
+    lines = io.StringIO("date,base,quote,rate\n# ЦБ\n2024-03-20,usd,rub,\"92,5\"\n")
+    
+    assert list(read_fx_rates(lines)) == [("USD", "RUB", TODAY, Decimal("92.5"))]
+
+
+def test_read_fx_rates_reports_bad_line():
+    """A broken row is reported with its line number."""
+    with pytest.raises(ValueError, match="Строка 2"):
+        list(read_fx_rates(io.StringIO("2024-03-20,USD,RUB,92.5\n2024-03-20,USD,RUB,0\n")))
+
+
+@pytest.mark.asyncio
+async def test_rates_fetched_once_and_cached(service):
+    """Missing rates come from one query (inverse pairs included) and are then served from the cache."""
+    service.fx_repo.get_latest.return_value = {
+        ("USD", "RUB"): Decimal("92.5"),
+        ("RUB", "KZT"): Decimal("5"),
+    }
+    
+    first = await service.get_rates(["USD", "KZT", "EUR", "RUB"], "RUB", TODAY)
+    second = await service.get_rates(["USD", "KZT", "EUR"], "RUB", TODAY)
+    
+    assert first == {"USD": Decimal("92.5"), "KZT": Decimal("0.2"), "EUR": None, "RUB": Decimal("1")}
+    assert second == {"USD": Decimal("92.5"), "KZT": Decimal("0.2"), "EUR": None}
+    service.fx_repo.get_latest.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_convert_totals_skips_currencies_without_rate(service):
+    """Per-currency totals are converted with one multiplication each; unknown currencies are listed."""
+    service.fx_repo.get_latest.return_value = {("USD", "RUB"): Decimal("92.5")}
+    
+    total = await service.convert_totals(
+        {"RUB": Decimal("1000.00"), "USD": Decimal("10.01"), "EUR": Decimal("5.00")}, "RUB", TODAY
+    )
+    
+    assert total.amount == Decimal("1925.93")
+    assert total.missing == ["EUR"]
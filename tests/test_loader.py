@@ -0,0 +1,43 @@
+"""
+Unit-тесты для пакетной загрузки по ID (BatchLoader).
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from repositories.loader import BatchLoader
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_become_one_batch():
+    """Тест: одновременные загрузки объединяются в один запрос, дубликаты ключей — в один ключ."""
+    batch_fn = AsyncMock(side_effect=lambda ids: {i: f"debt-{i}" for i in ids if i != 3})
+    loader = BatchLoader(batch_fn, name='test', window=0)
+
+    results = await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(3))
+
+    assert results == ["debt-1", "debt-2", "debt-1", None]
+    batch_fn.assert_called_once_with([1, 2, 3])
+
+
+@pytest.mark.asyncio
+async def test_batches_are_split_by_max_size():
+    """Тест: пакет отправляется сразу по достижении максимального размера."""
+    batch_fn = AsyncMock(side_effect=lambda ids: {i: i for i in ids})
+    loader = BatchLoader(batch_fn, name='test', window=0, max_batch_size=2)
+
+    results = await asyncio.gather(*(loader.load(i) for i in range(5)))
+
+    assert results == [0, 1, 2, 3, 4]
+    assert [call.args[0] for call in batch_fn.call_args_list] == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.asyncio
+async def test_batch_error_reaches_every_caller():
+    """Тест: ошибка пакетного запроса передаётся всем ожидающим."""
+    batch_fn = AsyncMock(side_effect=RuntimeError("db down"))
+    loader = BatchLoader(batch_fn, name='test', window=0)
+
+    results = await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    batch_fn.assert_called_once()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for audit_log partition maintenance.
+"""
+import pytest
+from datetime import date
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from maintenance import maintain_audit_partitions
+from dates import add_months
+from repositories.audit_partition_repository import parse_partition_name, partition_name
+
+
+def test_month_helpers():
+    """Test month arithmetic across year boundaries and partition names."""
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert partition_name(date(2024, 3, 1)) == "audit_log_2024_03"
+    assert parse_partition_name("audit_log_2024_03") == date(2024, 3, 1)
+    assert parse_partition_name("audit_log_default") is None
+
+
+@pytest.fixture
+def repo():
+    """Mock partition repository."""
+    repo = MagicMock()
+    repo.create_partition = AsyncMock(return_value=True)
+    repo.list_partitions = AsyncMock(return_value=[date(2023, 12, 1), date(2024, 1, 1), date(2024, 5, 1)])
+    repo.detach_partition = AsyncMock(side_effect=lambda month, conn: partition_name(month))
+    repo.archive_table = AsyncMock()
+    return repo
+
+
+@pytest.mark.asyncio
+async def test_creates_future_partitions_and_keeps_history(repo):
+    """Test future partitions are created and nothing is detached without retention."""
+    with patch('maintenance.AuditPartitionRepository', return_value=repo):
+        await maintain_audit_partitions(
+            AsyncMock(), months_ahead=2, retention_months=0, archive_dir=None, today=date(2024, 5, 20)
+        )
+
+    created = [call.args[0] for call in repo.create_partition.call_args_list]
+    assert created == [date(2024, 5, 1), date(2024, 6, 1), date(2024, 7, 1)]
+    repo.detach_partition.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_detaches_and_archives_old_partitions(repo):
+    """Test partitions older than retention are detached and archived."""
+    with patch('maintenance.AuditPartitionRepository', return_value=repo):
+        await maintain_audit_partitions(
+            AsyncMock(), months_ahead=0, retention_months=4,
+            archive_dir=Path("/tmp/archive"), today=date(2024, 5, 20)
+        )
+
+    detached = [call.args[0] for call in repo.detach_partition.call_args_list]
+    assert detached == [date(2023, 12, 1)]
+    assert repo.archive_table.call_args.args[0] == "audit_log_2023_12"
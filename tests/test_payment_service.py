@@ -65,6 +65,8 @@ class TestAddPayment:
         payment_service.debt_repo.get_by_id = AsyncMock(return_value=sample_debt)
         payment_service.payment_repo.create = AsyncMock(return_value=sample_payment)
         payment_service.audit_service.log_create = AsyncMock()
+        payment_service.plan_service.refresh = AsyncMock()
+        payment_service.summary_service.refresh = AsyncMock()
         
         # Mock database pool
         mock_conn = AsyncMock()
@@ -88,6 +90,8 @@ class TestAddPayment:
         payment_service.debt_repo.get_by_id.assert_called_once_with(1)
         payment_service.payment_repo.create.assert_called_once()
         payment_service.audit_service.log_create.assert_called_once()
+        payment_service.plan_service.refresh.assert_called_once_with(1, mock_conn)
+        payment_service.summary_service.refresh.assert_called_once_with([100, 200], mock_conn)
     
     @pytest.mark.asyncio
     async def test_add_payment_no_access(self, payment_service):
@@ -175,6 +179,68 @@ class TestAddPayment:
                 payment_date=date(2024, 1, 15),
                 user_id=100
             )
+    
+    @pytest.mark.asyncio
+    async def test_add_payment_repeated_key_returns_existing(self, payment_service, sample_payment):
+        """Test repeated submission with the same idempotency key returns the original payment."""
+        payment_service.debt_repo.check_access = AsyncMock(return_value=True)
+        payment_service.debt_repo.get_by_id = AsyncMock()
+        payment_service.payment_repo.get_by_idempotency_key = AsyncMock(return_value=sample_payment)
+        payment_service.payment_repo.create = AsyncMock()
+        
+        result = await payment_service.add_payment(
+            debt_id=1,
+            amount=Decimal("1000.00"),
+            payment_date=date(2024, 1, 15),
+            user_id=100,
+            idempotency_key="tg:100:abc"
+        )
+        
+        assert result == sample_payment
+        payment_service.payment_repo.create.assert_not_called()
+        payment_service.debt_repo.get_by_id.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_add_payment_concurrent_duplicate_skips_audit(self, payment_service, sample_debt, sample_payment):
+        """Test insert conflict on the idempotency key returns the stored payment without audit."""
+        payment_service.debt_repo.check_access = AsyncMock(return_value=True)
+        payment_service.debt_repo.get_by_id = AsyncMock(return_value=sample_debt)
+        payment_service.payment_repo.get_by_idempotency_key = AsyncMock(side_effect=[None, sample_payment])
+        payment_service.payment_repo.create = AsyncMock(return_value=None)
+        payment_service.audit_service.log_create = AsyncMock()
+        
+        mock_conn = AsyncMock()
+        mock_pool = AsyncMock()
+        mock_pool.acquire = AsyncMock(return_value=mock_conn)
+        mock_pool.release = AsyncMock()
+        mock_conn.transaction = MagicMock()
+        
+        with patch('services.payment_service.Database.get_pool', return_value=mock_pool):
+            result = await payment_service.add_payment(
+                debt_id=1,
+                amount=Decimal("1000.00"),
+                payment_date=date(2024, 1, 15),
+                user_id=100,
+                idempotency_key="tg:100:abc"
+            )
+        
+        assert result == sample_payment
+        payment_service.audit_service.log_create.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_add_payment_key_reused_for_other_debt(self, payment_service, sample_payment):
+        """Test idempotency key already bound to another debt is rejected."""
+        payment_service.debt_repo.check_access = AsyncMock(return_value=True)
+        payment_service.payment_repo.get_by_idempotency_key = AsyncMock(return_value=sample_payment)
+        
+        with pytest.raises(ValueError, match="другого долга"):
+            await payment_service.add_payment(
+                debt_id=2,
+                amount=Decimal("1000.00"),
+                payment_date=date(2024, 1, 15),
+                user_id=100,
+                idempotency_key="tg:100:abc"
+            )
 
 
 class TestDeletePayment:
@@ -192,6 +258,7 @@ class TestDeletePayment:
         )
         payment_service.payment_repo.soft_delete = AsyncMock(return_value=deleted_payment)
         payment_service.audit_service.log_delete = AsyncMock()
+        payment_service.plan_service.refresh = AsyncMock()
         
         # Mock database pool
         mock_conn = AsyncMock()
@@ -211,6 +278,7 @@ class TestDeletePayment:
         assert result == deleted_payment
         payment_service.payment_repo.soft_delete.assert_called_once()
         payment_service.audit_service.log_delete.assert_called_once()
+        payment_service.plan_service.refresh.assert_called_once_with(sample_payment.debt_id, mock_conn)
     
     @pytest.mark.asyncio
     async def test_delete_payment_not_found(self, payment_service):
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for PaymentPlanService.
+"""
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+from services.plan_service import PaymentPlanService, NO_EXPIRY
+from models.debt import Debt
+from models.payment_plan import PlannedPayment
+
+CREATED = datetime(2024, 1, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def make_debt(**overrides) -> Debt:
+    """Create debt for testing."""
+    data = dict(
+        id=1, debtor_user_id=100, creditor_user_id=200, name="Кредит",
+        principal_amount=Decimal("10000.00"), currency="RUB",
+        monthly_payment=Decimal("1000.00"), due_day=15, status="active",
+        closed_at=None, close_note=None, created_at=CREATED, updated_at=CREATED,
+    )
+    data.update(overrides)
+    return Debt(**data)
+
+
+@pytest.fixture
+def plan_service():
+    """Create PaymentPlanService with mocked repositories."""
+    service = PaymentPlanService()
+    service.plan_repo = AsyncMock()
+    service.debt_repo = AsyncMock()
+    service.payment_repo = AsyncMock()
+    service.summary_service = AsyncMock()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_refresh_stores_plan_valid_until_first_payment(plan_service):
+    """Refresh locks the plan, rebuilds it from the current balance and stores it."""
+    conn = AsyncMock()
+    plan_service.debt_repo.get_by_id.return_value = make_debt()
+    plan_service.payment_repo.calculate_balance.return_value = Decimal("2500.00")
+    
+    items = await plan_service.refresh(1, conn)
+    
+    plan_service.plan_repo.lock.assert_called_once_with(1, conn)
+    args, kwargs = plan_service.plan_repo.replace.call_args
+    records = args[1]
+    assert [record[1] for record in records] == [Decimal("1000.00"), Decimal("1000.00"), Decimal("500.00")]
+    assert [record[4] for record in records] == [False, False, True]
+    assert kwargs['valid_until'] == items[0].payment_date
+    assert kwargs['conn'] is conn
+
+
+@pytest.mark.asyncio
+async def test_refresh_closed_debt_stores_empty_plan(plan_service):
+    """A closed debt gets an empty plan that never expires."""
+    plan_service.debt_repo.get_by_id.return_value = make_debt(status="closed")
+    plan_service.payment_repo.calculate_balance.return_value = Decimal("2500.00")
+    
+    assert await plan_service.refresh(1, AsyncMock()) == []
+    assert plan_service.plan_repo.replace.call_args.kwargs['valid_until'] == NO_EXPIRY
+
+
+@pytest.mark.asyncio
+async def test_get_plan_reads_fresh_plan_without_rebuilding(plan_service):
+    """A plan valid today is served from storage."""
+    stored = PlannedPayment(
+        debt_id=1, seq=1, payment_date=date(2024, 3, 15), amount=Decimal("500.00"),
+        principal=None, interest=None, is_final=True,
+    )
+    plan_service.plan_repo.get_by_debt.return_value = (date(2024, 3, 15), [stored])
+    
+    with patch('services.plan_service.Database.run_transaction') as run_transaction:
+        items = await plan_service.get_plan(1, today=date(2024, 3, 15))
+    
+    run_transaction.assert_not_called()
+    assert [(item.payment_date, item.amount, item.is_final) for item in items] == [
+        (date(2024, 3, 15), Decimal("500.00"), True)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_plan_rebuilds_stale_plan(plan_service):
+    """A plan whose first payment has passed is rebuilt in a transaction."""
+    plan_service.plan_repo.get_by_debt.return_value = (date(2024, 3, 15), [])
+    
+    with patch('services.plan_service.Database.run_transaction', AsyncMock(return_value=[])) as run_transaction:
+        await plan_service.get_plan(1, today=date(2024, 3, 16))
+    
+    assert run_transaction.call_args.kwargs['name'] == 'plan.refresh'
+
+
+@pytest.mark.asyncio
+async def test_refresh_stale_builds_plans_from_given_date(plan_service):
+    """Plans are rebuilt as of the maintenance date, so they stop being stale for it."""
+    today = date(2030, 6, 20)
+    stored = {}
+    
+    async def get_stale_debt_ids(on_date, limit, conn):
+        assert plan_service.plan_repo.get_stale_debt_ids.call_count <= 2, "stale plan selected again"
+        return [1] if stored.get('valid_until', date.min) < on_date else []
+    
+    async def replace(debt_id, records, valid_until, conn):
+        stored['valid_until'] = valid_until
+    
+    plan_service.plan_repo.get_stale_debt_ids.side_effect = get_stale_debt_ids
+    plan_service.plan_repo.replace.side_effect = replace
+    plan_service.debt_repo.get_by_id.return_value = make_debt()
+    plan_service.debt_repo.get_by_ids.return_value = {1: make_debt()}
+    plan_service.payment_repo.calculate_balance.return_value = Decimal("2500.00")
+    conn = AsyncMock()
+    conn.transaction = lambda: AsyncMock()
+    
+    assert await plan_service.refresh_stale(conn, today=today) == 1
+    assert stored['valid_until'] == date(2030, 7, 15)
+    plan_service.summary_service.refresh.assert_called_once_with([100, 200], conn, today)
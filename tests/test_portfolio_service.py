@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for PortfolioService.
+"""
+import time
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timezone
+
+from services.portfolio_service import (
+    PortfolioService,
+    STRATEGY_AVALANCHE,
+    STRATEGY_SNOWBALL,
+    STRATEGY_CUSTOM,
+    simulate,
+)
+from models.debt import Debt
+from services.amortization import rate_units
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+START = date(2024, 2, 1)
+
+
+def make_debt(debt_id, monthly_payment, due_day=10, currency="RUB"):
+    """Build an active debt."""
+    return Debt(
+        id=debt_id, debtor_user_id=100, creditor_user_id=None, name=f"Долг {debt_id}",
+        principal_amount=Decimal("100000.00"), currency=currency,
+        monthly_payment=monthly_payment, due_day=due_day, status="active",
+        closed_at=None, close_note=None, created_at=NOW, updated_at=NOW,
+    )
+
+
+DEBTS = [
+    (make_debt(1, Decimal("1000.00")), Decimal("3000.00")),
+    (make_debt(2, Decimal("2000.00"), due_day=31), Decimal("10000.00")),
+]
+
+
+def test_simulate_rolls_over_freed_payment():
+    """Once a debt is repaid its payment goes to the next debt."""
+    months, totals, payoff = simulate(balances=[300, 1000], minimums=[100, 200], order=[0, 1], budget=400)
+    
+    assert months[0] == [200, 200]
+    assert months[1] == [100, 300]
+    assert sum(sum(month) for month in months) == 1300
+    assert months[-1][1] > 0 and all(month[0] == 0 for month in months[2:])
+    assert payoff == [1, len(months) - 1]
+    assert totals[0] == 900 and totals[-1] == 0
+
+
+def test_simulate_minimums_stay_within_budget_after_interest():
+    """Interest can push the minimum above the budget; the month is capped at the budget."""
+    months, totals, payoff = simulate(
+        balances=[100000], minimums=[200000], order=[0], budget=100000, rates=[rate_units(Decimal("12"))]
+    )
+    
+    assert all(sum(month) <= 100000 for month in months)
+    assert months[0] == [100000]
+    assert totals[0] == 1000
+    assert payoff == [1]
+
+
+def test_snowball_pays_smallest_first():
+    """Snowball directs the extra budget to the smallest balance."""
+    plan = PortfolioService().plan(DEBTS, Decimal("4000.00"), STRATEGY_SNOWBALL, start=START)
+    
+    assert plan.months[0].payments == {1: Decimal("2000.00"), 2: Decimal("2000.00")}
+    assert plan.payoff_dates[1] == date(2024, 3, 10)
+    # 02.2024 has 29 days: due_day 31 moves to the last day of the month
+    assert plan.payoff_dates[2] == date(2024, 5, 31)
+    assert plan.is_complete
+    assert plan.total_paid == Decimal("13000.00")
+    assert plan.months[-1].remaining == Decimal("0")
+
+
+def test_avalanche_and_custom_order():
+    """Avalanche targets the largest balance; custom follows the user's order."""
+    service = PortfolioService()
+    plans = service.compare(DEBTS, Decimal("4000.00"), priority=[2, 1])
+    
+    assert set(plans) == {STRATEGY_AVALANCHE, STRATEGY_SNOWBALL, STRATEGY_CUSTOM}
+    assert plans[STRATEGY_AVALANCHE].months[0].payments[2] == Decimal("3000.00")
+    assert plans[STRATEGY_CUSTOM].months[0].payments == plans[STRATEGY_AVALANCHE].months[0].payments
+
+
+def test_plan_rejects_budget_below_minimums():
+    """The budget must cover every monthly payment."""
+    with pytest.raises(ValueError):
+        PortfolioService().plan(DEBTS, Decimal("2500.00"), STRATEGY_SNOWBALL)
+
+
+def test_plan_rejects_mixed_currencies():
+    """Debts in different currencies cannot share one budget."""
+    debts = DEBTS + [(make_debt(3, None, currency="USD"), Decimal("100.00"))]
+    
+    with pytest.raises(ValueError):
+        PortfolioService().plan(debts, Decimal("5000.00"), STRATEGY_SNOWBALL)
+
+
+def test_compare_is_fast_for_many_debts():
+    """Several strategies over a 30-year horizon for dozens of debts stay well under a second."""
+    debts = [(make_debt(i, Decimal("100.00")), Decimal("50000.00") + i) for i in range(1, 51)]
+    
+    started = time.perf_counter()
+    plans = PortfolioService().compare(debts, Decimal("6000.00"), priority=[debt.id for debt, _ in debts])
+    elapsed = time.perf_counter() - started
+    
+    assert all(len(plan.months) <= 360 for plan in plans.values())
+    assert elapsed < 1
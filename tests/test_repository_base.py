@@ -0,0 +1,79 @@
+"""
+Unit-тесты для объединения одновременных чтений (singleflight).
+"""
+import asyncio
+import pytest
+from database import Database
+from repositories.base import singleflight
+
+
+class FakeRepository:
+    """Репозиторий-заглушка, считающий обращения к «БД»."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    @singleflight
+    async def get_by_id(self, entity_id: int, conn=None):
+        self.calls += 1
+        await self.release.wait()
+        return {'id': entity_id}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_reads_share_one_query():
+    """Тест: одновременные чтения с одинаковыми аргументами выполняют один запрос."""
+    repo = FakeRepository()
+
+    tasks = [asyncio.ensure_future(repo.get_by_id(1)) for _ in range(3)]
+    other = asyncio.ensure_future(repo.get_by_id(2))
+    await asyncio.sleep(0)
+    repo.release.set()
+    results = await asyncio.gather(*tasks, other)
+
+    assert repo.calls == 2
+    assert results[:3] == [{'id': 1}] * 3
+    assert results[3] == {'id': 2}
+
+
+@pytest.mark.asyncio
+async def test_reads_with_connection_are_not_coalesced():
+    """Тест: чтения внутри транзакции (с conn) выполняются отдельно."""
+    repo = FakeRepository()
+    repo.release.set()
+
+    await asyncio.gather(repo.get_by_id(1, conn=object()), repo.get_by_id(1, object()))
+
+    assert repo.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_read_after_write_does_not_join_earlier_read():
+    """Тест: чтение после записи не получает результат запроса, начатого до неё."""
+    repo = FakeRepository()
+
+    before_write = asyncio.ensure_future(repo.get_by_id(1))
+    await asyncio.sleep(0)
+    Database.mark_write()
+    after_write = asyncio.ensure_future(repo.get_by_id(1))
+    await asyncio.sleep(0)
+    repo.release.set()
+    await asyncio.gather(before_write, after_write)
+
+    assert repo.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_read():
+    """Тест: отмена одного ожидающего не прерывает чтение для остальных."""
+    repo = FakeRepository()
+
+    first = asyncio.ensure_future(repo.get_by_id(1))
+    second = asyncio.ensure_future(repo.get_by_id(1))
+    await asyncio.sleep(0)
+    first.cancel()
+    repo.release.set()
+
+    assert await second == {'id': 1}
+    assert repo.calls == 1
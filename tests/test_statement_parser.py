@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for bank statement parsing.
+"""
+import io
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from services.statement_parser import (
+    FORMAT_1C,
+    FORMAT_CSV,
+    FORMAT_OFX,
+    StatementParser,
+    open_statement,
+    parse_amount,
+)
+
+TODAY = date(2024, 12, 31)
+
+
+def parse(content: bytes, filename: str = None):
+    """Parse statement bytes and return (parser, payments)."""
+    parser = StatementParser(open_statement(io.BytesIO(content)), filename=filename, today=TODAY)
+    return parser, [(p.payment_date, p.amount) for p in parser]
+
+
+def test_parse_amount_formats():
+    """Test amounts with different separators and signs."""
+    assert parse_amount("1 000,50") == Decimal("1000.50")
+    assert parse_amount("-1000.5") == Decimal("-1000.50")
+    assert parse_amount("1,000.50") == Decimal("1000.50")
+    assert parse_amount("abc") is None
+
+
+def test_csv_with_header_and_errors():
+    """Test CSV with Russian header, semicolon delimiter, a broken row and an incoming transfer."""
+    content = (
+        "Дата;Описание;Сумма\n"
+        "15.01.2024;Платёж по кредиту;-1 000,00\n"
+        "\n"
+        "15.02.2024;Платёж по кредиту;-1000,00\n"
+        "31.02.2024;Ошибка;-1000\n"
+        "15.01.2030;Будущее;-1000\n"
+        "20.02.2024;Зарплата;50000,00\n"
+    ).encode('utf-8')
+
+    parser, payments = parse(content)
+
+    assert parser.format == FORMAT_CSV
+    assert payments == [
+        (date(2024, 1, 15), Decimal("1000.00")),
+        (date(2024, 2, 15), Decimal("1000.00")),
+    ]
+    assert parser.error_count == 3
+    assert parser.errors[0][0] == 5
+    assert parser.errors[2] == (7, "поступление на счёт, а не платёж")
+
+
+def test_csv_without_header_in_cp1251():
+    """Test headerless CSV saved in Windows-1251."""
+    content = "2024-03-15,-500.00,Перевод\n2024-04-15,-500.00,Перевод\n".encode('cp1251')
+
+    parser, payments = parse(content)
+
+    assert payments == [(date(2024, 3, 15), Decimal("500.00")), (date(2024, 4, 15), Decimal("500.00"))]
+
+
+def test_ofx_sgml():
+    """Test OFX statement transactions: debits are imported, credits are skipped."""
+    content = (
+        "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+        "<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20240115120000[+3:MSK]\n<TRNAMT>-1500.00\n</STMTTRN>\n"
+        "<STMTTRN><DTPOSTED>20240215<TRNAMT>-1500.00</STMTTRN>\n"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240315<TRNAMT>1500.00</STMTTRN>\n"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240320<TRNAMT>30000.00</STMTTRN>\n"
+        "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+    ).encode('ascii')
+
+    parser, payments = parse(content)
+
+    assert parser.format == FORMAT_OFX
+    assert payments == [
+        (date(2024, 1, 15), Decimal("1500.00")),
+        (date(2024, 2, 15), Decimal("1500.00")),
+        (date(2024, 3, 15), Decimal("1500.00")),
+    ]
+    assert parser.error_count == 1
+
+
+def test_1c_client_bank_exchange():
+    """Test 1C client-bank export: only documents paid from the statement account are imported."""
+    own, other = "40817810000000000001", "40702810000000000002"
+    content = (
+        "1CClientBankExchange\nВерсияФормата=1.03\nКодировка=Windows\n"
+        f"СекцияРасчСчет\nРасчСчет={own}\nКонецРасчСчет\n"
+        "СекцияДокумент=Платежное поручение\nНомер=1\nДата=15.01.2024\nСумма=2500.00\n"
+        f"ПлательщикСчет={own}\nПолучательСчет={other}\nКонецДокумента\n"
+        "СекцияДокумент=Платежное поручение\nНомер=2\nДата=15.02.2024\nСумма=2500.00\n"
+        f"ПлательщикСчет={own}\nПолучательСчет={other}\nКонецДокумента\n"
+        "СекцияДокумент=Платежное поручение\nНомер=3\nДата=20.02.2024\nСумма=50000.00\n"
+        f"ПлательщикСчет={other}\nПолучательСчет={own}\nКонецДокумента\n"
+        "КонецФайла\n"
+    ).encode('cp1251')
+
+    parser, payments = parse(content)
+
+    assert parser.format == FORMAT_1C
+    assert payments == [(date(2024, 1, 15), Decimal("2500.00")), (date(2024, 2, 15), Decimal("2500.00"))]
+    assert parser.errors == [(21, "поступление на счёт, а не платёж")]
+
+
+def test_max_rows_limit():
+    """Test statement with too many payments is rejected."""
+    content = "".join(f"2024-01-{day:02d};-100\n" for day in range(1, 11)).encode('utf-8')
+    parser = StatementParser(open_statement(io.BytesIO(content)), max_rows=5, today=TODAY)
+
+    with pytest.raises(ValueError, match="больше 5 платежей"):
+        list(parser)
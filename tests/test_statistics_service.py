@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the nightly statistics pipeline.
+"""
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from models.debt import Debt
+from services.statistics_service import StatisticsService, installment_timeliness
+
+CREATED = datetime(2024, 1, 10, 12, 0, tzinfo=timezone.utc)
+TODAY = date(2024, 4, 1)
+
+
+def make_row(debt_id: int, debtor_user_id: int, payment_date=None, amount=None) -> dict:
+    """Create a cursor row (debt columns plus one payment) for testing."""
+    return dict(
+        id=debt_id, debtor_user_id=debtor_user_id, creditor_user_id=200, name=f"Долг {debt_id}",
+        principal_amount=Decimal("3000.00"), currency="RUB",
+        monthly_payment=Decimal("1000.00"), due_day=15, status="active",
+        closed_at=None, close_note=None, created_at=CREATED, updated_at=CREATED,
+        payment_date=payment_date, payment_amount=amount,
+    )
+
+
+def test_installment_timeliness_counts_delays():
+    """Installments are covered by payments in order; unpaid ones are late until today."""
+    debt = Debt.from_row(make_row(1, 100))
+    payments = [(date(2024, 1, 14), 100000), (date(2024, 2, 20), 100000)]
+    
+    assert installment_timeliness(debt, payments, TODAY) == (3, 1, 5 + 17)
+
+
+def test_installment_timeliness_prepayment_covers_later_installments():
+    """One large payment before the first due date makes every installment on time."""
+    debt = Debt.from_row(make_row(1, 100))
+    
+    assert installment_timeliness(debt, [(date(2024, 1, 12), 300000)], TODAY) == (3, 3, 0)
+
+
+@pytest.mark.asyncio
+async def test_run_streams_debtors_and_copies_in_batches():
+    """Rows are grouped per debtor, user rows go out via COPY and the global row is saved once."""
+    rows = [
+        make_row(1, 100, date(2024, 1, 14), Decimal("1000.00")),
+        make_row(1, 100, date(2024, 2, 14), Decimal("1000.00")),
+        make_row(2, 100),
+        make_row(3, 101, date(2024, 1, 12), Decimal("3000.00")),
+    ]
+    
+    async def stream(conn, prefetch):
+        for row in rows:
+            yield row
+    
+    service = StatisticsService()
+    service.statistics_repo = AsyncMock()
+    service.statistics_repo.stream_active_debt_payments = stream
+    conn = MagicMock()
+    conn.transaction.return_value.__aenter__ = AsyncMock()
+    conn.transaction.return_value.__aexit__ = AsyncMock(return_value=None)
+    
+    with patch('services.statistics_service.COPY_BATCH_SIZE', 1):
+        totals = await service.run(conn, today=TODAY)
+    
+    assert (totals.users, totals.debts) == (2, 3)
+    assert totals.installments_due == 9
+    assert totals.installments_on_time == 2 + 0 + 3
+    
+    service.statistics_repo.delete_for_date.assert_called_once_with(TODAY, conn)
+    copied = [c.args[0] for c in service.statistics_repo.copy_user_statistics.call_args_list]
+    assert [[record[1] for record in batch] for batch in copied] == [[100], [101]]
+    assert copied[1][0][3] == Decimal("1.0000")
+    service.statistics_repo.save_global_statistics.assert_called_once()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for UserSummaryService.
+"""
+import pytest
+from decimal import Decimal
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+from handlers.start import format_user_summary
+from models.user_summary import UserSummary
+from services.summary_service import UserSummaryService
+
+TODAY = date(2024, 3, 20)
+
+
+def test_summary_from_row_parses_amounts_exactly():
+    """Per-currency totals are stored as strings and read back as Decimal."""
+    summary = UserSummary.from_row({
+        'user_id': 1, 'debtor_active': 2, 'debtor_outstanding': '{"RUB": "15000.10", "USD": "99.99"}',
+        'debtor_next_due': date(2024, 4, 15), 'creditor_active': 0, 'creditor_outstanding': '{}',
+        'creditor_next_due': None, 'updated_at': None,
+    })
+    
+    assert summary.debtor_outstanding == {"RUB": Decimal("15000.10"), "USD": Decimal("99.99")}
+    assert summary.creditor_outstanding == {}
+
+
+
+def test_format_hides_next_due_that_has_passed():
+    """A summary built before the due date does not show that date afterwards."""
+    summary = UserSummary(
+        user_id=1, debtor_active=1, debtor_outstanding={"RUB": Decimal("5000.00")},
+        debtor_next_due=date(2024, 3, 15), creditor_active=1, creditor_outstanding={"RUB": Decimal("100.00")},
+        creditor_next_due=TODAY,
+    )
+    
+    text = format_user_summary(summary, today=TODAY)
+    
+    assert "15.03.2024" not in text
+    assert "Ближайшее поступление: 20.03.2024" in text
+
+
+@pytest.mark.asyncio
+async def test_refresh_skips_missing_creditor():
+    """A debt without a creditor refreshes only the debtor's summary."""
+    service = UserSummaryService()
+    service.summary_repo = AsyncMock()
+    conn = AsyncMock()
+    
+    await service.refresh([100, None], conn, today=TODAY)
+    
+    service.summary_repo.refresh.assert_called_once_with([100], TODAY, conn)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_all_walks_users_in_batches():
+    """The bulk rebuild pages through users by id, one transaction per batch."""
+    service = UserSummaryService()
+    service.summary_repo = AsyncMock()
+    service.summary_repo.get_user_ids_after.side_effect = [[1, 2], [5], []]
+    conn = MagicMock()
+    conn.transaction.return_value.__aenter__ = AsyncMock()
+    conn.transaction.return_value.__aexit__ = AsyncMock(return_value=None)
+    
+    rebuilt = await service.rebuild_all(conn, today=TODAY)
+    
+    assert rebuilt == 3
+    assert [c.args[0] for c in service.summary_repo.get_user_ids_after.call_args_list] == [0, 2, 5]
+    assert [c.args[0] for c in service.summary_repo.refresh.call_args_list] == [[1, 2], [5]]
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the /test_creditor reassignment path.
+"""
+import pytest
+from decimal import Decimal
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+from handlers import test_creditor
+from models.debt import Debt
+from repositories.debt_repository import DebtVersionConflictError
+
+NOW = datetime(2024, 3, 20, tzinfo=timezone.utc)
+
+
+def make_debt(version: int, creditor_user_id=None) -> Debt:
+    """Create debt for testing."""
+    return Debt(
+        id=1, debtor_user_id=100, creditor_user_id=creditor_user_id, name="Долг",
+        principal_amount=Decimal("1000.00"), currency="RUB", monthly_payment=None, due_day=None,
+        status="active", closed_at=None, close_note=None, created_at=NOW, updated_at=NOW, version=version,
+    )
+
+
+@pytest.mark.asyncio
+async def test_assign_test_creditor_matches_invite_accept():
+    """Reassignment is version-checked, refreshes summaries and drops both creditors' dashboards."""
+    debt_repo = AsyncMock()
+    debt_repo.update.side_effect = [DebtVersionConflictError(), make_debt(3, creditor_user_id=300)]
+    debt_repo.get_fresh.return_value = make_debt(2, creditor_user_id=200)
+    summary_service = AsyncMock()
+    
+    async def run_transaction(body, name):
+        return await body(AsyncMock())
+    
+    with patch.object(test_creditor, 'DebtRepository', return_value=debt_repo), \
+            patch.object(test_creditor, 'AuditService', return_value=AsyncMock()), \
+            patch.object(test_creditor, 'UserSummaryService', return_value=summary_service), \
+            patch.object(test_creditor, 'invalidate_creditor_dashboard') as invalidate, \
+            patch.object(test_creditor.Database, 'run_transaction', side_effect=run_transaction):
+        updated = await test_creditor.assign_test_creditor(make_debt(1), 300)
+    
+    assert updated.creditor_user_id == 300
+    assert [c.kwargs['expected_version'] for c in debt_repo.update.call_args_list] == [1, 2]
+    summary_service.refresh.assert_called_once()
+    assert summary_service.refresh.call_args.args[0] == [100, 200, 300]
+    assert [c.args[0] for c in invalidate.call_args_list] == [200, 300]
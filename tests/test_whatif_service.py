@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for WhatIfService and PlannerService.get_payoff_summary.
+"""
+import pytest
+from decimal import Decimal
+from datetime import date, datetime, timezone
+
+from services.planner_service import PlannerService
+from services.whatif_service import WhatIfService, Scenario, SCENARIO_CURRENT
+from models.debt import Debt
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+TODAY = date(2024, 1, 20)
+
+
+def make_debt(monthly_payment=Decimal("1000.00"), due_day=15):
+    """Build an active debt."""
+    return Debt(
+        id=1, debtor_user_id=100, creditor_user_id=None, name="Кредит",
+        principal_amount=Decimal("10000.00"), currency="RUB",
+        monthly_payment=monthly_payment, due_day=due_day, status="active",
+        closed_at=None, close_note=None, created_at=NOW, updated_at=NOW,
+    )
+
+
+@pytest.mark.parametrize("balance", [Decimal("500.00"), Decimal("1000.00"), Decimal("4500.50"), Decimal("5000.00")])
+def test_payoff_summary_counts_installments(balance):
+    """The closed form gives the payoff date, count and final payment of the plan."""
+    payoff_date, count, final, interest = PlannerService().get_payoff_summary(
+        balance, Decimal("1000.00"), 31, today=TODAY
+    )
+    
+    expected_count = -(-int(balance * 100) // 100000)
+    assert count == expected_count
+    assert interest == Decimal("0")
+    assert final == balance - (expected_count - 1) * Decimal("1000.00")
+    assert payoff_date == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31),
+                           date(2024, 4, 30), date(2024, 5, 31)][count - 1]
+
+
+def test_payoff_summary_applies_extra_payment_with_first_installment():
+    """A one-off extra payment shortens the plan from the first due date."""
+    payoff_date, count, final, _ = PlannerService().get_payoff_summary(
+        Decimal("5000.00"), Decimal("1000.00"), 15, extra_payment=Decimal("2500.00"), today=TODAY
+    )
+    
+    assert (payoff_date, count, final) == (date(2024, 4, 15), 3, Decimal("500.00"))
+
+
+def test_evaluate_reports_deltas_against_current_plan():
+    """Every scenario is compared with the current plan."""
+    service = WhatIfService()
+    debt = make_debt()
+    
+    results = service.evaluate(debt, Decimal("5000.00"), service.default_scenarios(debt), today=TODAY)
+    
+    assert results[SCENARIO_CURRENT].months_delta == 0
+    assert results[SCENARIO_CURRENT].installments == 5
+    assert results["double"].installments == 3
+    assert results["double"].installments_delta == -2
+    assert results["double"].final_payment_delta == Decimal("0.00")
+    assert results["extra1"].payoff_date == date(2024, 5, 15)
+    assert results["extra1"].months_delta == -1
+
+
+def test_evaluate_requires_plan_conditions():
+    """Debts without a monthly payment cannot be simulated."""
+    with pytest.raises(ValueError):
+        WhatIfService().evaluate(make_debt(monthly_payment=None), Decimal("100"), [Scenario("x", "x")])